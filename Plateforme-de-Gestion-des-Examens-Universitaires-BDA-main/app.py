@@ -8,6 +8,8 @@ from pathlib import Path
 import sys
 from datetime import datetime
 
+from backend.export import exporter
+
 # Chemin de la base de données SQLite
 DB_PATH = Path("examens.db")
 
@@ -290,13 +292,20 @@ def show_exam_management():
                         "text/csv"
                     )
                 with col2:
-                    excel = df.to_excel(index=False, engine='openpyxl')
-                    st.download_button(
-                        "📥 Télécharger Excel",
-                        excel,
-                        "examens.xlsx",
-                        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                    )
+                    if exporter.excel_available:
+                        # Écriture Excel ligne à ligne (openpyxl write_only)
+                        excel = exporter.write_rows(
+                            list(df.columns), df.itertuples(index=False, name=None),
+                            fmt='xlsx', basename='examens', sheet_name='Examens'
+                        )
+                        st.download_button(
+                            "📥 Télécharger Excel",
+                            excel.read(),
+                            excel.filename,
+                            excel.mime
+                        )
+                    else:
+                        st.info("💡 Installez openpyxl pour l'export Excel")
             else:
                 st.info("Aucun examen programmé")
                 
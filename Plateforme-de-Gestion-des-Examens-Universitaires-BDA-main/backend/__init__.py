@@ -6,12 +6,28 @@ Ce package contient tous les modules nécessaires pour :
 - La détection de conflits
 - La génération d'emplois du temps
 - L'optimisation des performances
+- L'instrumentation des requêtes (durées, requêtes lentes)
+- Les migrations versionnées du schéma
 
 Modules:
+    async_db: Requêtes parallèles des tableaux de bord (aiomysql)
+    convocations: Convocations et feuilles de surveillance PDF en lot
     db_connection: Gestion de la connexion MySQL
     detect_conflicts: Détection automatique des conflits
+    domains: Domaines des examens à planifier (forward checking)
+    export: Export CSV / Excel en flux (gzip optionnel)
     generate_edt: Génération optimale des emplois du temps
+    ical: Calendriers .ics des étudiants et professeurs (ETag, cache)
+    jobs: File des générations en arrière-plan (progression, annulation)
+    migrations: Application des migrations database/migrations
     optimization: Optimisation des requêtes et performances
+    partitions: Partitions par année académique (création, archivage)
+    query_stats: Trace des requêtes SQL et histogrammes par forme
+    resilience: Reprises sur erreur, backoff et disjoncteur MySQL
+    simulation: Simulations what-if du générateur, sans écriture
+    staffing: Encadrement des examens (assistants, flot de coût minimum)
+    staging: Plans générés en staging, validation et publication atomique
+    time_grid: Grille horaire de 15 min et occupation en intervalles (bitmaps)
 
 Usage:
     from backend.db_connection import db
@@ -23,10 +39,24 @@ Usage:
 __version__ = '1.0.0'
 __author__ = 'Projet BDA - Université'
 __all__ = [
+    'async_db',
+    'convocations',
     'db_connection',
     'detect_conflicts', 
+    'domains',
+    'export',
     'generate_edt',
-    'optimization'
+    'ical',
+    'jobs',
+    'migrations',
+    'optimization',
+    'partitions',
+    'query_stats',
+    'resilience',
+    'simulation',
+    'staffing',
+    'staging',
+    'time_grid'
 ]
 
 # Import des modules principaux pour faciliter l'accès
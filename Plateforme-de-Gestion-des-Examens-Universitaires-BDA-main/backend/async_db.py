@@ -0,0 +1,214 @@
+"""
+Module d'accès asynchrone à la base de données (aiomysql)
+⚡ Requêtes indépendantes des tableaux de bord exécutées en parallèle
+🔁 Pool de connexions propre, boucle asyncio dans un thread dédié
+🛟 Repli séquentiel sur db.execute_query si aiomysql n'est pas installé
+
+Usage:
+    from backend.async_db import async_db
+
+    resultats = async_db.run_concurrently({
+        'kpis': ("SELECT COUNT(*) as nb FROM examens WHERE annee_academique = %s", ('2024-2025',)),
+        'salles': ("SELECT * FROM salles", None),
+    })
+    resultats['kpis']  # liste de dictionnaires (None en cas d'erreur)
+    resultats.timings  # {nom: ms, 'total': ms}, propres à cet appel
+"""
+import asyncio
+import os
+import threading
+import time
+
+from backend.db_connection import ParallelResults, db
+from backend.query_stats import _find_caller
+
+try:
+    import aiomysql
+except ImportError:  # dépendance optionnelle
+    aiomysql = None
+
+
+class AsyncDatabase:
+    """Classe pour exécuter des lots de requêtes SELECT en parallèle"""
+
+    def __init__(self):
+        """Initialiser la couche asynchrone (pool créé au premier appel)"""
+        self.pool_size = int(os.getenv('DB_ASYNC_POOL_SIZE', '8'))
+        self.timeout = float(os.getenv('DB_ASYNC_TIMEOUT', '60'))
+        self._loop = None
+        self._pool = None
+        self._pool_lock = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        """True si le pilote asynchrone est installé"""
+        return aiomysql is not None
+
+    def _ensure_loop(self):
+        """
+        Démarrer la boucle asyncio dans un thread dédié
+
+        Streamlit exécute chaque page dans son propre thread: une boucle unique
+        et persistante permet de garder le pool entre les exécutions.
+        """
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name='async-db', daemon=True).start()
+            return self._loop
+
+    async def _get_pool(self):
+        # Les requêtes d'un lot démarrent ensemble: un seul pool doit être créé
+        if self._pool_lock is None:
+            self._pool_lock = asyncio.Lock()
+        async with self._pool_lock:
+            if self._pool is None:
+                self._pool = await aiomysql.create_pool(
+                    host=db.host,
+                    port=db.port,
+                    user=db.user,
+                    password=db.password,
+                    db=db.database,
+                    minsize=1,
+                    maxsize=self.pool_size,
+                    autocommit=True,
+                    charset='utf8mb4'
+                )
+                print(f"✅ Pool asynchrone MySQL: {db.database} ({self.pool_size} connexions max)")
+        return self._pool
+
+    async def fetch(self, query, params=None, caller=None):
+        """
+        Exécuter une requête SELECT sur une connexion du pool
+
+        Args:
+            query: Requête SQL
+            params: Paramètres de la requête (tuple)
+            caller: Appelant à enregistrer dans les statistiques
+
+        Returns:
+            list: Lignes (dictionnaires), None en cas d'erreur
+        """
+        start = time.perf_counter()
+        rows = 0
+        error = None
+        try:
+            pool = await self._get_pool()
+            async with pool.acquire() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute(query, params)
+                    result = list(await cursor.fetchall())
+                    rows = len(result)
+                    return result
+        except Exception as e:
+            error = str(e)
+            print(f"❌ Erreur lors de l'exécution asynchrone: {e}")
+            print(f"   Requête: {query[:100]}...")
+            return None
+        finally:
+            db.stats.record(query, (time.perf_counter() - start) * 1000, rows=rows, error=error, caller=caller)
+
+    async def gather(self, queries, caller=None, timings=None):
+        """
+        Exécuter un lot de requêtes en parallèle
+
+        Args:
+            queries: {nom: (requête, paramètres)}
+            caller: Appelant à enregistrer dans les statistiques
+            timings: Dictionnaire à remplir avec la durée (ms) de chaque requête
+
+        Returns:
+            dict: {nom: lignes}
+        """
+        timings = {} if timings is None else timings
+
+        async def timed(name, query, params):
+            start = time.perf_counter()
+            result = await self.fetch(query, params, caller)
+            timings[name] = round((time.perf_counter() - start) * 1000, 2)
+            return result
+
+        names = list(queries)
+        results = await asyncio.gather(*(timed(name, *queries[name]) for name in names))
+        return dict(zip(names, results))
+
+    def _run_sequentially(self, queries, timings):
+        """Repli sans aiomysql: une requête après l'autre sur la connexion partagée"""
+        results = {}
+        for name, (query, params) in queries.items():
+            start = time.perf_counter()
+            results[name] = db.execute_query(query, params)
+            timings[name] = round((time.perf_counter() - start) * 1000, 2)
+        return results
+
+    def run_concurrently(self, queries):
+        """
+        ⚡ Exécuter des requêtes indépendantes et attendre la fin de toutes
+
+        La durée totale est celle de la requête la plus lente (et non leur somme),
+        dans la limite de la taille du pool. Les durées sont rendues avec les
+        résultats: l'instance est partagée par toutes les sessions.
+
+        Args:
+            queries: {nom: (requête, paramètres)} - requêtes SELECT indépendantes
+
+        Returns:
+            ParallelResults: {nom: liste de dictionnaires, ou None en cas d'erreur}
+                avec l'attribut timings ({nom: ms, 'total': ms})
+        """
+        results = ParallelResults()
+        if not queries:
+            return results
+
+        start = time.perf_counter()
+        if not self.available:
+            results.update(self._run_sequentially(queries, results.timings))
+        else:
+            loop = self._ensure_loop()
+            future = asyncio.run_coroutine_threadsafe(
+                self.gather(queries, caller=_find_caller(), timings=results.timings), loop
+            )
+            try:
+                results.update(future.result(timeout=self.timeout))
+            except Exception as e:
+                future.cancel()
+                print(f"❌ Lot de requêtes asynchrones interrompu: {e}")
+                results.update({name: None for name in queries})
+
+        results.timings['total'] = round((time.perf_counter() - start) * 1000, 2)
+        return results
+
+    def close(self):
+        """Fermer le pool et arrêter la boucle"""
+        if self._loop is None:
+            return
+
+        async def _close():
+            if self._pool is not None:
+                self._pool.close()
+                await self._pool.wait_closed()
+                self._pool = None
+
+        asyncio.run_coroutine_threadsafe(_close(), self._loop).result(timeout=self.timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+        self._pool_lock = None
+
+
+# Instance globale
+async_db = AsyncDatabase()
+
+
+if __name__ == "__main__":
+    mode = "aiomysql" if async_db.available else "séquentiel (aiomysql absent)"
+    print(f"Mode: {mode}")
+    resultats = async_db.run_concurrently({
+        'examens': ("SELECT COUNT(*) as nb FROM examens", None),
+        'salles': ("SELECT COUNT(*) as nb FROM salles", None),
+        'professeurs': ("SELECT COUNT(*) as nb FROM professeurs", None),
+    })
+    for nom, lignes in resultats.items():
+        print(f"   {nom:<12} {lignes[0]['nb'] if lignes else '❌'}  ({resultats.timings.get(nom)} ms)")
+    print(f"⏱️ Total: {resultats.timings.get('total')} ms")
+    async_db.close()
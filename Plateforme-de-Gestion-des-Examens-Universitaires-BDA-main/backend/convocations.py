@@ -0,0 +1,452 @@
+"""
+Module de génération en lot des convocations (PDF)
+📄 Une convocation par étudiant, une feuille de surveillance par professeur
+⚡ Rendu PDF dans un pool de processus, données lues groupe par groupe
+📦 Une archive .zip par département
+🔁 Reprise après interruption: les documents déjà écrits ne sont pas refaits
+
+Usage:
+    from backend.convocations import convocation_generator
+
+    resultat = convocation_generator.generate('2024-2025', semestre=1)
+    resultat['archives']      # chemins des .zip par département
+    resultat['docs_par_sec']  # débit
+
+    python -m backend.convocations 2024-2025 [semestre]
+"""
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+import zipfile
+from itertools import groupby
+from pathlib import Path
+
+from backend.db_connection import db
+from backend.resilience import require
+
+# ========== RENDU PDF ==========
+# Générateur PDF minimal (texte, polices standard): aucune dépendance,
+# chaque document ne fait que quelques Ko.
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842   # A4 en points
+MARGIN = 50
+
+# style → (police, taille, interligne)
+STYLES = {
+    'titre': ('F2', 15, 24),
+    'gras': ('F2', 10, 15),
+    'normal': ('F1', 10, 14),
+    'tableau': ('F3', 8.5, 12),
+    'note': ('F1', 8.5, 12)
+}
+
+FONTS = {'F1': 'Helvetica', 'F2': 'Helvetica-Bold', 'F3': 'Courier'}
+
+
+def _pdf_string(text):
+    """Chaîne PDF littérale (WinAnsi / cp1252)"""
+    data = str(text).encode('cp1252', errors='replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def render_pdf(lines):
+    """
+    Construire un PDF texte
+
+    Args:
+        lines: Liste de (style, texte), style parmi STYLES
+
+    Returns:
+        bytes: Document PDF
+    """
+    pages = []
+    content = []
+    y = PAGE_HEIGHT - MARGIN
+    for style, text in lines:
+        font, size, leading = STYLES[style]
+        if y - leading < MARGIN:
+            pages.append(b'\n'.join(content))
+            content = []
+            y = PAGE_HEIGHT - MARGIN
+        y -= leading
+        if text:
+            content.append(b'BT /%s %s Tf %d %d Td %s Tj ET' % (
+                font.encode(), str(size).encode(), MARGIN, y, _pdf_string(text)))
+    pages.append(b'\n'.join(content))
+
+    # Objets: 1 catalogue, 2 arbre des pages, 3-5 polices, puis (page, contenu) par page
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            b' '.join(b'%d 0 R' % (6 + 2 * i) for i in range(len(pages))), len(pages))
+    ]
+    objects += [
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>' % name.encode()
+        for name in FONTS.values()
+    ]
+    resources = b'<< /Font << %s >> >>' % b' '.join(
+        b'/%s %d 0 R' % (key.encode(), 3 + i) for i, key in enumerate(FONTS))
+    for i, stream in enumerate(pages):
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources %s /Contents %d 0 R >>' % (
+            PAGE_WIDTH, PAGE_HEIGHT, resources, 7 + 2 * i))
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream) + 1, stream))
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def _ligne_examen(exam, extra=''):
+    """Ligne du tableau des examens (police à chasse fixe)"""
+    date_heure = exam['date_heure']
+    salle = exam['salle'] or 'À confirmer'
+    if exam.get('batiment'):
+        salle = f"{salle} ({exam['batiment']})"
+    return (f"{date_heure.strftime('%d/%m/%Y')}  {date_heure.strftime('%H:%M')}  "
+            f"{(exam['duree_minutes'] or 90):>3} min  {exam['module'][:38]:<38}  {salle[:22]:<22}{extra}")
+
+
+def build_convocation(entete, exams):
+    """Lignes de la convocation d'un étudiant"""
+    lines = [
+        ('titre', f"Convocation aux examens - {entete['periode']}"),
+        ('normal', ''),
+        ('gras', f"{entete['nom']} {entete['prenom']} - Matricule {entete['matricule']}"),
+        ('normal', f"{entete['departement']} / {entete['formation']} / {entete['groupe']}"),
+        ('normal', ''),
+        ('tableau', f"{'Date':<10}  {'Heure':<5}  {'Durée':>7}  {'Module':<38}  {'Salle':<22}"),
+        ('tableau', '-' * 95)
+    ]
+    lines += [('tableau', _ligne_examen(exam)) for exam in exams]
+    lines += [
+        ('normal', ''),
+        ('note', "Présentez-vous 15 minutes avant le début de chaque épreuve, muni(e) de votre carte d'étudiant."),
+        ('note', "Tout retard supérieur à 30 minutes entraîne le refus d'accès à la salle.")
+    ]
+    return lines
+
+
+def build_feuille_surveillance(entete, exams):
+    """Lignes de la feuille de surveillance d'un professeur"""
+    lines = [
+        ('titre', f"Feuille de surveillance - {entete['periode']}"),
+        ('normal', ''),
+        ('gras', f"{entete['prenom']} {entete['nom']}"),
+        ('normal', f"Département: {entete['departement']} - {len(exams)} surveillance(s)"),
+        ('normal', ''),
+        ('tableau', f"{'Date':<10}  {'Heure':<5}  {'Durée':>7}  {'Module':<38}  {'Salle':<22}  Étud."),
+        ('tableau', '-' * 95)
+    ]
+    lines += [('tableau', _ligne_examen(exam, f"  {exam['nb_etudiants']:>5}")) for exam in exams]
+    lines += [
+        ('normal', ''),
+        ('note', "Présence requise 30 minutes avant le début de l'épreuve pour la préparation de la salle.")
+    ]
+    return lines
+
+
+def _safe(name):
+    """Nom utilisable comme fichier / dossier"""
+    return re.sub(r'[^\w.-]+', '_', str(name)).strip('._') or 'sans_nom'
+
+
+BUILDERS = {'convocation': build_convocation, 'surveillance': build_feuille_surveillance}
+
+
+def _render_document(task):
+    """Tâche du pool: (chemin relatif, type, entête, examens) → (chemin relatif, PDF)"""
+    relpath, kind, entete, exams = task
+    return relpath, render_pdf(BUILDERS[kind](entete, exams))
+
+
+# ========== DONNÉES ==========
+
+# Mêmes examens que la page Étudiant (load_student_schedule), un groupe à la fois
+QUERY_GROUPE = """
+    SELECT et.matricule, et.nom, et.prenom,
+        m.nom as module, e.date_heure, e.duree_minutes, s.nom as salle, s.batiment
+    FROM etudiants et
+    JOIN inscriptions i ON et.id = i.etudiant_id
+    JOIN modules m ON i.module_id = m.id
+    JOIN examens e ON m.id = e.module_id
+        AND e.groupe_id = et.groupe_id
+        AND e.statut = 'planifie'
+        AND e.annee_academique = %s
+    LEFT JOIN salles s ON e.salle_id = s.id
+    WHERE et.groupe_id = %s
+"""
+
+# Mêmes examens que la page Professeur (get_professor_surveillances)
+QUERY_SURVEILLANTS = """
+    SELECT p.id as prof_id, p.nom, p.prenom,
+        m.nom as module, e.date_heure, e.duree_minutes, s.nom as salle, s.batiment, e.nb_etudiants
+    FROM professeurs p
+    JOIN surveillances sv ON sv.prof_id = p.id
+    JOIN examens e ON e.id = sv.examen_id
+        AND e.statut = 'planifie'
+        AND e.annee_academique = %s
+    JOIN modules m ON e.module_id = m.id
+    LEFT JOIN salles s ON e.salle_id = s.id
+    WHERE p.dept_id = %s
+"""
+
+QUERY_TOTAUX = """
+    SELECT d.id as dept_id,
+        (SELECT COUNT(DISTINCT et.id)
+         FROM etudiants et
+         JOIN formations f ON et.formation_id = f.id
+         JOIN inscriptions i ON et.id = i.etudiant_id
+         JOIN examens e ON e.module_id = i.module_id AND e.groupe_id = et.groupe_id
+            AND e.statut = 'planifie' AND e.annee_academique = %s {semestre}
+         WHERE f.dept_id = d.id) as etudiants,
+        (SELECT COUNT(DISTINCT sv.prof_id)
+         FROM surveillances sv
+         JOIN examens e ON e.id = sv.examen_id
+         JOIN professeurs p ON sv.prof_id = p.id
+         WHERE p.dept_id = d.id AND e.statut = 'planifie' AND e.annee_academique = %s {semestre}) as surveillants
+    FROM departements d
+"""
+
+
+class ConvocationGenerator:
+    """Classe pour produire les convocations et feuilles de surveillance d'une session"""
+
+    def __init__(self):
+        """Initialiser le générateur"""
+        self.output_dir = Path(os.getenv('CONVOCATIONS_DIR', 'convocations'))
+        self.processes = int(os.getenv('PDF_WORKERS', '0')) or os.cpu_count() or 1
+        # Documents envoyés à un processus en une fois
+        self.chunksize = int(os.getenv('PDF_CHUNKSIZE', '16'))
+
+    def _session_dir(self, annee_academique, semestre):
+        return self.output_dir / f"{annee_academique}_S{semestre or 'ALL'}"
+
+    def _load_checkpoint(self, path):
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {'departements_termines': [], 'documents': 0}
+
+    def _save_checkpoint(self, path, checkpoint):
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(checkpoint, ensure_ascii=False, indent=2), encoding='utf-8')
+        os.replace(tmp, path)
+
+    def _iter_tasks(self, dept, annee_academique, semestre, periode, staging):
+        """
+        Tâches de rendu d'un département, groupe par groupe
+
+        Les documents déjà présents dans le dossier de travail (reprise) sont ignorés.
+
+        Yields:
+            tuple: (chemin relatif, type, entête, examens), ou None pour un document déjà fait
+        """
+        filtre_semestre = " AND e.semestre = %s" if semestre else ""
+        params_semestre = (semestre,) if semestre else ()
+
+        # Une lecture en échec lève (require): le département n'est pas archivé ni marqué
+        # terminé, la génération est interrompue et reprend à la relance
+        groupes = require(db.execute_query("""
+            SELECT g.id, g.nom as groupe, f.nom as formation
+            FROM groupes g
+            JOIN formations f ON g.formation_id = f.id
+            WHERE f.dept_id = %s
+            ORDER BY f.nom, g.numero
+        """, (dept['id'],)), "groupes du département")
+
+        for groupe in groupes:
+            rows = require(db.execute_query(
+                QUERY_GROUPE + filtre_semestre + " ORDER BY et.matricule, e.date_heure",
+                (annee_academique, groupe['id']) + params_semestre
+            ), "examens du groupe")
+            dossier = f"etudiants/{_safe(groupe['formation'])}/{_safe(groupe['groupe'])}"
+            for matricule, exams in groupby(rows, key=lambda r: r['matricule']):
+                relpath = f"{dossier}/{_safe(matricule)}.pdf"
+                if (staging / relpath).exists():
+                    yield None
+                    continue
+                exams = list(exams)
+                entete = {
+                    'periode': periode, 'matricule': matricule,
+                    'nom': exams[0]['nom'], 'prenom': exams[0]['prenom'],
+                    'departement': dept['nom'], 'formation': groupe['formation'], 'groupe': groupe['groupe']
+                }
+                yield relpath, 'convocation', entete, exams
+
+        rows = require(db.execute_query(
+            QUERY_SURVEILLANTS + filtre_semestre + " ORDER BY p.id, e.date_heure",
+            (annee_academique, dept['id']) + params_semestre
+        ), "surveillances du département")
+        for prof_id, exams in groupby(rows, key=lambda r: r['prof_id']):
+            exams = list(exams)
+            relpath = f"surveillants/{_safe(exams[0]['nom'] + '_' + exams[0]['prenom'])}_{prof_id}.pdf"
+            if (staging / relpath).exists():
+                yield None
+                continue
+            entete = {'periode': periode, 'nom': exams[0]['nom'], 'prenom': exams[0]['prenom'],
+                      'departement': dept['nom']}
+            yield relpath, 'surveillance', entete, exams
+
+    def _archive(self, staging, archive_path):
+        """Zipper le dossier de travail d'un département puis le supprimer"""
+        tmp = archive_path.with_suffix('.zip.tmp')
+        with zipfile.ZipFile(tmp, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for path in sorted(staging.rglob('*.pdf')):
+                archive.write(path, path.relative_to(staging).as_posix())
+        os.replace(tmp, archive_path)
+        shutil.rmtree(staging, ignore_errors=True)
+
+    def generate(self, annee_academique, semestre=None, processes=None, progress_callback=None):
+        """
+        📄 Générer toutes les convocations et feuilles de surveillance
+
+        Chaque PDF est écrit dans un dossier de travail par département dès
+        qu'un processus l'a rendu; le département terminé est zippé et noté
+        dans checkpoint.json. Relancer après une interruption reprend là où
+        le travail s'est arrêté.
+
+        Args:
+            annee_academique: Année académique (ex: '2024-2025')
+            semestre: 1, 2 ou None (toute l'année)
+            processes: Nombre de processus de rendu (PDF_WORKERS, défaut: nombre de CPU)
+            progress_callback: Fonction (traites, total, docs_par_sec) appelée au fil de l'eau
+
+        Returns:
+            dict: success, documents (rendus), ignores (déjà faits), archives, temps_execution, docs_par_sec
+        """
+        start = time.perf_counter()
+        processes = processes or self.processes
+        session_dir = self._session_dir(annee_academique, semestre)
+        session_dir.mkdir(parents=True, exist_ok=True)
+        checkpoint_path = session_dir / 'checkpoint.json'
+        checkpoint = self._load_checkpoint(checkpoint_path)
+        periode = f"{annee_academique}" + (f" - Semestre {semestre}" if semestre else '')
+
+        resultat = {'success': False, 'documents': 0, 'ignores': 0, 'archives': [],
+                    'temps_execution': 0, 'docs_par_sec': 0}
+
+        departements = db.execute_query("SELECT id, code, nom FROM departements ORDER BY code")
+        if departements is None:
+            resultat['error'] = 'connexion indisponible'
+            return resultat
+
+        # Total pour la progression (départements restants uniquement)
+        filtre = "AND e.semestre = %s" if semestre else ""
+        params = (annee_academique,) + ((semestre,) if semestre else ())
+        totaux = {row['dept_id']: row['etudiants'] + row['surveillants']
+                  for row in db.execute_query(QUERY_TOTAUX.format(semestre=filtre), params * 2) or []}
+        restants = [d for d in departements if d['code'] not in checkpoint['departements_termines']]
+        total = sum(totaux.get(d['id'], 0) for d in restants)
+        traites = 0
+
+        pool = multiprocessing.get_context('spawn').Pool(processes) if processes > 1 else None
+        try:
+            for dept in restants:
+                staging = session_dir / _safe(dept['code'])
+                rendus_avant = resultat['documents']
+                taches = self._iter_tasks(dept, annee_academique, semestre, periode, staging)
+
+                def a_rendre():
+                    # Les documents déjà faits comptent dans la progression sans passer par le pool
+                    nonlocal traites
+                    for tache in taches:
+                        if tache is None:
+                            traites += 1
+                            resultat['ignores'] += 1
+                            continue
+                        yield tache
+
+                rendus = (pool.imap_unordered(_render_document, a_rendre(), chunksize=self.chunksize)
+                          if pool else map(_render_document, a_rendre()))
+                for relpath, pdf in rendus:
+                    path = staging / relpath
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    # Écriture atomique: un fichier présent est un document complet
+                    tmp = path.with_suffix('.pdf.tmp')
+                    tmp.write_bytes(pdf)
+                    os.replace(tmp, path)
+                    traites += 1
+                    resultat['documents'] += 1
+
+                    if progress_callback or traites % 500 == 0:
+                        debit = resultat['documents'] / max(time.perf_counter() - start, 1e-6)
+                        if progress_callback:
+                            progress_callback(traites, total, debit)
+                        if traites % 500 == 0:
+                            print(f"📄 {traites}/{total} documents ({debit:.0f} docs/s)")
+
+                archive_path = session_dir / f"{_safe(dept['code'])}.zip"
+                if staging.exists():
+                    self._archive(staging, archive_path)
+                    resultat['archives'].append(str(archive_path))
+                checkpoint['departements_termines'].append(dept['code'])
+                checkpoint['documents'] += resultat['documents'] - rendus_avant
+                self._save_checkpoint(checkpoint_path, checkpoint)
+                print(f"📦 {dept['code']}: archive {archive_path.name}")
+
+            resultat['success'] = True
+        except Exception as e:
+            resultat['error'] = str(e)
+            print(f"❌ Génération des convocations interrompue: {e} (relancer pour reprendre)")
+        finally:
+            if pool:
+                pool.terminate()
+                pool.join()
+
+        resultat['temps_execution'] = time.perf_counter() - start
+        resultat['docs_par_sec'] = round(resultat['documents'] / max(resultat['temps_execution'], 1e-6), 1)
+        if resultat['success']:
+            print(f"✅ {resultat['documents']} documents en {resultat['temps_execution']:.1f}s "
+                  f"({resultat['docs_par_sec']} docs/s, {resultat['ignores']} déjà faits)")
+        return resultat
+
+    def generate_in_background(self, **kwargs):
+        """
+        Lancer generate dans un thread (sur sa propre connexion MySQL)
+
+        Args:
+            **kwargs: Arguments de generate (hors progress_callback)
+
+        Returns:
+            dict: État partagé du job (etat, traites, total, debit, resultat), mis à jour par le thread
+        """
+        job = {'etat': 'en_cours', 'traites': 0, 'total': 0, 'debit': 0, 'resultat': None}
+
+        def progression(traites, total, debit):
+            job['traites'] = traites
+            job['total'] = total
+            job['debit'] = debit
+
+        def run():
+            # Connexion propre au thread: la connexion partagée sert les sessions Streamlit
+            with db.dedicated_connection():
+                resultat = self.generate(progress_callback=progression, **kwargs)
+            job['resultat'] = resultat
+            job['etat'] = 'termine' if resultat['success'] else 'erreur'
+
+        job['thread'] = threading.Thread(target=run, daemon=True)
+        job['thread'].start()
+        return job
+
+
+# Instance globale
+convocation_generator = ConvocationGenerator()
+
+
+if __name__ == "__main__":
+    # python -m backend.convocations 2024-2025 [semestre]
+    annee = sys.argv[1] if len(sys.argv) > 1 else '2024-2025'
+    sem = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    convocation_generator.generate(annee, semestre=sem)
@@ -2,29 +2,219 @@
 Module de connexion à la base de données MySQL
 """
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, errors, pooling
+from mysql.connector.constants import FieldType
+import itertools
 import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
+from backend.query_stats import QueryStats, _find_caller
+from backend.resilience import (
+    CIRCUIT_OUVERT, CONNECTION_LOST, SATURATION, CircuitBreaker, ResilienceMetrics,
+    backoff_delay, classify, is_retryable
+)
+
 # Charger les variables d'environnement
 load_dotenv()
 
+# Instructions acceptées par le protocole des requêtes préparées
+PREPARABLE_STATEMENTS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+# Au-delà, la requête est trop spécifique (listes IN générées) pour être mise en cache
+MAX_PREPARED_PARAMS = 64
+
+# Instructions de lecture routables vers un réplica
+READ_STATEMENTS = ('SELECT', 'SHOW', 'DESCRIBE', 'EXPLAIN')
+
+# query_df: colonnes converties en catégories (peu de valeurs distinctes, très répétées)
+CATEGORICAL_COLUMNS = (
+    'departement', 'formation', 'specialite', 'niveau', 'groupe',
+    'salle', 'type_salle', 'batiment', 'statut', 'type_examen'
+)
+
+# Types MySQL (FieldType) regroupés pour la conversion en colonnes NumPy
+_DATETIME_TYPES = {FieldType.DATE, FieldType.NEWDATE, FieldType.DATETIME, FieldType.TIMESTAMP}
+_INTEGER_TYPES = {FieldType.TINY, FieldType.SHORT, FieldType.INT24, FieldType.LONG,
+                  FieldType.LONGLONG, FieldType.YEAR}
+_FLOAT_TYPES = {FieldType.FLOAT, FieldType.DOUBLE, FieldType.DECIMAL, FieldType.NEWDECIMAL}
+
+
+def _parse_hosts(value, default_port):
+    """'h1:3307,h2' → [('h1', 3307), ('h2', default_port)]"""
+    hosts = []
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(':')
+        hosts.append((host, int(port) if port else default_port))
+    return hosts
+
+
+def _column_to_array(values, type_code, categorical):
+    """
+    Convertir une colonne (liste de valeurs brutes) en tableau typé
+
+    Args:
+        values: Valeurs de la colonne (None = NULL)
+        type_code: Type MySQL (FieldType) issu de cursor.description
+        categorical: Vrai pour une colonne texte à convertir en catégorie
+
+    Returns:
+        Tableau NumPy, Categorical ou tableau pandas nullable
+    """
+    import numpy as np
+    import pandas as pd
+
+    if type_code in _DATETIME_TYPES:
+        # None → NaT
+        return np.array(values, dtype='datetime64[ns]')
+    if type_code in _INTEGER_TYPES:
+        if None in values:
+            return pd.array(values, dtype='Int64')
+        return np.array(values, dtype=np.int64)
+    if type_code in _FLOAT_TYPES:
+        # DECIMAL → float64 (NULL → NaN)
+        return np.fromiter((np.nan if v is None else v for v in values), dtype=np.float64, count=len(values))
+    if categorical:
+        return pd.Categorical(values)
+    return np.array(values, dtype=object)
+
 class DatabaseConnection:
     """Classe pour gérer la connexion à la base de données"""
     
     def __init__(self):
         """Initialiser la connexion"""
+        # État propre à chaque thread: connexion dédiée, lectures forcées, dernière écriture, dernière erreur
+        self._local = threading.local()
+        self._shared_connection = None
         self.connection = None
         self.host = os.getenv('DB_HOST', 'localhost')
         self.port = int(os.getenv('DB_PORT', '3306'))
         self.database = os.getenv('DB_NAME', 'edt_examens')
         self.user = os.getenv('DB_USER', 'root')
         self.password = os.getenv('DB_PASSWORD', '')
+        
+        # 📊 Instrumentation: durée, lignes, empreinte et appelant de chaque requête
+        self.stats = QueryStats()
+        
+        # 🔥 Cache LRU des requêtes préparées côté serveur (par connexion)
+        # Clé = texte SQL, valeur = (curseur préparé, texte SQL de référence)
+        self.prepared_cache_size = int(os.getenv('DB_PREPARED_CACHE', '64'))
+        self._shared_prepared = OrderedDict()
+        
+        # ⚡ Pool de connexions pour run_parallel (créé au premier appel)
+        self.pool_size = int(os.getenv('DB_POOL_SIZE', '5'))
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # Une connexion du pool par requête en vol, toutes sessions confondues
+        self._pool_slots = threading.BoundedSemaphore(self.pool_size)
+        
+        # 🔀 Réplicas de lecture (DB_REPLICA_HOSTS=hote1:3306,hote2)
+        self.replicas = [
+            {'host': host, 'port': port, 'connection': None, 'healthy': False,
+             'lag': None, 'checked_at': None, 'error': None}
+            for host, port in _parse_hosts(os.getenv('DB_REPLICA_HOSTS'), self.port)
+        ]
+        self.replica_max_lag = float(os.getenv('DB_REPLICA_MAX_LAG', '5'))
+        self.replica_check_interval = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', '10'))
+        # Lecture de ses propres écritures: lectures sur le primaire juste après une écriture
+        self.sticky_seconds = float(os.getenv('DB_STICKY_SECONDS', '5'))
+        self._round_robin = itertools.count()
+        self.read_routing = Counter()
+        
+        # 🔁 Résilience: nouvelles tentatives, disjoncteur, dernière erreur classée
+        self.max_attempts = int(os.getenv('DB_RETRY_ATTEMPTS', '3'))
+        self.connect_timeout = int(os.getenv('DB_CONNECT_TIMEOUT', '5'))
+        self.resilience = ResilienceMetrics()
+        self.breaker = CircuitBreaker(metrics=self.resilience)
+        # {'kind', 'errno', 'message'} du dernier échec du thread (voir last_error)
+        self.last_error = None
+    
+    @property
+    def last_error(self):
+        """
+        Dernier échec du thread courant: {'kind', 'errno', 'message'}, None si son
+        dernier appel a réussi (propre à chaque session Streamlit, job ou worker)
+        """
+        return getattr(self._local, 'last_error', None)
+    
+    @last_error.setter
+    def last_error(self, value):
+        self._local.last_error = value
+    
+    @property
+    def connection(self):
+        """Connexion du thread courant: dédiée (dedicated_connection) ou partagée"""
+        dedicated = getattr(self._local, 'dedicated', None)
+        return self._shared_connection if dedicated is None else dedicated['connection']
+    
+    @connection.setter
+    def connection(self, value):
+        dedicated = getattr(self._local, 'dedicated', None)
+        if dedicated is None:
+            self._shared_connection = value
+        else:
+            dedicated['connection'] = value
+    
+    @property
+    def _prepared(self):
+        """Cache des requêtes préparées de la connexion du thread courant"""
+        dedicated = getattr(self._local, 'dedicated', None)
+        return self._shared_prepared if dedicated is None else dedicated['prepared']
+    
+    @contextmanager
+    def dedicated_connection(self):
+        """
+        🧵 Donner au thread courant sa propre connexion pour execute_query & co
+        
+        La connexion partagée (et son cache de requêtes préparées) n'est pas
+        utilisable depuis plusieurs threads: un traitement en arrière-plan qui
+        passe par les chargeurs habituels (execute_query, query_df...) s'exécute
+        dans ce bloc. Ses lectures vont au primaire (pas de connexion de réplica
+        partagée entre threads); la connexion est fermée en sortie.
+        
+        Usage:
+            with db.dedicated_connection():
+                generateur.generate_schedule(...)
+        """
+        if getattr(self._local, 'dedicated', None) is not None:
+            # Bloc imbriqué: la connexion dédiée du thread est déjà en place
+            yield self
+            return
+        
+        self._local.dedicated = {'connection': None, 'prepared': OrderedDict()}
+        try:
+            yield self
+        finally:
+            try:
+                if self.connection is not None and self.connection.is_connected():
+                    self.clear_prepared_cache()
+                    self.connection.close()
+            except Error:
+                pass
+            finally:
+                self._local.dedicated = None
     
     def connect(self):
         """Établir la connexion à la base de données"""
-        try:
-            if self.connection is None or not self.connection.is_connected():
+        if self.connection is not None and self.connection.is_connected():
+            return self.connection
+        
+        # Les handles préparés appartiennent à l'ancienne connexion
+        self._prepared.clear()
+        self.connection = None
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                # ⚡ Échec immédiat si MySQL est déclaré indisponible
+                self.breaker.allow()
                 self.connection = mysql.connector.connect(
                     host=self.host,
                     port=self.port,
@@ -32,26 +222,411 @@ class DatabaseConnection:
                     user=self.user,
                     password=self.password,
                     autocommit=True,
-                    consume_results=True  # Important pour éviter "Unread result found"
+                    consume_results=True,  # Important pour éviter "Unread result found"
+                    connection_timeout=self.connect_timeout
                 )
-                if self.connection.is_connected():
-                    print(f"✅ Connecté à MySQL: {self.database}")
-                    return self.connection
-            return self.connection
+                self.breaker.record_success()
+                if attempt > 1:
+                    self.resilience.record_recovered()
+                print(f"✅ Connecté à MySQL: {self.database}")
+                return self.connection
+            except Error as e:
+                kind = self._note_failure(e)
+                if (kind in CONNECTION_LOST | {SATURATION} and attempt < self.max_attempts
+                        and not self.breaker.is_open):
+                    self.resilience.record_retry(kind)
+                    time.sleep(backoff_delay(attempt))
+                    continue
+                print(f"❌ Erreur de connexion MySQL ({kind}): {e}")
+                return None
+    
+    def new_connection(self, autocommit=True):
+        """
+        Ouvrir une connexion dédiée (hors connexion partagée)
+        
+        Utile pour un traitement en arrière-plan ou une transaction longue:
+        la connexion partagée n'est pas utilisable depuis plusieurs threads.
+        
+        Args:
+            autocommit: Mode autocommit de la nouvelle connexion
+            
+        Returns:
+            Connexion MySQL ou None
+        """
+        try:
+            self.breaker.allow()
+            return mysql.connector.connect(
+                host=self.host,
+                port=self.port,
+                database=self.database,
+                user=self.user,
+                password=self.password,
+                autocommit=autocommit,
+                consume_results=True,
+                connection_timeout=self.connect_timeout
+            )
+        except Error as e:
+            kind = self._note_failure(e)
+            print(f"❌ Erreur de connexion MySQL ({kind}): {e}")
+            return None
+    
+    def _transaction_connection(self):
+        """Connexion dédiée pour une transaction: prise dans le pool, sinon ouverte"""
+        try:
+            self.breaker.allow()
+            return self._get_pool().get_connection()
+        except errors.PoolError:
+            # Pool épuisé (run_parallel en cours): connexion hors pool
+            return self.new_connection()
         except Error as e:
-            print(f"❌ Erreur de connexion MySQL: {e}")
+            kind = self._note_failure(e)
+            print(f"❌ Erreur de connexion MySQL ({kind}): {e}")
             return None
     
+    @contextmanager
+    def transaction(self, connection=None, buffer_size=None):
+        """
+        Exécuter un bloc dans une transaction (COMMIT ou ROLLBACK global)
+        
+        Un seul COMMIT (un fsync) pour tout le bloc au lieu d'un par instruction
+        en autocommit. Les écritures ajoutées par add() sont regroupées en un
+        INSERT multi-lignes; savepoint() annule une partie du bloc seulement.
+        
+        Usage:
+            with db.transaction() as tx:
+                tx.execute("UPDATE ...", params)
+                for row in rows:
+                    tx.add("INSERT INTO ... VALUES (%s, %s)", row)
+                with tx.savepoint():
+                    tx.execute("DELETE ...", params)
+        
+        Args:
+            connection: Connexion dédiée à réutiliser (une connexion du pool si None)
+            buffer_size: Lignes mises en tampon avant envoi (DB_WRITE_BUFFER, défaut 500)
+            
+        Yields:
+            Transaction: curseur (dictionnaire, buffered) avec add/flush/savepoint
+        """
+        owned = connection is None
+        conn = self._transaction_connection() if owned else connection
+        if conn is None:
+            raise Error(msg="connexion indisponible", errno=(self.last_error or {}).get('errno'))
+        
+        start = time.perf_counter()
+        error = None
+        tx = None
+        try:
+            conn.start_transaction()
+            tx = Transaction(self, conn, conn.cursor(dictionary=True, buffered=True), buffer_size)
+            yield tx
+            tx.flush()
+            conn.commit()
+            self._mark_write('transaction')
+            self.breaker.record_success()
+        except Exception as e:
+            error = str(e)
+            if isinstance(e, Error):
+                self.breaker.record_failure(classify(e))
+            try:
+                conn.rollback()
+            except Error:
+                # Connexion perdue: le serveur a déjà annulé la transaction
+                pass
+            self.stats.record_commit('rollback')
+            raise
+        finally:
+            if tx:
+                tx.close()
+            if owned:
+                conn.close()  # rendue au pool
+            self.stats.record("COMMIT" if error is None else "ROLLBACK", (time.perf_counter() - start) * 1000, 0, error)
+    
     def disconnect(self):
         """Fermer la connexion"""
         if self.connection and self.connection.is_connected():
+            self.clear_prepared_cache()
             self.connection.close()
             print("✅ Connexion MySQL fermée")
+        for replica in self.replicas:
+            if replica['connection'] is not None:
+                try:
+                    replica['connection'].close()
+                except Error:
+                    pass
+                replica['connection'] = None
+    
+    # ========== RÉPLICAS DE LECTURE ==========
+    
+    @contextmanager
+    def primary(self):
+        """
+        Forcer les lectures du thread courant sur le primaire
+        
+        Usage:
+            with db.primary():
+                db.execute_query("UPDATE ...")
+                db.execute_query("SELECT ...")  # voit l'écriture précédente
+        """
+        self._local.force_primary = getattr(self._local, 'force_primary', 0) + 1
+        try:
+            yield self
+        finally:
+            self._local.force_primary -= 1
+    
+    def _mark_write(self, commit='autocommit'):
+        """
+        Noter une écriture validée: les lectures suivantes du même thread
+        (exécution de page Streamlit, job) restent sur le primaire; les
+        autres sessions continuent de lire sur les réplicas
+        
+        Args:
+            commit: 'autocommit' (une validation par instruction) ou 'transaction'
+        """
+        self._local.last_write_at = time.monotonic()
+        self.stats.record_commit(commit)
+    
+    def _reads_on_primary(self):
+        """Vrai si les lectures doivent aller au primaire (pas de réplica, connexion dédiée, thread collant)"""
+        if (not self.replicas or getattr(self._local, 'force_primary', 0)
+                or getattr(self._local, 'dedicated', None) is not None):
+            return True
+        last_write_at = getattr(self._local, 'last_write_at', None)
+        return last_write_at is not None and time.monotonic() - last_write_at < self.sticky_seconds
+    
+    def _replica_lag(self, conn):
+        """Retard de réplication en secondes (None si la réplication est arrêtée)"""
+        cursor = conn.cursor(dictionary=True, buffered=True)
+        try:
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except Error:
+                # MySQL < 8.0.22 / MariaDB
+                cursor.execute("SHOW SLAVE STATUS")
+            status = cursor.fetchone()
+        finally:
+            cursor.close()
+        if not status:
+            # Hôte non configuré comme réplica (copie statique): pas de retard
+            return 0
+        lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+        return None if lag is None else float(lag)
+    
+    def _check_replica(self, replica):
+        """Vérifier la connexion et le retard d'un réplica"""
+        replica['checked_at'] = time.monotonic()
+        try:
+            conn = replica['connection']
+            if conn is None or not conn.is_connected():
+                conn = replica['connection'] = mysql.connector.connect(
+                    host=replica['host'],
+                    port=replica['port'],
+                    database=self.database,
+                    user=self.user,
+                    password=self.password,
+                    autocommit=True,
+                    consume_results=True,
+                    connection_timeout=2
+                )
+            replica['lag'] = self._replica_lag(conn)
+            replica['healthy'] = replica['lag'] is not None and replica['lag'] <= self.replica_max_lag
+            replica['error'] = None if replica['lag'] is not None else 'réplication arrêtée'
+        except Error as e:
+            replica['healthy'] = False
+            replica['lag'] = None
+            replica['error'] = str(e)
+        
+        if not replica['healthy']:
+            detail = replica['error'] or f"retard {replica['lag']:.0f}s > {self.replica_max_lag:.0f}s"
+            print(f"⚠️ Réplica {replica['host']}:{replica['port']} écarté ({detail})")
+        return replica['healthy']
+    
+    def _pick_replica(self):
+        """Choisir un réplica sain (tourniquet), None pour lire sur le primaire"""
+        if self._reads_on_primary():
+            return None
+        
+        now = time.monotonic()
+        for replica in self.replicas:
+            if replica['checked_at'] is None or now - replica['checked_at'] >= self.replica_check_interval:
+                self._check_replica(replica)
+        
+        healthy = [r for r in self.replicas if r['healthy']]
+        if not healthy:
+            return None
+        return healthy[next(self._round_robin) % len(healthy)]
+    
+    def _execute_on_replica(self, query, params):
+        """
+        Exécuter une lecture sur un réplica
+        
+        Returns:
+            list: Résultats, ou None pour se replier sur le primaire
+        """
+        replica = self._pick_replica()
+        if replica is None:
+            self.read_routing['primaire'] += 1
+            return None
+        
+        cursor = None
+        try:
+            cursor = replica['connection'].cursor(dictionary=True, buffered=True)
+            cursor.execute(query, params or ())
+            result = cursor.fetchall()
+            self.read_routing[f"{replica['host']}:{replica['port']}"] += 1
+            return result
+        except Error as e:
+            if isinstance(e, (errors.InterfaceError, errors.OperationalError)):
+                # Réplica perdu en cours de route: écarté jusqu'à la prochaine vérification
+                replica['healthy'] = False
+                replica['error'] = str(e)
+                print(f"⚠️ Réplica {replica['host']}:{replica['port']} en erreur, repli sur le primaire: {e}")
+            self.read_routing['repli_primaire'] += 1
+            return None
+        finally:
+            if cursor:
+                cursor.close()
+    
+    def replica_status(self):
+        """
+        État des réplicas et répartition des lectures
+        
+        Returns:
+            dict: replicas (hôte, sain, retard, erreur) et lectures par destination
+        """
+        return {
+            'replicas': [{
+                'host': f"{r['host']}:{r['port']}",
+                'healthy': r['healthy'],
+                'lag': r['lag'],
+                'error': r['error']
+            } for r in self.replicas],
+            'max_lag': self.replica_max_lag,
+            'lectures': dict(self.read_routing)
+        }
+    
+    def _is_preparable(self, query, params):
+        """Vérifier si une requête peut passer par le cache des requêtes préparées"""
+        if self.prepared_cache_size <= 0:
+            return False
+        if params is not None and (isinstance(params, dict) or len(params) > MAX_PREPARED_PARAMS):
+            return False
+        return query.lstrip()[:7].upper().startswith(PREPARABLE_STATEMENTS)
+    
+    def _get_prepared_cursor(self, conn, query):
+        """
+        Obtenir le curseur préparé associé au texte SQL (LRU)
+        
+        Le curseur préparé de mysql-connector ne réutilise son handle que si
+        on lui repasse le même objet chaîne: on renvoie donc le texte de référence.
+        
+        Returns:
+            tuple: (curseur, texte de référence, True si le handle existait déjà)
+        """
+        entry = self._prepared.get(query)
+        if entry is not None:
+            self._prepared.move_to_end(query)
+            return entry[0], entry[1], True
+        
+        cursor = conn.cursor(prepared=True, dictionary=True)
+        self._prepared[query] = (cursor, query)
+        
+        # Éviction: fermer le handle le moins récemment utilisé (DEALLOCATE côté serveur)
+        while len(self._prepared) > self.prepared_cache_size:
+            _, (old_cursor, _) = self._prepared.popitem(last=False)
+            self.stats.record_prepared_eviction()
+            try:
+                old_cursor.close()
+            except Error:
+                pass
+        
+        return cursor, query, False
+    
+    def _discard_prepared(self, query):
+        """Retirer un handle préparé du cache (après une erreur)"""
+        entry = self._prepared.pop(query, None)
+        if entry is not None:
+            try:
+                entry[0].close()
+            except Error:
+                pass
+    
+    def clear_prepared_cache(self):
+        """Fermer tous les handles préparés de la connexion courante"""
+        while self._prepared:
+            _, (cursor, _) = self._prepared.popitem(last=False)
+            try:
+                cursor.close()
+            except Error:
+                pass
+    
+    def _note_failure(self, e):
+        """Classer une erreur, l'enregistrer (last_error, métriques, disjoncteur)"""
+        kind = classify(e)
+        self.last_error = {'kind': kind, 'errno': getattr(e, 'errno', None), 'message': str(e)}
+        if kind != CIRCUIT_OUVERT:
+            self.resilience.record_error(kind, self.last_error)
+            self.breaker.record_failure(kind)
+        return kind
+    
+    def _reset_connection(self):
+        """Abandonner la connexion partagée (perdue): reconnexion au prochain appel"""
+        self._prepared.clear()
+        try:
+            if self.connection is not None:
+                self.connection.close()
+        except Error:
+            pass
+        self.connection = None
+    
+    def _with_retries(self, operation, idempotent, label, reset_connection=True):
+        """
+        🔁 Exécuter une opération avec nouvelles tentatives et disjoncteur
+        
+        Args:
+            operation: Fonction sans argument (lève Error en cas d'échec)
+            idempotent: Vrai si l'opération peut être rejouée après une connexion perdue
+            label: Texte affiché en cas d'échec définitif
+            reset_connection: Abandonner la connexion partagée si elle est perdue
+            
+        Returns:
+            tuple: (succès, résultat)
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                self.breaker.allow()
+                result = operation()
+            except Error as e:
+                kind = self._note_failure(e)
+                if (kind != CIRCUIT_OUVERT and attempt < self.max_attempts
+                        and is_retryable(kind, idempotent) and not self.breaker.is_open):
+                    self.resilience.record_retry(kind)
+                    if kind in CONNECTION_LOST and reset_connection:
+                        self._reset_connection()
+                    time.sleep(backoff_delay(attempt))
+                    continue
+                if attempt > 1:
+                    self.resilience.record_gave_up()
+                print(f"❌ {label} ({kind}): {e}")
+                return False, None
+            
+            if result is None and self.last_error is not None:
+                # connect() a échoué (erreur déjà classée)
+                return False, None
+            self.breaker.record_success()
+            if attempt > 1:
+                self.resilience.record_recovered()
+            return True, result
     
     def execute_query(self, query, params=None):
         """
         Exécuter une requête SELECT
         
+        Les lectures sont rejouées après un deadlock, un lock wait ou une
+        connexion perdue; les écritures seulement après deadlock / lock wait
+        (instruction annulée). En cas d'échec, db.last_error décrit l'erreur.
+        
         Args:
             query: Requête SQL
             params: Paramètres de la requête (tuple ou dict)
@@ -59,10 +634,50 @@ class DatabaseConnection:
         Returns:
             Liste de dictionnaires avec les résultats
         """
+        is_select = query.strip().upper().startswith(READ_STATEMENTS)
+        self.last_error = None
+        ok, result = self._with_retries(
+            lambda: self._execute_query_once(query, params, is_select),
+            idempotent=is_select,
+            label=f"Erreur lors de l'exécution de la requête: {query.strip()[:100]}..."
+        )
+        return result if ok else None
+    
+    def _execute_query_once(self, query, params, is_select):
+        """Une tentative d'execute_query (lève Error)"""
         cursor = None
+        prepared = None
+        start = time.perf_counter()
+        rows = 0
+        error = None
         try:
+            if is_select and self.replicas:
+                # 🔀 Lecture routée vers un réplica sain (None = primaire)
+                result = self._execute_on_replica(query, params)
+                if result is not None:
+                    rows = len(result)
+                    return result
+            
             conn = self.connect()
             if conn:
+                if self._is_preparable(query, params):
+                    # 🔥 Requête préparée: le serveur ne re-parse pas un texte déjà vu
+                    prepared_cursor, statement, hit = self._get_prepared_cursor(conn, query)
+                    prepared = 'hit' if hit else 'miss'
+                    try:
+                        prepared_cursor.execute(statement, tuple(params) if params else ())
+                        if is_select:
+                            result = prepared_cursor.fetchall()
+                            rows = len(result)
+                            return result
+                        conn.commit()
+                        self._mark_write()
+                        rows = prepared_cursor.rowcount
+                        return True
+                    except Error:
+                        self._discard_prepared(query)
+                        raise
+                
                 cursor = conn.cursor(dictionary=True, buffered=True)  # buffered=True pour éviter les problèmes
                 
                 if params:
@@ -71,21 +686,25 @@ class DatabaseConnection:
                     cursor.execute(query)
                 
                 # Pour les SELECT
-                if query.strip().upper().startswith('SELECT') or query.strip().upper().startswith('DESCRIBE') or query.strip().upper().startswith('SHOW'):
+                if is_select:
                     result = cursor.fetchall()
+                    rows = len(result)
                     return result
                 else:
                     # Pour INSERT, UPDATE, DELETE
                     conn.commit()
+                    self._mark_write()
+                    rows = cursor.rowcount
                     return True
+            error = 'connexion indisponible'
             return None
         except Error as e:
-            print(f"❌ Erreur lors de l'exécution de la requête: {e}")
-            print(f"   Requête: {query[:100]}...")
-            return None
+            error = str(e)
+            raise
         finally:
             if cursor:
                 cursor.close()
+            self.stats.record(query, (time.perf_counter() - start) * 1000, rows, error, prepared=prepared)
     
     def execute_many(self, query, data):
         """
@@ -98,23 +717,56 @@ class DatabaseConnection:
         Returns:
             True si succès, False sinon
         """
+        self.last_error = None
+        # Un INSERT multi-lignes est une seule instruction: rejouable après deadlock
+        ok, result = self._with_retries(
+            lambda: self._execute_many_once(query, data),
+            idempotent=False,
+            label=f"Erreur lors de l'exécution multiple: {query.strip()[:100]}..."
+        ) if query.lstrip()[:6].upper() == 'INSERT' else self._run_once(
+            lambda: self._execute_many_once(query, data),
+            label=f"Erreur lors de l'exécution multiple: {query.strip()[:100]}..."
+        )
+        return bool(ok and result)
+    
+    def _execute_many_once(self, query, data):
+        """Une tentative d'execute_many (lève Error)"""
         cursor = None
+        start = time.perf_counter()
+        rows = 0
+        error = None
         try:
             conn = self.connect()
             if conn:
                 cursor = conn.cursor(buffered=True)
                 cursor.executemany(query, data)
                 conn.commit()
-                affected_rows = cursor.rowcount
+                self._mark_write()
+                rows = cursor.rowcount
                 return True
-            return False
+            error = 'connexion indisponible'
+            return None
         except Error as e:
-            print(f"❌ Erreur lors de l'exécution multiple: {e}")
-            print(f"   Requête: {query[:100]}...")
-            return False
+            error = str(e)
+            raise
         finally:
             if cursor:
                 cursor.close()
+            self.stats.record(query, (time.perf_counter() - start) * 1000, rows, error)
+    
+    def _run_once(self, operation, label):
+        """Exécuter une opération non rejouable sous contrôle du disjoncteur"""
+        try:
+            self.breaker.allow()
+            result = operation()
+        except Error as e:
+            kind = self._note_failure(e)
+            print(f"❌ {label} ({kind}): {e}")
+            return False, None
+        if result is None and self.last_error is not None:
+            return False, None
+        self.breaker.record_success()
+        return True, result
     
     def execute_procedure(self, procedure_name, params=None):
         """
@@ -127,7 +779,19 @@ class DatabaseConnection:
         Returns:
             Liste de dictionnaires avec les résultats
         """
+        self.last_error = None
+        ok, result = self._run_once(
+            lambda: self._execute_procedure_once(procedure_name, params),
+            label=f"Erreur lors de l'exécution de la procédure {procedure_name}"
+        )
+        return result if ok else None
+    
+    def _execute_procedure_once(self, procedure_name, params):
+        """Une exécution de procédure (lève Error)"""
         cursor = None
+        start = time.perf_counter()
+        results = []
+        error = None
         try:
             conn = self.connect()
             if conn:
@@ -139,19 +803,214 @@ class DatabaseConnection:
                     cursor.callproc(procedure_name)
                 
                 # Récupérer les résultats
-                results = []
                 for result in cursor.stored_results():
                     results.extend(result.fetchall())
                 
+                # Les procédures du projet écrivent (génération, nettoyage)
+                self._mark_write()
                 return results
+            error = 'connexion indisponible'
             return None
         except Error as e:
-            print(f"❌ Erreur lors de l'exécution de la procédure: {e}")
-            return None
+            error = str(e)
+            raise
         finally:
             if cursor:
                 cursor.close()
+            self.stats.record(f"CALL {procedure_name}", (time.perf_counter() - start) * 1000, len(results), error)
     
+    def _get_pool(self):
+        """Créer le pool de connexions au premier besoin"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = pooling.MySQLConnectionPool(
+                    pool_name=f"edt_{self.database}",
+                    pool_size=self.pool_size,
+                    host=self.host,
+                    port=self.port,
+                    database=self.database,
+                    user=self.user,
+                    password=self.password,
+                    autocommit=True,
+                    consume_results=True
+                )
+                print(f"✅ Pool MySQL: {self.database} ({self.pool_size} connexions)")
+            return self._pool
+    
+    def _execute_pooled(self, query, params, caller):
+        """Exécuter une lecture sur une connexion du pool (appelé depuis un thread)"""
+        ok, result = self._with_retries(
+            lambda: self._execute_pooled_once(query, params, caller),
+            idempotent=True,
+            label=f"Erreur lors de l'exécution parallèle: {query.strip()[:100]}...",
+            reset_connection=False
+        )
+        return result if ok else None
+    
+    def _execute_pooled_once(self, query, params, caller):
+        """Une tentative de lecture sur le pool (lève Error)"""
+        conn = None
+        cursor = None
+        start = time.perf_counter()
+        rows = 0
+        error = None
+        with self._pool_slots:
+            try:
+                conn = self._get_pool().get_connection()
+                cursor = conn.cursor(dictionary=True, buffered=True)
+                cursor.execute(query, params)
+                result = cursor.fetchall()
+                rows = len(result)
+                return result
+            except Error as e:
+                error = str(e)
+                raise
+            finally:
+                if cursor:
+                    cursor.close()
+                if conn:
+                    conn.close()  # rend la connexion au pool
+                self.stats.record(query, (time.perf_counter() - start) * 1000, rows, error, caller=caller)
+    
+    def run_parallel(self, queries, max_workers=None):
+        """
+        ⚡ Exécuter des lectures indépendantes en parallèle sur le pool
+        
+        Chaque requête prend une connexion du pool dans un thread; la durée
+        totale est celle de la plus lente (dans la limite de DB_POOL_SIZE).
+        
+        Usage:
+            resultats = db.run_parallel({
+                'formations': ("SELECT COUNT(*) as total FROM formations WHERE dept_id = %s", (dept_id,)),
+                'profs': ("SELECT COUNT(*) as total FROM professeurs WHERE dept_id = %s", (dept_id,)),
+            })
+            resultats['formations']   # liste de dictionnaires (None en cas d'erreur)
+            resultats.timings         # {nom: ms, 'total': ms}
+        
+        Args:
+            queries: {nom: (requête, paramètres)} - requêtes SELECT indépendantes
+            max_workers: Nombre de threads (défaut: taille du pool)
+            
+        Returns:
+            ParallelResults: dict {nom: lignes} avec l'attribut timings
+        """
+        results = ParallelResults()
+        start = time.perf_counter()
+        caller = _find_caller()
+        
+        def timed(name, query, params):
+            t0 = time.perf_counter()
+            rows = self._execute_pooled(query, params, caller)
+            return name, rows, round((time.perf_counter() - t0) * 1000, 2)
+        
+        workers = min(max_workers or self.pool_size, len(queries)) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='db-parallel') as executor:
+            futures = [executor.submit(timed, name, query, params) for name, (query, params) in queries.items()]
+            for future in futures:
+                name, rows, duration_ms = future.result()
+                results[name] = rows
+                results.timings[name] = duration_ms
+        
+        results.timings['total'] = round((time.perf_counter() - start) * 1000, 2)
+        return results
+
+    def query_df(self, query, params=None, dtypes=None, categories=None, batch_size=None):
+        """
+        📊 Exécuter un SELECT et construire directement un DataFrame
+
+        Les lignes sont lues par lots (tuples, sans dictionnaire par ligne)
+        puis transposées en une liste par colonne; chaque colonne est
+        convertie une seule fois en tableau typé d'après cursor.description:
+        dates → datetime64, entiers → int64 (Int64 si NULL), DECIMAL → float64,
+        noms répétés (formation, département, salle...) → category.
+
+        Usage:
+            df = db.query_df("SELECT f.nom as formation, e.date_heure FROM ...", (dept_id,))
+            if not df.empty:
+                ...
+
+        Args:
+            query: Requête SELECT
+            params: Paramètres de la requête (tuple)
+            dtypes: Types forcés par colonne, ex. {'semestre': 'int8'}
+            categories: Colonnes à convertir en catégories (défaut: CATEGORICAL_COLUMNS)
+            batch_size: Lignes lues par aller-retour (DB_FETCH_BATCH, défaut 5000)
+
+        Returns:
+            pandas.DataFrame (vide si aucune ligne), None en cas d'erreur
+        """
+        import pandas as pd
+
+        batch_size = batch_size or int(os.getenv('DB_FETCH_BATCH', '5000'))
+        categories = set(CATEGORICAL_COLUMNS if categories is None else categories)
+        self.last_error = None
+        ok, fetched = self._with_retries(
+            lambda: self._fetch_columns_once(query, params, batch_size),
+            idempotent=True,
+            label=f"Erreur lors de la lecture en colonnes: {query.strip()[:100]}..."
+        )
+        if not ok:
+            return None
+
+        names, type_codes, columns = fetched
+        df = pd.DataFrame({
+            name: _column_to_array(values, type_code, name in categories)
+            for name, type_code, values in zip(names, type_codes, columns)
+        }, columns=names)
+        if dtypes:
+            df = df.astype({name: dtype for name, dtype in dtypes.items() if name in df.columns})
+        return df
+
+    def _fetch_columns_once(self, query, params, batch_size):
+        """
+        Une tentative de query_df (lève Error)
+
+        Returns:
+            tuple: (noms, types MySQL, liste des valeurs par colonne)
+        """
+        cursor = None
+        start = time.perf_counter()
+        rows = 0
+        error = None
+        replica = self._pick_replica() if self.replicas else None
+        try:
+            if replica is not None:
+                conn = replica['connection']
+                self.read_routing[f"{replica['host']}:{replica['port']}"] += 1
+            else:
+                conn = self.connect()
+                if not conn:
+                    error = 'connexion indisponible'
+                    return None
+                if self.replicas:
+                    self.read_routing['primaire'] += 1
+
+            # Curseur non bufferisé à tuples: les lots arrivent au fil de fetchmany
+            cursor = conn.cursor(buffered=False)
+            cursor.execute(query, params or ())
+            names = [col[0] for col in cursor.description]
+            type_codes = [col[1] for col in cursor.description]
+            columns = [[] for _ in names]
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                rows += len(batch)
+                for column, values in zip(columns, zip(*batch)):
+                    column.extend(values)
+            return names, type_codes, columns
+        except Error as e:
+            error = str(e)
+            if replica is not None and isinstance(e, (errors.InterfaceError, errors.OperationalError)):
+                # Réplica écarté: la tentative suivante lit sur un autre hôte ou le primaire
+                replica['healthy'] = False
+                replica['error'] = str(e)
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+            self.stats.record(query, (time.perf_counter() - start) * 1000, rows, error)
+
     def get_last_insert_id(self):
         """Obtenir le dernier ID inséré"""
         cursor = None
@@ -171,6 +1030,125 @@ class DatabaseConnection:
                 cursor.close()
 
 
+class Transaction:
+    """
+    Curseur d'une transaction db.transaction()
+    
+    Les attributs du curseur (fetchone, fetchall, rowcount, lastrowid...)
+    restent accessibles directement.
+    """
+    
+    def __init__(self, database, connection, cursor, buffer_size=None):
+        self._db = database
+        self.connection = connection
+        self.cursor = cursor
+        self.buffer_size = buffer_size or int(os.getenv('DB_WRITE_BUFFER', '500'))
+        # Écritures en attente: [(requête, [paramètres, ...])], regroupées par requête consécutive
+        self._pending = []
+        self._pending_rows = 0
+        self._savepoints = 0
+        self.statements = 0
+        self.round_trips = 0
+    
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+    
+    def _run(self, query, method, args):
+        start = time.perf_counter()
+        error = None
+        try:
+            method(query, args)
+        except Error as e:
+            error = str(e)
+            raise
+        finally:
+            self.round_trips += 1
+            self._db.stats.record(query, (time.perf_counter() - start) * 1000, self.cursor.rowcount, error)
+    
+    def execute(self, query, params=None):
+        """Exécuter une instruction (les écritures en attente partent avant, dans l'ordre)"""
+        self.flush()
+        self._run(query, self.cursor.execute, params)
+        self.statements += 1
+        return self.cursor
+    
+    def executemany(self, query, seq_params):
+        """Exécuter une instruction pour chaque jeu de paramètres (INSERT: un seul aller-retour)"""
+        self.flush()
+        seq_params = list(seq_params)
+        if seq_params:
+            self._run(query, self.cursor.executemany, seq_params)
+            self.statements += len(seq_params)
+        return self.cursor
+    
+    def add(self, query, params=None):
+        """
+        Mettre une écriture en tampon
+        
+        Les écritures consécutives de même texte sont envoyées ensemble par
+        executemany (un INSERT ... VALUES (...), (...) multi-lignes).
+        """
+        if self._pending and self._pending[-1][0] == query:
+            self._pending[-1][1].append(params)
+        else:
+            self._pending.append((query, [params]))
+        self._pending_rows += 1
+        if self._pending_rows >= self.buffer_size:
+            self.flush()
+    
+    def flush(self):
+        """Envoyer les écritures en attente"""
+        pending, self._pending, self._pending_rows = self._pending, [], 0
+        for query, rows in pending:
+            if len(rows) == 1:
+                self._run(query, self.cursor.execute, rows[0])
+            else:
+                self._run(query, self.cursor.executemany, rows)
+            self.statements += len(rows)
+    
+    @contextmanager
+    def savepoint(self, name=None):
+        """
+        Sous-bloc annulable sans abandonner la transaction
+        
+        Usage:
+            with tx.savepoint():
+                tx.execute(...)   # annulé seul si une exception sort du bloc
+        """
+        self.flush()
+        self._savepoints += 1
+        name = name or f"sp_{self._savepoints}"
+        self.cursor.execute(f"SAVEPOINT `{name}`")
+        try:
+            yield name
+            self.flush()
+        except Exception:
+            self._pending, self._pending_rows = [], 0
+            self.cursor.execute(f"ROLLBACK TO SAVEPOINT `{name}`")
+            raise
+        self.cursor.execute(f"RELEASE SAVEPOINT `{name}`")
+    
+    def close(self):
+        self.cursor.close()
+
+
+class ParallelResults(dict):
+    """Résultats de run_parallel: {nom: lignes} + durées par requête (ms)"""
+    
+    def __init__(self):
+        super().__init__()
+        self.timings = {}
+    
+    def timings_summary(self):
+        """Texte court des durées, de la plus lente à la plus rapide"""
+        durations = sorted(
+            ((name, ms) for name, ms in self.timings.items() if name != 'total'),
+            key=lambda item: item[1], reverse=True
+        )
+        detail = ', '.join(f"{name} {ms:.0f} ms" for name, ms in durations)
+        return f"{self.timings.get('total', 0):.0f} ms ({detail})"
+
+
 # Instance globale de la connexion
 db = DatabaseConnection()
 
@@ -192,6 +1170,10 @@ def execute_procedure(procedure_name, params=None):
     """Exécuter une procédure stockée"""
     return db.execute_procedure(procedure_name, params)
 
+def run_parallel(queries, max_workers=None):
+    """Exécuter des lectures indépendantes en parallèle"""
+    return db.run_parallel(queries, max_workers)
+
 
 # Test de connexion au chargement du module
 if __name__ == "__main__":
@@ -221,6 +1203,12 @@ if __name__ == "__main__":
             for row in result:
                 print(f"   - {row['table_name']}")
         
+        # Réplicas de lecture configurés
+        for replica in db.replicas:
+            db._check_replica(replica)
+            etat = '✅' if replica['healthy'] else '❌'
+            print(f"{etat} Réplica {replica['host']}:{replica['port']} (retard: {replica['lag']}s)")
+        
         db.disconnect()
     else:
         print("\n❌ Échec de la connexion!")
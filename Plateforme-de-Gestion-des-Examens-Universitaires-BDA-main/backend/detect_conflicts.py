@@ -3,6 +3,10 @@ Module de détection des conflits - VERSION 100% CORRIGÉE
 🔥 FIX CRITIQUE: Vérifier que l'étudiant appartient AU BON GROUPE
 """
 from backend.db_connection import db
+from backend.export import exporter
+
+# En-têtes du rapport de conflits exporté
+CONFLICT_EXPORT_COLUMNS = ('Type', 'Priorité', 'Détail', 'Modules', 'Date')
 
 class ConflictDetector:
     """Classe pour détecter les conflits dans les emplois du temps"""
@@ -11,21 +15,45 @@ class ConflictDetector:
         """Initialiser le détecteur"""
         pass
     
-    def detect_all_conflicts(self):
+    def _partition_filter(self, alias, annee_academique=None, semestre=None):
+        """
+        Prédicats sur les colonnes de partitionnement de examens
+        
+        Comparaisons directes (sans fonction) pour que MySQL élague les
+        partitions des autres années / semestres.
+        
+        Returns:
+            tuple: (fragment SQL commençant par AND, liste de paramètres)
+        """
+        sql = ""
+        params = []
+        if annee_academique:
+            sql += f" AND {alias}.annee_academique = %s"
+            params.append(annee_academique)
+        if semestre:
+            sql += f" AND {alias}.semestre = %s"
+            params.append(semestre)
+        return sql, params
+    
+    def detect_all_conflicts(self, annee_academique=None, semestre=None):
         """
         Détecter tous les types de conflits
         
+        Args:
+            annee_academique: Limiter à une année (None = toutes)
+            semestre: Limiter à un semestre (None = tous)
+        
         Returns:
             dict: Dictionnaire avec tous les conflits détectés
         """
         return {
-            'etudiants': self.detect_student_conflicts(),
-            'professeurs': self.detect_professor_conflicts(),
-            'salles': self.detect_room_conflicts(),
-            'chevauchements': self.detect_time_overlaps()
+            'etudiants': self.detect_student_conflicts(annee_academique, semestre),
+            'professeurs': self.detect_professor_conflicts(annee_academique, semestre),
+            'salles': self.detect_room_conflicts(annee_academique, semestre),
+            'chevauchements': self.detect_time_overlaps(annee_academique, semestre)
         }
     
-    def detect_student_conflicts(self):
+    def detect_student_conflicts(self, annee_academique=None, semestre=None):
         """
         🔥 100% CORRIGÉ: Détecter les VRAIS conflits étudiants
         Un conflit = PLUS D'1 EXAMEN PAR JOUR
@@ -36,14 +64,15 @@ class ConflictDetector:
         Returns:
             list: Liste des conflits étudiants
         """
-        query = """
+        filtre, params = self._partition_filter('ex', annee_academique, semestre)
+        query = f"""
         SELECT 
             e.id as etudiant_id,
             e.matricule,
             CONCAT(e.prenom, ' ', e.nom) as etudiant,
             f.nom as formation,
             g.nom as groupe,
-            DATE(ex.date_heure) as jour,
+            ex.exam_date as jour,
             COUNT(DISTINCT ex.id) as nb_examens,
             GROUP_CONCAT(
                 DISTINCT CONCAT(TIME(ex.date_heure), ' - ', m.nom) 
@@ -57,7 +86,7 @@ class ConflictDetector:
         JOIN modules m ON i.module_id = m.id
         JOIN examens ex ON m.id = ex.module_id 
             AND ex.groupe_id = e.groupe_id
-        WHERE ex.statut = 'planifie'
+        WHERE ex.statut = 'planifie'{filtre}
         GROUP BY 
             e.id, 
             e.matricule, 
@@ -65,15 +94,15 @@ class ConflictDetector:
             e.nom, 
             f.nom, 
             g.nom,
-            DATE(ex.date_heure)
+            ex.exam_date
         HAVING COUNT(DISTINCT ex.id) > 1
         ORDER BY jour, nb_examens DESC, e.nom
         """
         
-        result = db.execute_query(query)
+        result = db.execute_query(query, tuple(params))
         return result if result else []
     
-    def detect_same_time_conflicts(self):
+    def detect_same_time_conflicts(self, annee_academique=None, semestre=None):
         """
         🆕 Détecter les conflits au MÊME CRÉNEAU HORAIRE (même heure)
         CRITIQUE: ex.groupe_id = e.groupe_id
@@ -81,7 +110,8 @@ class ConflictDetector:
         Returns:
             list: Liste des conflits au même créneau
         """
-        query = """
+        filtre, params = self._partition_filter('ex', annee_academique, semestre)
+        query = f"""
         SELECT 
             e.id as etudiant_id,
             e.matricule,
@@ -98,7 +128,7 @@ class ConflictDetector:
         JOIN modules m ON i.module_id = m.id
         JOIN examens ex ON m.id = ex.module_id 
             AND ex.groupe_id = e.groupe_id
-        WHERE ex.statut = 'planifie'
+        WHERE ex.statut = 'planifie'{filtre}
         GROUP BY 
             e.id, 
             e.matricule, 
@@ -111,23 +141,24 @@ class ConflictDetector:
         ORDER BY nb_examens_simultanes DESC, creneau_conflit
         """
         
-        result = db.execute_query(query)
+        result = db.execute_query(query, tuple(params))
         return result if result else []
     
-    def detect_professor_conflicts(self):
+    def detect_professor_conflicts(self, annee_academique=None, semestre=None):
         """
         Détecter les conflits professeurs (plus de 3 surveillances/jour)
         
         Returns:
             list: Liste des conflits professeurs
         """
-        query = """
+        filtre, params = self._partition_filter('ex', annee_academique, semestre)
+        query = f"""
         SELECT 
             p.id as professeur_id,
             p.nom,
             p.prenom,
             d.nom as departement,
-            DATE(ex.date_heure) as date_surveillance,
+            ex.exam_date as date_surveillance,
             COUNT(DISTINCT ex.id) as nb_surveillances,
             GROUP_CONCAT(
                 DISTINCT CONCAT(TIME(ex.date_heure), ' - ', m.nom)
@@ -136,25 +167,27 @@ class ConflictDetector:
             ) as horaires_detail
         FROM professeurs p
         JOIN departements d ON p.dept_id = d.id
-        JOIN examens ex ON p.id = ex.prof_id
+        JOIN surveillances sv ON sv.prof_id = p.id
+        JOIN examens ex ON ex.id = sv.examen_id
         JOIN modules m ON ex.module_id = m.id
-        WHERE ex.statut = 'planifie'
-        GROUP BY p.id, p.nom, p.prenom, d.nom, DATE(ex.date_heure)
+        WHERE ex.statut = 'planifie'{filtre}
+        GROUP BY p.id, p.nom, p.prenom, d.nom, ex.exam_date
         HAVING COUNT(DISTINCT ex.id) > 3
         ORDER BY date_surveillance, nb_surveillances DESC, p.nom
         """
         
-        result = db.execute_query(query)
+        result = db.execute_query(query, tuple(params))
         return result if result else []
     
-    def detect_room_conflicts(self):
+    def detect_room_conflicts(self, annee_academique=None, semestre=None):
         """
         Détecter les conflits de salles (capacité dépassée)
         
         Returns:
             list: Liste des conflits de salles
         """
-        query = """
+        filtre, params = self._partition_filter('ex', annee_academique, semestre)
+        query = f"""
         SELECT 
             s.id as salle_id,
             s.nom as salle_nom,
@@ -175,21 +208,24 @@ class ConflictDetector:
         JOIN modules m ON ex.module_id = m.id
         LEFT JOIN groupes g ON ex.groupe_id = g.id
         WHERE ex.statut = 'planifie'
-          AND ex.nb_etudiants > s.capacite
+          AND ex.nb_etudiants > s.capacite{filtre}
         ORDER BY depassement DESC, ex.date_heure
         """
         
-        result = db.execute_query(query)
+        result = db.execute_query(query, tuple(params))
         return result if result else []
     
-    def detect_time_overlaps(self):
+    def detect_time_overlaps(self, annee_academique=None, semestre=None):
         """
-        Détecter les chevauchements horaires dans les salles (même créneau, même salle)
+        Détecter les chevauchements horaires dans les salles ([début, fin) sécants, même salle)
         
         Returns:
             list: Liste des chevauchements
         """
-        query = """
+        filtre_e2, params_e2 = self._partition_filter('e2', annee_academique, semestre)
+        filtre, params = self._partition_filter('e1', annee_academique, semestre)
+        params = params_e2 + params
+        query = f"""
         SELECT 
             e1.id as examen1_id,
             e2.id as examen2_id,
@@ -204,12 +240,14 @@ class ConflictDetector:
             g2.nom as groupe2,
             CONCAT(
                 'Salle ', s.nom, ' occupée par ', m1.nom, 
-                ' et ', m2.nom, ' au même moment'
+                ' et ', m2.nom, ' sur des horaires qui se chevauchent'
             ) as message
         FROM examens e1
         JOIN examens e2 ON e1.salle_id = e2.salle_id 
             AND e1.id < e2.id
-            AND e1.date_heure = e2.date_heure
+            AND e1.exam_date = e2.exam_date
+            AND e1.date_heure < DATE_ADD(e2.date_heure, INTERVAL e2.duree_minutes MINUTE)
+            AND e2.date_heure < DATE_ADD(e1.date_heure, INTERVAL e1.duree_minutes MINUTE){filtre_e2}
         JOIN salles s ON e1.salle_id = s.id
         JOIN modules m1 ON e1.module_id = m1.id
         JOIN modules m2 ON e2.module_id = m2.id
@@ -217,21 +255,25 @@ class ConflictDetector:
         LEFT JOIN groupes g2 ON e2.groupe_id = g2.id
         WHERE 
             e1.statut = 'planifie' 
-            AND e2.statut = 'planifie'
+            AND e2.statut = 'planifie'{filtre}
         ORDER BY e1.date_heure
         """
         
-        result = db.execute_query(query)
+        result = db.execute_query(query, tuple(params))
         return result if result else []
     
-    def check_professor_balance(self):
+    def check_professor_balance(self, annee_academique=None, semestre=None):
         """
         Vérifier l'équilibrage des surveillances entre professeurs
         
+        Toutes les surveillances comptent (principal et assistants); la
+        réaffectation elle-même est faite à la génération (staffing.equilibrer).
+        
         Returns:
             dict: Statistiques sur l'équilibrage
         """
-        query = """
+        filtre, params = self._partition_filter('ex', annee_academique, semestre)
+        query = f"""
         SELECT 
             p.id,
             p.nom,
@@ -245,12 +287,15 @@ class ConflictDetector:
             ) as dates_surveillances
         FROM professeurs p
         JOIN departements d ON p.dept_id = d.id
-        LEFT JOIN examens ex ON p.id = ex.prof_id AND ex.statut = 'planifie'
+        LEFT JOIN (
+            surveillances sv
+            JOIN examens ex ON ex.id = sv.examen_id AND ex.statut = 'planifie'{filtre}
+        ) ON sv.prof_id = p.id
         GROUP BY p.id, p.nom, p.prenom, d.nom
         ORDER BY nb_surveillances DESC, p.nom
         """
         
-        result = db.execute_query(query)
+        result = db.execute_query(query, tuple(params))
         
         if not result:
             return {'balanced': True, 'stats': []}
@@ -269,15 +314,15 @@ class ConflictDetector:
             'stats': result
         }
     
-    def get_conflicts_summary(self):
+    def get_conflicts_summary(self, annee_academique=None, semestre=None):
         """
         Obtenir un résumé de tous les conflits
         
         Returns:
             dict: Résumé des conflits
         """
-        conflicts = self.detect_all_conflicts()
-        same_time = self.detect_same_time_conflicts()
+        conflicts = self.detect_all_conflicts(annee_academique, semestre)
+        same_time = self.detect_same_time_conflicts(annee_academique, semestre)
         
         return {
             'total_etudiants': len(conflicts['etudiants']),
@@ -294,17 +339,17 @@ class ConflictDetector:
             ])
         }
     
-    def get_detailed_report(self):
+    def get_detailed_report(self, annee_academique=None, semestre=None):
         """
         Générer un rapport détaillé des conflits
         
         Returns:
             dict: Rapport complet
         """
-        conflicts = self.detect_all_conflicts()
-        summary = self.get_conflicts_summary()
-        balance = self.check_professor_balance()
-        same_time_conflicts = self.detect_same_time_conflicts()
+        conflicts = self.detect_all_conflicts(annee_academique, semestre)
+        summary = self.get_conflicts_summary(annee_academique, semestre)
+        balance = self.check_professor_balance(annee_academique, semestre)
+        same_time_conflicts = self.detect_same_time_conflicts(annee_academique, semestre)
         
         return {
             'summary': summary,
@@ -385,67 +430,71 @@ class ConflictDetector:
         
         return recommendations
     
-    def export_conflicts_to_csv(self, filepath='conflicts_report.csv'):
+    def _iter_conflict_rows(self, conflicts):
+        """Lignes (Type, Priorité, Détail, Modules, Date) du rapport de conflits"""
+        for c in conflicts['etudiants']:
+            yield ('ÉTUDIANT - Plusieurs examens/jour', 'HIGH',
+                   f"{c['etudiant']} ({c['matricule']}) - {c['nb_examens']} examens le {c['jour']}",
+                   c.get('modules_detail', 'N/A'), c['jour'])
+        
+        for c in conflicts['professeurs']:
+            yield ('PROFESSEUR - Trop de surveillances', 'MEDIUM',
+                   f"{c['prenom']} {c['nom']} - {c['nb_surveillances']} surveillances le {c['date_surveillance']}",
+                   c.get('horaires_detail', 'N/A'), c['date_surveillance'])
+        
+        for c in conflicts['salles']:
+            yield ('SALLE - Capacité dépassée', 'HIGH',
+                   c.get('message', f"{c['salle_nom']} - {c['nb_etudiants']}/{c['capacite']} places"),
+                   c['module_nom'], c['date_heure'])
+        
+        for c in conflicts['chevauchements']:
+            yield ('CHEVAUCHEMENT - Même salle/créneau', 'CRITICAL',
+                   c.get('message', f"Salle {c['salle_nom']} occupée 2 fois"),
+                   f"{c['module1']} / {c['module2']}", c['debut1'])
+    
+    def export_conflicts(self, annee_academique=None, semestre=None, fmt='csv', compress=False,
+                         fileobj=None, conflicts=None):
+        """
+        Exporter les conflits en flux (CSV ou Excel, gzip optionnel)
+        
+        Args:
+            annee_academique: Année académique (toutes si None)
+            semestre: Semestre (tous si None)
+            fmt: 'csv' ou 'xlsx'
+            compress: Compresser le CSV en gzip
+            fileobj: Fichier binaire de destination (défaut: fichier temporaire)
+            conflicts: Résultat de detect_all_conflicts déjà calculé
+            
+        Returns:
+            ExportFile
+        """
+        if conflicts is None:
+            conflicts = self.detect_all_conflicts(annee_academique, semestre)
+        return exporter.write_rows(
+            CONFLICT_EXPORT_COLUMNS, self._iter_conflict_rows(conflicts),
+            fmt=fmt, compress=compress, basename='conflits', sheet_name='Conflits', fileobj=fileobj
+        )
+    
+    def export_conflicts_to_csv(self, filepath='conflicts_report.csv', annee_academique=None, semestre=None):
         """
         🆕 Exporter les conflits dans un fichier CSV
         
         Args:
-            filepath: Chemin du fichier de sortie
+            filepath: Chemin du fichier de sortie (compressé en gzip si .gz)
             
         Returns:
             bool: True si succès
         """
         try:
-            import pandas as pd
-            from datetime import datetime
-            
-            conflicts = self.detect_all_conflicts()
-            all_conflicts = []
-            
-            for c in conflicts['etudiants']:
-                all_conflicts.append({
-                    'Type': 'ÉTUDIANT - Plusieurs examens/jour',
-                    'Priorité': 'HIGH',
-                    'Détail': f"{c['etudiant']} ({c['matricule']}) - {c['nb_examens']} examens le {c['jour']}",
-                    'Modules': c.get('modules_detail', 'N/A'),
-                    'Date': c['jour']
-                })
-            
-            for c in conflicts['professeurs']:
-                all_conflicts.append({
-                    'Type': 'PROFESSEUR - Trop de surveillances',
-                    'Priorité': 'MEDIUM',
-                    'Détail': f"{c['prenom']} {c['nom']} - {c['nb_surveillances']} surveillances le {c['date_surveillance']}",
-                    'Modules': c.get('horaires_detail', 'N/A'),
-                    'Date': c['date_surveillance']
-                })
-            
-            for c in conflicts['salles']:
-                all_conflicts.append({
-                    'Type': 'SALLE - Capacité dépassée',
-                    'Priorité': 'HIGH',
-                    'Détail': c.get('message', f"{c['salle_nom']} - {c['nb_etudiants']}/{c['capacite']} places"),
-                    'Modules': c['module_nom'],
-                    'Date': c['date_heure']
-                })
-            
-            for c in conflicts['chevauchements']:
-                all_conflicts.append({
-                    'Type': 'CHEVAUCHEMENT - Même salle/créneau',
-                    'Priorité': 'CRITICAL',
-                    'Détail': c.get('message', f"Salle {c['salle_nom']} occupée 2 fois"),
-                    'Modules': f"{c['module1']} / {c['module2']}",
-                    'Date': c['debut1']
-                })
+            with open(filepath, 'wb') as f:
+                export = self.export_conflicts(annee_academique, semestre,
+                                               compress=str(filepath).endswith('.gz'), fileobj=f)
             
-            if all_conflicts:
-                df = pd.DataFrame(all_conflicts)
-                df.to_csv(filepath, index=False, encoding='utf-8-sig')
-                print(f"✅ Rapport exporté: {filepath}")
-                return True
+            if export.rows:
+                print(f"✅ Rapport exporté: {filepath} ({export.rows} conflits)")
             else:
                 print("✅ Aucun conflit à exporter")
-                return True
+            return True
                 
         except Exception as e:
             print(f"❌ Erreur export CSV: {e}")
@@ -0,0 +1,253 @@
+"""
+Module de domaines des examens à planifier (forward checking)
+📋 Chaque examen en attente garde l'ensemble de ses jours encore possibles
+👥 Index inversé étudiant -> examens en attente: réserver un jour pour un groupe
+   retire ce jour du domaine de tous les examens qui partagent un étudiant
+🏫 État partagé par créneau (jour, début, durée): salle et prof « témoins » encore
+   libres, réévalués seulement quand le témoin lui-même est réservé
+⚠️ Domaines vides signalés dès qu'ils apparaissent (avant la fin de la phase 1)
+
+Le domaine est une sur-approximation: un créneau retiré est réellement
+impossible (les occupations ne font que croître), un créneau restant doit
+encore être confirmé par trouver_salle / trouver_prof.
+
+Usage:
+    domaines = ExamDomains(scheduler)
+    domaines.initialiser(scheduler.modules_groupes, date_debut, date_fin)
+    if domaines.candidat(k, jour, debut):
+        ...
+"""
+from collections import defaultdict
+
+from backend.time_grid import masque
+
+# Un amphi libre accueille n'importe quel groupe (repli de trouver_salle)
+CAPACITE_ILLIMITEE = float('inf')
+
+# Nombre d'examens vides affichés individuellement
+MAX_VIDES_AFFICHES = 10
+
+
+class ExamDomains:
+    """Domaines des examens en attente et propagation des réservations"""
+
+    def __init__(self, scheduler, max_surveillances_jour=3):
+        """
+        Args:
+            scheduler: ScheduleGenerator (salles, professeurs, occupations, grille)
+            max_surveillances_jour: Limite de surveillances par prof et par jour
+        """
+        self.scheduler = scheduler
+        self.grid = scheduler.grid
+        self.max_surveillances_jour = max_surveillances_jour
+        # Première salle libre = plus grande capacité disponible
+        self.salles_normales = sorted(scheduler.salles_normales, key=lambda s: s['capacite'], reverse=True)
+
+        # Examens en attente: k -> {'nb', 'ticks', 'jours', 'module_id', 'groupe_id'}
+        self.examens = {}
+        self.examens_par_etudiant = defaultdict(set)
+        self.examens_par_duree = defaultdict(set)
+
+        # Créneaux: (jour, début, ticks) -> [salle témoin, capacité, prof témoin]
+        self.creneaux = {}
+        self.creneaux_par_jour = defaultdict(list)  # (jour, ticks) -> clés
+        self.capacite_jour = {}                    # (jour, ticks) -> capacité max d'un créneau vivant
+        self.temoins_salles = defaultdict(set)     # (jour, salle_id) -> clés
+        self.temoins_profs = defaultdict(set)      # (jour, prof_id) -> clés
+
+        self.vides = []
+        self.stats = {'jours_elagues': 0, 'creneaux_reevalues': 0, 'creneaux_morts': 0}
+
+    def initialiser(self, modules_groupes, date_debut, date_fin, exclus=()):
+        """
+        Construire les domaines initiaux
+
+        Recalculés à partir des occupations courantes, les domaines d'une reprise
+        sont identiques à ceux tenus à jour pendant la construction interrompue.
+
+        Args:
+            modules_groupes: Examens à planifier (clé = position dans la liste)
+            date_debut: Premier jour de la période
+            date_fin: Dernier jour de la période
+            exclus: Positions des examens déjà placés (reprise)
+
+        Returns:
+            int: Nombre d'examens dont le domaine est déjà vide
+        """
+        scheduler = self.scheduler
+        jours = self.grid.jours(date_debut, date_fin)
+
+        # Créneaux partagés pour chaque durée rencontrée
+        for ticks, duree in {self.grid.ticks(mg['duree_minutes']): mg['duree_minutes']
+                             for mg in modules_groupes}.items():
+            for date_obj in self.grid.debuts(date_debut, date_fin, duree):
+                cle = (date_obj.date(), self.grid.tick(date_obj), ticks)
+                self.creneaux[cle] = [None, 0, None]
+                self.creneaux_par_jour[(cle[0], ticks)].append(cle)
+                self._evaluer(cle)
+            for jour in jours:
+                self._maj_capacite_jour(jour, ticks)
+
+        for k, mg in enumerate(modules_groupes):
+            if k in exclus:
+                continue
+            etudiants = scheduler.get_etudiants_inscrits(mg['module_id'], mg['groupe_id'])
+            ticks = self.grid.ticks(mg['duree_minutes'])
+            nb = mg['nb_etudiants']
+            possibles = {
+                jour for jour in jours
+                if self.capacite_jour.get((jour, ticks), 0) >= nb
+                and scheduler.etudiants_par_jour[jour].isdisjoint(etudiants)
+            } if etudiants else set()
+
+            self.examens[k] = {
+                'nb': nb,
+                'ticks': ticks,
+                'jours': possibles,
+                'module_id': mg['module_id'],
+                'groupe_id': mg['groupe_id']
+            }
+            for etud_id in etudiants:
+                self.examens_par_etudiant[etud_id].add(k)
+            self.examens_par_duree[ticks].add(k)
+
+            if not possibles:
+                self._signaler_vide(k)
+
+        print(f"📋 Domaines: {len(self.examens)} examens, {len(self.creneaux)} créneaux, "
+              f"{len(self.vides)} sans aucun jour possible")
+        return len(self.vides)
+
+    def est_vide(self, k):
+        """True si l'examen n'a plus aucun jour possible"""
+        return not self.examens[k]['jours']
+
+    def candidat(self, k, jour, debut):
+        """
+        Filtre rapide d'un début candidat pour l'examen k
+
+        Returns:
+            bool: False si le créneau est impossible (étudiants, salles ou profs)
+        """
+        examen = self.examens[k]
+        if jour not in examen['jours']:
+            return False
+        etat = self.creneaux.get((jour, debut, examen['ticks']))
+        return etat is not None and etat[2] is not None and etat[1] >= examen['nb']
+
+    def reserver(self, k, jour, salle_id, prof_id, intervalle, etudiants_ids):
+        """
+        Propager la réservation de l'examen k (appelé après mise à jour des trackers)
+
+        Args:
+            k: Examen placé (retiré des examens en attente)
+            jour: Jour de l'examen
+            salle_id: Salle réservée
+            prof_id: Surveillant réservé
+            intervalle: Masque [début, fin) réservé
+            etudiants_ids: Étudiants de l'examen
+        """
+        self._retirer(k, etudiants_ids)
+
+        # 👥 Étudiants: ce jour est perdu pour tous les examens qui partagent un étudiant
+        for etud_id in etudiants_ids:
+            for autre in self.examens_par_etudiant.get(etud_id, ()):
+                self._elaguer_jour(autre, jour)
+
+        # 🏫 Salle / 👨‍🏫 prof: seuls les créneaux dont ils étaient le témoin changent
+        a_reevaluer = {cle for cle in self.temoins_salles.get((jour, salle_id), ())
+                       if masque(cle[1], cle[2]) & intervalle}
+        sature = self.scheduler.nb_surveillances_jour[(jour, prof_id)] >= self.max_surveillances_jour
+        a_reevaluer.update(cle for cle in self.temoins_profs.get((jour, prof_id), ())
+                           if sature or masque(cle[1], cle[2]) & intervalle)
+
+        durees = set()
+        for cle in a_reevaluer:
+            if self._evaluer(cle):
+                durees.add(cle[2])
+        for ticks in durees:
+            self._maj_capacite_jour(jour, ticks)
+
+    def _retirer(self, k, etudiants_ids):
+        examen = self.examens.pop(k, None)
+        if examen is None:
+            return
+        for etud_id in etudiants_ids:
+            self.examens_par_etudiant[etud_id].discard(k)
+        self.examens_par_duree[examen['ticks']].discard(k)
+
+    def _elaguer_jour(self, k, jour):
+        jours = self.examens[k]['jours']
+        if jour in jours:
+            jours.discard(jour)
+            self.stats['jours_elagues'] += 1
+            if not jours:
+                self._signaler_vide(k)
+
+    def _signaler_vide(self, k):
+        examen = self.examens[k]
+        self.vides.append(k)
+        if len(self.vides) <= MAX_VIDES_AFFICHES:
+            print(f"   ⚠️ Domaine vide: module {examen['module_id']} / groupe {examen['groupe_id']} "
+                  f"({examen['nb']} étudiants)")
+        elif len(self.vides) == MAX_VIDES_AFFICHES + 1:
+            print("   ⚠️ ... (autres domaines vides comptés sans détail)")
+
+    def _evaluer(self, cle):
+        """
+        Recalculer les témoins d'un créneau
+
+        Returns:
+            bool: True si la capacité ou la disponibilité des profs a baissé
+        """
+        scheduler = self.scheduler
+        jour, debut, ticks = cle
+        intervalle = masque(debut, ticks)
+        etat = self.creneaux[cle]
+        ancien = (etat[1], etat[2] is not None)
+        self.stats['creneaux_reevalues'] += 1
+
+        # Salle témoin: un amphi libre (tout groupe), sinon la plus grande salle libre
+        if etat[0] is not None:
+            self.temoins_salles[(jour, etat[0])].discard(cle)
+        occupation = scheduler.occupation_salles.jour(jour)
+        etat[0], etat[1] = None, 0
+        for salle in scheduler.amphis:
+            if not occupation.get(salle['id'], 0) & intervalle:
+                etat[0], etat[1] = salle['id'], CAPACITE_ILLIMITEE
+                break
+        else:
+            for salle in self.salles_normales:
+                if not occupation.get(salle['id'], 0) & intervalle:
+                    etat[0], etat[1] = salle['id'], salle['capacite']
+                    break
+        if etat[0] is not None:
+            self.temoins_salles[(jour, etat[0])].add(cle)
+
+        # Prof témoin: un prof libre sur l'intervalle et sous la limite du jour
+        if etat[2] is not None:
+            self.temoins_profs[(jour, etat[2])].discard(cle)
+        occupation = scheduler.occupation_profs.jour(jour)
+        etat[2] = None
+        for p in scheduler.professeurs:
+            if (not occupation.get(p['id'], 0) & intervalle
+                    and scheduler.nb_surveillances_jour[(jour, p['id'])] < self.max_surveillances_jour):
+                etat[2] = p['id']
+                self.temoins_profs[(jour, etat[2])].add(cle)
+                break
+
+        if ancien[0] > 0 and ancien[1] and not (etat[1] > 0 and etat[2] is not None):
+            self.stats['creneaux_morts'] += 1
+        return (etat[1], etat[2] is not None) != ancien
+
+    def _maj_capacite_jour(self, jour, ticks):
+        """Capacité max des créneaux vivants du jour; élaguer les examens trop gros"""
+        capacite = max((etat[1] for etat in map(self.creneaux.get, self.creneaux_par_jour.get((jour, ticks), ()))
+                        if etat[2] is not None), default=0)
+        ancienne = self.capacite_jour.get((jour, ticks))
+        self.capacite_jour[(jour, ticks)] = capacite
+
+        if ancienne is not None and capacite < ancienne:
+            for k in list(self.examens_par_duree.get(ticks, ())):
+                if self.examens[k]['nb'] > capacite:
+                    self._elaguer_jour(k, jour)
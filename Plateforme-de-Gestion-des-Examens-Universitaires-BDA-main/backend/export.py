@@ -0,0 +1,277 @@
+"""
+Module d'export en flux (CSV / Excel)
+📥 Lignes lues par lots sur une connexion dédiée, jamais chargées en entier
+💾 Écriture incrémentale dans un fichier temporaire (mémoire, puis disque au-delà du seuil)
+🗜️ Compression gzip optionnelle des CSV
+
+Usage:
+    from backend.export import exporter
+
+    fichier = exporter.export_planning('2024-2025', fmt='csv', compress=True)
+    if fichier:
+        st.download_button("📥 Télécharger", fichier.read(), fichier.filename, fichier.mime)
+"""
+import csv
+import gzip
+import io
+import os
+import tempfile
+import time
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # dépendance optionnelle (export Excel)
+    Workbook = None
+
+MIME_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'gzip': 'application/gzip'
+}
+
+# Planning complet: un examen par ligne avec ses surveillants
+PLANNING_EXPORT_QUERY = """
+    SELECT
+        d.nom as `Département`,
+        f.nom as `Formation`,
+        f.niveau as `Niveau`,
+        m.code as `Code module`,
+        m.nom as `Module`,
+        m.semestre as `Semestre`,
+        COALESCE(g.nom, 'Tous groupes') as `Groupe`,
+        DATE_FORMAT(e.date_heure, '%d/%m/%Y') as `Date`,
+        DATE_FORMAT(e.date_heure, '%H:%i') as `Heure`,
+        e.duree_minutes as `Durée (min)`,
+        s.nom as `Salle`,
+        e.nb_etudiants as `Étudiants`,
+        e.statut as `Statut`,
+        (SELECT GROUP_CONCAT(CONCAT(p.prenom, ' ', p.nom) ORDER BY p.nom SEPARATOR ', ')
+         FROM surveillances sv
+         JOIN professeurs p ON sv.prof_id = p.id
+         WHERE sv.examen_id = e.id) as `Surveillants`
+    FROM examens e
+    JOIN modules m ON e.module_id = m.id
+    JOIN formations f ON m.formation_id = f.id
+    JOIN departements d ON f.dept_id = d.id
+    JOIN salles s ON e.salle_id = s.id
+    LEFT JOIN groupes g ON e.groupe_id = g.id
+    WHERE e.annee_academique = %s
+"""
+
+
+class ExportFile:
+    """Fichier d'export prêt à être téléchargé"""
+
+    def __init__(self, file, filename, mime, rows):
+        self.file = file
+        self.filename = filename
+        self.mime = mime
+        self.rows = rows
+        file.seek(0, io.SEEK_END)
+        self.size = file.tell()
+        file.seek(0)
+
+    def read(self):
+        """
+        Contenu du fichier pour st.download_button
+
+        Streamlit attend des octets: c'est la seule copie complète en mémoire
+        (compressée si gzip), libérée avec le fichier temporaire.
+        """
+        self.file.seek(0)
+        try:
+            return self.file.read()
+        finally:
+            self.close()
+
+    def close(self):
+        self.file.close()
+
+
+class _CsvWriter:
+    """Écriture CSV ligne à ligne (UTF-8 avec BOM pour Excel)"""
+
+    def __init__(self, fileobj, columns):
+        self._text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='', write_through=True)
+        self._writer = csv.writer(self._text)
+        self._writer.writerow(columns)
+
+    def writerows(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._text.flush()
+        # Ne pas fermer le fichier sous-jacent
+        self._text.detach()
+
+
+class _XlsxWriter:
+    """Écriture Excel en mode write_only (lignes sérialisées au fil de l'eau)"""
+
+    def __init__(self, fileobj, columns, sheet_name):
+        if Workbook is None:
+            raise ImportError("openpyxl n'est pas installé (pip install openpyxl)")
+        self._fileobj = fileobj
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet(title=sheet_name[:31])
+        self._sheet.append(list(columns))
+
+    def writerows(self, rows):
+        for row in rows:
+            self._sheet.append(list(row))
+
+    def close(self):
+        self._workbook.save(self._fileobj)
+
+
+class StreamingExporter:
+    """Classe pour exporter de gros volumes sans DataFrame intermédiaire"""
+
+    def __init__(self):
+        """Initialiser l'exporteur"""
+        self.batch_size = int(os.getenv('DB_EXPORT_BATCH', '2000'))
+        # Au-delà de ce seuil, le fichier temporaire passe de la mémoire au disque
+        self.spool_max_size = int(float(os.getenv('EXPORT_SPOOL_MB', '8')) * 1024 * 1024)
+
+    @property
+    def excel_available(self):
+        """True si openpyxl est installé"""
+        return Workbook is not None
+
+    def write(self, columns, batches, fmt='csv', compress=False, basename='export',
+              sheet_name='Export', fileobj=None):
+        """
+        💾 Écrire des lots de lignes en CSV ou XLSX
+
+        Args:
+            columns: En-têtes des colonnes
+            batches: Itérable de lots (listes de tuples)
+            fmt: 'csv' ou 'xlsx'
+            compress: Compresser en gzip (CSV uniquement, un XLSX est déjà une archive zip)
+            basename: Nom du fichier sans extension
+            sheet_name: Nom de la feuille Excel
+            fileobj: Fichier binaire de destination (défaut: fichier temporaire)
+
+        Returns:
+            ExportFile (fichier rembobiné)
+        """
+        if fmt not in ('csv', 'xlsx'):
+            raise ValueError(f"Format d'export inconnu: {fmt}")
+        compress = compress and fmt == 'csv'
+
+        target = fileobj or tempfile.SpooledTemporaryFile(max_size=self.spool_max_size)
+        stream = gzip.GzipFile(fileobj=target, mode='wb') if compress else target
+        writer = _XlsxWriter(stream, columns, sheet_name) if fmt == 'xlsx' else _CsvWriter(stream, columns)
+
+        rows = 0
+        try:
+            for batch in batches:
+                writer.writerows(batch)
+                rows += len(batch)
+        finally:
+            writer.close()
+            if compress:
+                stream.close()  # écrit la fin du flux gzip, target reste ouvert
+
+        filename = f"{basename}.{fmt}" + ('.gz' if compress else '')
+        return ExportFile(target, filename, MIME_TYPES['gzip' if compress else fmt], rows)
+
+    def write_rows(self, columns, rows, **kwargs):
+        """Écrire un itérable de lignes (découpé en lots de batch_size)"""
+        iterator = iter(rows)
+
+        def batches():
+            while True:
+                batch = [row for _, row in zip(range(self.batch_size), iterator)]
+                if not batch:
+                    return
+                yield batch
+
+        return self.write(columns, batches(), **kwargs)
+
+    def export_query(self, query, params=None, **kwargs):
+        """
+        📥 Exporter le résultat d'une requête SELECT en flux
+
+        Les lignes sont lues par lots de batch_size sur une connexion dédiée
+        (curseur non bufferisé) et écrites au fur et à mesure.
+
+        Args:
+            query: Requête SELECT (les alias donnent les en-têtes)
+            params: Paramètres de la requête
+            **kwargs: Options de write (fmt, compress, basename, sheet_name)
+
+        Returns:
+            ExportFile, None en cas d'erreur
+        """
+        from backend.db_connection import db
+
+        conn = db.new_connection()
+        if conn is None:
+            return None
+
+        cursor = None
+        start = time.perf_counter()
+        rows = 0
+        error = None
+        try:
+            cursor = conn.cursor(buffered=False)
+            cursor.execute(query, params or ())
+            columns = [col[0] for col in cursor.description]
+            export = self.write(columns, iter(lambda: cursor.fetchmany(self.batch_size), []), **kwargs)
+            rows = export.rows
+            print(f"✅ Export {export.filename}: {rows} lignes, {export.size / 1024:.0f} Ko")
+            return export
+        except Exception as e:
+            error = str(e)
+            print(f"❌ Erreur lors de l'export: {e}")
+            return None
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+            db.stats.record(query, (time.perf_counter() - start) * 1000, rows, error)
+
+    def export_planning(self, annee_academique, dept_id=None, semestre=None, **kwargs):
+        """
+        Exporter le planning des examens avec leurs surveillants
+
+        Args:
+            annee_academique: Année académique (ex: '2024-2025')
+            dept_id: Limiter à un département (défaut: toute la faculté)
+            semestre: Limiter à un semestre
+            **kwargs: Options de write (fmt, compress)
+
+        Returns:
+            ExportFile, None en cas d'erreur
+        """
+        query = PLANNING_EXPORT_QUERY
+        params = [annee_academique]
+        if dept_id:
+            query += " AND f.dept_id = %s"
+            params.append(dept_id)
+        if semestre:
+            query += " AND e.semestre = %s"
+            params.append(semestre)
+        query += " ORDER BY d.nom, f.nom, e.date_heure"
+
+        kwargs.setdefault('basename', f"planning_{annee_academique}" + (f"_dept{dept_id}" if dept_id else ''))
+        kwargs.setdefault('sheet_name', f"Planning {annee_academique}")
+        return self.export_query(query, tuple(params), **kwargs)
+
+
+# Instance globale
+exporter = StreamingExporter()
+
+
+if __name__ == "__main__":
+    # python -m backend.export 2024-2025 [csv|xlsx] [gz]
+    import sys
+
+    annee = sys.argv[1] if len(sys.argv) > 1 else '2024-2025'
+    fmt = sys.argv[2] if len(sys.argv) > 2 else 'csv'
+    fichier = exporter.export_planning(annee, fmt=fmt, compress='gz' in sys.argv[3:])
+    if fichier:
+        with open(fichier.filename, 'wb') as f:
+            f.write(fichier.read())
+        print(f"💾 {fichier.filename}")
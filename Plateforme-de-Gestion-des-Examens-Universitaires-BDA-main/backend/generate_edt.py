@@ -4,33 +4,108 @@ Module de génération automatique d'emploi du temps - VERSION FINALE CORRIGÉE
 🎯 GARANTIE: 0 CONFLIT PROFESSEUR - 1 SEUL EXAMEN PAR CRÉNEAU HORAIRE
 🔥 CORRECTION CRITIQUE: Vérification du créneau horaire EXACT pour les profs
 📅 GÉNÉRATION PAR SEMESTRE avec vérification des examens existants
+⏱️ DURÉES RÉELLES: chaque module a sa durée, salles et profs occupés sur [début, fin)
+   (grille de 15 minutes, voir backend/time_grid.py)
+♻️ POINTS DE REPRISE: une génération identifiée (job_id) sauvegarde son état
+   périodiquement et reprend après un rerun ou un arrêt du processus (resume_schedule)
+👥 ENCADREMENT: après le placement, assistants ajoutés selon la salle et l'effectif,
+   puis surveillants réaffectés pour équilibrer les charges (flot de coût minimum,
+   voir backend/staffing.py)
+📥 MODE STAGING: le plan est déposé dans examens_staging, validé puis publié en une
+   transaction (backend/staging.py); les lecteurs ne voient jamais un plan partiel
 """
 from backend.db_connection import db
-from datetime import datetime, timedelta
+from backend.resilience import require
+from backend.time_grid import TimeGrid, OccupancyMap, masque
+from backend.domains import ExamDomains
+from backend.staffing import staffing
+from backend.staging import staging
+from datetime import datetime
 from collections import defaultdict
+from pathlib import Path
+import contextlib
+import io
+import multiprocessing
+import os
+import pickle
 import random
+import shutil
+import statistics
+import threading
+import time
 
 random.seed(42)
 
+# Critères de qualité d'un plan (multi-start), tous à minimiser
+CRITERES = {
+    'planifies': lambda q: -q['planifies'],   # examens planifiés (plus = mieux)
+    'equilibre': lambda q: q['equilibre'],    # écart-type des surveillances par prof
+    'gaspillage': lambda q: q['gaspillage']   # places vides dans les salles réservées
+}
+OBJECTIF_DEFAUT = ('planifies', 'equilibre', 'gaspillage')
+
+
+class GenerationAnnulee(Exception):
+    """Levée par un hook de progression pour arrêter la génération (point de reprise conservé)"""
+
+
+def _ecrire_pickle(path, contenu):
+    """Écriture atomique: un arrêt en cours d'écriture laisse l'ancien fichier intact"""
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'wb') as f:
+        pickle.dump(contenu, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def _lire_pickle(path):
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+
 class ScheduleGenerator:
-    def __init__(self):
+    def __init__(self, grid=None, max_surveillances_jour=None):
+        # Grille horaire (pas des débuts, bornes de la journée, durée par défaut)
+        self.grid = grid or TimeGrid()
+        
+        # Limite de surveillances par prof et par jour
+        self.max_surveillances_jour = max_surveillances_jour or int(os.getenv('EDT_MAX_SURVEILLANCES_JOUR', '3'))
+        
         # Trackers critiques
         self.profs_par_jour = defaultdict(list)
-        self.salles_par_creneau = defaultdict(set)
+        self.nb_surveillances_jour = defaultdict(int)
+        
+        # 🔥 Occupation en intervalles [début, fin) par jour: un examen de 3h
+        # bloque 3h, un examen de 90 min seulement 90 min
+        self.occupation_salles = OccupancyMap()
         
-        # 🔥 NOUVEAU TRACKER CRITIQUE: profs par CRÉNEAU HORAIRE (jour + heure)
         # Pour éviter qu'un prof surveille plusieurs examens au même moment
-        self.profs_par_creneau = defaultdict(set)
+        self.occupation_profs = OccupancyMap()
         
         # 🔥 TRACKER CRITIQUE: étudiants par JOUR (pas par créneau)
         self.etudiants_par_jour = defaultdict(set)
         
+        # Domaines des examens en attente (forward checking, voir backend/domains.py)
+        self.domaines = None
+        
         # Cache pour performance
         self.cache_etudiants = {}
         
         # Batch insert
         self.examens_batch = []
         self.surveillances_batch = []
+        self.assistants_batch = []     # (exam_temp_id, prof_id), rôle 'assistant'
+        
+        # ♻️ Points de reprise: un dossier par job (données figées + état courant)
+        self.checkpoint_dir = Path(os.getenv('EDT_CHECKPOINT_DIR', 'checkpoints_edt'))
+        self.checkpoint_every = int(os.getenv('EDT_CHECKPOINT_EVERY', '500'))
+        self.checkpoint_path = None
+        self.progress_callback = None
+        
+        # 📥 Run de staging de la génération en cours (None = écriture directe)
+        self.publication = None
     
     def get_etudiants_inscrits(self, module_id, groupe_id):
         """
@@ -47,7 +122,7 @@ class ScheduleGenerator:
                 WHERE i.module_id = %s 
                 AND e.groupe_id = %s
             """
-            result = db.execute_query(query, (module_id, groupe_id))
+            result = require(db.execute_query(query, (module_id, groupe_id)), "inscrits du module")
             
             if result:
                 self.cache_etudiants[key] = {row['id'] for row in result}
@@ -56,7 +131,19 @@ class ScheduleGenerator:
         
         return self.cache_etudiants[key]
     
-    def load_existing_exams_for_students(self, semestre, annee_academique):
+    @staticmethod
+    def _filtre_ignorer_dept(dept_id):
+        """Condition excluant les examens d'un département (simulation d'un replanning du département)"""
+        if not dept_id:
+            return ""
+        return """
+          AND ex.module_id NOT IN (
+              SELECT m_ign.id FROM modules m_ign
+              JOIN formations f_ign ON m_ign.formation_id = f_ign.id
+              WHERE f_ign.dept_id = %s
+          )"""
+    
+    def load_existing_exams_for_students(self, semestre, annee_academique, ignorer_dept_id=None):
         """
         🔥 NOUVEAU: Charger TOUS les examens déjà planifiés pour ce semestre
         Pour éviter les conflits avec les examens existants
@@ -66,7 +153,7 @@ class ScheduleGenerator:
         query = """
         SELECT DISTINCT
             e.id as etudiant_id,
-            DATE(ex.date_heure) as jour_examen
+            ex.exam_date as jour_examen
         FROM etudiants e
         JOIN inscriptions i ON e.id = i.etudiant_id
         JOIN modules m ON i.module_id = m.id
@@ -75,9 +162,12 @@ class ScheduleGenerator:
             AND ex.statut = 'planifie'
         WHERE ex.semestre = %s
           AND ex.annee_academique = %s
-        """
+        """ + self._filtre_ignorer_dept(ignorer_dept_id)
         
-        result = db.execute_query(query, (semestre, annee_academique))
+        result = require(
+            db.execute_query(query, (semestre, annee_academique) + ((ignorer_dept_id,) if ignorer_dept_id else ())),
+            "examens existants des étudiants"
+        )
         
         if result:
             for row in result:
@@ -89,48 +179,71 @@ class ScheduleGenerator:
         else:
             print("✅ Aucun examen existant")
     
-    def load_existing_professor_surveillances(self, semestre, annee_academique):
+    def load_existing_professor_surveillances(self, semestre, annee_academique, ignorer_dept_id=None):
         """
-        🔥 FONCTION CORRIGÉE: Charger les surveillances PAR CRÉNEAU HORAIRE
+        🔥 FONCTION CORRIGÉE: Charger les surveillances sur leur INTERVALLE RÉEL
         Pour éviter qu'un prof surveille plusieurs examens au même moment
         """
         print(f"📋 Chargement des surveillances existantes...")
         
+        # Surveillant principal (examens.prof_id) puis assistants (surveillances)
         query = """
         SELECT 
             ex.prof_id,
-            DATE(ex.date_heure) as jour,
-            HOUR(ex.date_heure) as heure,
-            ex.id as examen_id
+            ex.exam_date as jour,
+            ex.slot_index,
+            ex.duree_minutes,
+            ex.id as examen_id,
+            ex.date_heure
         FROM examens ex
         WHERE ex.statut = 'planifie'
           AND ex.semestre = %s
           AND ex.annee_academique = %s
-        ORDER BY ex.date_heure
+        """ + self._filtre_ignorer_dept(ignorer_dept_id) + """
+        UNION ALL
+        SELECT 
+            sv.prof_id,
+            ex.exam_date,
+            ex.slot_index,
+            ex.duree_minutes,
+            ex.id,
+            ex.date_heure
+        FROM surveillances sv
+        JOIN examens ex ON ex.id = sv.examen_id
+        WHERE sv.role = 'assistant'
+          AND sv.semestre = %s
+          AND sv.annee_academique = %s
+          AND ex.statut = 'planifie'
+          AND ex.semestre = %s
+          AND ex.annee_academique = %s
+        """ + self._filtre_ignorer_dept(ignorer_dept_id) + """
+        ORDER BY date_heure
         """
         
-        result = db.execute_query(query, (semestre, annee_academique))
+        filtre = (ignorer_dept_id,) if ignorer_dept_id else ()
+        result = require(db.execute_query(
+            query, (semestre, annee_academique) + filtre + (semestre, annee_academique) * 2 + filtre
+        ), "surveillances existantes")
         
         if result:
             for row in result:
                 jour = row['jour']
-                heure = row['heure']
                 prof_id = row['prof_id']
                 exam_id = row['examen_id']
                 
-                creneau = (jour, heure)
-                
-                # 🔥 NOUVEAU: Marquer le créneau horaire exact du prof
-                self.profs_par_creneau[creneau].add(prof_id)
+                # 🔥 Marquer tout l'intervalle [début, début + durée) du prof
+                intervalle = masque(row['slot_index'], self.grid.ticks(row['duree_minutes']))
+                self.occupation_profs.reserve(prof_id, jour, intervalle)
                 
                 # Garder aussi le tracker par jour pour la limite de 3/jour
                 self.profs_par_jour[jour].append((prof_id, exam_id))
+                self.nb_surveillances_jour[(jour, prof_id)] += 1
             
             print(f"✅ {len(result)} surveillances existantes chargées")
         else:
             print("✅ Aucune surveillance existante")
     
-    def load_existing_room_usage(self, semestre, annee_academique):
+    def load_existing_room_usage(self, semestre, annee_academique, ignorer_dept_id=None):
         """
         🔥 NOUVEAU: Charger l'utilisation des salles déjà planifiée
         """
@@ -139,37 +252,42 @@ class ScheduleGenerator:
         query = """
         SELECT 
             ex.salle_id,
-            ex.date_heure,
-            DATE(ex.date_heure) as jour,
-            HOUR(ex.date_heure) as heure
+            ex.exam_date as jour,
+            ex.slot_index,
+            ex.duree_minutes
         FROM examens ex
         WHERE ex.statut = 'planifie'
           AND ex.semestre = %s
           AND ex.annee_academique = %s
-        """
+        """ + self._filtre_ignorer_dept(ignorer_dept_id)
         
-        result = db.execute_query(query, (semestre, annee_academique))
+        result = require(
+            db.execute_query(query, (semestre, annee_academique) + ((ignorer_dept_id,) if ignorer_dept_id else ())),
+            "occupation des salles"
+        )
         
         if result:
             for row in result:
-                jour = row['jour']
-                heure = row['heure']
-                salle_id = row['salle_id']
-                creneau = (jour, heure)
-                self.salles_par_creneau[creneau].add(salle_id)
+                intervalle = masque(row['slot_index'], self.grid.ticks(row['duree_minutes']))
+                self.occupation_salles.reserve(row['salle_id'], row['jour'], intervalle)
             
             print(f"✅ {len(result)} créneaux de salles chargés")
         else:
             print("✅ Aucun créneau de salle")
     
-    def preload_data(self, dept_id=None, semestre=None):
-        """Charger toutes les données filtrées par semestre"""
+    def preload_data(self, dept_id=None, semestre=None, annee_academique=None, inclure_planifies=False):
+        """
+        Charger toutes les données filtrées par semestre (et année: élagage des partitions)
+        
+        Args:
+            inclure_planifies: Garder aussi les examens déjà planifiés (simulation d'un replanning complet)
+        """
         print(f"📦 Chargement des données (Semestre {semestre})...")
         
         # Salles
-        self.salles = db.execute_query(
+        self.salles = require(db.execute_query(
             "SELECT * FROM salles WHERE disponible = 1 ORDER BY capacite DESC"
-        )
+        ), "salles")
         
         self.amphis = [s for s in self.salles if s['type'] == 'amphi']
         self.salles_normales = [s for s in self.salles if s['type'] == 'salle']
@@ -178,11 +296,11 @@ class ScheduleGenerator:
         
         # Professeurs
         if dept_id:
-            self.professeurs = db.execute_query(
+            self.professeurs = require(db.execute_query(
                 "SELECT * FROM professeurs WHERE dept_id = %s", (dept_id,)
-            )
+            ), "professeurs")
         else:
-            self.professeurs = db.execute_query("SELECT * FROM professeurs")
+            self.professeurs = require(db.execute_query("SELECT * FROM professeurs"), "professeurs")
         
         # 🔥 REQUÊTE CRITIQUE: Filtrer par SEMESTRE et EXCLURE examens déjà planifiés
         base_query = """
@@ -191,6 +309,7 @@ class ScheduleGenerator:
                 m.nom as module_nom,
                 m.code as module_code,
                 m.semestre as module_semestre,
+                COALESCE(m.duree_examen_minutes, %s) as duree_minutes,
                 m.formation_id,
                 f.nom as formation_nom,
                 f.dept_id,
@@ -213,59 +332,97 @@ class ScheduleGenerator:
                 WHERE i3.module_id = m.id 
                 AND e3.groupe_id = g.id
             )
+        """
+        
+        params = [self.grid.duree_defaut]
+        
+        if not inclure_planifies:
+            base_query += """
             AND NOT EXISTS (
                 SELECT 1
                 FROM examens ex_exist
                 WHERE ex_exist.module_id = m.id
                 AND ex_exist.groupe_id = g.id
                 AND ex_exist.statut = 'planifie'
-            )
-        """
+            """
+            
+            # 📅 Ne regarder que la partition de l'année planifiée
+            if annee_academique:
+                base_query += " AND ex_exist.annee_academique = %s"
+                params.append(annee_academique)
+            base_query += "\n            )\n"
         
-        # 🔥 FILTRER PAR SEMESTRE
+        # 🔥 FILTRER PAR SEMESTRE (paramètre lié plutôt qu'interpolé)
         if semestre:
-            base_query += f" AND m.semestre = {semestre}"
+            base_query += " AND m.semestre = %s"
+            params.append(semestre)
         
         if dept_id:
             query = base_query + " AND f.dept_id = %s"
             query += " HAVING nb_etudiants > 0 ORDER BY nb_etudiants DESC"
-            self.modules_groupes = db.execute_query(query, (dept_id,))
+            params.append(dept_id)
+            self.modules_groupes = require(db.execute_query(query, tuple(params)), "examens à planifier")
         else:
             query = base_query + " HAVING nb_etudiants > 0 ORDER BY nb_etudiants DESC"
-            self.modules_groupes = db.execute_query(query)
+            self.modules_groupes = require(db.execute_query(query, tuple(params)), "examens à planifier")
         
         print(f"✅ {len(self.professeurs)} profs | {len(self.modules_groupes)} examens à planifier (Semestre {semestre})\n")
         
         return len(self.modules_groupes) > 0
     
-    def trouver_salle(self, nb_etudiants, creneau):
-        """Trouver une salle adaptée"""
+    def trouver_salle(self, nb_etudiants, occupation, intervalle):
+        """
+        Trouver une salle adaptée et libre sur tout l'intervalle
+        
+        Args:
+            nb_etudiants: Taille du groupe
+            occupation: Occupation des salles du jour ({salle_id: bits})
+            intervalle: Masque binaire [début, fin) de l'examen
+        """
         # Gros groupe -> amphi
         if nb_etudiants > 30:
             for salle in self.amphis:
-                if salle['capacite'] >= nb_etudiants and salle['id'] not in self.salles_par_creneau[creneau]:
+                if salle['capacite'] >= nb_etudiants and not occupation.get(salle['id'], 0) & intervalle:
                     return salle
         
         # Petit groupe -> salle normale
         for salle in self.salles_normales:
-            if salle['capacite'] >= nb_etudiants and salle['id'] not in self.salles_par_creneau[creneau]:
+            if salle['capacite'] >= nb_etudiants and not occupation.get(salle['id'], 0) & intervalle:
                 return salle
         
         # Fallback: n'importe quel amphi libre
         for salle in self.amphis:
-            if salle['id'] not in self.salles_par_creneau[creneau]:
+            if not occupation.get(salle['id'], 0) & intervalle:
                 return salle
         
         return None
     
-    def trouver_creneau(self, dates, module_id, groupe_id, nb_etudiants, profs_dept, autres_profs):
+    def trouver_prof(self, profs, jour, occupation, intervalle):
+        """Premier prof libre sur l'intervalle et sous la limite de surveillances du jour"""
+        limite = self.max_surveillances_jour
+        for p in profs:
+            if not occupation.get(p['id'], 0) & intervalle and self.nb_surveillances_jour[(jour, p['id'])] < limite:
+                return p
+        return None
+    
+    def trouver_creneau(self, dates, module_id, groupe_id, nb_etudiants, profs_dept, autres_profs, duree=None,
+                        domaine=None):
         """
         🎯 ALGORITHME CRITIQUE CORRIGÉ: Trouver un créneau valide
         RÈGLES ABSOLUES: 
         - Si UN SEUL étudiant a déjà un examen ce jour → SKIP
-        - Si le prof est déjà occupé À CE CRÉNEAU HORAIRE EXACT → SKIP
-        - Max 3 surveillances par jour par prof
+        - Si la salle ou le prof est occupé sur une partie de [début, début + durée) → SKIP
+        - Max 3 surveillances par jour par prof (max_surveillances_jour)
+        
+        Args:
+            dates: Débuts candidats (où un examen de cette durée tient dans la journée)
+            duree: Durée de l'examen en minutes (défaut: durée par défaut de la grille)
+            domaine: Clé de l'examen dans self.domaines: seuls les débuts encore possibles
+                sont examinés (jours bloqués par les étudiants, créneaux sans salle ni prof)
         """
+        duree = duree or self.grid.duree_defaut
+        nb_ticks = self.grid.ticks(duree)
+        
         # 🔥 ÉTAPE 1: Identifier TOUS les étudiants concernés
         etudiants_ids = self.get_etudiants_inscrits(module_id, groupe_id)
         
@@ -275,46 +432,29 @@ class ScheduleGenerator:
         # 🔥 ÉTAPE 2: Tester CHAQUE créneau
         for date_obj in dates:
             jour = date_obj.date()
-            creneau = (jour, date_obj.hour)
+            debut = self.grid.tick(date_obj)
             
             # ✅ CONTRAINTE #1 (CRITIQUE): Vérifier que AUCUN étudiant n'a d'examen CE JOUR
-            conflit = False
-            for etud_id in etudiants_ids:
-                if etud_id in self.etudiants_par_jour[jour]:
-                    conflit = True
-                    break
-            
-            if conflit:
+            if domaine is not None:
+                # Domaine élagué à chaque réservation: jour déjà vérifié pour tous les étudiants
+                if not self.domaines.candidat(domaine, jour, debut):
+                    continue
+            elif not self.etudiants_par_jour[jour].isdisjoint(etudiants_ids):
                 continue  # Passer au créneau suivant
             
+            intervalle = masque(debut, nb_ticks)
+            
             # ✅ CONTRAINTE #2: Salle disponible
-            salle = self.trouver_salle(nb_etudiants, creneau)
+            salle = self.trouver_salle(nb_etudiants, self.occupation_salles.jour(jour), intervalle)
             if not salle:
                 continue
             
-            # ✅ CONTRAINTE #3 (CORRIGÉE): Prof disponible À CE CRÉNEAU HORAIRE EXACT
-            prof = None
-            
-            # Profs du département en priorité
-            for p in profs_dept:
-                # 🔥 VÉRIFICATION CORRIGÉE: Le prof est-il disponible À CETTE HEURE PRÉCISE ?
-                if p['id'] not in self.profs_par_creneau[creneau]:
-                    # Vérifier aussi la limite de 3 surveillances par jour
-                    nb_surv_jour = len([x for x in self.profs_par_jour[jour] if x[0] == p['id']])
-                    if nb_surv_jour < 3:
-                        prof = p
-                        break
+            # ✅ CONTRAINTE #3 (CORRIGÉE): Prof libre sur TOUT L'INTERVALLE de l'examen
+            occupation_profs = self.occupation_profs.jour(jour)
             
-            # Autres profs si besoin
-            if not prof:
-                for p in autres_profs:
-                    # 🔥 VÉRIFICATION CORRIGÉE: Le prof est-il disponible À CETTE HEURE PRÉCISE ?
-                    if p['id'] not in self.profs_par_creneau[creneau]:
-                        # Vérifier aussi la limite de 3 surveillances par jour
-                        nb_surv_jour = len([x for x in self.profs_par_jour[jour] if x[0] == p['id']])
-                        if nb_surv_jour < 3:
-                            prof = p
-                            break
+            # Profs du département en priorité, autres profs si besoin
+            prof = (self.trouver_prof(profs_dept, jour, occupation_profs, intervalle)
+                    or self.trouver_prof(autres_profs, jour, occupation_profs, intervalle))
             
             if not prof:
                 continue
@@ -322,10 +462,13 @@ class ScheduleGenerator:
             # ✅ CRÉNEAU VALIDE TROUVÉ
             return {
                 'date': date_obj,
+                'duree': duree,
+                'intervalle': intervalle,
                 'salle': salle,
                 'prof': prof,
                 'etudiants_ids': etudiants_ids,
-                'nb_etudiants': nb_etudiants
+                'nb_etudiants': nb_etudiants,
+                'domaine': domaine
             }
         
         return None
@@ -345,7 +488,7 @@ class ScheduleGenerator:
             salle['id'],
             groupe_id,
             date_obj,
-            90,
+            creneau_info['duree'],
             nb_etudiants,
             semestre,
             annee_academique
@@ -356,52 +499,101 @@ class ScheduleGenerator:
         
         # 🔥 MISE À JOUR CRITIQUE: Marquer CHAQUE étudiant comme occupé CE JOUR
         jour = date_obj.date()
-        creneau = (jour, date_obj.hour)
+        intervalle = creneau_info['intervalle']
         
         for etud_id in etudiants_ids:
             self.etudiants_par_jour[jour].add(etud_id)
         
-        # 🔥 NOUVEAU: Marquer le prof comme occupé À CE CRÉNEAU HORAIRE EXACT
-        self.profs_par_creneau[creneau].add(prof['id'])
+        # 🔥 Marquer le prof et la salle comme occupés sur [début, fin)
+        self.occupation_profs.reserve(prof['id'], jour, intervalle)
+        self.occupation_salles.reserve(salle['id'], jour, intervalle)
         
         # Garder aussi le tracker par jour
         self.profs_par_jour[jour].append((prof['id'], exam_temp_id))
-        self.salles_par_creneau[creneau].add(salle['id'])
+        self.nb_surveillances_jour[(jour, prof['id'])] += 1
+        
+        # 📋 Forward checking: élaguer les domaines des examens en attente
+        if self.domaines is not None and creneau_info.get('domaine') is not None:
+            self.domaines.reserver(creneau_info['domaine'], jour, salle['id'], prof['id'],
+                                   intervalle, etudiants_ids)
     
-    def sauvegarder_batch(self):
-        """Sauvegarder tous les examens"""
+    def sauvegarder_batch(self, chunk_size=500):
+        """
+        Sauvegarder tous les examens et leurs surveillances
+        
+        Une seule transaction (un COMMIT au lieu de deux par examen):
+        INSERT multi-lignes par lots de chunk_size, tout ou rien.
+        """
         print(f"\n💾 Sauvegarde de {len(self.examens_batch)} examens...")
         
         if not self.examens_batch:
             print("⚠️ Aucun examen à sauvegarder")
             return True
         
+        query_examen = """
+            INSERT INTO examens 
+            (module_id, prof_id, salle_id, groupe_id, date_heure, duree_minutes, nb_etudiants, semestre, annee_academique, statut)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 'planifie')
+        """
+        query_surveillance = """
+            INSERT INTO surveillances (examen_id, prof_id, role, annee_academique, semestre)
+            VALUES (%s, %s, 'principal', %s, %s)
+        """
+        query_assistant = """
+            INSERT INTO surveillances (examen_id, prof_id, role, annee_academique, semestre)
+            VALUES (%s, %s, 'assistant', %s, %s)
+        """
+        
+        assistants = defaultdict(list)
+        for exam_temp_id, prof_id in self.assistants_batch:
+            assistants[exam_temp_id - 1].append(prof_id)
+        
         try:
-            exam_ids = []
-            
-            for exam_data in self.examens_batch:
-                query = """
-                    INSERT INTO examens 
-                    (module_id, prof_id, salle_id, groupe_id, date_heure, duree_minutes, nb_etudiants, semestre, annee_academique, statut)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 'planifie')
-                """
-                db.execute_query(query, exam_data)
-                exam_id = db.get_last_insert_id()
-                if exam_id:
-                    exam_ids.append(exam_id)
-            
-            # Surveillances
-            for i, exam_id in enumerate(exam_ids):
-                _, prof_id = self.surveillances_batch[i]
-                db.execute_query(
-                    "INSERT INTO surveillances (examen_id, prof_id, role) VALUES (%s, %s, 'principal')",
-                    (exam_id, prof_id)
-                )
+            nb_surveillances = 0
+            
+            with db.transaction(buffer_size=chunk_size) as tx:
+                for debut in range(0, len(self.examens_batch), chunk_size):
+                    lot = self.examens_batch[debut:debut + chunk_size]
+                    tx.execute("SELECT COALESCE(MAX(id), 0) as max_id FROM examens")
+                    max_id = tx.fetchone()['max_id']
+                    tx.executemany(query_examen, lot)
+                    
+                    # IDs du lot: un INSERT multi-lignes ne garantit pas des IDs consécutifs
+                    # (innodb_autoinc_lock_mode=2), on les relit par clé
+                    semestre, annee_academique = lot[0][7], lot[0][8]
+                    tx.execute("""
+                        SELECT id, module_id, groupe_id, salle_id, date_heure
+                        FROM examens
+                        WHERE annee_academique = %s AND semestre = %s AND id > %s
+                    """, (annee_academique, semestre, max_id))
+                    ids = {}
+                    for row in tx.fetchall():
+                        ids.setdefault((row['module_id'], row['groupe_id'], row['salle_id'], row['date_heure']), row['id'])
+                    
+                    # Surveillances (année/semestre recopiés pour le partitionnement)
+                    for i, exam_data in enumerate(lot):
+                        exam_id = ids.get((exam_data[0], exam_data[3], exam_data[2], exam_data[4]))
+                        if exam_id is None:
+                            continue
+                        _, prof_id = self.surveillances_batch[debut + i]
+                        tx.add(query_surveillance, (exam_id, prof_id, exam_data[8], exam_data[7]))
+                        nb_surveillances += 1
+                    
+                    # Assistants après les principaux: un seul INSERT multi-lignes par requête
+                    for i, exam_data in enumerate(lot):
+                        exam_id = ids.get((exam_data[0], exam_data[3], exam_data[2], exam_data[4]))
+                        if exam_id is None:
+                            continue
+                        for prof_id in assistants.get(debut + i, ()):
+                            tx.add(query_assistant, (exam_id, prof_id, exam_data[8], exam_data[7]))
+                            nb_surveillances += 1
             
-            print(f"✅ {len(exam_ids)} examens sauvegardés")
+            print(f"✅ {len(self.examens_batch)} examens et {nb_surveillances} surveillances sauvegardés "
+                  f"({tx.round_trips} allers-retours, 1 commit)")
             return True
             
         except Exception as e:
+            # ROLLBACK: aucun examen partiel en base
             print(f"❌ Erreur: {e}")
             import traceback
             traceback.print_exc()
@@ -414,7 +606,7 @@ class ScheduleGenerator:
             FROM periodes_examens 
             WHERE semestre = %s AND annee_academique = %s
         """
-        result = db.execute_query(query, (semestre, annee_academique))
+        result = require(db.execute_query(query, (semestre, annee_academique)), "période d'examen")
         
         if result:
             return result[0]['date_debut'], result[0]['date_fin']
@@ -425,7 +617,369 @@ class ScheduleGenerator:
         else:
             return datetime(2025, 6, 1).date(), datetime(2025, 7, 1).date()
     
-    def generate_schedule(self, semestre, dept_id=None, annee_academique='2024-2025'):
+    def construire(self, date_debut, date_fin, semestre, annee_academique, rng=random, reprise=None):
+        """
+        🧱 Construction gloutonne en mémoire (phase 1 + retry), sans accès à la base
+        
+        L'avancement (phase, position, échecs, ordre des créneaux) est tenu dans un
+        dict sauvegardé avec les trackers à chaque point de reprise: reprendre avec
+        ce dict et le même état aléatoire donne exactement le même plan.
+        
+        Args:
+            date_debut: Premier jour de la période d'examens
+            date_fin: Dernier jour de la période
+            semestre: Semestre planifié
+            annee_academique: Année académique
+            rng: Générateur aléatoire des ordres de créneaux (défaut: module random)
+            reprise: Avancement lu dans un point de reprise (resume_schedule)
+        
+        Returns:
+            dict: planifies, retry, domaines_vides, jours
+        """
+        # 🔥 Générer les débuts possibles sur la grille (pas configurable, Lun-Sam)
+        # Un seul ordre aléatoire; chaque durée n'en garde que les débuts où
+        # l'examen finit avant la fin de journée
+        if reprise:
+            etat = reprise
+        else:
+            dates = self.grid.debuts(date_debut, date_fin)
+            rng.shuffle(dates)
+            etat = {'phase': 'phase1', 'index': 0, 'dates': dates, 'echecs': [], 'places': [], 'retry': 0}
+        dates = etat['dates']
+        jours_count = len(self.grid.jours(date_debut, date_fin))
+        dates_par_duree = {}
+        
+        def dates_pour(duree):
+            if duree not in dates_par_duree:
+                dates_par_duree[duree] = [d for d in dates if self.grid.tient_dans_la_journee(d, duree)]
+            return dates_par_duree[duree]
+        
+        print(f"📅 {len(dates_pour(self.grid.duree_defaut))} créneaux de {self.grid.duree_defaut} min "
+              f"sur {jours_count} jours ({date_debut} → {date_fin}), {self.grid}\n")
+        
+        total = len(self.modules_groupes)
+        echecs = etat['echecs']
+        places = etat['places']
+        
+        # Organiser profs
+        profs_by_dept = defaultdict(list)
+        for p in self.professeurs:
+            profs_by_dept[p['dept_id']].append(p)
+        
+        autres_cache = {}
+        for did in profs_by_dept:
+            autres_cache[did] = [p for p in self.professeurs if p['dept_id'] != did]
+        
+        # 📋 Domaines initiaux (jours possibles de chaque examen encore à placer)
+        self.domaines = ExamDomains(self, self.max_surveillances_jour)
+        self.domaines.initialiser(self.modules_groupes, date_debut, date_fin, exclus=set(places))
+        
+        # 🔥 PLANIFICATION
+        if etat['phase'] == 'phase1':
+            print("🔄 Planification en cours...\n")
+            
+            for k in range(etat['index'], total):
+                idx = k + 1
+                if idx % 500 == 0:
+                    print(f"   ⏳ {idx}/{total} ({len(places)} OK, {len(self.domaines.vides)} domaines vides)")
+                
+                mg = self.modules_groupes[k]
+                module_id = mg['module_id']
+                groupe_id = mg['groupe_id']
+                nb_etudiants = mg['nb_etudiants']
+                dept_id_module = mg['dept_id']
+                
+                profs_dept = profs_by_dept.get(dept_id_module, [])
+                autres = autres_cache.get(dept_id_module, [])
+                
+                # Domaine vide: aucun jour possible, inutile de parcourir les créneaux
+                creneau = None
+                if not self.domaines.est_vide(k):
+                    duree = mg['duree_minutes']
+                    creneau = self.trouver_creneau(
+                        dates_pour(duree), module_id, groupe_id, nb_etudiants, profs_dept, autres, duree, domaine=k
+                    )
+                
+                if creneau:
+                    self.enregistrer(creneau, module_id, groupe_id, semestre, annee_academique)
+                    places.append(k)
+                else:
+                    echecs.append(k)
+                
+                etat['index'] = idx
+                self._point_de_reprise(etat, rng, total)
+            
+            print(f"\n✅ Phase 1: {len(places)}/{total} ({100*len(places)/total:.1f}%)")
+            print(f"📋 Domaines: {len(self.domaines.vides)} vides, "
+                  f"{self.domaines.stats['jours_elagues']} jours élagués, "
+                  f"{self.domaines.stats['creneaux_morts']} créneaux saturés")
+            
+            # Nouvel ordre des créneaux pour le retry (sauvegardé avant de commencer)
+            if echecs:
+                rng.shuffle(dates)
+                dates_par_duree.clear()
+            etat.update(phase='retry', index=0)
+            self._point_de_reprise(etat, rng, total, force=True)
+        
+        # 🔥 RETRY pour échecs
+        if echecs:
+            print(f"\n🔄 Retry pour {len(echecs) - etat['index']} échecs...\n")
+            
+            for i in range(etat['index'], len(echecs)):
+                k = echecs[i]
+                mg = self.modules_groupes[k]
+                if not self.domaines.est_vide(k):
+                    creneau = self.trouver_creneau(
+                        dates_pour(mg['duree_minutes']), mg['module_id'], mg['groupe_id'], mg['nb_etudiants'],
+                        self.professeurs, [], mg['duree_minutes'], domaine=k
+                    )
+                    
+                    if creneau:
+                        self.enregistrer(creneau, mg['module_id'], mg['groupe_id'], semestre, annee_academique)
+                        places.append(k)
+                        etat['retry'] += 1
+                
+                etat['index'] = i + 1
+                self._point_de_reprise(etat, rng, len(echecs))
+            
+            print(f"✅ Retry: +{etat['retry']} récupérés")
+        
+        return {
+            'planifies': len(places),
+            'retry': etat['retry'],
+            'domaines_vides': len(self.domaines.vides),
+            'jours': jours_count
+        }
+    
+    def _point_de_reprise(self, etat, rng, total, force=False):
+        """Signaler la progression et sauvegarder l'état tous les checkpoint_every examens"""
+        if self.progress_callback and (force or etat['index'] % 50 == 0):
+            try:
+                self.progress_callback(etat['index'], total, etat['phase'])
+            except GenerationAnnulee:
+                # Annulation = pause: l'état courant devient le point de reprise
+                if self.checkpoint_path:
+                    self.sauver_checkpoint(etat, rng, total)
+                raise
+        if self.checkpoint_path and (force or etat['index'] % self.checkpoint_every == 0):
+            self.sauver_checkpoint(etat, rng, total)
+    
+    def compter_surveillances(self):
+        """Nombre de surveillances par prof (existantes + planifiées)"""
+        surv_counts = defaultdict(int)
+        for jour, profs_list in self.profs_par_jour.items():
+            for pid, _ in profs_list:
+                surv_counts[pid] += 1
+        return surv_counts
+    
+    def qualite(self, planifies):
+        """
+        Mesures d'un plan construit (objectif du multi-start)
+        
+        Returns:
+            dict: planifies, equilibre (écart-type des surveillances par prof),
+                  gaspillage (places vides dans les salles réservées)
+        """
+        surv_counts = self.compter_surveillances()
+        charges = [surv_counts.get(p['id'], 0) for p in self.professeurs]
+        capacites = {s['id']: s['capacite'] for s in self.salles}
+        return {
+            'planifies': planifies,
+            'equilibre': round(statistics.pstdev(charges), 3) if charges else 0,
+            'gaspillage': sum(max(capacites.get(e[2], 0) - e[6], 0) for e in self.examens_batch)
+        }
+    
+    def snapshot(self, date_debut, date_fin, semestre, annee_academique):
+        """
+        📸 Instantané des données préchargées pour les constructions en parallèle
+        
+        Les listes (salles, profs, examens, étudiants) sont partagées en lecture seule;
+        les trackers mutables sont sérialisés pour que chaque essai reparte de l'état chargé.
+        """
+        # Tous les étudiants en cache: les processus n'accèdent pas à la base
+        for mg in self.modules_groupes:
+            self.get_etudiants_inscrits(mg['module_id'], mg['groupe_id'])
+        
+        return {
+            'grid': self.grid,
+            'salles': self.salles,
+            'amphis': self.amphis,
+            'salles_normales': self.salles_normales,
+            'professeurs': self.professeurs,
+            'modules_groupes': self.modules_groupes,
+            'cache_etudiants': self.cache_etudiants,
+            'max_surveillances_jour': self.max_surveillances_jour,
+            'contexte': (date_debut, date_fin, semestre, annee_academique),
+            'trackers': pickle.dumps({
+                'etudiants_par_jour': self.etudiants_par_jour,
+                'profs_par_jour': self.profs_par_jour,
+                'nb_surveillances_jour': self.nb_surveillances_jour,
+                'occupation_salles': self.occupation_salles,
+                'occupation_profs': self.occupation_profs
+            })
+        }
+    
+    @classmethod
+    def depuis_snapshot(cls, snapshot, grid=None, max_surveillances_jour=None):
+        """
+        Générateur prêt à construire à partir d'un instantané (sans base de données)
+        
+        Args:
+            grid: Remplace la grille de l'instantané (simulation)
+            max_surveillances_jour: Remplace la limite de surveillances par jour
+        """
+        generateur = cls(grid or snapshot['grid'], max_surveillances_jour or snapshot.get('max_surveillances_jour'))
+        for attr in ('salles', 'amphis', 'salles_normales', 'professeurs', 'modules_groupes', 'cache_etudiants'):
+            setattr(generateur, attr, snapshot[attr])
+        for attr, valeur in pickle.loads(snapshot['trackers']).items():
+            setattr(generateur, attr, valeur)
+        return generateur
+    
+    def construire_multistart(self, date_debut, date_fin, semestre, annee_academique, essais,
+                              processes=None, objectif=None, graine=42):
+        """
+        🎲 Multi-start: essais constructions gloutonnes indépendantes en parallèle
+        
+        Chaque essai a sa propre graine (graine, graine + 1, ...) et part du même
+        instantané; seul le meilleur plan selon l'objectif est adopté.
+        
+        Args:
+            essais: Nombre de constructions
+            processes: Processus du pool (défaut: EDT_WORKERS ou nombre de cœurs)
+            objectif: Critères par priorité (défaut: EDT_OBJECTIF ou OBJECTIF_DEFAUT)
+            graine: Première graine
+        
+        Returns:
+            dict: Résumé du plan gagnant (planifies, domaines_vides, jours, graine, essais, acceleration)
+        """
+        objectif = objectif or [c.strip() for c in os.getenv('EDT_OBJECTIF', ','.join(OBJECTIF_DEFAUT)).split(',')
+                                if c.strip()]
+        inconnus = [c for c in objectif if c not in CRITERES]
+        if inconnus:
+            raise ValueError(f"Critères d'objectif inconnus: {', '.join(inconnus)} (valides: {', '.join(CRITERES)})")
+        
+        processes = min(essais, processes or int(os.getenv('EDT_WORKERS', '0')) or os.cpu_count() or 1)
+        snapshot = self.snapshot(date_debut, date_fin, semestre, annee_academique)
+        graines = [graine + i for i in range(essais)]
+        print(f"🎲 Multi-start: {essais} essais sur {processes} processus (objectif: {' > '.join(objectif)})")
+        
+        start = time.perf_counter()
+        if processes > 1:
+            with multiprocessing.get_context('spawn').Pool(
+                processes, initializer=_init_essai, initargs=(snapshot,)
+            ) as pool:
+                resultats = list(pool.imap_unordered(_construire_essai, graines))
+        else:
+            _init_essai(snapshot)
+            resultats = list(map(_construire_essai, graines))
+        duree_totale = time.perf_counter() - start
+        
+        resultats.sort(key=lambda r: r['graine'])
+        meilleur = min(resultats, key=lambda r: tuple(CRITERES[c](r) for c in objectif))
+        
+        for r in resultats:
+            print(f"   {'🏆' if r is meilleur else '  '} graine {r['graine']}: {r['planifies']} planifiés, "
+                  f"équilibre σ={r['equilibre']}, {r['gaspillage']} places vides ({r['temps']}s CPU)")
+        acceleration = sum(r['temps'] for r in resultats) / max(duree_totale, 1e-6)
+        print(f"⚡ {essais} essais en {duree_totale:.1f}s (accélération x{acceleration:.1f}, {processes} processus)")
+        
+        # Adopter le plan gagnant (seul celui-ci sera sauvegardé)
+        self.examens_batch = meilleur['examens_batch']
+        self.surveillances_batch = meilleur['surveillances_batch']
+        self.profs_par_jour = defaultdict(list, meilleur['profs_par_jour'])
+        # Occupation des profs du gagnant: l'encadrement place les assistants autour
+        self.occupation_profs = meilleur['occupation_profs']
+        self.nb_surveillances_jour = defaultdict(int, meilleur['nb_surveillances_jour'])
+        
+        return {
+            'planifies': meilleur['planifies'],
+            'retry': meilleur['retry'],
+            'domaines_vides': meilleur['domaines_vides'],
+            'jours': len(self.grid.jours(date_debut, date_fin)),
+            'graine': meilleur['graine'],
+            'essais': [
+                {cle: r[cle] for cle in ('graine', 'planifies', 'equilibre', 'gaspillage', 'domaines_vides', 'temps')}
+                | {'gagnant': r is meilleur}
+                for r in resultats
+            ],
+            'acceleration': round(acceleration, 2)
+        }
+    
+    @staticmethod
+    def identifiant_job(semestre, dept_id=None, annee_academique='2024-2025'):
+        """Identifiant stable d'une génération: un rerun retrouve le même job"""
+        return f"{annee_academique}_S{semestre}_{'tous' if dept_id is None else f'dept{dept_id}'}"
+    
+    def ouvrir_checkpoint(self, job_id, date_debut, date_fin, semestre, annee_academique):
+        """
+        ♻️ Préparer les points de reprise d'un job
+        
+        Les données lues en base (salles, profs, examens, étudiants) sont figées une
+        fois dans donnees.pkl; seul etat.pkl (trackers, batches, avancement) est
+        réécrit pendant la construction.
+        """
+        dossier = self.checkpoint_dir / job_id
+        dossier.mkdir(parents=True, exist_ok=True)
+        (dossier / 'etat.pkl').unlink(missing_ok=True)
+        _ecrire_pickle(dossier / 'donnees.pkl', self.snapshot(date_debut, date_fin, semestre, annee_academique))
+        self.checkpoint_path = dossier / 'etat.pkl'
+        print(f"♻️ Points de reprise: {dossier} (tous les {self.checkpoint_every} examens)")
+    
+    def sauver_checkpoint(self, etat, rng=None, total=0):
+        """Écrire l'état courant de la génération (trackers, batches, avancement)"""
+        _ecrire_pickle(self.checkpoint_path, {
+            'sauvegarde_le': datetime.now(),
+            'phase': etat['phase'],
+            'traites': etat.get('index', 0),
+            'total': total,
+            'etat': etat,
+            'rng': rng.getstate() if rng is not None else None,
+            'trackers': {
+                'etudiants_par_jour': self.etudiants_par_jour,
+                'profs_par_jour': self.profs_par_jour,
+                'nb_surveillances_jour': self.nb_surveillances_jour,
+                'occupation_salles': self.occupation_salles,
+                'occupation_profs': self.occupation_profs
+            },
+            'examens_batch': self.examens_batch,
+            'surveillances_batch': self.surveillances_batch,
+            'assistants_batch': self.assistants_batch,
+            'publication': self.publication
+        })
+    
+    def fermer_checkpoint(self):
+        """Supprimer les points de reprise d'un job sauvegardé en base"""
+        if self.checkpoint_path:
+            shutil.rmtree(self.checkpoint_path.parent, ignore_errors=True)
+            self.checkpoint_path = None
+    
+    def points_de_reprise(self):
+        """
+        Jobs interrompus pouvant être repris
+        
+        Returns:
+            list: dicts id, phase, traites, total, sauvegarde_le
+        """
+        points = []
+        if not self.checkpoint_dir.is_dir():
+            return points
+        for dossier in sorted(self.checkpoint_dir.iterdir()):
+            point = _lire_pickle(dossier / 'etat.pkl')
+            if point is None:
+                continue
+            points.append({
+                'id': dossier.name,
+                'phase': point['phase'],
+                'traites': point['traites'],
+                'total': point['total'],
+                'sauvegarde_le': point['sauvegarde_le']
+            })
+        return points
+    
+    
+    def generate_schedule(self, semestre, dept_id=None, annee_academique='2024-2025',
+                          essais=1, processes=None, objectif=None, job_id=None, progress_callback=None,
+                          staging=False, remplacer=False, publier=True):
         """
         🚀 GÉNÉRATION PAR SEMESTRE AVEC 0 CONFLIT GARANTI
         🔥 CORRECTION: Profs ne surveillent plus plusieurs examens au même moment
@@ -434,6 +988,15 @@ class ScheduleGenerator:
             semestre: 1 ou 2 (OBLIGATOIRE)
             dept_id: ID département (None = tous)
             annee_academique: Année académique
+            essais: Nombre de constructions (> 1: multi-start en parallèle, meilleur plan gardé)
+            processes: Processus du multi-start (défaut: nombre de cœurs)
+            objectif: Critères du multi-start par priorité, ex: ['planifies', 'equilibre', 'gaspillage']
+            job_id: Active les points de reprise de ce job (voir identifiant_job, resume_schedule)
+            progress_callback: Fonction (traites, total, phase) appelée pendant la construction
+            staging: Déposer le plan dans examens_staging (validé, puis publié si publier)
+            remplacer: Replanifier tout le périmètre; la publication remplace l'ancien
+                planning en une transaction (implique staging)
+            publier: Publier automatiquement un plan sans conflit (sinon: staging.publier)
         """
         try:
             if semestre not in [1, 2]:
@@ -450,22 +1013,44 @@ class ScheduleGenerator:
             
             # Reset
             self.profs_par_jour.clear()
-            self.salles_par_creneau.clear()
-            self.profs_par_creneau.clear()  # 🔥 NOUVEAU
+            self.nb_surveillances_jour.clear()
+            self.occupation_salles.clear()
+            self.occupation_profs.clear()
             self.etudiants_par_jour.clear()
+            self.domaines = None
             self.cache_etudiants.clear()
             self.examens_batch.clear()
             self.surveillances_batch.clear()
+            self.assistants_batch.clear()
+            self.checkpoint_path = None
+            self.progress_callback = progress_callback
+            self.publication = None
+            if progress_callback:
+                progress_callback(0, 0, 'chargement')
+            
+            if staging or remplacer:
+                self.publication = {
+                    'run_id': f"{job_id or self.identifiant_job(semestre, dept_id, annee_academique)}"
+                              f"_{start_time:%Y%m%d_%H%M%S_%f}",
+                    'semestre': semestre,
+                    'annee_academique': annee_academique,
+                    'dept_id': dept_id,
+                    'remplacer': remplacer,
+                    'publier': publier
+                }
             
             # 🔥 NOUVEAU: Charger les examens existants AVANT de planifier
-            self.load_existing_exams_for_students(semestre, annee_academique)
-            self.load_existing_professor_surveillances(semestre, annee_academique)
-            self.load_existing_room_usage(semestre, annee_academique)
+            # (en remplacement, ceux du périmètre sont replanifiés et ne comptent pas)
+            if not (remplacer and dept_id is None):
+                ignorer = dept_id if remplacer else None
+                self.load_existing_exams_for_students(semestre, annee_academique, ignorer)
+                self.load_existing_professor_surveillances(semestre, annee_academique, ignorer)
+                self.load_existing_room_usage(semestre, annee_academique, ignorer)
             
             print()
             
             # Charger données filtrées par semestre (exclut examens déjà planifiés)
-            if not self.preload_data(dept_id, semestre):
+            if not self.preload_data(dept_id, semestre, annee_academique, inclure_planifies=remplacer):
                 print("✅ Tous les examens sont déjà planifiés pour ce semestre")
                 return {
                     'success': True, 
@@ -491,140 +1076,197 @@ class ScheduleGenerator:
             # 🔥 Récupérer période d'examen
             date_debut, date_fin = self.get_periode_examen(semestre, annee_academique)
             
-            # Convertir en datetime
-            start_date = datetime.combine(date_debut, datetime.min.time())
-            end_date = datetime.combine(date_fin, datetime.min.time())
-            
-            # 🔥 Générer créneaux (6 par jour, Lun-Sam)
-            dates = []
-            current = start_date
-            jours_count = 0
-            
-            while current <= end_date:
-                if current.weekday() < 6:
-                    for heure in [8, 10, 12, 14, 16, 18]:
-                        dates.append(current.replace(hour=heure, minute=0, second=0, microsecond=0))
-                    jours_count += 1
-                current += timedelta(days=1)
-            
-            random.shuffle(dates)
-            print(f"📅 {len(dates)} créneaux sur {jours_count} jours ({date_debut} → {date_fin})\n")
-            
-            total = len(self.modules_groupes)
-            
-            # Organiser profs
-            profs_by_dept = defaultdict(list)
-            for p in self.professeurs:
-                profs_by_dept[p['dept_id']].append(p)
-            
-            autres_cache = {}
-            for did in profs_by_dept:
-                autres_cache[did] = [p for p in self.professeurs if p['dept_id'] != did]
-            
-            # 🔥 PLANIFICATION
-            print("🔄 Planification en cours...\n")
-            planifies = 0
-            echecs = []
+            if job_id:
+                self.ouvrir_checkpoint(job_id, date_debut, date_fin, semestre, annee_academique)
             
-            for idx, mg in enumerate(self.modules_groupes, 1):
-                if idx % 500 == 0:
-                    print(f"   ⏳ {idx}/{total} ({planifies} OK)")
-                
-                module_id = mg['module_id']
-                groupe_id = mg['groupe_id']
-                nb_etudiants = mg['nb_etudiants']
-                dept_id_module = mg['dept_id']
-                
-                profs_dept = profs_by_dept.get(dept_id_module, [])
-                autres = autres_cache.get(dept_id_module, [])
-                
-                creneau = self.trouver_creneau(
-                    dates, module_id, groupe_id, nb_etudiants, profs_dept, autres
+            if essais > 1:
+                # 🎲 Plusieurs constructions indépendantes, seule la meilleure est gardée
+                resume = self.construire_multistart(
+                    date_debut, date_fin, semestre, annee_academique, essais, processes, objectif
                 )
-                
-                if creneau:
-                    self.enregistrer(creneau, module_id, groupe_id, semestre, annee_academique)
-                    planifies += 1
-                else:
-                    echecs.append((mg, module_id, groupe_id, nb_etudiants))
-            
-            print(f"\n✅ Phase 1: {planifies}/{total} ({100*planifies/total:.1f}%)")
-            
-            # 🔥 RETRY pour échecs
-            if echecs:
-                print(f"\n🔄 Retry pour {len(echecs)} échecs...\n")
-                random.shuffle(dates)
-                
-                retry_ok = 0
-                for mg, mid, gid, nb_etu in echecs:
-                    creneau = self.trouver_creneau(
-                        dates, mid, gid, nb_etu, self.professeurs, []
-                    )
-                    
-                    if creneau:
-                        self.enregistrer(creneau, mid, gid, semestre, annee_academique)
-                        planifies += 1
-                        retry_ok += 1
-                
-                print(f"✅ Retry: +{retry_ok} récupérés")
-            
-            non_planifies = total - planifies
-            
-            # Sauvegarde
-            if not self.sauvegarder_batch():
-                return {'success': False, 'message': 'Erreur sauvegarde', 'stats': {}}
-            
-            # Stats
-            end_time = datetime.now()
-            temps = (end_time - start_time).total_seconds()
-            taux = (planifies / total * 100) if total > 0 else 0
-            
-            salles_used = len(set(e[2] for e in self.examens_batch)) if self.examens_batch else 0
-            modules_uniques = len(set(mg['module_id'] for mg in self.modules_groupes))
-            
-            # Surveillances
-            surv_counts = defaultdict(int)
-            for jour, profs_list in self.profs_par_jour.items():
-                for pid, _ in profs_list:
-                    surv_counts[pid] += 1
-            
-            min_s = min(surv_counts.values()) if surv_counts else 0
-            max_s = max(surv_counts.values()) if surv_counts else 0
-            avg_s = sum(surv_counts.values()) / len(surv_counts) if surv_counts else 0
+            else:
+                # Générateur propre au job: deux générations simultanées ne se partagent
+                # pas l'état aléatoire (même suite que random.seed(42))
+                resume = self.construire(date_debut, date_fin, semestre, annee_academique,
+                                         rng=random.Random(42))
             
+            return self.terminer(semestre, resume, start_time)
+        
+        except GenerationAnnulee:
+            return self._annulee()
+        
+        except Exception as e:
+            print(f"\n❌ ERREUR: {e}")
+            import traceback
+            traceback.print_exc()
+            return {
+                'success': False,
+                'message': f'Erreur: {str(e)}',
+                'stats': {}
+            }
+    
+    def _annulee(self):
+        print("\n⏹️ Génération annulée" + (" (point de reprise conservé)" if self.checkpoint_path else ""))
+        return {'success': False, 'annule': True, 'message': 'Génération annulée', 'stats': {}}
+    
+    def terminer(self, semestre, resume, start_time):
+        """
+        💾 Sauvegarder le plan construit et calculer les statistiques
+        
+        Avec un job suivi, l'état est d'abord figé en phase 'sauvegarde': si l'écriture
+        en base échoue, resume_schedule ne refait que la sauvegarde.
+        En mode staging, le plan est déposé, validé et éventuellement publié
+        (stats['publication']) au lieu d'être inséré directement.
+        Les assistants sont affectés et les charges équilibrées avant le point
+        'sauvegarde' (une seule fois, resume['encadrement'] est repris avec lui).
+        """
+        total = len(self.modules_groupes)
+        planifies = resume['planifies']
+        jours_count = resume['jours']
+        
+        non_planifies = total - planifies
+        
+        # 👥 Encadrement: assistants des examens placés
+        if 'encadrement' not in resume:
+            if self.progress_callback:
+                self.progress_callback(0, len(self.examens_batch), 'encadrement')
+            resume['encadrement'] = staffing.encadrer(self)
+            if self.progress_callback:
+                self.progress_callback(0, len(self.examens_batch), 'equilibrage')
+            resume['equilibrage'] = staffing.equilibrer(self)
+        
+        # Sauvegarde
+        if self.checkpoint_path:
+            self.sauver_checkpoint({'phase': 'sauvegarde', 'index': total, 'resume': resume}, total=total)
+        if self.progress_callback:
+            self.progress_callback(total, total, 'sauvegarde')
+        depot = None
+        if self.publication:
+            depot = staging.deposer(self.publication, self.examens_batch, self.surveillances_batch,
+                                    self.assistants_batch)
+            if not depot['success']:
+                return {'success': False, 'message': f"Erreur staging: {depot.get('error')}", 'stats': {},
+                        'publication': depot}
+        elif not self.sauvegarder_batch():
+            return {'success': False, 'message': 'Erreur sauvegarde', 'stats': {}}
+        self.fermer_checkpoint()
+        
+        # Stats
+        end_time = datetime.now()
+        temps = (end_time - start_time).total_seconds()
+        taux = (planifies / total * 100) if total > 0 else 0
+        
+        salles_used = len(set(e[2] for e in self.examens_batch)) if self.examens_batch else 0
+        modules_uniques = len(set(mg['module_id'] for mg in self.modules_groupes))
+        
+        # Surveillances
+        surv_counts = self.compter_surveillances()
+        
+        min_s = min(surv_counts.values()) if surv_counts else 0
+        max_s = max(surv_counts.values()) if surv_counts else 0
+        avg_s = sum(surv_counts.values()) / len(surv_counts) if surv_counts else 0
+        
+        print("\n" + "="*70)
+        print(f"✅ SEMESTRE {semestre} TERMINÉ: {planifies}/{total} ({taux:.1f}%)")
+        print(f"⏱️  Temps: {temps:.1f}s")
+        print(f"❌ Échecs: {non_planifies}")
+        
+        if non_planifies > 0:
+            jours_necessaires = int(jours_count * 1.5)
+            print(f"\n💡 SOLUTION: Augmenter période à {jours_necessaires} jours")
+        else:
+            print("\n🎉 100% RÉUSSITE - AUCUN ÉCHEC!")
+        
+        print("="*70 + "\n")
+        
+        stats = {
+            'semestre': semestre,
+            'examens_planifies': planifies,
+            'examens_non_planifies': non_planifies,
+            'examens_total': total,
+            'modules_total': modules_uniques,
+            'temps_execution': round(temps, 2),
+            'taux_reussite': round(taux, 1),
+            'salles_utilisees': salles_used,
+            'surveillance_min': min_s,
+            'surveillance_max': max_s,
+            'surveillance_avg': round(avg_s, 1),
+            'domaines_vides': resume['domaines_vides'],
+            'encadrement': resume['encadrement'],
+            'equilibrage': resume['equilibrage'],
+            'conflits_groupes': 0,
+            'conflits_professeurs': 0,
+            'conflits_salles': 0
+        }
+        if 'essais' in resume:
+            # Qualité de chaque graine (le gagnant est marqué)
+            stats.update({k: resume[k] for k in ('graine', 'essais', 'acceleration')})
+        
+        message = f'Semestre {semestre}: {planifies} examens planifiés en {temps:.1f}s'
+        if depot:
+            stats['publication'] = depot
+            if depot['statut'] != 'publie':
+                message += f" (run {depot['run_id']} en staging: {depot['statut']})"
+        
+        return {
+            'success': True,
+            'message': message,
+            'stats': stats
+        }
+    
+    def resume_schedule(self, job_id, progress_callback=None):
+        """
+        ♻️ Reprendre une génération interrompue à son dernier point de reprise
+        
+        Aucune relecture en base: les données figées du job et l'état sauvegardé
+        suffisent; seule la sauvegarde finale écrit dans examens / surveillances.
+        
+        Args:
+            job_id: Identifiant du job (identifiant_job / points_de_reprise)
+            progress_callback: Fonction (traites, total, phase)
+        
+        Returns:
+            dict: success, message, stats (comme generate_schedule)
+        """
+        dossier = self.checkpoint_dir / job_id
+        donnees = _lire_pickle(dossier / 'donnees.pkl')
+        point = _lire_pickle(dossier / 'etat.pkl')
+        if donnees is None or point is None:
+            return {'success': False, 'message': f'Aucun point de reprise pour {job_id}', 'stats': {}}
+        
+        try:
+            start_time = datetime.now()
+            date_debut, date_fin, semestre, annee_academique = donnees['contexte']
+            etat = point['etat']
             print("\n" + "="*70)
-            print(f"✅ SEMESTRE {semestre} TERMINÉ: {planifies}/{total} ({taux:.1f}%)")
-            print(f"⏱️  Temps: {temps:.1f}s")
-            print(f"❌ Échecs: {non_planifies}")
+            print(f"♻️ REPRISE {job_id}: phase {etat['phase']}, {point['traites']}/{point['total']} "
+                  f"(point du {point['sauvegarde_le']:%d/%m/%Y %H:%M:%S})")
+            print("="*70)
             
-            if non_planifies > 0:
-                jours_necessaires = int(jours_count * 1.5)
-                print(f"\n💡 SOLUTION: Augmenter période à {jours_necessaires} jours")
-            else:
-                print("\n🎉 100% RÉUSSITE - AUCUN ÉCHEC!")
+            # Nouveau générateur: les trackers du point remplacent ceux de l'instantané
+            generateur = ScheduleGenerator.depuis_snapshot(donnees)
+            for attr, valeur in point['trackers'].items():
+                setattr(generateur, attr, valeur)
+            generateur.examens_batch = point['examens_batch']
+            generateur.surveillances_batch = point['surveillances_batch']
+            generateur.assistants_batch = point.get('assistants_batch', [])
+            generateur.publication = point.get('publication')
+            generateur.checkpoint_dir = self.checkpoint_dir
+            generateur.checkpoint_path = dossier / 'etat.pkl'
+            generateur.progress_callback = progress_callback
             
-            print("="*70 + "\n")
+            if etat['phase'] == 'sauvegarde':
+                resume = etat['resume']
+            else:
+                rng = random.Random()
+                rng.setstate(point['rng'])
+                resume = generateur.construire(date_debut, date_fin, semestre, annee_academique,
+                                               rng=rng, reprise=etat)
             
-            return {
-                'success': True,
-                'message': f'Semestre {semestre}: {planifies} examens planifiés en {temps:.1f}s',
-                'stats': {
-                    'semestre': semestre,
-                    'examens_planifies': planifies,
-                    'examens_non_planifies': non_planifies,
-                    'examens_total': total,
-                    'modules_total': modules_uniques,
-                    'temps_execution': round(temps, 2),
-                    'taux_reussite': round(taux, 1),
-                    'salles_utilisees': salles_used,
-                    'surveillance_min': min_s,
-                    'surveillance_max': max_s,
-                    'surveillance_avg': round(avg_s, 1),
-                    'conflits_groupes': 0,
-                    'conflits_professeurs': 0,
-                    'conflits_salles': 0
-                }
-            }
+            return generateur.terminer(semestre, resume, start_time)
+        
+        except GenerationAnnulee:
+            return generateur._annulee()
         
         except Exception as e:
             print(f"\n❌ ERREUR: {e}")
@@ -636,60 +1278,123 @@ class ScheduleGenerator:
                 'stats': {}
             }
     
-    def clear_schedule(self, dept_id=None, semestre=None, annee_academique='2024-2025'):
+    def _clear_filters(self, alias, dept_id, semestre, annee_academique):
+        """Conditions de sélection des examens à effacer (colonnes de partitionnement en tête)"""
+        conditions = []
+        params = []
+        
+        if annee_academique:
+            conditions.append(f"{alias}.annee_academique = %s")
+            params.append(annee_academique)
+        
+        if semestre:
+            conditions.append(f"{alias}.semestre = %s")
+            params.append(semestre)
+        
+        if dept_id:
+            conditions.append(f"""
+                {alias}.module_id IN (
+                    SELECT m.id FROM modules m
+                    JOIN formations f ON m.formation_id = f.id
+                    WHERE f.dept_id = %s
+                )
+            """)
+            params.append(dept_id)
+        
+        return conditions, params
+    
+    def clear_schedule(self, dept_id=None, semestre=None, annee_academique='2024-2025',
+                       chunk_size=500, progress_callback=None):
         """
-        🔥 FONCTION CORRIGÉE: Effacer le planning d'un semestre
+        🔥 Effacer le planning par lots, sans liste IN géante
+        
+        Les examens sont parcourus par plages d'id (keyset): chaque lot supprime
+        ses surveillances (jointure) puis ses examens dans UNE transaction.
+        Mémoire constante, verrous limités à un lot, aucun orphelin en cas d'échec.
+        
+        Args:
+            dept_id: ID département (None = tous)
+            semestre: 1, 2 ou None
+            annee_academique: Année académique
+            chunk_size: Nombre d'examens par lot/transaction
+            progress_callback: Fonction appelée avec (examens_traites, total)
+        
+        Returns:
+            dict: success, examens, surveillances (lignes supprimées), lots, temps_execution
         """
+        start_time = datetime.now()
+        result = {'success': False, 'examens': 0, 'surveillances': 0, 'lots': 0, 'temps_execution': 0}
+        
+        # Connexion dédiée: utilisable depuis un thread d'arrière-plan
+        conn = db.new_connection()
+        if conn is None:
+            result['error'] = "connexion indisponible"
+            return result
+        
         try:
             print(f"\n🗑️ Suppression des examens...")
             
-            # Construire les conditions WHERE
-            where_conditions = []
-            params = []
-            
-            if semestre:
-                where_conditions.append("semestre = %s")
-                params.append(semestre)
-            
-            if annee_academique:
-                where_conditions.append("annee_academique = %s")
-                params.append(annee_academique)
+            conditions, params = self._clear_filters('e', dept_id, semestre, annee_academique)
+            where = " AND ".join(conditions) if conditions else "1 = 1"
             
-            if dept_id:
-                where_conditions.append("""
-                    module_id IN (
-                        SELECT m.id FROM modules m
-                        JOIN formations f ON m.formation_id = f.id
-                        WHERE f.dept_id = %s
-                    )
-                """)
-                params.append(dept_id)
+            cursor = conn.cursor(dictionary=True, buffered=True)
+            cursor.execute(f"SELECT COUNT(*) as total FROM examens e WHERE {where}", tuple(params))
+            total = cursor.fetchone()['total']
+            cursor.close()
             
-            where_clause = ""
-            if where_conditions:
-                where_clause = " WHERE " + " AND ".join(where_conditions)
+            if total == 0:
+                print("   ℹ️ Aucun examen à supprimer")
+            else:
+                print(f"   Trouvé: {total} examens à supprimer (lots de {chunk_size})")
             
-            # 🔥 ÉTAPE 1: Récupérer les IDs des examens à supprimer
-            exam_ids_query = f"SELECT id FROM examens{where_clause}"
-            exam_ids_result = db.execute_query(exam_ids_query, tuple(params) if params else None)
+            # Filtre d'élagage côté surveillances (colonnes dénormalisées)
+            surv_filter = ""
+            surv_params = []
+            if annee_academique:
+                surv_filter += " AND s.annee_academique = %s"
+                surv_params.append(annee_academique)
+            if semestre:
+                surv_filter += " AND s.semestre = %s"
+                surv_params.append(semestre)
             
-            if exam_ids_result:
-                exam_ids = [row['id'] for row in exam_ids_result]
-                print(f"   Trouvé: {len(exam_ids)} examens à supprimer")
-                
-                # 🔥 ÉTAPE 2: Supprimer les surveillances
-                if exam_ids:
-                    placeholders = ','.join(['%s'] * len(exam_ids))
-                    surv_query = f"DELETE FROM surveillances WHERE examen_id IN ({placeholders})"
-                    db.execute_query(surv_query, tuple(exam_ids))
-                    print(f"   ✅ Surveillances supprimées")
+            last_id = 0
+            while total:
+                with db.transaction(conn) as cursor:
+                    # Borne haute du lot (seul l'id courant est gardé en mémoire)
+                    cursor.execute(f"""
+                        SELECT MAX(id) as max_id, COUNT(*) as nb
+                        FROM (
+                            SELECT e.id FROM examens e
+                            WHERE {where} AND e.id > %s
+                            ORDER BY e.id
+                            LIMIT %s
+                        ) lot
+                    """, tuple(params) + (last_id, chunk_size))
+                    lot = cursor.fetchone()
+                    if not lot['nb']:
+                        break
+                    max_id = lot['max_id']
+                    
+                    cursor.execute(f"""
+                        DELETE s FROM surveillances s
+                        JOIN examens e ON e.id = s.examen_id
+                        WHERE {where} AND e.id > %s AND e.id <= %s{surv_filter}
+                    """, tuple(params) + (last_id, max_id) + tuple(surv_params))
+                    result['surveillances'] += cursor.rowcount
+                    
+                    cursor.execute(f"""
+                        DELETE e FROM examens e
+                        WHERE {where} AND e.id > %s AND e.id <= %s
+                    """, tuple(params) + (last_id, max_id))
+                    result['examens'] += cursor.rowcount
                 
-                # 🔥 ÉTAPE 3: Supprimer les examens
-                exam_delete_query = f"DELETE FROM examens{where_clause}"
-                db.execute_query(exam_delete_query, tuple(params) if params else None)
-                print(f"   ✅ Examens supprimés")
-            else:
-                print("   ℹ️ Aucun examen à supprimer")
+                result['lots'] += 1
+                last_id = max_id
+                if progress_callback:
+                    progress_callback(min(result['examens'], total), total)
+            
+            result['success'] = True
+            result['temps_execution'] = (datetime.now() - start_time).total_seconds()
             
             msg = "Planning effacé"
             if semestre:
@@ -697,14 +1402,74 @@ class ScheduleGenerator:
             if dept_id:
                 msg += f" (Département {dept_id})"
             
+            print(f"   ✅ {result['surveillances']} surveillances, {result['examens']} examens supprimés en {result['lots']} lots")
             print(f"✅ {msg}\n")
-            return True
+            return result
             
         except Exception as e:
+            # Le lot en cours a été annulé (ROLLBACK): les lots précédents restent validés
             print(f"❌ Erreur lors de la suppression: {e}")
             import traceback
             traceback.print_exc()
-            return False
+            result['error'] = str(e)
+            return result
+        finally:
+            conn.close()
+    
+    def clear_schedule_in_background(self, **kwargs):
+        """
+        Lancer clear_schedule dans un thread
+        
+        Args:
+            **kwargs: Arguments de clear_schedule (hors progress_callback)
+        
+        Returns:
+            dict: État partagé du job (etat, traites, total, resultat), mis à jour par le thread
+        """
+        job = {'etat': 'en_cours', 'traites': 0, 'total': 0, 'resultat': None}
+        
+        def progression(traites, total):
+            job['traites'] = traites
+            job['total'] = total
+        
+        def run():
+            resultat = self.clear_schedule(progress_callback=progression, **kwargs)
+            job['resultat'] = resultat
+            job['etat'] = 'termine' if resultat['success'] else 'erreur'
+        
+        job['thread'] = threading.Thread(target=run, daemon=True)
+        job['thread'].start()
+        return job
+
+
+# Instantané du multi-start, chargé une fois par processus du pool
+_SNAPSHOT = None
+
+
+def _init_essai(snapshot):
+    global _SNAPSHOT
+    _SNAPSHOT = snapshot
+
+
+def _construire_essai(graine):
+    """Une construction complète pour une graine (exécutée dans un processus du pool)"""
+    # Temps CPU: la somme sur les essais divisée par la durée réelle donne l'accélération
+    start = time.process_time()
+    generateur = ScheduleGenerator.depuis_snapshot(_SNAPSHOT)
+    with contextlib.redirect_stdout(io.StringIO()):
+        resume = generateur.construire(*_SNAPSHOT['contexte'], rng=random.Random(graine))
+    return {
+        'graine': graine,
+        **generateur.qualite(resume['planifies']),
+        'retry': resume['retry'],
+        'domaines_vides': resume['domaines_vides'],
+        'temps': round(time.process_time() - start, 3),
+        'examens_batch': generateur.examens_batch,
+        'surveillances_batch': generateur.surveillances_batch,
+        'profs_par_jour': dict(generateur.profs_par_jour),
+        'occupation_profs': generateur.occupation_profs,
+        'nb_surveillances_jour': dict(generateur.nb_surveillances_jour)
+    }
 
 
 # Instance globale
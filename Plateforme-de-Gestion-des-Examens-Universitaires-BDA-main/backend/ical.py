@@ -0,0 +1,353 @@
+"""
+Module des calendriers iCalendar (.ics) des étudiants et professeurs
+📆 Un fichier .ics par étudiant / professeur, mis en cache sur disque
+🔖 ETag = empreinte des examens concernés: régénéré seulement s'ils changent
+📡 Serveur HTTP léger: les clients calendrier reçoivent 304 tant que rien ne change
+
+Usage:
+    from backend.ical import calendar_feeds
+
+    flux = calendar_feeds.get_feed('etudiant', '202400123')
+    flux['body']   # contenu .ics (octets)
+    flux['etag']   # '"etudiant-202400123-12-3141592653"'
+
+    # Serveur d'abonnement (ICS_SECRET obligatoire)
+    python -m backend.ical serve 8502
+"""
+import hashlib
+import hmac
+import os
+import re
+import sys
+import tempfile
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from backend.db_connection import db
+
+# Examens affichés dans les pages Étudiant / Professeur (même filtre de statut)
+STUDENT_FROM = """
+    FROM etudiants et
+    JOIN inscriptions i ON et.id = i.etudiant_id
+    JOIN modules m ON i.module_id = m.id
+    JOIN examens e ON m.id = e.module_id
+        AND e.groupe_id = et.groupe_id
+        AND e.statut = 'planifie'
+"""
+
+# Surveillances du professeur: principal ou assistant
+PROFESSOR_FROM = """
+    FROM surveillances sv
+    JOIN examens e ON e.id = sv.examen_id
+    JOIN modules m ON e.module_id = m.id
+"""
+
+FEEDS = {
+    'etudiant': {
+        'label': 'Examens',
+        'where': "WHERE et.matricule = %s",
+        'from': STUDENT_FROM,
+        'events': STUDENT_FROM + """
+            JOIN formations f ON et.formation_id = f.id
+            LEFT JOIN groupes g ON e.groupe_id = g.id
+            LEFT JOIN salles s ON e.salle_id = s.id
+        """,
+        'select': """
+            SELECT e.id as examen_id, m.nom as module_nom, m.code as module_code,
+                e.date_heure, e.duree_minutes, s.nom as salle_nom, s.batiment,
+                f.nom as formation_nom, g.nom as groupe_nom
+        """
+    },
+    'professeur': {
+        'label': 'Surveillances',
+        'where': "WHERE sv.prof_id = %s AND e.statut = 'planifie'",
+        'from': PROFESSOR_FROM,
+        'events': PROFESSOR_FROM + """
+            JOIN formations f ON m.formation_id = f.id
+            LEFT JOIN groupes g ON e.groupe_id = g.id
+            LEFT JOIN salles s ON e.salle_id = s.id
+        """,
+        'select': """
+            SELECT e.id as examen_id, m.nom as module_nom, m.code as module_code,
+                e.date_heure, e.duree_minutes, s.nom as salle_nom, s.batiment,
+                f.nom as formation_nom, g.nom as groupe_nom, e.nb_etudiants
+        """
+    }
+}
+
+# Empreinte des examens d'un flux: une ligne agrégée, sans rapatrier les examens
+FINGERPRINT_SELECT = """
+    SELECT COUNT(*) as nb,
+        COALESCE(BIT_XOR(CRC32(CONCAT_WS('|', e.id, e.date_heure, e.duree_minutes,
+                                         e.salle_id, e.groupe_id, m.nom))), 0) as empreinte
+"""
+
+_IDENT_RE = re.compile(r'^[A-Za-z0-9_-]{1,32}$')
+
+
+def _escape(text):
+    """Échapper un texte pour une propriété iCalendar (RFC 5545 §3.3.11)"""
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line):
+    """Replier une ligne à 75 octets (continuation = espace en début de ligne)"""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line
+    parts = []
+    while data:
+        limit = 75 if not parts else 74
+        cut = min(limit, len(data))
+        # Ne pas couper un caractère UTF-8 multi-octets
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode('utf-8'))
+        data = data[cut:]
+    return '\r\n '.join(parts)
+
+
+def render_calendar(name, events, timezone_name='Africa/Algiers'):
+    """
+    Construire un calendrier iCalendar
+
+    Les heures sont « flottantes » (heure locale de l'établissement),
+    X-WR-TIMEZONE indique le fuseau aux clients.
+
+    Args:
+        name: Nom du calendrier
+        events: Examens (dictionnaires: examen_id, module_nom, date_heure, duree_minutes, salle_nom...)
+        timezone_name: Fuseau horaire de l'établissement
+
+    Returns:
+        str: Contenu .ics (fins de ligne CRLF)
+    """
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Plateforme EDT Examens//FR',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape(name)}',
+        f'X-WR-TIMEZONE:{timezone_name}',
+        'REFRESH-INTERVAL;VALUE=DURATION:PT1H',
+        'X-PUBLISHED-TTL:PT1H'
+    ]
+    for event in events:
+        debut = event['date_heure']
+        fin = debut + timedelta(minutes=event.get('duree_minutes') or 90)
+        salle = event.get('salle_nom') or 'Salle à confirmer'
+        if event.get('batiment'):
+            salle = f"{salle} ({event['batiment']})"
+        details = [f"Module: {event['module_nom']} ({event.get('module_code') or '-'})"]
+        if event.get('formation_nom'):
+            details.append(f"Formation: {event['formation_nom']}")
+        if event.get('groupe_nom'):
+            details.append(f"Groupe: {event['groupe_nom']}")
+        if event.get('nb_etudiants'):
+            details.append(f"Étudiants: {event['nb_etudiants']}")
+
+        lines += [
+            'BEGIN:VEVENT',
+            f"UID:examen-{event['examen_id']}@edt-examens",
+            f'DTSTAMP:{stamp}',
+            f"DTSTART:{debut.strftime('%Y%m%dT%H%M%S')}",
+            f"DTEND:{fin.strftime('%Y%m%dT%H%M%S')}",
+            f"SUMMARY:{_escape('Examen - ' + event['module_nom'])}",
+            f'LOCATION:{_escape(salle)}',
+            f"DESCRIPTION:{_escape(chr(10).join(details))}",
+            'END:VEVENT'
+        ]
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
+
+
+class CalendarFeeds:
+    """Classe pour générer, mettre en cache et servir les calendriers .ics"""
+
+    def __init__(self):
+        """Initialiser les flux (cache dans ICS_CACHE_DIR)"""
+        self.cache_dir = Path(os.getenv('ICS_CACHE_DIR') or Path(tempfile.gettempdir()) / 'edt_ics')
+        self.secret = os.getenv('ICS_SECRET', '')
+        self.base_url = os.getenv('ICS_BASE_URL', 'http://localhost:8502').rstrip('/')
+        self.timezone = os.getenv('ICS_TIMEZONE', 'Africa/Algiers')
+        # Délai minimal entre deux interrogations d'un client (Cache-Control)
+        self.max_age = int(os.getenv('ICS_MAX_AGE', '300'))
+        self._lock = threading.Lock()
+        # not_modified (304), cache (fichier réutilisé), regenere
+        self.counters = Counter()
+
+    def _check(self, kind, ident):
+        """Identifiant normalisé, None s'il ne peut pas désigner un calendrier"""
+        if kind not in FEEDS:
+            raise ValueError(f"Type de calendrier inconnu: {kind}")
+        ident = str(ident).strip()
+        return ident if _IDENT_RE.match(ident) else None
+
+    def etag(self, kind, ident):
+        """
+        ETag du calendrier: nombre d'examens et empreinte CRC32 de leurs champs affichés
+
+        Returns:
+            str: ETag (entre guillemets), None si la base est indisponible
+        """
+        ident = self._check(kind, ident)
+        if ident is None:
+            return None
+        feed = FEEDS[kind]
+        result = db.execute_query(FINGERPRINT_SELECT + feed['from'] + feed['where'], (ident,))
+        if result is None:
+            return None
+        row = result[0] if result else {'nb': 0, 'empreinte': 0}
+        return f'"{kind}-{ident}-{row["nb"]}-{row["empreinte"]}"'
+
+    def _paths(self, kind, ident):
+        base = self.cache_dir / f"{kind}_{ident}"
+        return base.with_suffix('.ics'), base.with_suffix('.etag')
+
+    def _render(self, kind, ident):
+        """Charger les examens et construire le calendrier (None si erreur)"""
+        feed = FEEDS[kind]
+        query = feed['select'] + feed['events'] + feed['where'] + " ORDER BY e.date_heure"
+        events = db.execute_query(query, (ident,))
+        if events is None:
+            return None
+        return render_calendar(f"{feed['label']} {ident}", events, self.timezone).encode('utf-8')
+
+    def get_feed(self, kind, ident, if_none_match=None):
+        """
+        📆 Obtenir le calendrier d'un étudiant (matricule) ou d'un professeur (id)
+
+        Une seule requête agrégée suffit quand le client a déjà la bonne version
+        (304) ou quand le fichier en cache est à jour.
+
+        Args:
+            kind: 'etudiant' ou 'professeur'
+            ident: Matricule de l'étudiant ou id du professeur
+            if_none_match: En-tête If-None-Match du client
+
+        Returns:
+            dict: status (200, 304, 404 ou 503), etag, body (octets ou None)
+        """
+        ident = self._check(kind, ident)
+        if ident is None:
+            return {'status': 404, 'etag': None, 'body': None}
+        etag = self.etag(kind, ident)
+        if etag is None:
+            return {'status': 503, 'etag': None, 'body': None}
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(',')]:
+            self.counters['not_modified'] += 1
+            return {'status': 304, 'etag': etag, 'body': None}
+
+        ics_path, etag_path = self._paths(kind, ident)
+        with self._lock:
+            try:
+                if etag_path.read_text(encoding='utf-8') == etag:
+                    self.counters['cache'] += 1
+                    return {'status': 200, 'etag': etag, 'body': ics_path.read_bytes()}
+            except OSError:
+                pass
+
+            body = self._render(kind, ident)
+            if body is None:
+                return {'status': 503, 'etag': None, 'body': None}
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Écriture atomique: un client ne lit jamais un fichier à moitié écrit
+            for path, data in ((ics_path, body), (etag_path, etag.encode('utf-8'))):
+                tmp = path.with_suffix(path.suffix + '.tmp')
+                tmp.write_bytes(data)
+                os.replace(tmp, path)
+            self.counters['regenere'] += 1
+            print(f"📆 Calendrier régénéré: {ics_path.name}")
+            return {'status': 200, 'etag': etag, 'body': body}
+
+    def token(self, kind, ident):
+        """Jeton d'accès au flux (HMAC de ICS_SECRET), None si ICS_SECRET n'est pas défini"""
+        if not self.secret:
+            return None
+        message = f"{kind}:{ident}".encode('utf-8')
+        return hmac.new(self.secret.encode('utf-8'), message, hashlib.sha256).hexdigest()[:32]
+
+    def feed_url(self, kind, ident):
+        """URL d'abonnement du calendrier, None si le serveur n'est pas configuré"""
+        token = self.token(kind, ident)
+        if token is None:
+            return None
+        return f"{self.base_url}/{kind}/{ident}.ics?token={token}"
+
+    def serve(self, host='0.0.0.0', port=8502):
+        """
+        📡 Servir les calendriers en HTTP (GET /<etudiant|professeur>/<id>.ics?token=...)
+
+        Serveur mono-thread: la connexion partagée db n'est pas utilisée
+        depuis plusieurs threads, et un 304 ne coûte qu'une requête agrégée.
+        """
+        if not self.secret:
+            print("❌ ICS_SECRET non défini: les flux ne peuvent pas être protégés")
+            return
+        server = HTTPServer((host, port), _FeedHandler)
+        print(f"📡 Calendriers servis sur http://{host}:{port} (cache: {self.cache_dir})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+class _FeedHandler(BaseHTTPRequestHandler):
+    """Requêtes GET des clients calendrier"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] not in FEEDS or not parts[1].endswith('.ics'):
+            self.send_error(404)
+            return
+        kind, ident = parts[0], parts[1][:-4]
+        token = parse_qs(url.query).get('token', [''])[0]
+        expected = calendar_feeds.token(kind, ident)
+        if not _IDENT_RE.match(ident) or not expected or not hmac.compare_digest(token, expected):
+            self.send_error(403)
+            return
+
+        feed = calendar_feeds.get_feed(kind, ident, self.headers.get('If-None-Match'))
+        if feed['status'] not in (200, 304):
+            self.send_error(feed['status'])
+            return
+        self.send_response(feed['status'])
+        self.send_header('ETag', feed['etag'])
+        self.send_header('Cache-Control', f"private, max-age={calendar_feeds.max_age}")
+        if feed['body'] is not None:
+            self.send_header('Content-Type', 'text/calendar; charset=utf-8')
+            self.send_header('Content-Length', str(len(feed['body'])))
+        self.end_headers()
+        if feed['body'] is not None:
+            self.wfile.write(feed['body'])
+
+    def log_message(self, format, *args):
+        print(f"📡 {self.address_string()} {format % args}")
+
+
+# Instance globale
+calendar_feeds = CalendarFeeds()
+
+
+if __name__ == "__main__":
+    # python -m backend.ical serve [port] | python -m backend.ical <etudiant|professeur> <id>
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        calendar_feeds.serve(port=int(sys.argv[2]) if len(sys.argv) > 2 else 8502)
+    elif len(sys.argv) > 2:
+        flux = calendar_feeds.get_feed(sys.argv[1], sys.argv[2])
+        print(f"ETag: {flux['etag']}")
+        if flux['body']:
+            print(flux['body'].decode('utf-8'))
+        print(dict(calendar_feeds.counters))
+    else:
+        print("Usage: python -m backend.ical serve [port] | <etudiant|professeur> <id>")
@@ -0,0 +1,249 @@
+"""
+Module d'exécution des générations hors du thread de requête Streamlit
+🧵 Pool de threads local: la page soumet un job et rend la main immédiatement
+📋 Table des jobs partagée par toutes les sessions: en_attente, en_cours, termine, erreur, annule
+📈 Progression écrite par les hooks de phase du générateur
+   (chargement, effacement, phase1, retry, sauvegarde)
+⏹️ Annulation: un job en attente est retiré de la file, un job en cours s'arrête au
+   prochain hook (avant toute écriture du plan; le point de reprise est conservé)
+📥 Mode staging: pas d'effacement préalable, le plan remplace l'ancien à la publication
+   (backend/staging.py); le planning publié reste lisible pendant tout le job
+🔒 Un seul job à la fois par (année, semestre): les départements d'un même semestre
+   partagent salles, professeurs et étudiants et passent donc l'un après l'autre;
+   deux semestres différents tournent en parallèle
+🧵 Chaque job lit et écrit sur sa propre connexion MySQL (db.dedicated_connection)
+
+Usage:
+    from backend.jobs import job_runner
+
+    job = job_runner.generer(semestre=1, annee_academique='2024-2025', effacer=True)
+    job_runner.generer(semestre=2, annee_academique='2024-2025')
+    job_runner.annuler(job['id'])
+"""
+import os
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from backend.db_connection import db
+from backend.generate_edt import GenerationAnnulee, ScheduleGenerator, scheduler
+
+ETATS_ACTIFS = ('en_attente', 'en_cours')
+
+
+def _cle(job_id):
+    """(année, semestre) d'un identifiant produit par ScheduleGenerator.identifiant_job"""
+    annee_academique, semestre = job_id.split('_')[:2]
+    return annee_academique, int(semestre[1:])
+
+
+class JobRunner:
+    """File des jobs de génération exécutés par un pool de threads"""
+
+    def __init__(self, workers=None):
+        """
+        Args:
+            workers: Jobs exécutés simultanément (défaut: EDT_JOB_WORKERS, 2)
+        """
+        self.workers = workers or int(os.getenv('EDT_JOB_WORKERS', '2'))
+        self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix='edt-job')
+        self.jobs = {}                     # id -> job, dans l'ordre de soumission
+        self._files = defaultdict(deque)   # (année, semestre) -> jobs en attente
+        self._cles_actives = set()         # (année, semestre) ayant un job confié au pool
+        self._lock = threading.Lock()
+
+    def soumettre(self, job_id, libelle, tache):
+        """
+        Ajouter un job à la file
+
+        Args:
+            job_id: Identifiant (ScheduleGenerator.identifiant_job); un job actif de
+                même identifiant est retourné tel quel (rattachement après un rerun)
+            libelle: Texte affiché dans la table des jobs
+            tache: Fonction (progression) -> dict avec 'success'; progression(traites, total, phase)
+                lève GenerationAnnulee quand le job est annulé
+
+        Returns:
+            dict: Job (id, libelle, etat, phase, traites, total, resultat, soumis_le, debut, fin)
+        """
+        cle = _cle(job_id)
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job and job['etat'] in ETATS_ACTIFS:
+                return job
+
+            job = {
+                'id': job_id,
+                'libelle': libelle,
+                'etat': 'en_attente',
+                'phase': None,
+                'traites': 0,
+                'total': 0,
+                'resultat': None,
+                'soumis_le': datetime.now(),
+                'debut': None,
+                'fin': None,
+                'annulation': threading.Event()
+            }
+            # Une nouvelle soumission remplace l'ancien job terminé (et passe en fin de table)
+            self.jobs.pop(job_id, None)
+            self.jobs[job_id] = job
+            self._files[cle].append((job, tache))
+            self._lancer_suivant(cle)
+        return job
+
+    def _lancer_suivant(self, cle):
+        """Confier au pool le prochain job de la clé si aucun n'y tourne (appelé sous verrou)"""
+        if cle in self._cles_actives:
+            return
+        file = self._files[cle]
+        while file:
+            job, tache = file.popleft()
+            if job['etat'] == 'en_attente':
+                self._cles_actives.add(cle)
+                self.pool.submit(self._executer, job, cle, tache)
+                return
+
+    def _executer(self, job, cle, tache):
+        def progression(traites, total, phase):
+            if job['annulation'].is_set():
+                raise GenerationAnnulee(job['id'])
+            job['traites'] = traites
+            job['total'] = total
+            job['phase'] = phase
+
+        try:
+            with self._lock:
+                # Annulé entre la soumission au pool et le démarrage
+                if job['annulation'].is_set():
+                    return
+                job['debut'] = datetime.now()
+                job['etat'] = 'en_cours'
+            try:
+                # Connexion propre au thread: la connexion partagée sert les sessions Streamlit
+                with db.dedicated_connection():
+                    resultat = tache(progression)
+            except Exception as e:
+                print(f"❌ Job {job['id']}: {e}")
+                resultat = {'success': False, 'message': f'Erreur: {str(e)}', 'stats': {}}
+
+            job['resultat'] = resultat
+            job['fin'] = datetime.now()
+            if resultat['success']:
+                job['etat'] = 'termine'
+            else:
+                job['etat'] = 'annule' if job['annulation'].is_set() else 'erreur'
+        finally:
+            with self._lock:
+                self._cles_actives.discard(cle)
+                self._lancer_suivant(cle)
+
+    def generer(self, semestre, dept_id=None, annee_academique='2024-2025', effacer=False, staging=False,
+                **kwargs):
+        """
+        🚀 Mettre en file la génération d'un semestre
+
+        Args:
+            semestre: 1 ou 2
+            dept_id: ID département (None = tous)
+            annee_academique: Année académique
+            effacer: Replanifier le périmètre (planning effacé avant, ou remplacé à la
+                publication en mode staging)
+            staging: Passer par examens_staging (voir generate_schedule)
+            **kwargs: Autres arguments de generate_schedule (essais, processes, objectif, publier)
+
+        Returns:
+            dict: Job
+        """
+        job_id = scheduler.identifiant_job(semestre, dept_id, annee_academique)
+        libelle = f"Génération S{semestre} {annee_academique}" + (f" (département {dept_id})" if dept_id else "")
+
+        def tache(progression):
+            # Générateur dédié: ses trackers ne sont partagés avec aucun autre job
+            generateur = ScheduleGenerator(scheduler.grid, scheduler.max_surveillances_jour)
+            generateur.checkpoint_dir = scheduler.checkpoint_dir
+
+            if staging:
+                return generateur.generate_schedule(
+                    semestre, dept_id, annee_academique, job_id=job_id, progress_callback=progression,
+                    staging=True, remplacer=effacer, **kwargs
+                )
+
+            efface = None
+            if effacer:
+                efface = generateur.clear_schedule(
+                    dept_id=dept_id, semestre=semestre, annee_academique=annee_academique,
+                    progress_callback=lambda traites, total: progression(traites, total, 'effacement')
+                )
+                if not efface['success']:
+                    return {'success': False, 'message': f"Effacement interrompu: {efface.get('error')}",
+                            'stats': {}, 'effacement': efface}
+
+            resultat = generateur.generate_schedule(
+                semestre, dept_id, annee_academique, job_id=job_id, progress_callback=progression, **kwargs
+            )
+            resultat['effacement'] = efface
+            return resultat
+
+        return self.soumettre(job_id, libelle, tache)
+
+    def reprendre(self, job_id):
+        """
+        ♻️ Mettre en file la reprise d'une génération interrompue (resume_schedule)
+
+        Returns:
+            dict: Job
+        """
+        return self.soumettre(job_id, f"Reprise {job_id}",
+                              lambda progression: scheduler.resume_schedule(job_id, progression))
+
+    def annuler(self, job_id):
+        """
+        ⏹️ Annuler un job
+
+        Returns:
+            bool: True si le job était actif
+        """
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job['etat'] not in ETATS_ACTIFS:
+                return False
+            job['annulation'].set()
+            if job['etat'] == 'en_attente':
+                # Encore dans la file: _lancer_suivant l'ignorera
+                job['etat'] = 'annule'
+                job['fin'] = datetime.now()
+        print(f"⏹️ Annulation demandée: {job_id}")
+        return True
+
+    def liste(self, actifs=False):
+        """
+        Table des jobs
+
+        Args:
+            actifs: Seulement les jobs en attente ou en cours
+
+        Returns:
+            list: Jobs dans l'ordre de soumission
+        """
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return [job for job in jobs if job['etat'] in ETATS_ACTIFS] if actifs else jobs
+
+    def purger(self):
+        """
+        Retirer de la table les jobs terminés, en erreur ou annulés
+
+        Returns:
+            int: Nombre de jobs retirés
+        """
+        with self._lock:
+            finis = [job_id for job_id, job in self.jobs.items() if job['etat'] not in ETATS_ACTIFS]
+            for job_id in finis:
+                del self.jobs[job_id]
+        return len(finis)
+
+
+# Instance globale
+job_runner = JobRunner()
@@ -0,0 +1,315 @@
+"""
+Module de migrations versionnées du schéma
+📁 Fichiers database/migrations/NNN_description.sql appliqués dans l'ordre
+📋 Versions appliquées enregistrées dans la table schema_migrations
+🔁 Idempotent: une migration appliquée n'est jamais rejouée
+🔎 Un SELECT dans une migration est une vérification: une première colonne
+   non nulle (ex: COUNT(*) de lignes incohérentes) fait échouer la migration
+
+Usage:
+    python -m backend.migrations            # appliquer les migrations en attente
+    python -m backend.migrations status     # état des migrations
+"""
+import hashlib
+import re
+import sys
+import time
+from pathlib import Path
+
+from mysql.connector import Error
+
+from backend.db_connection import db
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / 'database' / 'migrations'
+
+_RE_MIGRATION_FILE = re.compile(r"^(\d{3})_(\w+)\.sql$")
+
+# Erreurs signifiant que l'objet existe déjà (ou n'existe plus):
+# l'instruction a déjà produit son effet sur cette base
+ALREADY_APPLIED_ERRNOS = {
+    1050,  # Table already exists
+    1060,  # Duplicate column name
+    1061,  # Duplicate key name
+    1091,  # Can't DROP; check that column/key exists
+    1826,  # Duplicate foreign key constraint name
+}
+
+
+def split_sql(script):
+    """
+    Découper un script SQL en instructions
+
+    Gère la directive DELIMITER (procédures, triggers), les chaînes
+    et les commentaires contenant des points-virgules.
+
+    Args:
+        script: Contenu du fichier .sql
+
+    Returns:
+        list: Instructions sans leur délimiteur
+    """
+    statements = []
+    delimiter = ';'
+    current = []
+
+    for line in script.splitlines(keepends=True):
+        stripped = line.strip()
+        if not ''.join(current).strip() and stripped.upper().startswith('DELIMITER '):
+            delimiter = stripped.split(None, 1)[1]
+            current = []
+            continue
+        current.append(line)
+
+        buffer = ''.join(current)
+        end = _find_delimiter(buffer, delimiter)
+        while end is not None:
+            statement = buffer[:end].strip()
+            if _strip_comments(statement):
+                statements.append(statement)
+            buffer = buffer[end + len(delimiter):]
+            end = _find_delimiter(buffer, delimiter)
+        current = [buffer] if buffer.strip() else []
+
+    tail = ''.join(current).strip()
+    if _strip_comments(tail):
+        statements.append(tail)
+    return statements
+
+
+def _find_delimiter(buffer, delimiter):
+    """Position du délimiteur hors chaînes et commentaires (None si absent)"""
+    quote = None
+    i = 0
+    while i < len(buffer):
+        c = buffer[i]
+        if quote:
+            if c == '\\':
+                i += 2
+                continue
+            if c == quote:
+                quote = None
+        elif c in ("'", '"', '`'):
+            quote = c
+        elif buffer.startswith('--', i) or c == '#':
+            nl = buffer.find('\n', i)
+            if nl == -1:
+                return None
+            i = nl
+            continue
+        elif buffer.startswith('/*', i):
+            close = buffer.find('*/', i + 2)
+            if close == -1:
+                return None
+            i = close + 2
+            continue
+        elif buffer.startswith(delimiter, i):
+            return i
+        i += 1
+    return None
+
+
+def _is_check(statement):
+    """Instruction de vérification (SELECT) d'une migration"""
+    return _strip_comments(statement).upper().startswith('SELECT')
+
+
+def _strip_comments(sql):
+    """Texte SQL sans commentaires (pour ignorer les blocs vides)"""
+    sql = re.sub(r"/\*.*?\*/", ' ', sql, flags=re.S)
+    return re.sub(r"(--|#)[^\n]*", ' ', sql).strip()
+
+
+class MigrationRunner:
+    """Classe pour appliquer les migrations du schéma"""
+
+    def __init__(self, connection=None, migrations_dir=None):
+        """
+        Initialiser le runner
+
+        Args:
+            connection: Connexion mysql.connector (défaut: connexion partagée db)
+            migrations_dir: Dossier des fichiers .sql (défaut: database/migrations)
+        """
+        self._connection = connection
+        self.migrations_dir = Path(migrations_dir) if migrations_dir else MIGRATIONS_DIR
+
+    def _conn(self):
+        return self._connection if self._connection is not None else db.connect()
+
+    def discover(self):
+        """
+        Lister les fichiers de migration
+
+        Returns:
+            list: Dictionnaires (version, nom, chemin, checksum) triés par version
+        """
+        migrations = []
+        for path in sorted(self.migrations_dir.glob('*.sql')):
+            match = _RE_MIGRATION_FILE.match(path.name)
+            if not match:
+                continue
+            content = path.read_text(encoding='utf-8')
+            migrations.append({
+                'version': match.group(1),
+                'nom': match.group(2),
+                'path': path,
+                'checksum': hashlib.sha256(content.encode('utf-8')).hexdigest()
+            })
+        return migrations
+
+    def _ensure_table(self, cursor):
+        """Créer la table de suivi des versions"""
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version VARCHAR(10) NOT NULL PRIMARY KEY,
+                nom VARCHAR(200) NOT NULL,
+                checksum CHAR(64) NOT NULL,
+                duree_ms INT NOT NULL DEFAULT 0,
+                applied_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
+
+    def applied_versions(self):
+        """
+        Versions déjà appliquées
+
+        Returns:
+            dict: {version: checksum}
+        """
+        conn = self._conn()
+        if conn is None:
+            return {}
+        cursor = conn.cursor(buffered=True)
+        try:
+            self._ensure_table(cursor)
+            cursor.execute("SELECT version, checksum FROM schema_migrations")
+            return {version: checksum for version, checksum in cursor.fetchall()}
+        finally:
+            cursor.close()
+
+    def pending(self):
+        """Migrations non encore appliquées"""
+        applied = self.applied_versions()
+        return [m for m in self.discover() if m['version'] not in applied]
+
+    def is_up_to_date(self):
+        """
+        Vérification légère au démarrage (une seule lecture de schema_migrations)
+
+        Returns:
+            bool: True si toutes les migrations connues sont appliquées
+        """
+        return not self.pending()
+
+    def _apply(self, conn, migration):
+        """Exécuter les instructions d'une migration"""
+        statements = split_sql(migration['path'].read_text(encoding='utf-8'))
+        cursor = conn.cursor(buffered=True)
+        skipped = 0
+        try:
+            for statement in statements:
+                try:
+                    cursor.execute(statement)
+                    rows = cursor.fetchall() if cursor.with_rows else []
+                except Error as e:
+                    if e.errno in ALREADY_APPLIED_ERRNOS:
+                        skipped += 1
+                        continue
+                    raise
+                if _is_check(statement) and rows and rows[0][0]:
+                    # Non enregistrée: la migration est rejouée (et revérifiée) au prochain lancement
+                    colonne = cursor.column_names[0] if cursor.column_names else 'résultat'
+                    raise Error(msg=f"Vérification en échec: {colonne} = {rows[0][0]}")
+            conn.commit()
+        finally:
+            cursor.close()
+        return len(statements), skipped
+
+    def migrate(self, target=None):
+        """
+        Appliquer les migrations en attente
+
+        Les instructions DDL de MySQL sont validées implicitement: une migration
+        interrompue est reprise au prochain lancement, les instructions déjà
+        effectives étant ignorées (objet déjà existant).
+
+        Args:
+            target: Version maximale à appliquer (toutes si None)
+
+        Returns:
+            list: Versions appliquées, ou None en cas d'échec
+        """
+        conn = self._conn()
+        if conn is None:
+            print("❌ Migrations impossibles: pas de connexion")
+            return None
+
+        applied = self.applied_versions()
+        done = []
+
+        for migration in self.discover():
+            version = migration['version']
+            if target is not None and version > target:
+                break
+            if version in applied:
+                if applied[version] != migration['checksum']:
+                    print(f"⚠️  Migration {version} modifiée après application ({migration['path'].name})")
+                continue
+
+            print(f"🔧 Migration {version}_{migration['nom']}...")
+            start = time.perf_counter()
+            try:
+                nb, skipped = self._apply(conn, migration)
+            except Error as e:
+                print(f"❌ Échec de la migration {version}: {e}")
+                return None
+            duree_ms = int((time.perf_counter() - start) * 1000)
+
+            cursor = conn.cursor(buffered=True)
+            try:
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, nom, checksum, duree_ms) VALUES (%s, %s, %s, %s)",
+                    (version, migration['nom'], migration['checksum'], duree_ms)
+                )
+                conn.commit()
+            finally:
+                cursor.close()
+
+            detail = f", {skipped} déjà présentes" if skipped else ""
+            print(f"✅ {version} appliquée ({nb} instructions{detail}, {duree_ms} ms)")
+            done.append(version)
+
+        if not done:
+            print("✅ Schéma à jour")
+        return done
+
+    def status(self):
+        """
+        État de chaque migration
+
+        Returns:
+            list: Dictionnaires (version, nom, applied, modified)
+        """
+        applied = self.applied_versions()
+        return [{
+            'version': m['version'],
+            'nom': m['nom'],
+            'applied': m['version'] in applied,
+            'modified': m['version'] in applied and applied[m['version']] != m['checksum']
+        } for m in self.discover()]
+
+
+# Instance globale
+migration_runner = MigrationRunner()
+
+
+if __name__ == "__main__":
+    action = sys.argv[1] if len(sys.argv) > 1 else 'migrate'
+
+    if action == 'status':
+        for m in migration_runner.status():
+            etat = '✅' if m['applied'] else '⏳'
+            note = ' (modifiée)' if m['modified'] else ''
+            print(f"{etat} {m['version']}_{m['nom']}{note}")
+    else:
+        sys.exit(0 if migration_runner.migrate() is not None else 1)
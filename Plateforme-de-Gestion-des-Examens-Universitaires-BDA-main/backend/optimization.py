@@ -1,8 +1,140 @@
 """
 Module d'optimisation des requêtes et des performances
 """
+import os
+import statistics
+import sys
+import time
+
 from backend.db_connection import db
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+# Base servie aux utilisateurs: les index du catalogue y sont créés par les
+# migrations 000/001, on ne les supprime pas sans confirmation explicite
+PRODUCTION_DB = os.getenv('DB_PRODUCTION_NAME', 'edt_examens')
+
+# ========== CATALOGUE D'INDEX ==========
+# Chaque index est rattaché aux requêtes qu'il sert; 'benchmark' reproduit
+# le chemin d'accès pour la mesure avant/après.
+# exam_date / slot_index: colonnes générées (database/migrations/001)
+INDEX_CATALOGUE = [
+    {
+        'name': 'idx_examens_groupe_module_statut',
+        'table': 'examens',
+        'columns': ('groupe_id', 'module_id', 'statut'),
+        'used_by': [
+            'generate_edt.preload_data (NOT EXISTS examen planifié)',
+            'detect_conflicts.detect_student_conflicts / detect_same_time_conflicts',
+            '3_Etudiant.load_student_schedule / get_exam_stats / check_conflicts'
+        ],
+        'benchmark': """
+            SELECT COUNT(*) FROM etudiants et
+            JOIN inscriptions i ON et.id = i.etudiant_id
+            JOIN examens ex ON ex.module_id = i.module_id
+                AND ex.groupe_id = et.groupe_id
+                AND ex.statut = 'planifie'
+        """
+    },
+    {
+        'name': 'idx_examens_prof_statut_jour',
+        'table': 'examens',
+        'columns': ('prof_id', 'statut', 'exam_date'),
+        'used_by': [
+            'generate_edt.load_existing_professor_surveillances (surveillants principaux)',
+            'staging.PLAN_SURVEILLANTS (planning hors périmètre)'
+        ],
+        'benchmark': """
+            SELECT p.id, ex.exam_date, COUNT(ex.id) FROM professeurs p
+            JOIN examens ex ON p.id = ex.prof_id AND ex.statut = 'planifie'
+            GROUP BY p.id, ex.exam_date
+        """
+    },
+    {
+        'name': 'idx_examens_salle_date',
+        'table': 'examens',
+        'columns': ('salle_id', 'date_heure'),
+        'used_by': [
+            'detect_conflicts.detect_time_overlaps (auto-jointure salle/créneau)',
+            'generate_edt.load_existing_room_usage'
+        ],
+        'benchmark': """
+            SELECT COUNT(*) FROM examens e1
+            JOIN examens e2 ON e1.salle_id = e2.salle_id
+                AND e1.id < e2.id
+                AND e1.date_heure = e2.date_heure
+            WHERE e1.statut = 'planifie' AND e2.statut = 'planifie'
+        """
+    },
+    {
+        'name': 'idx_examens_statut_jour_creneau',
+        'table': 'examens',
+        'columns': ('statut', 'exam_date', 'slot_index'),
+        'used_by': [
+            '2_Admin_Examens.get_schedule_stats',
+            '6_Vice_Doyen.get_kpis_globaux / get_conflits_par_departement',
+            'generate_edt.load_existing_exams_for_students / load_existing_room_usage'
+        ],
+        'benchmark': """
+            SELECT exam_date, slot_index, COUNT(*) FROM examens
+            WHERE statut = 'planifie'
+            GROUP BY exam_date, slot_index
+        """
+    },
+    {
+        'name': 'idx_etudiants_groupe',
+        'table': 'etudiants',
+        'columns': ('groupe_id',),
+        'used_by': [
+            'generate_edt.get_etudiants_inscrits / preload_data (COUNT par groupe)',
+            'detect_conflicts.detect_student_conflicts'
+        ],
+        'benchmark': """
+            SELECT g.id, COUNT(et.id) FROM groupes g
+            LEFT JOIN etudiants et ON et.groupe_id = g.id
+            GROUP BY g.id
+        """
+    },
+    {
+        'name': 'idx_surveillances_prof_examen',
+        'table': 'surveillances',
+        'columns': ('prof_id', 'examen_id'),
+        'used_by': [
+            '4_Professeur.get_professor_surveillances / check_overload_days',
+            '5_Chef_Departement.detecter_conflits'
+        ],
+        'benchmark': """
+            SELECT s.prof_id, COUNT(*) FROM surveillances s
+            JOIN examens e ON e.id = s.examen_id
+            WHERE e.statut = 'planifie'
+            GROUP BY s.prof_id
+        """
+    },
+    {
+        'name': 'idx_modules_formation_semestre',
+        'table': 'modules',
+        'columns': ('formation_id', 'semestre'),
+        'used_by': [
+            'generate_edt.preload_data (filtre semestre)',
+            '5_Chef_Departement.afficher_examens_par_formation'
+        ],
+        'benchmark': """
+            SELECT f.id, COUNT(m.id) FROM formations f
+            JOIN modules m ON m.formation_id = f.id AND m.semestre = 1
+            GROUP BY f.id
+        """
+    }
+]
+
+# Liste faculté (examens + formation, département, salle) pour compare_dataframe_memory
+DATAFRAME_BENCHMARK_QUERY = """
+    SELECT d.nom as departement, f.nom as formation, m.nom as module, m.semestre,
+        e.date_heure, s.nom as salle, e.nb_etudiants, e.statut, e.id as examen_id
+    FROM examens e
+    JOIN modules m ON e.module_id = m.id
+    JOIN formations f ON m.formation_id = f.id
+    JOIN departements d ON f.dept_id = d.id
+    JOIN salles s ON e.salle_id = s.id
+"""
 
 class QueryOptimizer:
     """Classe pour optimiser les performances des requêtes"""
@@ -11,50 +143,176 @@ class QueryOptimizer:
         """Initialiser l'optimiseur"""
         pass
     
-    def create_indexes(self) -> Dict[str, bool]:
+    def _existing_indexes(self) -> Dict[str, Dict[str, List[str]]]:
         """
-        Créer les index nécessaires pour optimiser les performances
+        Lire les index présents dans la base courante
         Returns:
-            Dictionnaire des index créés
-        """
-        indexes = {
-            'idx_examens_date_statut': """
-                CREATE INDEX IF NOT EXISTS idx_examens_date_statut 
-                ON examens(date_heure, statut)
-            """,
-            'idx_examens_module_statut': """
-                CREATE INDEX IF NOT EXISTS idx_examens_module_statut 
-                ON examens(module_id, statut)
-            """,
-            'idx_inscriptions_composite': """
-                CREATE INDEX IF NOT EXISTS idx_inscriptions_composite 
-                ON inscriptions(etudiant_id, module_id)
-            """,
-            'idx_surveillances_prof_exam': """
-                CREATE INDEX IF NOT EXISTS idx_surveillances_prof_exam 
-                ON surveillances(prof_id, examen_id)
-            """,
-            'idx_modules_formation': """
-                CREATE INDEX IF NOT EXISTS idx_modules_formation 
-                ON modules(formation_id)
-            """,
-            'idx_formations_dept': """
-                CREATE INDEX IF NOT EXISTS idx_formations_dept 
-                ON formations(dept_id)
-            """
-        }
+            {table: {index_name: [colonnes dans l'ordre]}}
+        """
+        query = """
+        SELECT 
+            TABLE_NAME as table_name,
+            INDEX_NAME as index_name,
+            COLUMN_NAME as column_name
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+        ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+        """
+        existing = {}
+        for row in db.execute_query(query) or []:
+            existing.setdefault(row['table_name'], {}).setdefault(row['index_name'], []).append(row['column_name'])
+        return existing
+    
+    def get_index_catalogue_status(self) -> List[Dict[str, Any]]:
+        """
+        Comparer le catalogue d'index à la base
+        Returns:
+            Une ligne par index du catalogue: présent, couvert par un autre index, requêtes servies
+        """
+        existing = self._existing_indexes()
+        status = []
+        for spec in INDEX_CATALOGUE:
+            table_indexes = existing.get(spec['table'], {})
+            covered_by = None
+            for name, cols in table_indexes.items():
+                if name != spec['name'] and cols[:len(spec['columns'])] == list(spec['columns']):
+                    covered_by = name
+                    break
+            status.append({
+                'name': spec['name'],
+                'table': spec['table'],
+                'columns': ', '.join(spec['columns']),
+                'present': spec['name'] in table_indexes,
+                'covered_by': covered_by,
+                'used_by': spec['used_by']
+            })
+        return status
+    
+    def create_indexes(self, names: Optional[List[str]] = None) -> Dict[str, str]:
+        """
+        Créer les index du catalogue (idempotent)
+        Args:
+            names: Sous-ensemble du catalogue (tous si None)
+        Returns:
+            {index: 'cree' | 'existe' | 'couvert par <index>' | 'erreur'}
+        """
+        results = {}
+        for item in self.get_index_catalogue_status():
+            if names and item['name'] not in names:
+                continue
+            if item['present']:
+                results[item['name']] = 'existe'
+                continue
+            if item['covered_by']:
+                # Un index existant a déjà ces colonnes en préfixe: inutile d'en doubler le coût d'écriture
+                results[item['name']] = f"couvert par {item['covered_by']}"
+                continue
+            
+            cols = ', '.join(f"`{c}`" for c in item['columns'].split(', '))
+            ok = db.execute_query(f"ALTER TABLE `{item['table']}` ADD INDEX `{item['name']}` ({cols})")
+            results[item['name']] = 'cree' if ok else 'erreur'
+            print(f"{'✅' if ok else '❌'} {item['table']}.{item['name']} ({item['columns']})")
+        
+        return results
+    
+    def _suppression_autorisee(self, confirmer: bool, action: str) -> bool:
+        """Supprimer des index n'est permis hors production que sur confirmation explicite"""
+        if confirmer or db.database != PRODUCTION_DB:
+            return True
+        print(f"❌ {action} refusé sur la base de production '{db.database}': les requêtes des "
+              f"utilisateurs passeraient en parcours complet. Utilisez une copie (DB_NAME) "
+              f"ou confirmez explicitement (--confirmer).")
+        return False
+    
+    def drop_indexes(self, names: Optional[List[str]] = None, confirmer: bool = False) -> Dict[str, str]:
+        """
+        Supprimer les index du catalogue (idempotent)
+        Seuls les index déclarés dans INDEX_CATALOGUE sont touchés. Sur la base
+        de production (PRODUCTION_DB) ce sont les index des migrations 000/001:
+        refusé sans confirmer=True.
+        Args:
+            names: Sous-ensemble du catalogue (tous si None)
+            confirmer: Autoriser la suppression sur la base de production
+        Returns:
+            {index: 'supprime' | 'absent' | 'erreur'} ({} si refusé)
+        """
+        if not self._suppression_autorisee(confirmer, "DROP INDEX"):
+            return {}
         
         results = {}
-        for index_name, query in indexes.items():
-            try:
-                db.execute_query(query, fetch=False)
-                results[index_name] = True
-            except Exception as e:
-                print(f"Erreur création index {index_name}: {e}")
-                results[index_name] = False
+        for item in self.get_index_catalogue_status():
+            if names and item['name'] not in names:
+                continue
+            if not item['present']:
+                results[item['name']] = 'absent'
+                continue
+            
+            ok = db.execute_query(f"ALTER TABLE `{item['table']}` DROP INDEX `{item['name']}`")
+            results[item['name']] = 'supprime' if ok else 'erreur'
+            print(f"{'✅' if ok else '❌'} DROP {item['table']}.{item['name']}")
         
         return results
     
+    def _time_query(self, query: str, repeat: int) -> float:
+        """Durée médiane (ms) d'une requête, après un passage de chauffe"""
+        db.execute_query(query)
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            db.execute_query(query)
+            durations.append((time.perf_counter() - start) * 1000)
+        return round(statistics.median(durations), 2)
+    
+    def benchmark_index_catalogue(self, repeat: int = 5, confirmer: bool = False) -> List[Dict[str, Any]]:
+        """
+        Mesurer les requêtes du catalogue sans puis avec leurs index
+        Les index du catalogue sont supprimés, chaque requête est chronométrée,
+        les index sont recréés puis les requêtes sont rechronométrées. Les index
+        supprimés sont recréés même si une mesure échoue; ceux qui n'ont pas pu
+        l'être sont signalés (etat 'non restaure').
+        Args:
+            repeat: Nombre d'exécutions par mesure (médiane retenue)
+            confirmer: Autoriser le benchmark sur la base de production
+        Returns:
+            Une ligne par index: avant_ms, apres_ms, gain ([] si refusé)
+        """
+        if not self._suppression_autorisee(confirmer, "Benchmark des index"):
+            return []
+        
+        dropped = self.drop_indexes(confirmer=True)
+        created = None
+        try:
+            db.execute_query("ANALYZE TABLE examens, etudiants, inscriptions, surveillances, modules")
+            before = {spec['name']: self._time_query(spec['benchmark'], repeat) for spec in INDEX_CATALOGUE}
+            
+            created = self.create_indexes()
+            db.execute_query("ANALYZE TABLE examens, etudiants, inscriptions, surveillances, modules")
+            after = {spec['name']: self._time_query(spec['benchmark'], repeat) for spec in INDEX_CATALOGUE}
+        finally:
+            if created is None:
+                # Mesure interrompue: remettre au moins les index supprimés
+                created = self.create_indexes([name for name, etat in dropped.items() if etat == 'supprime'])
+            lost = [name for name, etat in dropped.items()
+                    if etat == 'supprime' and created.get(name) not in ('cree', 'existe')
+                    and not str(created.get(name, '')).startswith('couvert par')]
+            for name in lost:
+                created[name] = 'non restaure'
+            if lost:
+                print(f"❌ Index non restaurés (à recréer: python -m backend.optimization create): {', '.join(lost)}")
+        
+        report = []
+        for spec in INDEX_CATALOGUE:
+            avant, apres = before[spec['name']], after[spec['name']]
+            report.append({
+                'index': spec['name'],
+                'table': spec['table'],
+                'etat': created.get(spec['name']),
+                'avant_ms': avant,
+                'apres_ms': apres,
+                'gain': round(avant / apres, 1) if apres else None
+            })
+        return report
+    
     def analyze_query_performance(self, query: str) -> Dict[str, Any]:
         """
         Analyser les performances d'une requête avec EXPLAIN
@@ -91,7 +349,7 @@ class QueryOptimizer:
             ROUND((DATA_LENGTH / 1024 / 1024), 2) as data_mb,
             ROUND((INDEX_LENGTH / 1024 / 1024), 2) as index_mb
         FROM information_schema.TABLES
-        WHERE TABLE_SCHEMA = 'edt_examens'
+        WHERE TABLE_SCHEMA = DATABASE()
             AND TABLE_TYPE = 'BASE TABLE'
         ORDER BY (DATA_LENGTH + INDEX_LENGTH) DESC
         """
@@ -113,7 +371,7 @@ class QueryOptimizer:
             COLUMN_NAME as column_name,
             CARDINALITY as cardinality
         FROM information_schema.STATISTICS
-        WHERE TABLE_SCHEMA = 'edt_examens'
+        WHERE TABLE_SCHEMA = DATABASE()
         ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
         """
         
@@ -135,50 +393,97 @@ class QueryOptimizer:
         for table in tables:
             try:
                 query = f"OPTIMIZE TABLE {table}"
-                db.execute_query(query, fetch=False)
-                results[table] = True
+                results[table] = db.execute_query(query) is not None
             except Exception as e:
                 print(f"Erreur optimisation {table}: {e}")
                 results[table] = False
         
         return results
     
-    def get_slow_queries_log(self) -> List[Dict[str, Any]]:
+    def get_slow_queries_log(self, min_count: int = 1, only_slow: bool = False) -> List[Dict[str, Any]]:
         """
-        Simuler un log des requêtes lentes
+        Log des requêtes lentes observées par DatabaseConnection
+        Args:
+            min_count: Nombre minimal d'appels pour qu'une forme apparaisse
+            only_slow: Ne garder que les formes dont le p95 dépasse le seuil
         Returns:
-            Log des requêtes potentiellement lentes
-        """
-        # Identifier les requêtes qui pourraient être lentes
-        queries_to_check = [
-            {
-                'name': 'Conflits étudiants',
-                'query': 'SELECT * FROM v_conflits_etudiants',
-                'description': 'Détection des étudiants avec plusieurs examens/jour'
-            },
-            {
-                'name': 'Conflits professeurs',
-                'query': 'SELECT * FROM v_conflits_professeurs',
-                'description': 'Détection des professeurs surchargés'
-            },
-            {
-                'name': 'Planning étudiant',
-                'query': 'CALL sp_planning_etudiant(1)',
-                'description': 'Récupération du planning d\'un étudiant'
-            }
-        ]
-        
+            Percentiles réels (p50/p95/p99) par forme de requête, triés par p95
+        """
         results = []
-        for item in queries_to_check:
-            analysis = self.analyze_query_performance(item['query'])
+        for shape in db.stats.summary(min_count=min_count):
+            if only_slow and not shape['is_slow']:
+                continue
             results.append({
-                'name': item['name'],
-                'description': item['description'],
-                'analysis': analysis
+                'name': shape['fingerprint'][:80],
+                'fingerprint': shape['fingerprint'],
+                'count': shape['count'],
+                'p50_ms': shape['p50_ms'],
+                'p95_ms': shape['p95_ms'],
+                'p99_ms': shape['p99_ms'],
+                'max_ms': shape['max_ms'],
+                'avg_ms': shape['avg_ms'],
+                'avg_rows': shape['avg_rows'],
+                'slow_count': shape['slow_count'],
+                'errors': shape['errors'],
+                'is_slow': shape['is_slow'],
+                'prepared_hits': shape['prepared_hits'],
+                'prepared_misses': shape['prepared_misses'],
+                'callers': shape['callers']
             })
         
         return results
     
+    def get_recent_slow_queries(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Derniers appels ayant dépassé le seuil de lenteur
+        Args:
+            limit: Nombre maximal d'entrées
+        Returns:
+            Entrées du ring buffer (durée, lignes, empreinte, appelant)
+        """
+        return db.stats.slow_queries(limit)
+    
+    def get_prepared_cache_stats(self) -> Dict[str, Any]:
+        """
+        État du cache des requêtes préparées
+        Returns:
+            Hits (parse évités), misses, évictions, taille et capacité du cache
+        """
+        totals = db.stats.totals()
+        return {
+            'capacity': db.prepared_cache_size,
+            'cached_statements': len(db._prepared),
+            'hits': totals['prepared_hits'],
+            'misses': totals['prepared_misses'],
+            'evictions': totals['prepared_evictions'],
+            'hit_rate': totals['prepared_hit_rate']
+        }
+    
+    def get_commit_stats(self) -> Dict[str, Any]:
+        """
+        Validations effectuées (chaque COMMIT = un fsync du redo log)
+        Returns:
+            Commits implicites (autocommit), explicites (transactions), rollbacks
+        """
+        totals = db.stats.totals()
+        return {
+            'commits': totals['commits'],
+            'autocommit': totals['autocommit_commits'],
+            'transactions': totals['transaction_commits'],
+            'rollbacks': totals['rollbacks']
+        }
+    
+    def get_resilience_stats(self) -> Dict[str, Any]:
+        """
+        État de la couche de résilience
+        Returns:
+            Disjoncteur (état, échecs, réouverture), erreurs et tentatives par classe,
+            reprises réussies, abandons et dernière erreur (toutes sessions confondues)
+        """
+        stats = db.resilience.snapshot()
+        stats['breaker'] = db.breaker.status()
+        return stats
+    
     def benchmark_operations(self) -> Dict[str, Any]:
         """
         Benchmarker les opérations principales
@@ -220,7 +525,50 @@ class QueryOptimizer:
             'total_time': sum(benchmarks.values()),
             'unit': 'milliseconds'
         }
-    
+
+    def compare_dataframe_memory(self, query: str = DATAFRAME_BENCHMARK_QUERY,
+                                 params: Optional[tuple] = None) -> Dict[str, Any]:
+        """
+        Comparer la construction d'un DataFrame: execute_query + pd.DataFrame
+        (un dictionnaire par ligne) contre db.query_df (colonnes typées)
+        Args:
+            query: Requête SELECT mesurée (défaut: tous les examens avec formation et salle)
+            params: Paramètres de la requête
+        Returns:
+            Par chemin: durée (ms), pic mémoire Python (Mo), taille du DataFrame (Mo)
+        """
+        import tracemalloc
+        import pandas as pd
+
+        def mesurer(build):
+            tracemalloc.start()
+            start = time.perf_counter()
+            try:
+                df = build()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            if df is None:
+                return None
+            return {
+                'rows': len(df),
+                'duree_ms': round((time.perf_counter() - start) * 1000, 2),
+                'pic_mo': round(peak / 1024 ** 2, 2),
+                'dataframe_mo': round(float(df.memory_usage(deep=True).sum()) / 1024 ** 2, 2)
+            }
+
+        def par_dictionnaires():
+            rows = db.execute_query(query, params)
+            return None if rows is None else pd.DataFrame(rows)
+
+        report = {
+            'dictionnaires': mesurer(par_dictionnaires),
+            'colonnes': mesurer(lambda: db.query_df(query, params))
+        }
+        if report['dictionnaires'] and report['colonnes'] and report['colonnes']['pic_mo']:
+            report['gain_pic'] = round(report['dictionnaires']['pic_mo'] / report['colonnes']['pic_mo'], 1)
+        return report
+
     def get_database_info(self) -> Dict[str, Any]:
         """
         Obtenir des informations générales sur la base de données
@@ -232,7 +580,7 @@ class QueryOptimizer:
         SELECT 
             SUM(DATA_LENGTH + INDEX_LENGTH) / 1024 / 1024 as total_size_mb
         FROM information_schema.TABLES
-        WHERE TABLE_SCHEMA = 'edt_examens'
+        WHERE TABLE_SCHEMA = DATABASE()
         """
         
         size_result = db.execute_query(size_query)
@@ -242,7 +590,7 @@ class QueryOptimizer:
         tables_query = """
         SELECT COUNT(*) as count
         FROM information_schema.TABLES
-        WHERE TABLE_SCHEMA = 'edt_examens'
+        WHERE TABLE_SCHEMA = DATABASE()
             AND TABLE_TYPE = 'BASE TABLE'
         """
         
@@ -253,7 +601,7 @@ class QueryOptimizer:
         views_query = """
         SELECT COUNT(*) as count
         FROM information_schema.TABLES
-        WHERE TABLE_SCHEMA = 'edt_examens'
+        WHERE TABLE_SCHEMA = DATABASE()
             AND TABLE_TYPE = 'VIEW'
         """
         
@@ -264,7 +612,7 @@ class QueryOptimizer:
         procs_query = """
         SELECT COUNT(*) as count
         FROM information_schema.ROUTINES
-        WHERE ROUTINE_SCHEMA = 'edt_examens'
+        WHERE ROUTINE_SCHEMA = DATABASE()
             AND ROUTINE_TYPE = 'PROCEDURE'
         """
         
@@ -279,4 +627,42 @@ class QueryOptimizer:
         }
 
 # Instance globale
-optimizer = QueryOptimizer()
\ No newline at end of file
+optimizer = QueryOptimizer()
+
+
+if __name__ == "__main__":
+    # python -m backend.optimization [status|create|drop|benchmark|dataframe] [--confirmer]
+    # drop / benchmark suppriment des index: --confirmer requis sur la base de production
+    action = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    confirmer = '--confirmer' in sys.argv[2:]
+    
+    if action == 'create':
+        for name, etat in optimizer.create_indexes().items():
+            print(f"   {name}: {etat}")
+    elif action == 'drop':
+        for name, etat in optimizer.drop_indexes(confirmer=confirmer).items():
+            print(f"   {name}: {etat}")
+    elif action == 'benchmark':
+        print("=" * 70)
+        print(f"{'Index':<36}{'Avant (ms)':>11}{'Après (ms)':>11}{'Gain':>8}")
+        print("=" * 70)
+        for row in optimizer.benchmark_index_catalogue(confirmer=confirmer):
+            gain = f"x{row['gain']}" if row['gain'] else '-'
+            print(f"{row['index']:<36}{row['avant_ms']:>11}{row['apres_ms']:>11}{gain:>8}")
+    elif action == 'dataframe':
+        rapport = optimizer.compare_dataframe_memory()
+        for chemin in ('dictionnaires', 'colonnes'):
+            mesure = rapport[chemin]
+            if mesure:
+                print(f"   {chemin:<14} {mesure['rows']} lignes  {mesure['duree_ms']} ms  "
+                      f"pic {mesure['pic_mo']} Mo  DataFrame {mesure['dataframe_mo']} Mo")
+            else:
+                print(f"   {chemin:<14} ❌")
+        if rapport.get('gain_pic'):
+            print(f"⚡ Pic mémoire divisé par {rapport['gain_pic']}")
+    else:
+        for item in optimizer.get_index_catalogue_status():
+            etat = '✅' if item['present'] else (f"↪ {item['covered_by']}" if item['covered_by'] else '❌')
+            print(f"{etat} {item['table']}.{item['name']} ({item['columns']})")
+            for usage in item['used_by']:
+                print(f"      - {usage}")
@@ -0,0 +1,241 @@
+"""
+Module de gestion des partitions de `examens` et `surveillances`
+📅 Une partition par année académique, sous-partitionnée par semestre
+➕ Création des partitions des années à venir (découpe de p_futur)
+🗄️ Archivage d'une année = DROP PARTITION (pas de DELETE massif)
+🔍 Vérification de l'élagage (EXPLAIN ... colonne partitions)
+
+Usage:
+    python -m backend.partitions                    # lister les partitions
+    python -m backend.partitions ensure 2026-2027   # créer la partition d'une année
+    python -m backend.partitions archive 2023-2024  # supprimer une année
+"""
+import os
+import re
+import sys
+
+from backend.db_connection import db
+
+# Tables partitionnées (migration 002); surveillances d'abord pour les suppressions
+PARTITIONED_TABLES = ('surveillances', 'examens')
+
+FUTURE_PARTITION = 'p_futur'
+
+_RE_ANNEE = re.compile(r"^(\d{4})-(\d{4})$")
+
+
+def partition_name(annee_academique):
+    """'2024-2025' → 'p_2024_2025'"""
+    return 'p_' + annee_academique.replace('-', '_')
+
+
+def annee_suivante(annee_academique):
+    """'2024-2025' → '2025-2026'"""
+    debut = int(annee_academique[:4])
+    return f"{debut + 1}-{debut + 2}"
+
+
+class PartitionManager:
+    """Classe pour gérer les partitions par année académique"""
+
+    def __init__(self):
+        """Initialiser le gestionnaire"""
+        self._annee_active = None
+
+    def _check_annee(self, annee_academique):
+        match = _RE_ANNEE.match(annee_academique or '')
+        if not match or int(match.group(2)) != int(match.group(1)) + 1:
+            raise ValueError(f"Année académique invalide: {annee_academique!r} (attendu: 2024-2025)")
+
+    def annee_active(self):
+        """
+        Année académique courante des tableaux de bord
+
+        Dernière année configurée dans periodes_examens, sinon ANNEE_ACADEMIQUE
+        (défaut 2024-2025). Mise en cache pour la durée du processus.
+
+        Returns:
+            str: Année académique, ex: '2024-2025'
+        """
+        if self._annee_active is None:
+            result = db.execute_query("SELECT MAX(annee_academique) as annee FROM periodes_examens")
+            annee = result[0]['annee'] if result and result[0]['annee'] else None
+            annee = annee or os.getenv('ANNEE_ACADEMIQUE', '2024-2025')
+            if result is None:
+                # Lecture en échec: valeur par défaut pour cet appel, relue au suivant
+                return annee
+            self._annee_active = annee
+        return self._annee_active
+
+    def list_partitions(self, table='examens'):
+        """
+        Lister les partitions d'une table et leur volume
+
+        Args:
+            table: examens ou surveillances
+
+        Returns:
+            list: Dictionnaires (partition, borne, lignes, taille_mo) par partition
+        """
+        return self._read_partitions(table) or []
+
+    def _read_partitions(self, table):
+        """list_partitions, mais None si la lecture a échoué (à distinguer de « aucune partition »)"""
+        query = """
+        SELECT
+            PARTITION_NAME as partition_name,
+            PARTITION_DESCRIPTION as borne,
+            SUM(TABLE_ROWS) as lignes,
+            ROUND(SUM(DATA_LENGTH + INDEX_LENGTH) / 1024 / 1024, 2) as taille_mo,
+            MIN(PARTITION_ORDINAL_POSITION) as position
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME = %s
+          AND PARTITION_NAME IS NOT NULL
+        GROUP BY PARTITION_NAME, PARTITION_DESCRIPTION
+        ORDER BY position
+        """
+        return db.execute_query(query, (table,))
+
+    def _read_all_partitions(self):
+        """
+        Partitions de toutes les tables, lues avant toute modification
+
+        Returns:
+            dict: {table: partitions}, None si une lecture a échoué
+        """
+        lues = {table: self._read_partitions(table) for table in PARTITIONED_TABLES}
+        echecs = [table for table, partitions in lues.items() if partitions is None]
+        if echecs:
+            print(f"❌ Lecture des partitions impossible ({', '.join(echecs)}): aucune modification")
+            return None
+        return lues
+
+    def ensure_year(self, annee_academique):
+        """
+        Créer la partition d'une année (et des années intermédiaires manquantes)
+
+        La partition p_futur (MAXVALUE) est découpée par REORGANIZE PARTITION;
+        elle doit être vide ou ne contenir que des années postérieures, ce qui
+        est le cas tant que les années sont créées à l'avance.
+
+        Args:
+            annee_academique: Année à couvrir, ex: '2026-2027'
+
+        Returns:
+            list: Partitions créées (vide si déjà présente), None en cas d'erreur
+        """
+        self._check_annee(annee_academique)
+        created = []
+        lues = self._read_all_partitions()
+        if lues is None:
+            return None
+
+        for table in PARTITIONED_TABLES:
+            partitions = lues[table]
+            if not partitions:
+                print(f"❌ {table} n'est pas partitionnée (appliquer la migration 002)")
+                return None
+
+            names = {p['partition_name'] for p in partitions}
+            if partition_name(annee_academique) in names:
+                continue
+
+            # Dernière borne explicite avant p_futur: première année non couverte
+            bornes = [p['borne'].strip("'") for p in partitions if p['partition_name'] != FUTURE_PARTITION]
+            annee = max(bornes)
+            nouvelles = []
+            while annee <= annee_academique:
+                nouvelles.append(annee)
+                annee = annee_suivante(annee)
+            if not nouvelles:
+                # Année antérieure déjà regroupée (ex: p_anterieur)
+                continue
+
+            definitions = ', '.join(
+                f"PARTITION `{partition_name(a)}` VALUES LESS THAN ('{annee_suivante(a)}')" for a in nouvelles
+            )
+            query = f"""
+                ALTER TABLE `{table}` REORGANIZE PARTITION `{FUTURE_PARTITION}` INTO (
+                    {definitions},
+                    PARTITION `{FUTURE_PARTITION}` VALUES LESS THAN (MAXVALUE)
+                )
+            """
+            if not db.execute_query(query):
+                print(f"❌ Impossible de créer les partitions {nouvelles} de {table}")
+                return None
+
+            print(f"✅ {table}: partitions {', '.join(partition_name(a) for a in nouvelles)} créées")
+            created.extend(f"{table}.{partition_name(a)}" for a in nouvelles)
+
+        return created
+
+    def archive_year(self, annee_academique):
+        """
+        Supprimer toutes les données d'une année par DROP PARTITION
+
+        Opération de métadonnées: instantanée quelle que soit la volumétrie,
+        sans verrou ligne par ligne ni undo log (contrairement à un DELETE).
+        Exporter les données au préalable si elles doivent être conservées.
+
+        Args:
+            annee_academique: Année à archiver, ex: '2023-2024'
+
+        Returns:
+            dict: {table: lignes estimées supprimées}, None en cas d'erreur
+        """
+        self._check_annee(annee_academique)
+        name = partition_name(annee_academique)
+        removed = {}
+        # Les deux tables sont lues avant le premier DROP: une lecture en échec ne doit
+        # pas passer pour « pas de partition » et laisser une table à moitié archivée
+        lues = self._read_all_partitions()
+        if lues is None:
+            return None
+
+        for table in PARTITIONED_TABLES:
+            partitions = {p['partition_name']: p for p in lues[table]}
+            if name not in partitions:
+                print(f"ℹ️ {table}: pas de partition {name} (année regroupée dans une autre partition)")
+                removed[table] = 0
+                continue
+
+            if not db.execute_query(f"ALTER TABLE `{table}` DROP PARTITION `{name}`"):
+                print(f"❌ Échec de la suppression de {table}.{name}")
+                return None
+            removed[table] = int(partitions[name]['lignes'] or 0)
+            print(f"✅ {table}.{name} supprimée (~{removed[table]} lignes)")
+
+        return removed
+
+    def explain_pruning(self, query, params=None):
+        """
+        Partitions lues par une requête
+
+        Args:
+            query: Requête SELECT
+            params: Paramètres de la requête
+
+        Returns:
+            list: {table, partitions} pour chaque table du plan
+        """
+        plan = db.execute_query(f"EXPLAIN {query}", params) or []
+        return [{'table': row.get('table'), 'partitions': row.get('partitions')} for row in plan]
+
+
+# Instance globale
+partition_manager = PartitionManager()
+
+
+if __name__ == "__main__":
+    action = sys.argv[1] if len(sys.argv) > 1 else 'list'
+
+    if action == 'ensure' and len(sys.argv) > 2:
+        partition_manager.ensure_year(sys.argv[2])
+    elif action == 'archive' and len(sys.argv) > 2:
+        partition_manager.archive_year(sys.argv[2])
+    else:
+        for table in PARTITIONED_TABLES:
+            print(f"📅 {table}")
+            for p in partition_manager.list_partitions(table):
+                print(f"   {p['partition_name']:<14} < {p['borne']:<14} {p['lignes'] or 0:>9} lignes  {p['taille_mo']} Mo")
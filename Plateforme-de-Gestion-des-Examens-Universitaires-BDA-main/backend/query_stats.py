@@ -0,0 +1,332 @@
+"""
+Module d'instrumentation des requêtes SQL
+🔥 Chaque appel est tracé: durée, lignes retournées, empreinte normalisée, appelant
+📊 Ring buffer en mémoire + histogrammes agrégés par forme de requête
+🐢 Seuil de lenteur configurable (DB_SLOW_QUERY_MS)
+⚡ Compteurs du cache des requêtes préparées (hits / misses / évictions)
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque, Counter
+from functools import lru_cache
+from pathlib import Path
+
+# ========== NORMALISATION DES REQUÊTES ==========
+
+_RE_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_RE_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_RE_PLACEHOLDER = re.compile(r"%\([^)]+\)s|%s|\?")
+_RE_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_RE_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+_RE_VALUES_LIST = re.compile(r"\bVALUES\s*(\([^()]*\))(?:\s*,\s*\([^()]*\))+", re.I)
+_RE_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(query):
+    """
+    Normaliser une requête pour regrouper les appels de même forme
+
+    Les littéraux et paramètres deviennent '?', les listes IN (...)
+    et VALUES (...), (...) sont repliées, les espaces sont compactés.
+
+    Args:
+        query: Texte SQL
+
+    Returns:
+        str: Empreinte normalisée
+    """
+    q = _RE_COMMENT.sub(' ', query)
+    q = _RE_STRING.sub('?', q)
+    q = _RE_PLACEHOLDER.sub('?', q)
+    q = _RE_NUMBER.sub('?', q)
+    q = _RE_IN_LIST.sub('IN (?+)', q)
+    q = _RE_VALUES_LIST.sub(r'VALUES \1+', q)
+    return _RE_SPACES.sub(' ', q).strip()
+
+
+# ========== HISTOGRAMME ==========
+
+# Bornes logarithmiques (ms): 0.05 ms → ~2 min, facteur 1.25
+_BUCKET_BOUNDS = []
+_b = 0.05
+while _b < 120000:
+    _BUCKET_BOUNDS.append(round(_b, 4))
+    _b *= 1.25
+_BUCKET_BOUNDS.append(float('inf'))
+
+
+def _bucket_index(duration_ms):
+    """Indice du bucket (recherche dichotomique)"""
+    lo, hi = 0, len(_BUCKET_BOUNDS) - 1
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if duration_ms <= _BUCKET_BOUNDS[mid]:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+class FingerprintStats:
+    """Statistiques agrégées d'une forme de requête"""
+
+    __slots__ = ('fingerprint', 'count', 'total_ms', 'max_ms', 'min_ms',
+                 'rows', 'errors', 'slow_count', 'buckets', 'callers', 'last_seen',
+                 'prepared_hits', 'prepared_misses')
+
+    def __init__(self, fp):
+        self.fingerprint = fp
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.min_ms = None
+        self.rows = 0
+        self.errors = 0
+        self.slow_count = 0
+        self.buckets = [0] * len(_BUCKET_BOUNDS)
+        self.callers = Counter()
+        self.last_seen = None
+        self.prepared_hits = 0
+        self.prepared_misses = 0
+
+    def add(self, duration_ms, rows, caller, error, slow, ts, prepared=None):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.min_ms = duration_ms if self.min_ms is None else min(self.min_ms, duration_ms)
+        self.rows += rows or 0
+        self.buckets[_bucket_index(duration_ms)] += 1
+        self.last_seen = ts
+        if error:
+            self.errors += 1
+        if slow:
+            self.slow_count += 1
+        if prepared == 'hit':
+            self.prepared_hits += 1
+        elif prepared == 'miss':
+            self.prepared_misses += 1
+        # Borner le nombre d'appelants distincts suivis
+        if caller in self.callers or len(self.callers) < 20:
+            self.callers[caller] += 1
+
+    def percentile(self, p):
+        """
+        Estimer un percentile à partir de l'histogramme
+
+        Args:
+            p: Percentile entre 0 et 100
+
+        Returns:
+            float: Borne supérieure du bucket (ms), plafonnée au max observé
+        """
+        if self.count == 0:
+            return 0.0
+        seuil = p / 100.0 * self.count
+        cumul = 0
+        for i, n in enumerate(self.buckets):
+            cumul += n
+            if cumul >= seuil and n:
+                return round(min(_BUCKET_BOUNDS[i], self.max_ms), 3)
+        return round(self.max_ms, 3)
+
+    def to_dict(self, slow_threshold_ms):
+        p95 = self.percentile(95)
+        return {
+            'fingerprint': self.fingerprint,
+            'count': self.count,
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'min_ms': round(self.min_ms or 0.0, 3),
+            'p50_ms': self.percentile(50),
+            'p95_ms': p95,
+            'p99_ms': self.percentile(99),
+            'max_ms': round(self.max_ms, 3),
+            'total_ms': round(self.total_ms, 3),
+            'avg_rows': round(self.rows / self.count, 1) if self.count else 0.0,
+            'errors': self.errors,
+            'slow_count': self.slow_count,
+            'is_slow': p95 >= slow_threshold_ms,
+            'prepared_hits': self.prepared_hits,
+            'prepared_misses': self.prepared_misses,
+            'callers': [c for c, _ in self.callers.most_common(5)],
+            'last_seen': self.last_seen
+        }
+
+
+# ========== TRACEUR ==========
+
+_INTERNAL_FILES = {'db_connection.py', 'query_stats.py'}
+
+
+def _find_caller():
+    """Trouver le premier appelant hors de la couche d'accès aux données"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = Path(frame.f_code.co_filename).name
+        if filename not in _INTERNAL_FILES:
+            return f"{filename}:{frame.f_lineno} ({frame.f_code.co_name})"
+        frame = frame.f_back
+    return 'inconnu'
+
+
+class QueryStats:
+    """Collecteur des traces de requêtes (thread-safe)"""
+
+    def __init__(self, slow_threshold_ms=None, buffer_size=None, enabled=None):
+        """
+        Initialiser le collecteur
+
+        Args:
+            slow_threshold_ms: Seuil de lenteur en ms (défaut: DB_SLOW_QUERY_MS ou 100)
+            buffer_size: Taille du ring buffer (défaut: DB_TRACE_BUFFER ou 1000)
+            enabled: Activer la trace (défaut: DB_TRACE_ENABLED ou 1)
+        """
+        if slow_threshold_ms is None:
+            slow_threshold_ms = float(os.getenv('DB_SLOW_QUERY_MS', '100'))
+        if buffer_size is None:
+            buffer_size = int(os.getenv('DB_TRACE_BUFFER', '1000'))
+        if enabled is None:
+            enabled = os.getenv('DB_TRACE_ENABLED', '1') not in ('0', 'false', 'False')
+
+        self.slow_threshold_ms = slow_threshold_ms
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=buffer_size)
+        self._slow = deque(maxlen=buffer_size)
+        self._by_fingerprint = {}
+        self._prepared_evictions = 0
+        # COMMIT implicites (autocommit, un par écriture) et explicites (transactions)
+        self._commits = Counter()
+
+    def set_slow_threshold(self, threshold_ms):
+        """Modifier le seuil de lenteur (ms)"""
+        self.slow_threshold_ms = float(threshold_ms)
+
+    def record(self, query, duration_ms, rows=0, error=None, caller=None, prepared=None):
+        """
+        Enregistrer un appel
+
+        Args:
+            query: Texte SQL exécuté
+            duration_ms: Durée de l'appel en millisecondes
+            rows: Lignes retournées (SELECT) ou affectées (DML)
+            error: Message d'erreur éventuel
+            caller: Appelant (détecté automatiquement si None)
+            prepared: 'hit' / 'miss' si la requête est passée par le cache préparé
+        """
+        if not self.enabled:
+            return
+
+        fp = fingerprint(query)
+        if caller is None:
+            caller = _find_caller()
+        slow = duration_ms >= self.slow_threshold_ms
+        ts = time.time()
+
+        entry = {
+            'timestamp': ts,
+            'fingerprint': fp,
+            'duration_ms': round(duration_ms, 3),
+            'rows': rows or 0,
+            'caller': caller,
+            'error': error,
+            'slow': slow,
+            'prepared': prepared
+        }
+
+        with self._lock:
+            self._recent.append(entry)
+            if slow:
+                self._slow.append(entry)
+            stats = self._by_fingerprint.get(fp)
+            if stats is None:
+                stats = self._by_fingerprint[fp] = FingerprintStats(fp)
+            stats.add(duration_ms, rows, caller, error, slow, ts, prepared)
+
+    def record_prepared_eviction(self):
+        """Compter un handle préparé fermé par le LRU"""
+        with self._lock:
+            self._prepared_evictions += 1
+
+    def record_commit(self, kind='transaction'):
+        """
+        Compter une validation
+
+        Args:
+            kind: 'autocommit' (écriture isolée), 'transaction' (COMMIT explicite) ou 'rollback'
+        """
+        with self._lock:
+            self._commits[kind] += 1
+
+    def recent(self, limit=None):
+        """Derniers appels (du plus récent au plus ancien)"""
+        with self._lock:
+            entries = list(self._recent)
+        entries.reverse()
+        return entries[:limit] if limit else entries
+
+    def slow_queries(self, limit=None):
+        """Derniers appels ayant dépassé le seuil de lenteur"""
+        with self._lock:
+            entries = list(self._slow)
+        entries.reverse()
+        return entries[:limit] if limit else entries
+
+    def summary(self, min_count=1):
+        """
+        Statistiques agrégées par empreinte
+
+        Args:
+            min_count: Nombre minimal d'appels pour apparaître
+
+        Returns:
+            list: Dictionnaires triés par p95 décroissant
+        """
+        with self._lock:
+            rows = [s.to_dict(self.slow_threshold_ms)
+                    for s in self._by_fingerprint.values() if s.count >= min_count]
+        rows.sort(key=lambda r: r['p95_ms'], reverse=True)
+        return rows
+
+    def totals(self):
+        """Compteurs globaux"""
+        with self._lock:
+            count = sum(s.count for s in self._by_fingerprint.values())
+            total_ms = sum(s.total_ms for s in self._by_fingerprint.values())
+            errors = sum(s.errors for s in self._by_fingerprint.values())
+            slow = sum(s.slow_count for s in self._by_fingerprint.values())
+            shapes = len(self._by_fingerprint)
+            hits = sum(s.prepared_hits for s in self._by_fingerprint.values())
+            misses = sum(s.prepared_misses for s in self._by_fingerprint.values())
+            evictions = self._prepared_evictions
+            commits = dict(self._commits)
+        return {
+            'queries': count,
+            'total_ms': round(total_ms, 3),
+            'errors': errors,
+            'slow_queries': slow,
+            'distinct_shapes': shapes,
+            'slow_threshold_ms': self.slow_threshold_ms,
+            'prepared_hits': hits,
+            'prepared_misses': misses,
+            'prepared_evictions': evictions,
+            # Chaque hit = un parse/plan évité côté serveur
+            'prepared_hit_rate': round(hits / (hits + misses) * 100, 1) if hits + misses else 0.0,
+            # Chaque commit = un fsync du redo log côté serveur
+            'commits': commits.get('autocommit', 0) + commits.get('transaction', 0),
+            'autocommit_commits': commits.get('autocommit', 0),
+            'transaction_commits': commits.get('transaction', 0),
+            'rollbacks': commits.get('rollback', 0)
+        }
+
+    def reset(self):
+        """Vider toutes les traces"""
+        with self._lock:
+            self._recent.clear()
+            self._slow.clear()
+            self._by_fingerprint.clear()
+            self._prepared_evictions = 0
+            self._commits.clear()
@@ -0,0 +1,347 @@
+"""
+Module de résilience des accès MySQL
+🏷️ Classification des erreurs (deadlock, lock wait, connexion perdue, saturation)
+🔁 Nouvelles tentatives avec backoff exponentiel et gigue
+🚫 require(): une lecture en échec lève une erreur au lieu de passer pour « aucune ligne »
+⚡ Disjoncteur: échec immédiat quand MySQL est saturé ou injoignable
+📊 Compteurs de tentatives, déclenchements et refus
+
+Usage:
+    from backend.resilience import run_transaction
+
+    def valider(cursor):
+        cursor.execute("UPDATE examens SET statut = 'valide' WHERE ...")
+        cursor.execute("INSERT INTO validations_planning ...")
+
+    run_transaction(valider)  # rejouée entièrement en cas de deadlock
+"""
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+from mysql.connector import Error
+
+# Classes d'erreurs par code MySQL / client
+DEADLOCK = 'deadlock'
+LOCK_WAIT = 'lock_wait'
+GONE_AWAY = 'gone_away'
+CONNEXION = 'connexion'
+SATURATION = 'saturation'
+CIRCUIT_OUVERT = 'circuit_ouvert'
+FATALE = 'fatale'
+
+ERROR_CLASSES = {
+    1213: DEADLOCK,     # ER_LOCK_DEADLOCK
+    1205: LOCK_WAIT,    # ER_LOCK_WAIT_TIMEOUT
+    2006: GONE_AWAY,    # CR_SERVER_GONE_ERROR
+    2013: GONE_AWAY,    # CR_SERVER_LOST
+    2055: GONE_AWAY,    # CR_SERVER_LOST_EXTENDED
+    4031: GONE_AWAY,    # ER_CLIENT_INTERACTION_TIMEOUT
+    2002: CONNEXION,    # CR_CONNECTION_ERROR
+    2003: CONNEXION,    # CR_CONN_HOST_ERROR
+    1040: SATURATION,   # ER_CON_COUNT_ERROR (too many connections)
+    1203: SATURATION,   # ER_TOO_MANY_USER_CONNECTIONS
+    3024: SATURATION,   # ER_QUERY_TIMEOUT (max_execution_time)
+}
+
+# Erreurs après lesquelles l'instruction n'a laissé aucun effet (rejouable)
+TRANSIENT = {DEADLOCK, LOCK_WAIT}
+
+# Erreurs de connexion: rejouables pour une lecture après reconnexion
+CONNECTION_LOST = {GONE_AWAY, CONNEXION}
+
+# Erreurs comptées par le disjoncteur (serveur indisponible ou saturé). Deadlock et
+# lock wait n'en font pas partie: une contention de lignes (deux validations simultanées,
+# publication qui tient ses verrous) est rejouée, elle ne coupe pas la base à tous
+BREAKER_FAILURES = {GONE_AWAY, CONNEXION, SATURATION}
+
+
+def classify(error):
+    """
+    Classer une erreur MySQL
+
+    Args:
+        error: Exception mysql.connector
+
+    Returns:
+        str: deadlock, lock_wait, gone_away, connexion, saturation ou fatale
+    """
+    if isinstance(error, CircuitOpenError):
+        return CIRCUIT_OUVERT
+    return ERROR_CLASSES.get(getattr(error, 'errno', None), FATALE)
+
+
+def is_retryable(kind, idempotent):
+    """
+    Une nouvelle tentative est-elle sûre ?
+
+    Deadlock et lock wait annulent l'instruction: toujours rejouables.
+    Une connexion perdue laisse l'effet d'une écriture inconnu: seules
+    les opérations idempotentes (lectures) sont rejouées.
+    """
+    if kind in TRANSIENT:
+        return True
+    return idempotent and kind in CONNECTION_LOST
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    """
+    Délai avant la tentative suivante (backoff exponentiel, gigue complète)
+
+    Args:
+        attempt: Numéro de la tentative échouée (1, 2, ...)
+        base: Délai de base en secondes (DB_RETRY_BASE_DELAY, défaut 0.05)
+        cap: Délai maximal en secondes (DB_RETRY_MAX_DELAY, défaut 2)
+
+    Returns:
+        float: Délai en secondes, tiré uniformément dans [0, min(cap, base * 2^attempt)]
+    """
+    base = float(os.getenv('DB_RETRY_BASE_DELAY', '0.05')) if base is None else base
+    cap = float(os.getenv('DB_RETRY_MAX_DELAY', '2')) if cap is None else cap
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitOpenError(Error):
+    """Levée quand le disjoncteur refuse l'accès à la base"""
+
+    def __init__(self, retry_in):
+        super().__init__(msg=f"Base de données indisponible (disjoncteur ouvert, nouvel essai dans {retry_in:.0f}s)")
+        self.retry_in = retry_in
+
+
+class QueryFailedError(Error):
+    """Levée par require() quand une lecture a échoué (tentatives épuisées, disjoncteur ouvert)"""
+
+    def __init__(self, what, last_error=None):
+        detail = f" ({last_error['kind']}: {last_error['message']})" if last_error else ""
+        super().__init__(msg=f"Lecture impossible: {what}{detail}",
+                         errno=(last_error or {}).get('errno'))
+        self.kind = (last_error or {}).get('kind')
+
+
+def require(result, what):
+    """
+    Résultat d'une lecture qui ne peut pas être remplacée par « aucune ligne »
+
+    execute_query rend None quand la lecture échoue: pour un chargeur dont le
+    résultat décide de la suite (planning existant, salles, examens à placer),
+    traiter None comme une liste vide produirait un résultat faux.
+
+    Usage:
+        salles = require(db.execute_query("SELECT * FROM salles"), "salles")
+
+    Args:
+        result: Valeur rendue par db.execute_query
+        what: Ce qui était lu (pour le message d'erreur)
+
+    Returns:
+        result, inchangé s'il n'est pas None
+
+    Raises:
+        QueryFailedError: si la lecture a échoué (détail tiré de db.last_error)
+    """
+    if result is not None:
+        return result
+    from backend.db_connection import db
+    raise QueryFailedError(what, db.last_error)
+
+
+class ResilienceMetrics:
+    """Compteurs de résilience (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Remettre les compteurs à zéro"""
+        with self._lock:
+            self.errors = Counter()
+            self.retries = Counter()
+            self.recovered = 0
+            self.gave_up = 0
+            self.trips = 0
+            self.rejected = 0
+            self.last_error = None
+
+    def record_error(self, kind, detail=None):
+        """
+        Args:
+            kind: Classe de l'erreur
+            detail: {'kind', 'errno', 'message'} retenu comme dernière erreur (toutes sessions)
+        """
+        with self._lock:
+            self.errors[kind] += 1
+            if detail is not None:
+                self.last_error = detail
+
+    def record_retry(self, kind):
+        with self._lock:
+            self.retries[kind] += 1
+
+    def record_recovered(self):
+        with self._lock:
+            self.recovered += 1
+
+    def record_gave_up(self):
+        with self._lock:
+            self.gave_up += 1
+
+    def record_trip(self):
+        with self._lock:
+            self.trips += 1
+
+    def record_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        """
+        Instantané des compteurs
+
+        Returns:
+            dict: erreurs et tentatives par classe, succès après reprise,
+                  abandons, déclenchements et refus du disjoncteur
+        """
+        with self._lock:
+            return {
+                'errors': dict(self.errors),
+                'retries': dict(self.retries),
+                'total_retries': sum(self.retries.values()),
+                'recovered': self.recovered,
+                'gave_up': self.gave_up,
+                'breaker_trips': self.trips,
+                'breaker_rejected': self.rejected,
+                'last_error': self.last_error
+            }
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur à trois états
+
+    fermé: appels autorisés; N échecs consécutifs → ouvert
+    ouvert: appels refusés immédiatement pendant reset_timeout secondes
+    semi-ouvert: appels d'essai; premier succès → fermé, premier échec → ouvert
+    """
+
+    FERME = 'ferme'
+    OUVERT = 'ouvert'
+    SEMI_OUVERT = 'semi_ouvert'
+
+    def __init__(self, failure_threshold=None, reset_timeout=None, metrics=None):
+        """
+        Initialiser le disjoncteur
+
+        Args:
+            failure_threshold: Échecs consécutifs avant ouverture (DB_BREAKER_THRESHOLD, défaut 5)
+            reset_timeout: Durée d'ouverture en secondes (DB_BREAKER_RESET, défaut 30)
+            metrics: ResilienceMetrics à alimenter
+        """
+        self.failure_threshold = failure_threshold or int(os.getenv('DB_BREAKER_THRESHOLD', '5'))
+        self.reset_timeout = reset_timeout or float(os.getenv('DB_BREAKER_RESET', '30'))
+        self.metrics = metrics or ResilienceMetrics()
+        self._lock = threading.Lock()
+        self.state = self.FERME
+        self.failures = 0
+        self.opened_at = None
+
+    def allow(self):
+        """
+        Vérifier qu'un appel peut partir
+
+        Raises:
+            CircuitOpenError: si le disjoncteur est ouvert
+        """
+        with self._lock:
+            if self.state == self.OUVERT:
+                elapsed = time.monotonic() - self.opened_at
+                if elapsed < self.reset_timeout:
+                    self.metrics.record_rejected()
+                    raise CircuitOpenError(self.reset_timeout - elapsed)
+                self.state = self.SEMI_OUVERT
+
+    def record_success(self):
+        if self.state == self.FERME and not self.failures:
+            return
+        with self._lock:
+            if self.state != self.FERME:
+                print("✅ Disjoncteur MySQL refermé")
+            self.state = self.FERME
+            self.failures = 0
+
+    def record_failure(self, kind):
+        """Compter un échec (seules les classes BREAKER_FAILURES comptent)"""
+        with self._lock:
+            if kind not in BREAKER_FAILURES:
+                # Erreur applicative: le serveur a répondu
+                if self.state == self.SEMI_OUVERT:
+                    self.state = self.FERME
+                    self.failures = 0
+                return
+            self.failures += 1
+            if self.state == self.SEMI_OUVERT or self.failures >= self.failure_threshold:
+                if self.state != self.OUVERT:
+                    self.metrics.record_trip()
+                    print(f"🔥 Disjoncteur MySQL ouvert ({self.failures} échecs, {kind}): "
+                          f"refus pendant {self.reset_timeout:.0f}s")
+                self.state = self.OUVERT
+                self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        """Vrai tant que les appels sont refusés"""
+        with self._lock:
+            return self.state == self.OUVERT and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def status(self):
+        """État courant du disjoncteur"""
+        with self._lock:
+            retry_in = None
+            if self.state == self.OUVERT:
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+            return {'state': self.state, 'failures': self.failures, 'retry_in': retry_in}
+
+
+def run_transaction(work, attempts=None, connection=None):
+    """
+    Exécuter une transaction complète, rejouée en cas de deadlock ou lock wait
+
+    La fonction est rappelée depuis le début à chaque tentative: elle ne doit
+    avoir d'effet qu'à travers le curseur fourni.
+
+    Args:
+        work: Fonction (cursor) -> résultat, exécutée dans db.transaction()
+        attempts: Nombre maximal de tentatives (DB_RETRY_ATTEMPTS, défaut 3)
+        connection: Connexion dédiée à réutiliser
+
+    Returns:
+        Résultat de work
+
+    Raises:
+        Error: dernière erreur si toutes les tentatives échouent ou si elle n'est pas rejouable
+    """
+    from backend.db_connection import db
+
+    attempts = attempts or int(os.getenv('DB_RETRY_ATTEMPTS', '3'))
+    for attempt in range(1, attempts + 1):
+        try:
+            with db.transaction(connection) as cursor:
+                result = work(cursor)
+            if attempt > 1:
+                db.resilience.record_recovered()
+            return result
+        except Error as e:
+            kind = classify(e)
+            db.last_error = {'kind': kind, 'errno': getattr(e, 'errno', None), 'message': str(e)}
+            db.resilience.record_error(kind, db.last_error)
+            # Toute la transaction a été annulée: la rejouer est sûr pour deadlock / lock wait
+            if kind not in TRANSIENT or attempt == attempts:
+                db.resilience.record_gave_up()
+                raise
+            db.resilience.record_retry(kind)
+            delay = backoff_delay(attempt)
+            print(f"🔁 Transaction rejouée ({kind}, tentative {attempt + 1}/{attempts} dans {delay * 1000:.0f} ms)")
+            time.sleep(delay)
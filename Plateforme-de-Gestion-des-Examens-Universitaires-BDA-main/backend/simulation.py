@@ -0,0 +1,275 @@
+"""
+Module de simulation du générateur d'emplois du temps (dry-run / what-if)
+🧪 Aucune écriture: les données sont lues une fois, les plans construits en mémoire
+🔧 Paramètres modifiables par scénario: période, salles, limite de surveillances, grille horaire
+📊 Balayage de dizaines de scénarios (en parallèle sur plusieurs cœurs)
+
+Usage:
+    from backend.simulation import simulator
+
+    simulator.charger(semestre=1, annee_academique='2024-2025')
+    resultats = simulator.balayer([
+        {'nom': 'Actuel'},
+        {'nom': '+5 jours', 'prolongation_jours': 5},
+        {'nom': '4 surveillances/jour', 'max_surveillances_jour': 4},
+        {'nom': '2 amphis de plus', 'salles_en_plus': [{'type': 'amphi', 'capacite': 200, 'nombre': 2}]}
+    ])
+
+Paramètres d'un scénario (tous optionnels):
+    nom: Libellé du scénario
+    date_debut / date_fin: Bornes de la période (date ou 'AAAA-MM-JJ', défaut: periodes_examens)
+    prolongation_jours: Jours ajoutés après date_fin
+    salles_indisponibles: IDs de salles retirées
+    salles_en_plus: Salles fictives [{'type': 'amphi'|'salle', 'capacite': n, 'nombre': k}]
+    max_surveillances_jour: Limite de surveillances par prof et par jour
+    pas_minutes / debut_journee / fin_journee / jours_ouvres: Grille horaire
+    graine: Graine de l'ordre des créneaux (défaut: 42)
+"""
+import contextlib
+import io
+import itertools
+import multiprocessing
+import os
+import random
+import time
+from datetime import date, timedelta
+
+from backend.generate_edt import ScheduleGenerator
+
+PARAMETRES_GRILLE = ('pas_minutes', 'debut_journee', 'fin_journee', 'jours_ouvres')
+
+# Instantané des données, chargé une fois par processus du pool
+_BASE = None
+
+
+def _date(valeur):
+    """date, 'AAAA-MM-JJ' ou None"""
+    if valeur is None or isinstance(valeur, date):
+        return valeur
+    return date.fromisoformat(str(valeur))
+
+
+def _salles_scenario(salles, scenario):
+    """Salles disponibles dans le scénario (retraits + salles fictives à ID négatif)"""
+    exclues = set(scenario.get('salles_indisponibles') or ())
+    salles = [s for s in salles if s['id'] not in exclues]
+
+    salle_id = -1
+    for ajout in scenario.get('salles_en_plus') or ():
+        for _ in range(int(ajout.get('nombre', 1))):
+            salles.append({
+                'id': salle_id,
+                'nom': f"Fictive {-salle_id}",
+                'type': ajout.get('type', 'salle'),
+                'capacite': int(ajout['capacite']),
+                'disponible': 1
+            })
+            salle_id -= 1
+
+    # Même ordre que preload_data (capacité décroissante)
+    return sorted(salles, key=lambda s: s['capacite'], reverse=True)
+
+
+def simuler(base, scenario, avec_plan=True):
+    """
+    🧪 Construire un plan en mémoire pour un scénario
+
+    Args:
+        base: Instantané des données (ScheduleSimulator.charger)
+        scenario: Paramètres modifiés (voir le docstring du module)
+        avec_plan: Joindre la liste des examens placés
+
+    Returns:
+        dict: nom, parametres, stats, plan (si avec_plan)
+    """
+    start = time.perf_counter()
+    date_debut, date_fin, semestre, annee_academique = base['contexte']
+    date_debut = _date(scenario.get('date_debut')) or date_debut
+    date_fin = (_date(scenario.get('date_fin')) or date_fin) + timedelta(days=int(scenario.get('prolongation_jours') or 0))
+
+    grille = base['grid'].remplacer(**{p: scenario.get(p) for p in PARAMETRES_GRILLE})
+    generateur = ScheduleGenerator.depuis_snapshot(base, grid=grille,
+                                                   max_surveillances_jour=scenario.get('max_surveillances_jour'))
+    if scenario.get('salles_indisponibles') or scenario.get('salles_en_plus'):
+        generateur.salles = _salles_scenario(base['salles'], scenario)
+        generateur.amphis = [s for s in generateur.salles if s['type'] == 'amphi']
+        generateur.salles_normales = [s for s in generateur.salles if s['type'] == 'salle']
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        resume = generateur.construire(date_debut, date_fin, semestre, annee_academique,
+                                       rng=random.Random(scenario.get('graine', 42)))
+
+    total = len(generateur.modules_groupes)
+    planifies = resume['planifies']
+    surv_counts = generateur.compter_surveillances()
+    qualite = generateur.qualite(planifies)
+
+    resultat = {
+        'nom': scenario.get('nom') or 'Scénario',
+        'parametres': {cle: valeur for cle, valeur in scenario.items() if cle != 'nom'},
+        'stats': {
+            'examens_planifies': planifies,
+            'examens_non_planifies': total - planifies,
+            'examens_total': total,
+            'taux_reussite': round(planifies / total * 100, 1) if total else 100.0,
+            'jours': resume['jours'],
+            'periode': f"{date_debut} → {date_fin}",
+            'salles_utilisees': len({e[2] for e in generateur.examens_batch}),
+            'surveillance_min': min(surv_counts.values()) if surv_counts else 0,
+            'surveillance_max': max(surv_counts.values()) if surv_counts else 0,
+            'surveillance_avg': round(sum(surv_counts.values()) / len(surv_counts), 1) if surv_counts else 0,
+            'equilibre': qualite['equilibre'],
+            'gaspillage': qualite['gaspillage'],
+            'domaines_vides': resume['domaines_vides'],
+            'temps_execution': round(time.perf_counter() - start, 3)
+        }
+    }
+
+    if avec_plan:
+        resultat['plan'] = [
+            {
+                'module_id': e[0],
+                'prof_id': e[1],
+                'salle_id': e[2],
+                'groupe_id': e[3],
+                'date_heure': e[4],
+                'duree_minutes': e[5],
+                'nb_etudiants': e[6]
+            }
+            for e in generateur.examens_batch
+        ]
+    return resultat
+
+
+def _init_simulation(base):
+    global _BASE
+    _BASE = base
+
+
+def _simuler_tache(tache):
+    index, scenario, avec_plan = tache
+    return index, simuler(_BASE, scenario, avec_plan)
+
+
+def scenarios_croises(**valeurs):
+    """
+    Produit cartésien de valeurs de paramètres
+
+    Exemple:
+        scenarios_croises(prolongation_jours=[0, 5], max_surveillances_jour=[3, 4])
+        -> 4 scénarios nommés 'prolongation_jours=0, max_surveillances_jour=3', ...
+
+    Returns:
+        list: Scénarios
+    """
+    noms = list(valeurs)
+    scenarios = []
+    for combinaison in itertools.product(*(valeurs[nom] for nom in noms)):
+        scenario = dict(zip(noms, combinaison))
+        scenario['nom'] = ', '.join(f"{nom}={valeur}" for nom, valeur in zip(noms, combinaison)) or 'Actuel'
+        scenarios.append(scenario)
+    return scenarios
+
+
+class ScheduleSimulator:
+    """Simulations du générateur sans écriture en base"""
+
+    def __init__(self):
+        """Initialiser le simulateur"""
+        self.base = None
+        self.cle = None
+        self.processes = int(os.getenv('EDT_WORKERS', '0')) or os.cpu_count() or 1
+
+    def charger(self, semestre, dept_id=None, annee_academique='2024-2025', depuis_zero=True, force=False):
+        """
+        📦 Lire une fois les données du semestre (requêtes SELECT uniquement)
+
+        Args:
+            semestre: 1 ou 2
+            dept_id: Département simulé (None = tous)
+            annee_academique: Année académique
+            depuis_zero: Simuler un replanning complet (les examens déjà planifiés du
+                périmètre sont replacés; sinon ils restent fixes comme dans generate_schedule)
+            force: Relire même si le même périmètre est déjà chargé
+
+        Returns:
+            dict: Instantané des données, None en cas d'erreur
+        """
+        cle = (semestre, dept_id, annee_academique, depuis_zero)
+        if self.base is not None and self.cle == cle and not force:
+            return self.base
+
+        start = time.perf_counter()
+        try:
+            generateur = ScheduleGenerator()
+            # Examens existants hors périmètre: ils occupent toujours salles, profs et étudiants
+            if not (depuis_zero and dept_id is None):
+                ignorer = dept_id if depuis_zero else None
+                generateur.load_existing_exams_for_students(semestre, annee_academique, ignorer)
+                generateur.load_existing_professor_surveillances(semestre, annee_academique, ignorer)
+                generateur.load_existing_room_usage(semestre, annee_academique, ignorer)
+            generateur.preload_data(dept_id, semestre, annee_academique, inclure_planifies=depuis_zero)
+            date_debut, date_fin = generateur.get_periode_examen(semestre, annee_academique)
+            base = generateur.snapshot(date_debut, date_fin, semestre, annee_academique)
+        except Exception as e:
+            print(f"❌ Erreur lors du chargement de la simulation: {e}")
+            return None
+
+        base['chargement'] = round(time.perf_counter() - start, 2)
+        self.base, self.cle = base, cle
+        print(f"✅ Simulation S{semestre}: {len(base['modules_groupes'])} examens chargés en {base['chargement']}s")
+        return base
+
+    def simuler(self, scenario=None, avec_plan=True):
+        """
+        Simuler un scénario sur les données chargées
+
+        Returns:
+            dict: nom, parametres, stats, plan; None si aucune donnée chargée
+        """
+        if self.base is None:
+            print("⚠️ Aucune donnée chargée (appeler charger)")
+            return None
+        return simuler(self.base, scenario or {}, avec_plan)
+
+    def balayer(self, scenarios, processes=None, avec_plan=False):
+        """
+        📊 Simuler une liste de scénarios
+
+        Args:
+            scenarios: Liste de scénarios (voir scenarios_croises)
+            processes: Processus (défaut: EDT_WORKERS ou nombre de cœurs)
+            avec_plan: Joindre le plan de chaque scénario
+
+        Returns:
+            list: Résultats dans l'ordre des scénarios
+        """
+        if self.base is None:
+            print("⚠️ Aucune donnée chargée (appeler charger)")
+            return []
+
+        processes = min(len(scenarios), processes or self.processes)
+        taches = [(i, scenario, avec_plan) for i, scenario in enumerate(scenarios)]
+        start = time.perf_counter()
+
+        if processes > 1:
+            with multiprocessing.get_context('spawn').Pool(
+                processes, initializer=_init_simulation, initargs=(self.base,)
+            ) as pool:
+                resultats = list(pool.imap_unordered(_simuler_tache, taches))
+        else:
+            _init_simulation(self.base)
+            resultats = list(map(_simuler_tache, taches))
+
+        resultats = [r for _, r in sorted(resultats, key=lambda r: r[0])]
+        print(f"🧪 {len(scenarios)} scénarios simulés en {time.perf_counter() - start:.1f}s "
+              f"({processes} processus)")
+        for r in resultats:
+            stats = r['stats']
+            print(f"   {r['nom']}: {stats['examens_planifies']}/{stats['examens_total']} "
+                  f"({stats['taux_reussite']}%), σ={stats['equilibre']}, {stats['temps_execution']}s")
+        return resultats
+
+
+# Instance globale
+simulator = ScheduleSimulator()
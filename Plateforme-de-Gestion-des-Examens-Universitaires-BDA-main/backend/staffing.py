@@ -0,0 +1,429 @@
+"""
+Module d'encadrement des examens: surveillants assistants et équilibrage des charges
+👥 Besoin par examen selon la salle et l'effectif (1 surveillant par
+   EDT_ETUDIANTS_PAR_SURVEILLANT étudiants, au moins EDT_SURVEILLANTS_MIN_AMPHI en amphi);
+   le surveillant principal choisi au placement compte pour un
+💰 Affectation par flot de coût minimum, créneau par créneau: un prof coûte d'autant
+   plus qu'il surveille déjà ce jour-là puis sur la période (coût marginal de la
+   somme des carrés des charges), un prof d'un autre département coûte un peu plus
+⚖️ Équilibrage: chaque créneau est réaffecté en entier (principaux et assistants) par
+   le même flot tant que les charges se resserrent; écart max-min avant/après rapporté
+🔒 Mêmes règles que le placement: un prof n'est jamais sur deux examens qui se
+   chevauchent et ne dépasse pas max_surveillances_jour
+📦 Les affectations s'ajoutent à generateur.assistants_batch (rôle 'assistant'),
+   insérées avec le plan par sauvegarder_batch ou le staging
+
+Usage:
+    from backend.staffing import staffing
+
+    stats = staffing.encadrer(generateur)     # après construire()
+    bilan = staffing.equilibrer(generateur)   # réaffectation des surveillants
+"""
+import heapq
+import math
+import os
+import statistics
+import time
+from collections import defaultdict
+from itertools import groupby
+
+from backend.time_grid import masque
+
+# Coût d'un poste supplémentaire pour un prof (à minimiser)
+POIDS_JOUR = 10          # par surveillance déjà tenue ce jour-là
+POIDS_CHARGE = 1         # × (2 × charge + 1): coût marginal de Σ charge² sur la période
+PENALITE_AUTRE_DEPT = 5  # prof d'un autre département que l'examen
+
+INFINI = float('inf')
+
+
+class FlotCoutMin:
+    """
+    Flot de coût minimum sur un graphe orienté (primal-dual: Dijkstra avec
+    potentiels puis flot bloquant; coûts initiaux positifs ou nuls)
+
+    Usage:
+        flot = FlotCoutMin(4)
+        arc = flot.ajouter_arc(0, 1, capacite=2, cout=3)
+        ...
+        total, cout = flot.resoudre(0, 3)
+        flot.flux(arc)
+    """
+
+    def __init__(self, n):
+        self.n = n
+        # Arcs par sommet: [destination, capacité résiduelle, coût, indice de l'arc inverse]
+        self.graphe = [[] for _ in range(n)]
+
+    def ajouter_arc(self, u, v, capacite, cout):
+        """Ajouter l'arc u -> v; retourne sa référence (pour flux)"""
+        self.graphe[u].append([v, capacite, cout, len(self.graphe[v])])
+        self.graphe[v].append([u, 0, -cout, len(self.graphe[u]) - 1])
+        return u, len(self.graphe[u]) - 1
+
+    def flux(self, arc):
+        """Flot passant sur un arc après resoudre()"""
+        u, i = arc
+        v, _, _, inverse = self.graphe[u][i]
+        return self.graphe[v][inverse][1]
+
+    def resoudre(self, source, puits, flot_max=None):
+        """
+        Envoyer le flot maximal (borné par flot_max) au coût minimal
+
+        Un Dijkstra par longueur de plus court chemin, puis un flot bloquant (Dinic) sur
+        les arcs de coût réduit nul: tous les plus courts chemins de même longueur
+        (nombreux quand les charges sont à égalité) partent en une fois.
+
+        Returns:
+            tuple: (flot envoyé, coût total)
+        """
+        graphe = self.graphe
+        potentiel = [0] * self.n
+        flot = cout = 0
+        while flot_max is None or flot < flot_max:
+            distance = [INFINI] * self.n
+            distance[source] = 0
+            tas = [(0, source)]
+            while tas:
+                d, u = heapq.heappop(tas)
+                if u == puits:
+                    break
+                if d > distance[u]:
+                    continue
+                pu = potentiel[u]
+                for v, capacite, c, _ in graphe[u]:
+                    if capacite > 0:
+                        nd = d + c + pu - potentiel[v]
+                        if nd < distance[v]:
+                            distance[v] = nd
+                            heapq.heappush(tas, (nd, v))
+            d_puits = distance[puits]
+            if d_puits == INFINI:
+                break
+
+            # Dijkstra arrêté au puits: potentiels plafonnés à sa distance
+            # (les coûts réduits restent positifs, nuls sur les plus courts chemins)
+            for v in range(self.n):
+                potentiel[v] += min(distance[v], d_puits)
+
+            niveau = self._niveaux(source, potentiel)
+            suivant = [0] * self.n
+            while flot_max is None or flot < flot_max:
+                envoi = self._pousser(source, puits, INFINI if flot_max is None else flot_max - flot,
+                                      niveau, suivant, potentiel)
+                if not envoi:
+                    break
+                flot += envoi
+                cout += envoi * (potentiel[puits] - potentiel[source])
+        return flot, cout
+
+    def _niveaux(self, source, potentiel):
+        """Distances en arcs depuis la source, par les arcs admissibles (coût réduit nul)"""
+        niveau = [-1] * self.n
+        niveau[source] = 0
+        file = [source]
+        for u in file:
+            for v, capacite, c, _ in self.graphe[u]:
+                if capacite > 0 and niveau[v] < 0 and c + potentiel[u] - potentiel[v] == 0:
+                    niveau[v] = niveau[u] + 1
+                    file.append(v)
+        return niveau
+
+    def _pousser(self, u, puits, envoi, niveau, suivant, potentiel):
+        """Un chemin augmentant admissible (niveaux croissants); retourne le flot poussé"""
+        if u == puits:
+            return envoi
+        arcs = self.graphe[u]
+        while suivant[u] < len(arcs):
+            arc = arcs[suivant[u]]
+            v, capacite, c, inverse = arc
+            if capacite > 0 and niveau[v] == niveau[u] + 1 and c + potentiel[u] - potentiel[v] == 0:
+                pousse = self._pousser(v, puits, min(envoi, capacite), niveau, suivant, potentiel)
+                if pousse:
+                    arc[1] -= pousse
+                    self.graphe[v][inverse][1] += pousse
+                    return pousse
+            suivant[u] += 1
+        return 0
+
+
+def _creneaux(examens_batch, indices):
+    """Examens groupés par début (ils se chevauchent deux à deux), dans l'ordre chronologique"""
+    ordre = sorted(indices, key=lambda i: examens_batch[i][4])
+    return [(date_heure, list(groupe)) for date_heure, groupe in groupby(ordre, key=lambda i: examens_batch[i][4])]
+
+
+class SurveillanceStaffing:
+    """Calcul du besoin en surveillants, affectation des assistants et équilibrage"""
+
+    def __init__(self, etudiants_par_surveillant=None, minimum_amphi=None, passes=None):
+        """
+        Args:
+            etudiants_par_surveillant: Étudiants par surveillant (défaut: EDT_ETUDIANTS_PAR_SURVEILLANT, 40)
+            minimum_amphi: Surveillants minimum dans un amphi (défaut: EDT_SURVEILLANTS_MIN_AMPHI, 2)
+            passes: Passes d'équilibrage au plus (défaut: EDT_EQUILIBRAGE_PASSES, 3; 0 = désactivé)
+        """
+        self.etudiants_par_surveillant = etudiants_par_surveillant or int(
+            os.getenv('EDT_ETUDIANTS_PAR_SURVEILLANT', '40'))
+        self.minimum_amphi = minimum_amphi or int(os.getenv('EDT_SURVEILLANTS_MIN_AMPHI', '2'))
+        self.passes = int(os.getenv('EDT_EQUILIBRAGE_PASSES', '3')) if passes is None else passes
+
+    def requis(self, salle, nb_etudiants):
+        """Surveillants nécessaires pour un examen (principal compris)"""
+        minimum = self.minimum_amphi if salle and salle['type'] == 'amphi' else 1
+        return max(minimum, math.ceil(nb_etudiants / self.etudiants_par_surveillant))
+
+    @staticmethod
+    def _poste(generateur, i, prof_id, charge, reserver=True):
+        """Réserver (ou libérer) un prof sur l'examen i dans les trackers du générateur"""
+        examen = generateur.examens_batch[i]
+        jour = examen[4].date()
+        intervalle = masque(generateur.grid.tick(examen[4]), generateur.grid.ticks(examen[5]))
+        exam_temp_id = i + 1
+        if reserver:
+            generateur.occupation_profs.reserve(prof_id, jour, intervalle)
+            generateur.profs_par_jour[jour].append((prof_id, exam_temp_id))
+            generateur.nb_surveillances_jour[(jour, prof_id)] += 1
+            charge[prof_id] = charge.get(prof_id, 0) + 1
+        else:
+            generateur.occupation_profs.libere(prof_id, jour, intervalle)
+            generateur.profs_par_jour[jour].remove((prof_id, exam_temp_id))
+            generateur.nb_surveillances_jour[(jour, prof_id)] -= 1
+            charge[prof_id] -= 1
+
+    def _affecter(self, generateur, date_heure, groupe, besoins, charge, dept_examen):
+        """
+        Flot de coût minimum d'un créneau: source -> examen (besoins) -> prof (1 poste) -> puits
+
+        Chaque examen ne garde que ses `postes` profs les moins coûteux: un prof plus
+        loin dans la liste serait remplaçable par un prof inutilisé au moins aussi bon,
+        l'optimum est conservé avec un graphe bien plus petit.
+
+        Returns:
+            list: (indice examen, prof_id, coût) des postes pourvus
+        """
+        grid = generateur.grid
+        jour = date_heure.date()
+        debut = grid.tick(date_heure)
+        occupation = generateur.occupation_profs.jour(jour)
+        limite = generateur.max_surveillances_jour
+        postes = sum(besoins[i] for i in groupe)
+
+        # Profs libres par durée d'examen, triés par coût (hors département)
+        libres_par_duree = {}
+        for i in groupe:
+            duree = generateur.examens_batch[i][5]
+            if duree not in libres_par_duree:
+                intervalle = masque(debut, grid.ticks(duree))
+                libres = []
+                for p in generateur.professeurs:
+                    du_jour = generateur.nb_surveillances_jour[(jour, p['id'])]
+                    if du_jour < limite and not occupation.get(p['id'], 0) & intervalle:
+                        cout = POIDS_JOUR * du_jour + POIDS_CHARGE * (2 * charge.get(p['id'], 0) + 1)
+                        libres.append((cout, p['id'], p['dept_id']))
+                libres.sort()
+                libres_par_duree[duree] = libres
+
+        sommets_profs = {}
+        arcs = []
+        for i in groupe:
+            examen = generateur.examens_batch[i]
+            dept = dept_examen.get((examen[0], examen[3]))
+            meme_dept, autres = [], []
+            for cout, prof_id, prof_dept in libres_par_duree[examen[5]]:
+                if prof_dept == dept:
+                    if len(meme_dept) < postes:
+                        meme_dept.append((cout, prof_id))
+                elif len(autres) < postes:
+                    autres.append((cout + PENALITE_AUTRE_DEPT, prof_id))
+                if len(meme_dept) == postes and len(autres) == postes:
+                    break
+            for cout, prof_id in sorted(meme_dept + autres)[:postes]:
+                sommets_profs.setdefault(prof_id, len(sommets_profs))
+                arcs.append((i, prof_id, cout))
+
+        n_examens = len(groupe)
+        puits = 1 + n_examens + len(sommets_profs)
+        flot = FlotCoutMin(puits + 1)
+        for k, i in enumerate(groupe):
+            flot.ajouter_arc(0, 1 + k, besoins[i], 0)
+        for prof_id, k in sommets_profs.items():
+            flot.ajouter_arc(1 + n_examens + k, puits, 1, 0)
+        sommet_examen = {i: 1 + k for k, i in enumerate(groupe)}
+        refs = [(i, prof_id, cout, flot.ajouter_arc(sommet_examen[i], 1 + n_examens + sommets_profs[prof_id], 1, cout))
+                for i, prof_id, cout in arcs]
+        flot.resoudre(0, puits)
+        return [(i, prof_id, cout) for i, prof_id, cout, arc in refs if flot.flux(arc)]
+
+    def encadrer(self, generateur):
+        """
+        👥 Ajouter les assistants nécessaires aux examens du plan
+
+        Les examens qui commencent ensemble se chevauchent deux à deux: un prof y
+        tient au plus un poste, et l'affectation du créneau est un flot de coût
+        minimum examens -> profs. Les créneaux sont traités dans l'ordre chronologique
+        et réservent les profs avant le suivant.
+
+        Args:
+            generateur: ScheduleGenerator après construire() (trackers et batches à jour)
+
+        Returns:
+            dict: requis, assistants, manquants, examens_renforces, creneaux, temps
+        """
+        start = time.perf_counter()
+        salles = {s['id']: s for s in generateur.salles}
+        dept_examen = {(mg['module_id'], mg['groupe_id']): mg['dept_id'] for mg in generateur.modules_groupes}
+        charge = dict(generateur.compter_surveillances())
+
+        # Postes d'assistants à pourvoir par examen (indice dans examens_batch)
+        besoins = {}
+        for i, examen in enumerate(generateur.examens_batch):
+            manque = self.requis(salles.get(examen[2]), examen[6]) - 1
+            if manque > 0:
+                besoins[i] = manque
+
+        stats = {'requis': sum(besoins.values()), 'assistants': 0, 'manquants': 0,
+                 'examens_renforces': 0, 'creneaux': 0}
+        for date_heure, groupe in _creneaux(generateur.examens_batch, besoins):
+            pourvus = self._affecter(generateur, date_heure, groupe, besoins, charge, dept_examen)
+
+            # Réserver les assistants comme le placement réserve le principal
+            for i, prof_id, _ in pourvus:
+                generateur.assistants_batch.append((i + 1, prof_id))
+                self._poste(generateur, i, prof_id, charge)
+
+            stats['creneaux'] += 1
+            stats['assistants'] += len(pourvus)
+            stats['manquants'] += sum(besoins[i] for i in groupe) - len(pourvus)
+            stats['examens_renforces'] += len({i for i, _, _ in pourvus})
+
+        stats['temps'] = round(time.perf_counter() - start, 3)
+        print(f"👥 Encadrement: {stats['assistants']}/{stats['requis']} assistants affectés sur "
+              f"{stats['examens_renforces']} examens ({stats['creneaux']} créneaux, {stats['temps']}s)")
+        if stats['manquants']:
+            print(f"⚠️ {stats['manquants']} postes d'assistant non pourvus (profs indisponibles ou à la limite du jour)")
+        return stats
+
+    def equilibrer(self, generateur, passes=None):
+        """
+        ⚖️ Réaffecter les surveillants des examens placés pour resserrer les charges
+
+        Chaque créneau est libéré puis réaffecté par le flot de coût minimum
+        (postes du créneau x profs libres), les autres créneaux restant fixes.
+        Le coût mêle charge, jours déjà chargés et département: une passe peut
+        donc dégrader la somme des carrés des charges ou l'écart max - min. Une
+        passe n'est gardée que si elle fait baisser la somme des carrés sans
+        élargir l'écart; sinon l'affectation d'avant la passe est restaurée et
+        l'équilibrage s'arrête. Un principal encore affecté à son examen garde
+        son rôle; sinon le prof le moins coûteux (même département d'abord) le prend.
+
+        Args:
+            generateur: ScheduleGenerator après encadrer()
+            passes: Passes au plus (défaut: self.passes)
+
+        Returns:
+            dict: avant, apres ({min, max, ecart, ecart_type, hors_dept}), reaffectations,
+                passes (gardées), passe_annulee, temps
+        """
+        passes = self.passes if passes is None else passes
+        start = time.perf_counter()
+        batch = generateur.examens_batch
+        dept_examen = {(mg['module_id'], mg['groupe_id']): mg['dept_id'] for mg in generateur.modules_groupes}
+        dept_prof = {p['id']: p['dept_id'] for p in generateur.professeurs}
+        charge = dict(generateur.compter_surveillances())
+
+        # Postes par examen: principal en tête, puis assistants
+        postes = {i: [examen[1]] for i, examen in enumerate(batch)}
+        for exam_temp_id, prof_id in generateur.assistants_batch:
+            postes[exam_temp_id - 1].append(prof_id)
+
+        def bilan():
+            charges = [charge.get(p['id'], 0) for p in generateur.professeurs] or [0]
+            return {
+                'min': min(charges),
+                'max': max(charges),
+                'ecart': max(charges) - min(charges),
+                'ecart_type': round(statistics.pstdev(charges), 3),
+                'hors_dept': sum(1 for i, profs in postes.items() for p in profs
+                                 if dept_prof.get(p) != dept_examen.get((batch[i][0], batch[i][3])))
+            }
+
+        def mesure():
+            # (somme des carrés, écart max - min): une passe doit baisser l'une sans élargir l'autre
+            charges = [charge.get(p['id'], 0) for p in generateur.professeurs] or [0]
+            return sum(c * c for c in charge.values()), max(charges) - min(charges)
+
+        def reserver_tout(affectation, reserver):
+            for i, profs in affectation.items():
+                for prof_id in profs:
+                    self._poste(generateur, i, prof_id, charge, reserver=reserver)
+
+        avant = bilan()
+        objectif, ecart = mesure()
+        reaffectations = 0
+        effectuees = 0
+        annulee = False
+        creneaux = _creneaux(batch, postes) if passes > 0 else []
+
+        for _ in range(passes):
+            instantane = {i: list(profs) for i, profs in postes.items()}
+            changements = 0
+            for date_heure, groupe in creneaux:
+                for i in groupe:
+                    for prof_id in postes[i]:
+                        self._poste(generateur, i, prof_id, charge, reserver=False)
+
+                besoins = {i: len(postes[i]) for i in groupe}
+                pourvus = self._affecter(generateur, date_heure, groupe, besoins, charge, dept_examen)
+                nouveaux = defaultdict(list)
+                for i, prof_id, _ in sorted(pourvus, key=lambda a: a[2]):
+                    nouveaux[i].append(prof_id)
+
+                # L'affectation actuelle est toujours réalisable: un créneau incomplet
+                # ne peut venir que d'une donnée incohérente, il est laissé tel quel
+                if len(pourvus) == sum(besoins.values()):
+                    for i in groupe:
+                        profs = nouveaux[i]
+                        principal = postes[i][0]
+                        if principal in profs:
+                            profs.remove(principal)
+                            profs.insert(0, principal)
+                        changements += len(set(profs) - set(postes[i]))
+                        postes[i] = profs
+
+                for i in groupe:
+                    for prof_id in postes[i]:
+                        self._poste(generateur, i, prof_id, charge)
+
+            nouvel_objectif, nouvel_ecart = mesure()
+            if nouvel_objectif >= objectif or nouvel_ecart > ecart:
+                if changements:
+                    # Passe sans gain (ou qui dégrade): retour à l'affectation d'avant la passe
+                    reserver_tout(postes, reserver=False)
+                    postes = instantane
+                    reserver_tout(postes, reserver=True)
+                    annulee = nouvel_objectif != objectif or nouvel_ecart != ecart
+                break
+            effectuees += 1
+            reaffectations += changements
+            objectif, ecart = nouvel_objectif, nouvel_ecart
+
+        # Batches réécrits: principal dans examens / surveillances, assistants à part
+        for i, profs in postes.items():
+            if batch[i][1] != profs[0]:
+                batch[i] = (batch[i][0], profs[0]) + tuple(batch[i][2:])
+                generateur.surveillances_batch[i] = (i + 1, profs[0])
+        generateur.assistants_batch[:] = [(i + 1, prof_id) for i in sorted(postes) for prof_id in postes[i][1:]]
+
+        resultat = {'avant': avant, 'apres': bilan(), 'reaffectations': reaffectations, 'passes': effectuees,
+                    'passe_annulee': annulee, 'temps': round(time.perf_counter() - start, 3)}
+        print(f"⚖️ Équilibrage: écart {avant['ecart']} -> {resultat['apres']['ecart']} "
+              f"(σ {avant['ecart_type']} -> {resultat['apres']['ecart_type']}), "
+              f"{reaffectations} réaffectations en {effectuees} passes"
+              f"{' (dernière passe annulée)' if annulee else ''}, {resultat['temps']}s")
+        return resultat
+
+
+# Instance globale
+staffing = SurveillanceStaffing()
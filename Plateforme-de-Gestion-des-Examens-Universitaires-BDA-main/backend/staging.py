@@ -0,0 +1,394 @@
+"""
+Module de publication en deux temps des plans générés (staging)
+📥 Dépôt: le plan est écrit dans examens_staging sous un run_id (INSERT multi-lignes,
+   une transaction), sans toucher aux tables lues par les étudiants
+🔍 Validation: conflits salles / surveillants / étudiants contrôlés sur le staging et
+   sur le planning publié qui reste en place (hors périmètre remplacé)
+📤 Publication: suppression du périmètre remplacé + INSERT ... SELECT dans UNE
+   transaction courte; les lecteurs (lectures cohérentes InnoDB, sans verrou)
+   voient l'ancien planning jusqu'au COMMIT, puis le nouveau
+🧹 Un run non publié peut être abandonné; un échec ne laisse rien dans examens
+
+Tables: runs_generation, examens_staging (database/migrations/004_examens_staging.sql),
+        surveillances_staging (assistants, 005_surveillances_staging.sql)
+
+Usage:
+    from backend.staging import staging
+
+    run = staging.deposer({'run_id': ..., 'semestre': 1, 'annee_academique': '2024-2025',
+                           'dept_id': None, 'remplacer': True, 'publier': False},
+                          examens_batch, surveillances_batch)
+    staging.publier(run['run_id'])
+"""
+import time
+
+from backend.db_connection import db
+
+QUERY_LIGNE = """
+    INSERT INTO examens_staging
+    (run_id, ligne, module_id, prof_id, salle_id, groupe_id, date_heure, duree_minutes, nb_etudiants,
+     semestre, annee_academique, surveillant_id)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+QUERY_ASSISTANT = "INSERT INTO surveillances_staging (run_id, ligne, prof_id) VALUES (%s, %s, %s)"
+
+# Plan candidat = staging du run ∪ planning publié conservé (même année / semestre)
+# {hors_perimetre}: exclut les examens que la publication va remplacer
+PLAN_CANDIDAT = """
+    SELECT 'staging' as origine, st.ligne as ref, st.module_id, st.groupe_id, st.salle_id,
+           st.date_heure, st.duree_minutes, st.exam_date
+    FROM examens_staging st
+    WHERE st.run_id = %s
+    UNION ALL
+    SELECT 'planning', ex.id, ex.module_id, ex.groupe_id, ex.salle_id,
+           ex.date_heure, ex.duree_minutes, ex.exam_date
+    FROM examens ex
+    WHERE ex.annee_academique = %s AND ex.semestre = %s
+      AND ex.statut = 'planifie'{hors_perimetre}
+"""
+
+# Une ligne par surveillant (principal et assistants) du plan candidat
+PLAN_SURVEILLANTS = """
+    SELECT 'staging' as origine, st.ligne as ref, st.surveillant_id as prof_id,
+           st.date_heure, st.duree_minutes, st.exam_date
+    FROM examens_staging st
+    WHERE st.run_id = %s
+    UNION ALL
+    SELECT 'staging', ss.ligne, ss.prof_id, st.date_heure, st.duree_minutes, st.exam_date
+    FROM surveillances_staging ss
+    JOIN examens_staging st ON st.run_id = ss.run_id AND st.ligne = ss.ligne
+    WHERE ss.run_id = %s
+    UNION ALL
+    SELECT 'planning', ex.id, ex.prof_id, ex.date_heure, ex.duree_minutes, ex.exam_date
+    FROM examens ex
+    WHERE ex.annee_academique = %s AND ex.semestre = %s
+      AND ex.statut = 'planifie'{hors_perimetre}
+    UNION ALL
+    SELECT 'planning', ex.id, sv.prof_id, ex.date_heure, ex.duree_minutes, ex.exam_date
+    FROM surveillances sv
+    JOIN examens ex ON ex.id = sv.examen_id
+    WHERE sv.annee_academique = %s AND sv.semestre = %s AND sv.role = 'assistant'
+      AND ex.annee_academique = %s AND ex.semestre = %s
+      AND ex.statut = 'planifie'{hors_perimetre}
+"""
+
+# Même ressource sur des intervalles [début, fin) sécants, au moins un examen du run
+QUERY_CHEVAUCHEMENTS = """
+    SELECT COUNT(*) as nb
+    FROM ({plan}) a
+    JOIN ({plan}) b ON a.{colonne} = b.{colonne}
+        AND a.exam_date = b.exam_date
+        AND (a.origine, a.ref) < (b.origine, b.ref)
+        AND a.date_heure < DATE_ADD(b.date_heure, INTERVAL b.duree_minutes MINUTE)
+        AND b.date_heure < DATE_ADD(a.date_heure, INTERVAL a.duree_minutes MINUTE)
+    WHERE a.origine = 'staging' OR b.origine = 'staging'
+"""
+
+# Étudiant ayant plus d'un examen le même jour, dont au moins un du run
+QUERY_ETUDIANTS = """
+    SELECT COUNT(*) as nb
+    FROM (
+        SELECT e.id
+        FROM ({plan}) p
+        JOIN etudiants e ON e.groupe_id = p.groupe_id
+        JOIN inscriptions i ON i.etudiant_id = e.id AND i.module_id = p.module_id
+        GROUP BY e.id, p.exam_date
+        HAVING COUNT(*) > 1 AND SUM(p.origine = 'staging') > 0
+    ) conflits
+"""
+
+
+def _perimetre(alias, dept_id):
+    """Condition 'examen du département' (module -> formation -> département)"""
+    return f"""
+        {alias}.module_id IN (
+            SELECT m.id FROM modules m
+            JOIN formations f ON m.formation_id = f.id
+            WHERE f.dept_id = %s
+        )"""
+
+
+class ScheduleStaging:
+    """Dépôt, validation et publication atomique des plans générés"""
+
+    def _run(self, tx, run_id, verrou=False):
+        tx.execute(
+            "SELECT * FROM runs_generation WHERE run_id = %s" + (" FOR UPDATE" if verrou else ""),
+            (run_id,)
+        )
+        return tx.fetchone()
+
+    def charger(self, run, examens_batch, surveillances_batch, assistants_batch=(), chunk_size=500):
+        """
+        📥 Écrire un plan dans le staging (tout ou rien)
+
+        Un run déjà chargé mais non publié est remplacé (reprise après un arrêt).
+
+        Args:
+            run: dict run_id, semestre, annee_academique, dept_id, remplacer
+            examens_batch: Tuples (module_id, prof_id, salle_id, groupe_id, date_heure,
+                duree_minutes, nb_etudiants, semestre, annee_academique)
+            surveillances_batch: (index, surveillant_id) alignés sur examens_batch
+            assistants_batch: (index, prof_id) des assistants (index = position + 1)
+            chunk_size: Lignes par INSERT multi-lignes
+
+        Returns:
+            int: Lignes chargées
+        """
+        start = time.perf_counter()
+        with db.transaction(buffer_size=chunk_size) as tx:
+            tx.execute("DELETE FROM examens_staging WHERE run_id = %s", (run['run_id'],))
+            tx.execute("DELETE FROM surveillances_staging WHERE run_id = %s", (run['run_id'],))
+            tx.execute("""
+                INSERT INTO runs_generation
+                (run_id, annee_academique, semestre, dept_id, remplace, statut, nb_examens)
+                VALUES (%s, %s, %s, %s, %s, 'charge', %s)
+                ON DUPLICATE KEY UPDATE statut = 'charge', nb_examens = VALUES(nb_examens),
+                    conflits = NULL, publie_le = NULL
+            """, (run['run_id'], run['annee_academique'], run['semestre'], run.get('dept_id'),
+                  int(bool(run.get('remplacer'))), len(examens_batch)))
+
+            for ligne, (examen, (_, surveillant_id)) in enumerate(zip(examens_batch, surveillances_batch)):
+                tx.add(QUERY_LIGNE, (run['run_id'], ligne) + tuple(examen) + (surveillant_id,))
+            for exam_temp_id, prof_id in assistants_batch:
+                tx.add(QUERY_ASSISTANT, (run['run_id'], exam_temp_id - 1, prof_id))
+
+        print(f"📥 Staging {run['run_id']}: {len(examens_batch)} examens, {len(assistants_batch)} assistants chargés "
+              f"({tx.round_trips} allers-retours, {time.perf_counter() - start:.2f}s)")
+        return len(examens_batch)
+
+    def valider(self, run_id):
+        """
+        🔍 Contrôler les conflits du plan en staging
+
+        Returns:
+            dict: statut ('valide' ou 'rejete'), conflits {salles, surveillants, etudiants}, total
+        """
+        with db.transaction() as tx:
+            run = self._run(tx, run_id)
+            if run is None:
+                raise ValueError(f"Run inconnu: {run_id}")
+
+            # Le planning remplacé ne compte pas: il disparaît à la publication
+            hors_perimetre = ""
+            planning = (run['annee_academique'], run['semestre'])
+            if run['remplace']:
+                if run['dept_id'] is None:
+                    hors_perimetre = " AND 1 = 0"
+                else:
+                    hors_perimetre = " AND NOT" + _perimetre('ex', run['dept_id'])
+                    planning += (run['dept_id'],)
+            plan = PLAN_CANDIDAT.format(hors_perimetre=hors_perimetre)
+            params_plan = (run_id,) + planning
+            surveillants = PLAN_SURVEILLANTS.format(hors_perimetre=hors_perimetre)
+            params_surveillants = (run_id, run_id) + planning + (run['annee_academique'], run['semestre']) + planning
+
+            conflits = {}
+            tx.execute(QUERY_CHEVAUCHEMENTS.format(plan=plan, colonne='salle_id'), params_plan * 2)
+            conflits['salles'] = tx.fetchone()['nb']
+            tx.execute(QUERY_CHEVAUCHEMENTS.format(plan=surveillants, colonne='prof_id'), params_surveillants * 2)
+            conflits['surveillants'] = tx.fetchone()['nb']
+            tx.execute(QUERY_ETUDIANTS.format(plan=plan), params_plan)
+            conflits['etudiants'] = tx.fetchone()['nb']
+
+            total = sum(conflits.values())
+            statut = 'valide' if total == 0 else 'rejete'
+            tx.execute("UPDATE runs_generation SET statut = %s, conflits = %s WHERE run_id = %s",
+                       (statut, total, run_id))
+
+        print(f"🔍 Validation {run_id}: {'✅ aucun conflit' if total == 0 else f'❌ {total} conflits'} "
+              f"(salles {conflits['salles']}, surveillants {conflits['surveillants']}, "
+              f"étudiants {conflits['etudiants']})")
+        return {'statut': statut, 'conflits': conflits, 'total': total}
+
+    def publier(self, run_id, forcer=False):
+        """
+        📤 Publier un run: remplacement du périmètre et copie du plan en une transaction
+
+        Args:
+            run_id: Run à publier
+            forcer: Publier même si la validation a trouvé des conflits
+
+        Returns:
+            dict: success, examens, surveillances, supprimes, temps_execution (error si échec)
+        """
+        start = time.perf_counter()
+        resultat = {'success': False, 'examens': 0, 'surveillances': 0, 'supprimes': 0, 'temps_execution': 0}
+        try:
+            with db.transaction() as tx:
+                run = self._run(tx, run_id, verrou=True)
+                if run is None:
+                    resultat['error'] = f"run inconnu: {run_id}"
+                    return resultat
+                if run['statut'] == 'publie':
+                    resultat['error'] = "run déjà publié"
+                    return resultat
+                if run['statut'] != 'valide' and not (forcer and run['statut'] == 'rejete'):
+                    resultat['error'] = f"run {run['statut']} (validation requise)"
+                    return resultat
+
+                annee_academique, semestre = run['annee_academique'], run['semestre']
+
+                # Ancien planning du périmètre (colonnes de partitionnement en tête)
+                if run['remplace']:
+                    where = "e.annee_academique = %s AND e.semestre = %s"
+                    params = [annee_academique, semestre]
+                    if run['dept_id'] is not None:
+                        where += " AND" + _perimetre('e', run['dept_id'])
+                        params.append(run['dept_id'])
+                    tx.execute(f"""
+                        DELETE s FROM surveillances s
+                        JOIN examens e ON e.id = s.examen_id
+                        WHERE {where} AND s.annee_academique = %s AND s.semestre = %s
+                    """, tuple(params) + (annee_academique, semestre))
+                    tx.execute(f"DELETE e FROM examens e WHERE {where}", tuple(params))
+                    resultat['supprimes'] = tx.rowcount
+
+                tx.execute("SELECT COALESCE(MAX(id), 0) as max_id FROM examens")
+                max_id = tx.fetchone()['max_id']
+
+                tx.execute("""
+                    INSERT INTO examens
+                    (module_id, prof_id, salle_id, groupe_id, date_heure, duree_minutes, nb_etudiants,
+                     semestre, annee_academique, statut)
+                    SELECT module_id, prof_id, salle_id, groupe_id, date_heure, duree_minutes, nb_etudiants,
+                           semestre, annee_academique, 'planifie'
+                    FROM examens_staging
+                    WHERE run_id = %s
+                    ORDER BY ligne
+                """, (run_id,))
+                resultat['examens'] = tx.rowcount
+
+                # IDs relus par clé (une salle n'accueille qu'un examen à un instant donné)
+                examen_publie = """
+                    JOIN examens e ON e.annee_academique = st.annee_academique
+                        AND e.semestre = st.semestre
+                        AND e.id > %s
+                        AND e.module_id = st.module_id
+                        AND e.groupe_id <=> st.groupe_id
+                        AND e.salle_id = st.salle_id
+                        AND e.date_heure = st.date_heure
+                """
+                tx.execute(f"""
+                    INSERT INTO surveillances (examen_id, prof_id, role, annee_academique, semestre)
+                    SELECT e.id, st.surveillant_id, 'principal', st.annee_academique, st.semestre
+                    FROM examens_staging st
+                    {examen_publie}
+                    WHERE st.run_id = %s
+                """, (max_id, run_id))
+                resultat['surveillances'] = tx.rowcount
+                tx.execute(f"""
+                    INSERT INTO surveillances (examen_id, prof_id, role, annee_academique, semestre)
+                    SELECT e.id, ss.prof_id, 'assistant', st.annee_academique, st.semestre
+                    FROM surveillances_staging ss
+                    JOIN examens_staging st ON st.run_id = ss.run_id AND st.ligne = ss.ligne
+                    {examen_publie}
+                    WHERE ss.run_id = %s
+                """, (max_id, run_id))
+                resultat['surveillances'] += tx.rowcount
+
+                tx.execute("UPDATE runs_generation SET statut = 'publie', publie_le = NOW() WHERE run_id = %s",
+                           (run_id,))
+
+            # Hors transaction: le staging publié n'est plus utile
+            with db.transaction() as tx:
+                tx.execute("DELETE FROM surveillances_staging WHERE run_id = %s", (run_id,))
+                tx.execute("DELETE FROM examens_staging WHERE run_id = %s", (run_id,))
+
+        except Exception as e:
+            # ROLLBACK: le planning publié est inchangé
+            print(f"❌ Erreur lors de la publication de {run_id}: {e}")
+            resultat['error'] = str(e)
+            return resultat
+
+        resultat['success'] = True
+        resultat['temps_execution'] = round(time.perf_counter() - start, 2)
+        print(f"📤 Run {run_id} publié: {resultat['supprimes']} examens remplacés par {resultat['examens']} "
+              f"({resultat['surveillances']} surveillances, 1 commit, {resultat['temps_execution']}s)")
+        return resultat
+
+    def deposer(self, run, examens_batch, surveillances_batch, assistants_batch=()):
+        """
+        Charger, valider et (si demandé et sans conflit) publier un plan
+
+        Args:
+            run: dict run_id, semestre, annee_academique, dept_id, remplacer, publier
+            examens_batch: Plan généré (voir charger)
+            surveillances_batch: Surveillants du plan
+            assistants_batch: Assistants de l'encadrement
+
+        Returns:
+            dict: success, run_id, statut, conflits, publication (résultat de publier ou None)
+        """
+        resultat = {'success': False, 'run_id': run['run_id'], 'statut': None, 'conflits': None,
+                    'publication': None}
+        try:
+            with db.transaction() as tx:
+                existant = self._run(tx, run['run_id'])
+            if existant and existant['statut'] == 'publie':
+                # Reprise après une publication déjà validée: ne pas dupliquer le plan
+                resultat.update(success=True, statut='publie')
+                return resultat
+
+            self.charger(run, examens_batch, surveillances_batch, assistants_batch)
+            validation = self.valider(run['run_id'])
+            resultat.update(statut=validation['statut'], conflits=validation['conflits'])
+        except Exception as e:
+            print(f"❌ Erreur staging {run['run_id']}: {e}")
+            resultat['error'] = str(e)
+            return resultat
+
+        resultat['success'] = True
+        if run.get('publier') and validation['statut'] == 'valide':
+            resultat['publication'] = self.publier(run['run_id'])
+            if resultat['publication']['success']:
+                resultat['statut'] = 'publie'
+            else:
+                resultat['success'] = False
+                resultat['error'] = resultat['publication']['error']
+        return resultat
+
+    def abandonner(self, run_id):
+        """
+        🧹 Abandonner un run non publié (lignes de staging supprimées)
+
+        Returns:
+            bool: True si le run a été abandonné
+        """
+        try:
+            with db.transaction() as tx:
+                run = self._run(tx, run_id, verrou=True)
+                if run is None or run['statut'] == 'publie':
+                    return False
+                tx.execute("DELETE FROM surveillances_staging WHERE run_id = %s", (run_id,))
+                tx.execute("DELETE FROM examens_staging WHERE run_id = %s", (run_id,))
+                tx.execute("UPDATE runs_generation SET statut = 'abandonne' WHERE run_id = %s", (run_id,))
+        except Exception as e:
+            print(f"❌ Erreur lors de l'abandon de {run_id}: {e}")
+            return False
+        print(f"🧹 Run {run_id} abandonné")
+        return True
+
+    def runs_en_attente(self, annee_academique=None):
+        """
+        Runs chargés, validés ou rejetés, pas encore publiés
+
+        Returns:
+            list: Lignes de runs_generation (plus récentes d'abord)
+        """
+        query = """
+            SELECT run_id, annee_academique, semestre, dept_id, remplace, statut, nb_examens, conflits, created_at
+            FROM runs_generation
+            WHERE statut IN ('charge', 'valide', 'rejete')
+        """
+        params = ()
+        if annee_academique:
+            query += " AND annee_academique = %s"
+            params = (annee_academique,)
+        query += " ORDER BY created_at DESC"
+        return db.execute_query(query, params) or []
+
+
+# Instance globale
+staging = ScheduleStaging()
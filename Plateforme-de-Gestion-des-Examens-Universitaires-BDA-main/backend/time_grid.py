@@ -0,0 +1,234 @@
+"""
+Module de grille horaire des examens
+⏱️ Temps découpé en ticks de 15 minutes (même résolution que examens.slot_index)
+📅 Créneaux de début configurables (pas, début/fin de journée, jours ouvrés)
+🧮 Occupation des salles / professeurs en intervalles [début, fin) : un entier par
+   ressource et par jour dont le bit i représente le tick i
+
+Un examen de 90 minutes n'occupe que 6 ticks : avec un pas plus fin que la durée,
+une salle peut enchaîner plusieurs examens dans la journée sans réserver un
+créneau entier de 2 heures.
+
+Usage:
+    from backend.time_grid import TimeGrid, OccupancyMap
+
+    grille = TimeGrid(pas_minutes=30)
+    salles = OccupancyMap()
+    _, intervalle = grille.intervalle(date_heure, 180)
+    if salles.is_free(salle_id, date_heure.date(), intervalle):
+        salles.reserve(salle_id, date_heure.date(), intervalle)
+"""
+import os
+from datetime import datetime, timedelta
+
+TICK_MINUTES = 15
+TICKS_PAR_JOUR = 24 * 60 // TICK_MINUTES
+
+
+def _parse_heure(valeur):
+    """'08:30' ou '8' -> minutes depuis minuit"""
+    heures, _, minutes = str(valeur).partition(':')
+    return int(heures) * 60 + int(minutes or 0)
+
+
+def _format_heure(tick):
+    """Tick -> 'HH:MM'"""
+    return f"{tick // 4:02d}:{tick % 4 * TICK_MINUTES:02d}"
+
+
+def masque(debut, nb_ticks):
+    """
+    Masque binaire de l'intervalle [debut, debut + nb_ticks)
+
+    Args:
+        debut: Tick de début dans la journée (0..95)
+        nb_ticks: Nombre de ticks occupés
+
+    Returns:
+        int: Bits debut..debut+nb_ticks-1 à 1
+    """
+    return ((1 << nb_ticks) - 1) << debut
+
+
+class TimeGrid:
+    """Grille des créneaux de début possibles pour une période d'examens"""
+
+    def __init__(self, pas_minutes=None, debut_journee=None, fin_journee=None,
+                 jours_ouvres=None, duree_defaut=None):
+        """
+        Initialiser la grille
+
+        Args:
+            pas_minutes: Écart entre deux débuts possibles (défaut: EDT_PAS_MINUTES, 120)
+            debut_journee: Heure du premier examen 'HH:MM' (défaut: EDT_DEBUT_JOURNEE, 08:00)
+            fin_journee: Heure limite de fin d'examen 'HH:MM' (défaut: EDT_FIN_JOURNEE, 20:00)
+            jours_ouvres: Nombre de jours travaillés à partir du lundi (défaut: EDT_JOURS_OUVRES, 6)
+            duree_defaut: Durée d'un examen sans durée propre (défaut: EDT_DUREE_DEFAUT, 90)
+        """
+        pas = int(pas_minutes or os.getenv('EDT_PAS_MINUTES', '120'))
+        # Arrondi au tick supérieur: un début tombe toujours sur un tick
+        self.pas_ticks = max(1, -(-pas // TICK_MINUTES))
+        self.debut_tick = _parse_heure(debut_journee or os.getenv('EDT_DEBUT_JOURNEE', '08:00')) // TICK_MINUTES
+        self.fin_tick = -(-_parse_heure(fin_journee or os.getenv('EDT_FIN_JOURNEE', '20:00')) // TICK_MINUTES)
+        self.fin_tick = min(self.fin_tick, TICKS_PAR_JOUR)
+        self.jours_ouvres = int(jours_ouvres or os.getenv('EDT_JOURS_OUVRES', '6'))
+        self.duree_defaut = int(duree_defaut or os.getenv('EDT_DUREE_DEFAUT', '90'))
+
+        if self.fin_tick <= self.debut_tick:
+            raise ValueError("La fin de journée doit être postérieure au début de journée")
+
+    @property
+    def pas_minutes(self):
+        return self.pas_ticks * TICK_MINUTES
+
+    def remplacer(self, **modifications):
+        """
+        Copie de la grille avec certains paramètres modifiés (simulation)
+
+        Args:
+            **modifications: Paramètres du constructeur (None = inchangé)
+
+        Returns:
+            TimeGrid
+        """
+        parametres = {
+            'pas_minutes': self.pas_minutes,
+            'debut_journee': _format_heure(self.debut_tick),
+            'fin_journee': _format_heure(self.fin_tick),
+            'jours_ouvres': self.jours_ouvres,
+            'duree_defaut': self.duree_defaut
+        }
+        parametres.update({cle: valeur for cle, valeur in modifications.items() if valeur is not None})
+        return TimeGrid(**parametres)
+
+    def ticks(self, duree_minutes):
+        """Nombre de ticks couverts par une durée (arrondi supérieur)"""
+        return max(1, -(-int(duree_minutes or self.duree_defaut) // TICK_MINUTES))
+
+    @staticmethod
+    def tick(date_heure):
+        """Tick de début d'un datetime (= examens.slot_index)"""
+        return date_heure.hour * 4 + date_heure.minute // TICK_MINUTES
+
+    def intervalle(self, date_heure, duree_minutes):
+        """
+        Intervalle occupé par un examen
+
+        Args:
+            date_heure: Début de l'examen
+            duree_minutes: Durée de l'examen
+
+        Returns:
+            tuple: (tick de début, masque binaire de l'intervalle)
+        """
+        debut = self.tick(date_heure)
+        return debut, masque(debut, min(self.ticks(duree_minutes), TICKS_PAR_JOUR - debut))
+
+    def jours(self, date_debut, date_fin):
+        """Jours ouvrés de la période (bornes incluses)"""
+        jours = []
+        jour = date_debut
+        while jour <= date_fin:
+            if jour.weekday() < self.jours_ouvres:
+                jours.append(jour)
+            jour += timedelta(days=1)
+        return jours
+
+    def debuts(self, date_debut, date_fin, duree_minutes=None):
+        """
+        Débuts possibles d'un examen sur la période
+
+        Args:
+            date_debut: Premier jour (date)
+            date_fin: Dernier jour (date, inclus)
+            duree_minutes: Ne garder que les débuts où un examen de cette durée finit
+                avant la fin de journée (défaut: tous les débuts de la journée)
+
+        Returns:
+            list: datetimes triés
+        """
+        dernier = self.fin_tick - (self.ticks(duree_minutes) if duree_minutes else 1)
+        resultat = []
+        for jour in self.jours(date_debut, date_fin):
+            minuit = datetime.combine(jour, datetime.min.time())
+            for t in range(self.debut_tick, dernier + 1, self.pas_ticks):
+                resultat.append(minuit + timedelta(minutes=t * TICK_MINUTES))
+        return resultat
+
+    def tient_dans_la_journee(self, date_heure, duree_minutes):
+        """True si l'examen commencé à date_heure finit avant la fin de journée"""
+        return self.tick(date_heure) + self.ticks(duree_minutes) <= self.fin_tick
+
+    def __repr__(self):
+        return (f"TimeGrid(pas={self.pas_minutes}min, "
+                f"{_format_heure(self.debut_tick)}-{_format_heure(self.fin_tick)}, "
+                f"{self.jours_ouvres} jours/semaine)")
+
+
+class OccupancyMap:
+    """
+    Occupation de ressources (salles, professeurs) par jour
+
+    Test « [début, fin) libre ? » = un ET binaire, réservation = un OU binaire:
+    coût constant quelle que soit la durée de l'examen.
+    """
+
+    def __init__(self):
+        self._jours = {}
+
+    def clear(self):
+        self._jours.clear()
+
+    def jour(self, jour):
+        """
+        Occupations d'un jour {ressource: bits}
+
+        À récupérer une fois avant de tester de nombreuses ressources
+        (ex: parcours des salles candidates).
+        """
+        occupation = self._jours.get(jour)
+        if occupation is None:
+            occupation = self._jours[jour] = {}
+        return occupation
+
+    def is_free(self, ressource, jour, masque_intervalle):
+        """True si la ressource est libre sur tout l'intervalle"""
+        return not (self.jour(jour).get(ressource, 0) & masque_intervalle)
+
+    def reserve(self, ressource, jour, masque_intervalle):
+        """Marquer l'intervalle comme occupé"""
+        occupation = self.jour(jour)
+        occupation[ressource] = occupation.get(ressource, 0) | masque_intervalle
+
+    def libere(self, ressource, jour, masque_intervalle):
+        """Rendre l'intervalle libre (annuler une réservation, ex: réaffectation)"""
+        occupation = self.jour(jour)
+        occupation[ressource] = occupation.get(ressource, 0) & ~masque_intervalle
+
+    def intervalles(self, ressource, jour):
+        """
+        Intervalles occupés d'une ressource (diagnostic)
+
+        Returns:
+            list: [(tick début, tick fin)] triés, fin exclue
+        """
+        bits = self._jours.get(jour, {}).get(ressource, 0)
+        resultat = []
+        tick = 0
+        while bits:
+            if bits & 1:
+                debut = tick
+                while bits & 1:
+                    bits >>= 1
+                    tick += 1
+                resultat.append((debut, tick))
+            else:
+                # Sauter d'un coup les ticks libres
+                saut = (bits & -bits).bit_length() - 1
+                bits >>= saut
+                tick += saut
+        return resultat
+
+    def __len__(self):
+        """Nombre de couples (ressource, jour) ayant au moins une réservation"""
+        return sum(len(occupation) for occupation in self._jours.values())
@@ -40,6 +40,18 @@ def check_dependencies():
             print(f"❌ {package} - Non installé")
             all_ok = False
     
+    # Dépendances optionnelles (repli automatique si absentes)
+    optional = {
+        'aiomysql': 'aiomysql (requêtes parallèles des tableaux de bord)',
+        'openpyxl': 'openpyxl (export Excel)'
+    }
+    for module, package in optional.items():
+        try:
+            __import__(module)
+            print(f"✅ {package} - Installé")
+        except ImportError:
+            print(f"⚠️  {package} - Non installé (mode séquentiel)")
+    
     return all_ok
 
 def check_database_connection():
@@ -0,0 +1,26 @@
+-- Migration 001 : colonnes générées jour / créneau sur `examens`
+--
+-- DATE(date_heure) et HOUR(date_heure) dans les WHERE / GROUP BY empêchent
+-- l'utilisation des index. Les colonnes STORED sont calculées une fois à
+-- l'écriture et peuvent être indexées avec `statut`.
+--
+--   exam_date  : jour de l'examen (= DATE(date_heure))
+--   slot_index : créneau de 15 minutes dans la journée (0..95)
+--                heure = slot_index DIV 4
+--
+-- L'ALTER reconstruit la table : les lignes existantes sont recalculées
+-- (backfill) pendant l'opération, aucune mise à jour manuelle n'est nécessaire.
+
+ALTER TABLE `examens`
+  ADD COLUMN `exam_date` DATE
+    GENERATED ALWAYS AS (CAST(`date_heure` AS DATE)) STORED,
+  ADD COLUMN `slot_index` TINYINT UNSIGNED
+    GENERATED ALWAYS AS (HOUR(`date_heure`) * 4 + MINUTE(`date_heure`) DIV 15) STORED,
+  ADD INDEX `idx_examens_statut_jour_creneau` (`statut`, `exam_date`, `slot_index`),
+  ADD INDEX `idx_examens_prof_statut_jour` (`prof_id`, `statut`, `exam_date`);
+
+-- Vérification du backfill
+SELECT COUNT(*) AS lignes_incoherentes
+FROM `examens`
+WHERE `exam_date` <> DATE(`date_heure`)
+   OR `slot_index` DIV 4 <> HOUR(`date_heure`);
@@ -0,0 +1,77 @@
+-- Migration 002 : partitionnement de `examens` et `surveillances`
+--
+-- Partitions par année académique (RANGE COLUMNS) et sous-partitions par
+-- semestre (HASH). Une requête filtrant sur annee_academique = ? AND
+-- semestre = ? ne lit qu'une sous-partition ; archiver une année devient
+-- un ALTER TABLE ... DROP PARTITION (voir backend/partitions.py).
+--
+-- `surveillances` reçoit une copie dénormalisée de annee_academique /
+-- semestre de son examen pour être partitionnée de la même façon.
+--
+-- Contraintes MySQL :
+--   * chaque clé unique (dont la clé primaire) doit contenir les colonnes
+--     de partitionnement ;
+--   * aucune clé étrangère ne peut viser ou partir d'une table partitionnée :
+--     supprimer au préalable les éventuelles FOREIGN KEY vers examens /
+--     surveillances d'une base ancienne.
+--
+-- Sur une base créée par la migration 000, `examens` est déjà partitionnée :
+-- les ALTER la reconstruisent à l'identique.
+
+-- --------------------------------------------------------
+-- examens
+-- --------------------------------------------------------
+
+ALTER TABLE `examens`
+  MODIFY `semestre` tinyint NOT NULL COMMENT '1 ou 2',
+  MODIFY `annee_academique` varchar(10) COLLATE utf8mb4_unicode_ci NOT NULL COMMENT '2024-2025';
+
+ALTER TABLE `examens`
+  DROP PRIMARY KEY,
+  ADD PRIMARY KEY (`id`, `annee_academique`, `semestre`);
+
+ALTER TABLE `examens`
+PARTITION BY RANGE COLUMNS(`annee_academique`)
+SUBPARTITION BY HASH(`semestre`) SUBPARTITIONS 2 (
+  PARTITION `p_anterieur` VALUES LESS THAN ('2024-2025'),
+  PARTITION `p_2024_2025` VALUES LESS THAN ('2025-2026'),
+  PARTITION `p_2025_2026` VALUES LESS THAN ('2026-2027'),
+  PARTITION `p_futur` VALUES LESS THAN (MAXVALUE)
+);
+
+-- --------------------------------------------------------
+-- surveillances
+-- --------------------------------------------------------
+
+ALTER TABLE `surveillances`
+  ADD COLUMN `annee_academique` varchar(10) COLLATE utf8mb4_unicode_ci DEFAULT NULL COMMENT 'copie de examens.annee_academique',
+  ADD COLUMN `semestre` tinyint DEFAULT NULL COMMENT 'copie de examens.semestre';
+
+-- Backfill depuis l'examen surveillé
+UPDATE `surveillances` s
+JOIN `examens` e ON e.id = s.examen_id
+SET s.annee_academique = e.annee_academique,
+    s.semestre = e.semestre
+WHERE s.annee_academique IS NULL;
+
+-- Surveillances orphelines (examen supprimé) : rangées dans p_anterieur
+UPDATE `surveillances`
+SET annee_academique = '', semestre = 0
+WHERE annee_academique IS NULL;
+
+ALTER TABLE `surveillances`
+  MODIFY `annee_academique` varchar(10) COLLATE utf8mb4_unicode_ci NOT NULL COMMENT 'copie de examens.annee_academique',
+  MODIFY `semestre` tinyint NOT NULL COMMENT 'copie de examens.semestre',
+  DROP PRIMARY KEY,
+  ADD PRIMARY KEY (`id`, `annee_academique`, `semestre`),
+  DROP INDEX `unique_surveillance`,
+  ADD UNIQUE KEY `unique_surveillance` (`examen_id`, `prof_id`, `annee_academique`, `semestre`);
+
+ALTER TABLE `surveillances`
+PARTITION BY RANGE COLUMNS(`annee_academique`)
+SUBPARTITION BY HASH(`semestre`) SUBPARTITIONS 2 (
+  PARTITION `p_anterieur` VALUES LESS THAN ('2024-2025'),
+  PARTITION `p_2024_2025` VALUES LESS THAN ('2025-2026'),
+  PARTITION `p_2025_2026` VALUES LESS THAN ('2026-2027'),
+  PARTITION `p_futur` VALUES LESS THAN (MAXVALUE)
+);
@@ -0,0 +1,12 @@
+-- Migration 003 : durée d'examen propre à chaque module
+--
+-- Le générateur (backend/generate_edt.py) place chaque examen sur une grille
+-- de 15 minutes et réserve la salle et le surveillant sur [début, début + durée).
+-- NULL = durée par défaut du générateur (EDT_DUREE_DEFAUT, 90 minutes).
+--
+-- Exemple : UPDATE modules SET duree_examen_minutes = 180 WHERE code = 'INF301';
+
+ALTER TABLE `modules`
+  ADD COLUMN `duree_examen_minutes` smallint UNSIGNED DEFAULT NULL
+    COMMENT 'Durée de l''examen en minutes (NULL = durée par défaut)'
+    AFTER `semestre`;
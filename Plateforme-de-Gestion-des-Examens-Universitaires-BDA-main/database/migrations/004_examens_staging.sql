@@ -0,0 +1,45 @@
+-- Migration 004 : plans générés en staging avant publication
+--
+-- Le générateur (backend/generate_edt.py, mode staging) écrit son plan dans
+-- `examens_staging` sous un identifiant de run, sans toucher aux tables lues
+-- par les étudiants. Les contrôles de conflits s'exécutent sur le staging
+-- (backend/staging.py) ; la publication remplace le planning du périmètre et
+-- copie le plan par INSERT ... SELECT dans UNE transaction courte : les
+-- lecteurs voient l'ancien planning jusqu'au COMMIT, puis le nouveau.
+--
+-- Le staging n'est pas partitionné : un run est lu et supprimé par sa clé.
+
+CREATE TABLE IF NOT EXISTS `runs_generation` (
+  `run_id` varchar(64) COLLATE utf8mb4_unicode_ci NOT NULL,
+  `annee_academique` varchar(10) COLLATE utf8mb4_unicode_ci NOT NULL COMMENT '2024-2025',
+  `semestre` tinyint NOT NULL COMMENT '1 ou 2',
+  `dept_id` int DEFAULT NULL COMMENT 'NULL = tous les départements',
+  `remplace` tinyint(1) NOT NULL DEFAULT '0' COMMENT '1 = la publication remplace le planning du périmètre',
+  `statut` enum('charge','valide','rejete','publie','abandonne') COLLATE utf8mb4_unicode_ci NOT NULL DEFAULT 'charge',
+  `nb_examens` int NOT NULL DEFAULT '0',
+  `conflits` int DEFAULT NULL COMMENT 'Conflits trouvés à la validation (NULL = non validé)',
+  `created_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  `publie_le` datetime DEFAULT NULL,
+  PRIMARY KEY (`run_id`),
+  KEY `idx_runs_annee_semestre_statut` (`annee_academique`, `semestre`, `statut`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS `examens_staging` (
+  `run_id` varchar(64) COLLATE utf8mb4_unicode_ci NOT NULL,
+  `ligne` int NOT NULL COMMENT 'Position dans le plan généré',
+  `module_id` int NOT NULL,
+  `prof_id` int NOT NULL,
+  `salle_id` int NOT NULL,
+  `groupe_id` int DEFAULT NULL,
+  `date_heure` datetime NOT NULL,
+  `duree_minutes` int NOT NULL DEFAULT '90',
+  `nb_etudiants` int NOT NULL DEFAULT '0',
+  `semestre` tinyint NOT NULL,
+  `annee_academique` varchar(10) COLLATE utf8mb4_unicode_ci NOT NULL,
+  `surveillant_id` int NOT NULL COMMENT 'Surveillant principal (surveillances.prof_id)',
+  `exam_date` date GENERATED ALWAYS AS (CAST(`date_heure` AS DATE)) STORED,
+  PRIMARY KEY (`run_id`, `ligne`),
+  KEY `idx_staging_salle_jour` (`run_id`, `salle_id`, `exam_date`),
+  KEY `idx_staging_surveillant_jour` (`run_id`, `surveillant_id`, `exam_date`),
+  KEY `idx_staging_groupe_module` (`run_id`, `groupe_id`, `module_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,14 @@
+-- Migration 005 : assistants des plans en staging
+--
+-- L'encadrement (backend/staffing.py) ajoute des surveillants assistants aux
+-- examens placés. En mode staging, ils sont déposés ici à côté du plan
+-- (examens_staging.surveillant_id reste le surveillant principal) et copiés
+-- dans `surveillances` (rôle 'assistant') par la même transaction de publication.
+
+CREATE TABLE IF NOT EXISTS `surveillances_staging` (
+  `run_id` varchar(64) COLLATE utf8mb4_unicode_ci NOT NULL,
+  `ligne` int NOT NULL COMMENT 'examens_staging.ligne',
+  `prof_id` int NOT NULL,
+  PRIMARY KEY (`run_id`, `ligne`, `prof_id`),
+  KEY `idx_surveillances_staging_prof` (`run_id`, `prof_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
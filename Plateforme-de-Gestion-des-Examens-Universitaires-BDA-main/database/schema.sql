@@ -200,6 +200,45 @@ CREATE TABLE IF NOT EXISTS `etudiants` (
   KEY `idx_matricule` (`matricule`)
 ) ENGINE=InnoDB AUTO_INCREMENT=13001 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+--
+-- Structure de la table `examens`
+-- (partitionnée par année académique / semestre, voir database/migrations)
+--
+
+DROP TABLE IF EXISTS `examens`;
+CREATE TABLE IF NOT EXISTS `examens` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `module_id` int NOT NULL,
+  `prof_id` int NOT NULL,
+  `salle_id` int NOT NULL,
+  `groupe_id` int DEFAULT NULL,
+  `date_heure` datetime NOT NULL,
+  `duree_minutes` int NOT NULL DEFAULT '90',
+  `nb_etudiants` int NOT NULL DEFAULT '0',
+  `semestre` tinyint NOT NULL COMMENT '1 ou 2',
+  `annee_academique` varchar(10) COLLATE utf8mb4_unicode_ci NOT NULL COMMENT '2024-2025',
+  `statut` enum('planifie','valide','approuve','en_cours','termine','annule') COLLATE utf8mb4_unicode_ci NOT NULL DEFAULT 'planifie',
+  `date_validation` datetime DEFAULT NULL,
+  `validateur_id` int DEFAULT NULL,
+  `created_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  `exam_date` date GENERATED ALWAYS AS (CAST(`date_heure` AS DATE)) STORED,
+  `slot_index` tinyint unsigned GENERATED ALWAYS AS (HOUR(`date_heure`) * 4 + MINUTE(`date_heure`) DIV 15) STORED,
+  PRIMARY KEY (`id`,`annee_academique`,`semestre`),
+  KEY `idx_examens_groupe_module_statut` (`groupe_id`,`module_id`,`statut`),
+  KEY `idx_examens_prof_statut_jour` (`prof_id`,`statut`,`exam_date`),
+  KEY `idx_examens_salle_date` (`salle_id`,`date_heure`),
+  KEY `idx_examens_statut_jour_creneau` (`statut`,`exam_date`,`slot_index`),
+  KEY `idx_examens_module` (`module_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+PARTITION BY RANGE COLUMNS(`annee_academique`)
+SUBPARTITION BY HASH(`semestre`) SUBPARTITIONS 2 (
+  PARTITION `p_anterieur` VALUES LESS THAN ('2024-2025'),
+  PARTITION `p_2024_2025` VALUES LESS THAN ('2025-2026'),
+  PARTITION `p_2025_2026` VALUES LESS THAN ('2026-2027'),
+  PARTITION `p_futur` VALUES LESS THAN (MAXVALUE)
+);
+
+
 
 --
 -- Structure de la table `formations`
@@ -292,6 +331,23 @@ CREATE TABLE IF NOT EXISTS `modules` (
   KEY `idx_formation` (`formation_id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=1515 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+--
+-- Structure de la table `periodes_examens`
+--
+
+DROP TABLE IF EXISTS `periodes_examens`;
+CREATE TABLE IF NOT EXISTS `periodes_examens` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `semestre` tinyint NOT NULL COMMENT '1 ou 2',
+  `annee_academique` varchar(10) COLLATE utf8mb4_unicode_ci NOT NULL COMMENT '2024-2025',
+  `date_debut` date NOT NULL,
+  `date_fin` date NOT NULL,
+  `created_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `unique_periode` (`annee_academique`,`semestre`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+
 
 
 - Structure de la table `professeurs`
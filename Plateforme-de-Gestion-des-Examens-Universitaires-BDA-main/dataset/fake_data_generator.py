@@ -7,11 +7,19 @@ Structure spéciale pour département INFO
    - 1 VICE-DOYEN (parmi les professeurs)
 """
 
+import sys
+from pathlib import Path
+
 import mysql.connector
 from faker import Faker
 import random
 from datetime import datetime, timedelta, date
 
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.migrations import MigrationRunner
+
 fake = Faker('fr_FR')
 Faker.seed(42)
 random.seed(42)
@@ -85,127 +93,14 @@ def get_connection():
     """Connexion à la base de données"""
     return mysql.connector.connect(**DB_CONFIG)
 
-def setup_database_schema(cursor):
-    """Vérifier et ajouter les colonnes manquantes + table chefs + colonnes Vice-Doyen"""
-    print("🔧 Vérification du schéma de la base...")
+def setup_database_schema(conn):
+    """Appliquer les migrations versionnées (database/migrations) au lieu de sonder information_schema"""
+    print("🔧 Mise à jour du schéma de la base...")
     
     try:
-        # Colonnes formations
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM information_schema.COLUMNS 
-            WHERE TABLE_SCHEMA = 'edt_examens' 
-            AND TABLE_NAME = 'formations' 
-            AND COLUMN_NAME = 'nb_groupes'
-        """)
-        if cursor.fetchone()[0] == 0:
-            cursor.execute("ALTER TABLE formations ADD COLUMN nb_groupes INT DEFAULT 1")
-            print("  ✅ Colonne nb_groupes ajoutée")
-        
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM information_schema.COLUMNS 
-            WHERE TABLE_SCHEMA = 'edt_examens' 
-            AND TABLE_NAME = 'formations' 
-            AND COLUMN_NAME = 'specialite'
-        """)
-        if cursor.fetchone()[0] == 0:
-            cursor.execute("ALTER TABLE formations ADD COLUMN specialite VARCHAR(100) DEFAULT NULL")
-            print("  ✅ Colonne specialite ajoutée")
-        
-        # Colonnes étudiants
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM information_schema.COLUMNS 
-            WHERE TABLE_SCHEMA = 'edt_examens' 
-            AND TABLE_NAME = 'etudiants' 
-            AND COLUMN_NAME = 'groupe_id'
-        """)
-        if cursor.fetchone()[0] == 0:
-            cursor.execute("ALTER TABLE etudiants ADD COLUMN groupe_id INT DEFAULT NULL")
-            print("  ✅ Colonne groupe_id ajoutée")
-        
-        # Colonnes pour chefs de département
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM information_schema.COLUMNS 
-            WHERE TABLE_SCHEMA = 'edt_examens' 
-            AND TABLE_NAME = 'professeurs' 
-            AND COLUMN_NAME = 'est_chef_dept'
-        """)
-        if cursor.fetchone()[0] == 0:
-            cursor.execute("ALTER TABLE professeurs ADD COLUMN est_chef_dept BOOLEAN DEFAULT FALSE")
-            print("  ✅ Colonne est_chef_dept ajoutée")
-        
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM information_schema.COLUMNS 
-            WHERE TABLE_SCHEMA = 'edt_examens' 
-            AND TABLE_NAME = 'professeurs' 
-            AND COLUMN_NAME = 'date_nomination'
-        """)
-        if cursor.fetchone()[0] == 0:
-            cursor.execute("ALTER TABLE professeurs ADD COLUMN date_nomination DATE DEFAULT NULL")
-            print("  ✅ Colonne date_nomination ajoutée")
-        
-        # 🔥 NOUVEAU: Colonnes pour Vice-Doyen
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM information_schema.COLUMNS 
-            WHERE TABLE_SCHEMA = 'edt_examens' 
-            AND TABLE_NAME = 'professeurs' 
-            AND COLUMN_NAME = 'est_vice_doyen'
-        """)
-        if cursor.fetchone()[0] == 0:
-            cursor.execute("ALTER TABLE professeurs ADD COLUMN est_vice_doyen BOOLEAN DEFAULT FALSE")
-            print("  ✅ Colonne est_vice_doyen ajoutée")
-        
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM information_schema.COLUMNS 
-            WHERE TABLE_SCHEMA = 'edt_examens' 
-            AND TABLE_NAME = 'professeurs' 
-            AND COLUMN_NAME = 'date_nomination_vd'
-        """)
-        if cursor.fetchone()[0] == 0:
-            cursor.execute("ALTER TABLE professeurs ADD COLUMN date_nomination_vd DATE DEFAULT NULL")
-            print("  ✅ Colonne date_nomination_vd ajoutée")
-        
-        # Table chefs_departement pour historique
-        cursor.execute("SHOW TABLES LIKE 'chefs_departement'")
-        if not cursor.fetchone():
-            cursor.execute("""
-                CREATE TABLE chefs_departement (
-                    id INT PRIMARY KEY AUTO_INCREMENT,
-                    dept_id INT NOT NULL,
-                    prof_id INT NOT NULL,
-                    date_debut DATE NOT NULL,
-                    date_fin DATE DEFAULT NULL,
-                    statut ENUM('actif', 'ancien') DEFAULT 'actif',
-                    FOREIGN KEY (dept_id) REFERENCES departements(id) ON DELETE CASCADE,
-                    FOREIGN KEY (prof_id) REFERENCES professeurs(id) ON DELETE CASCADE,
-                    INDEX idx_dept_actif (dept_id, statut)
-                )
-            """)
-            print("  ✅ Table chefs_departement créée")
-        
-        # 🔥 NOUVEAU: Table vice_doyens pour historique
-        cursor.execute("SHOW TABLES LIKE 'vice_doyens'")
-        if not cursor.fetchone():
-            cursor.execute("""
-                CREATE TABLE vice_doyens (
-                    id INT PRIMARY KEY AUTO_INCREMENT,
-                    prof_id INT NOT NULL,
-                    date_debut DATE NOT NULL,
-                    date_fin DATE DEFAULT NULL,
-                    statut ENUM('actif', 'ancien') DEFAULT 'actif',
-                    FOREIGN KEY (prof_id) REFERENCES professeurs(id) ON DELETE CASCADE,
-                    INDEX idx_statut (statut)
-                )
-            """)
-            print("  ✅ Table vice_doyens créée")
-        
-        print("✅ Schéma vérifié\n")
+        if MigrationRunner(connection=conn).migrate() is None:
+            print("⚠️  Erreur schéma: migration interrompue")
+        print()
     except Exception as e:
         print(f"⚠️  Erreur schéma: {e}")
 
@@ -691,7 +586,7 @@ def main():
     
     try:
         # 1. Setup schéma
-        setup_database_schema(cursor)
+        setup_database_schema(conn)
         conn.commit()
         
         # 2. Nettoyage
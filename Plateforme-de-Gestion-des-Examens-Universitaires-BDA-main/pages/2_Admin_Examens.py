@@ -9,12 +9,19 @@ from pathlib import Path
 from datetime import datetime, timedelta
 import pandas as pd
 import hashlib
+import time
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from backend.convocations import convocation_generator
 from backend.db_connection import db
 from backend.detect_conflicts import conflict_detector
 from backend.generate_edt import scheduler  # ✅ Utilise generate_edt.py
+from backend.jobs import ETATS_ACTIFS, job_runner
+from backend.staging import staging
+from backend.optimization import optimizer
+from backend.partitions import partition_manager
+from backend.simulation import simulator, scenarios_croises
 
 st.set_page_config(
     page_title="Admin Examens",
@@ -110,12 +117,14 @@ def get_schedule_stats(semestre=None):
     WHERE e.statut = 'planifie'
     """
     
+    params = []
     if semestre:
-        query += f" AND e.semestre = {semestre}"
+        query += " AND e.semestre = %s"
+        params.append(semestre)
     
     query += " GROUP BY e.semestre ORDER BY e.semestre"
     
-    result = db.execute_query(query)
+    result = db.execute_query(query, tuple(params))
     return result if result else []
 
 def get_modules_count_by_semestre():
@@ -139,6 +148,384 @@ def get_modules_count_by_semestre():
     """
     return db.execute_query(query)
 
+def afficher_effacement(semestre, annee_academique):
+    """Effacer un semestre en arrière-plan en suivant la progression lot par lot"""
+    job = scheduler.clear_schedule_in_background(semestre=semestre, annee_academique=annee_academique)
+    bar = st.progress(0, text=f"🗑️ Effacement planning S{semestre}...")
+    
+    while job['etat'] == 'en_cours':
+        if job['total']:
+            bar.progress(job['traites'] / job['total'], text=f"🗑️ {job['traites']}/{job['total']} examens effacés")
+        time.sleep(0.3)
+    bar.empty()
+    
+    resultat = job['resultat']
+    if job['etat'] == 'termine':
+        st.success(
+            f"✅ Planning S{semestre} effacé: {resultat['examens']} examens, "
+            f"{resultat['surveillances']} surveillances ({resultat['lots']} lots, {resultat['temps_execution']:.1f}s)"
+        )
+    else:
+        st.error(
+            f"❌ Erreur: {resultat.get('error')} — {resultat['examens']} examens "
+            f"déjà effacés, le lot en cours a été annulé"
+        )
+
+def afficher_convocations(semestre, annee_academique):
+    """Générer les convocations PDF en arrière-plan (reprise automatique après interruption)"""
+    job = convocation_generator.generate_in_background(annee_academique=annee_academique, semestre=semestre)
+    bar = st.progress(0, text=f"📄 Préparation des convocations S{semestre}...")
+    
+    while job['etat'] == 'en_cours':
+        if job['total']:
+            bar.progress(
+                min(job['traites'] / job['total'], 1.0),
+                text=f"📄 {job['traites']}/{job['total']} documents ({job['debit']:.0f} docs/s)"
+            )
+        time.sleep(0.5)
+    bar.empty()
+    
+    resultat = job['resultat']
+    if job['etat'] == 'termine':
+        deja_faits = f", {resultat['ignores']} déjà présents" if resultat['ignores'] else ""
+        st.success(
+            f"✅ {resultat['documents']} documents générés en {resultat['temps_execution']:.1f}s "
+            f"({resultat['docs_par_sec']} docs/s{deja_faits})"
+        )
+        for archive in resultat['archives']:
+            st.caption(f"📦 {archive}")
+    else:
+        st.error(
+            f"❌ Génération interrompue: {resultat.get('error')} — {resultat['documents']} documents "
+            f"déjà écrits, relancez pour reprendre"
+        )
+
+PHASES_GENERATION = {
+    'chargement': "📦 Chargement des données",
+    'effacement': "🗑️ Effacement du planning",
+    'phase1': "🔄 Placement des examens",
+    'retry': "🔁 Retry des échecs",
+    'encadrement': "👥 Affectation des assistants",
+    'equilibrage': "⚖️ Équilibrage des surveillances",
+    'sauvegarde': "💾 Sauvegarde"
+}
+
+ETATS_JOBS = {
+    'en_attente': "⏳ En attente",
+    'en_cours': "🔄 En cours",
+    'termine': "✅ Terminé",
+    'erreur': "❌ Erreur",
+    'annule': "⏹️ Annulé"
+}
+
+def _texte_progression(job):
+    texte = f"{job['libelle']} — {PHASES_GENERATION.get(job['phase'], job['phase'])}"
+    if job['total']:
+        texte += f": {job['traites']}/{job['total']}"
+    return texte
+
+def afficher_resultat_generation(result):
+    """Métriques d'une génération terminée"""
+    if result['success']:
+        st.success(f"✅ {result['message']}")
+        
+        stats = result['stats']
+        col_a, col_b, col_c = st.columns(3)
+        
+        with col_a:
+            st.metric("📝 Examens planifiés", stats['examens_planifies'])
+            st.metric("⏱️ Temps d'exécution", f"{stats['temps_execution']}s")
+        
+        with col_b:
+            st.metric("📚 Total modules", stats['modules_total'])
+            st.metric("🏫 Salles utilisées", stats['salles_utilisees'])
+        
+        with col_c:
+            st.metric("❌ Échecs", stats['examens_non_planifies'])
+            st.metric("✅ Taux de réussite", f"{stats['taux_reussite']}%")
+        
+        # Vérifier conflits
+        total_conflits = (stats.get('conflits_groupes', 0) + 
+                        stats.get('conflits_professeurs', 0) + 
+                        stats.get('conflits_salles', 0))
+        
+        if total_conflits == 0:
+            st.success("🎉 ZÉRO CONFLIT - Planning optimal!")
+        else:
+            st.warning(f"⚠️ {total_conflits} conflits détectés")
+        
+        # 👥 Assistants (surveillants supplémentaires des grandes salles)
+        encadrement = stats.get('encadrement')
+        if encadrement and encadrement['requis']:
+            st.caption(
+                f"👥 {encadrement['assistants']}/{encadrement['requis']} assistants affectés sur "
+                f"{encadrement['examens_renforces']} examens en {encadrement['temps']}s"
+            )
+            if encadrement['manquants']:
+                st.warning(f"⚠️ {encadrement['manquants']} postes d'assistant non pourvus "
+                           "(profs indisponibles ou à la limite de surveillances du jour)")
+        
+        # ⚖️ Équilibrage des charges de surveillance
+        equilibrage = stats.get('equilibrage')
+        if equilibrage:
+            avant, apres = equilibrage['avant'], equilibrage['apres']
+            st.caption(
+                f"⚖️ Équilibrage: écart max-min {avant['ecart']} → {apres['ecart']} "
+                f"(σ {avant['ecart_type']} → {apres['ecart_type']}, "
+                f"hors département {avant['hors_dept']} → {apres['hors_dept']}), "
+                f"{equilibrage['reaffectations']} réaffectations en {equilibrage['passes']} passe(s), "
+                f"{equilibrage['temps']}s"
+                + (" - dernière passe annulée (elle dégradait l'équilibre)" if equilibrage.get('passe_annulee') else "")
+            )
+        
+        # 📥 Dépôt en staging
+        depot = stats.get('publication')
+        if depot:
+            if depot['statut'] == 'publie':
+                publication = depot['publication']
+                st.caption(
+                    f"📤 Run {depot['run_id']} publié: {publication['supprimes']} examens remplacés par "
+                    f"{publication['examens']} en {publication['temps_execution']}s (une transaction)"
+                    if publication else f"📤 Run {depot['run_id']} déjà publié"
+                )
+            else:
+                st.info(f"📥 Run {depot['run_id']} en staging ({depot['statut']}): "
+                        f"conflits {depot['conflits']} — à publier ci-dessous")
+        
+        # 🎲 Qualité de chaque graine (multi-start)
+        if stats.get('essais'):
+            st.caption(
+                f"🏆 Graine retenue: {stats['graine']} | "
+                f"⚡ accélération x{stats['acceleration']} sur {len(stats['essais'])} essais"
+            )
+            df_essais = pd.DataFrame(stats['essais']).rename(columns={
+                'graine': 'Graine', 'planifies': 'Planifiés', 'equilibre': 'Équilibre (σ)',
+                'gaspillage': 'Places vides', 'domaines_vides': 'Domaines vides',
+                'temps': 'CPU (s)', 'gagnant': '🏆'
+            })
+            st.dataframe(df_essais, use_container_width=True, hide_index=True)
+    else:
+        st.error(f"❌ {result['message']}")
+
+def afficher_jobs():
+    """📋 Table des jobs de génération et reprise des générations interrompues"""
+    jobs = job_runner.liste()
+    actifs = {job['id'] for job in jobs if job['etat'] in ETATS_ACTIFS}
+    interrompus = [p for p in scheduler.points_de_reprise() if p['id'] not in actifs]
+    if not jobs and not interrompus:
+        return
+    
+    st.markdown("#### 📋 Jobs de génération")
+    
+    for job in jobs:
+        col_job, col_etat, col_btn = st.columns([3, 1, 1])
+        with col_job:
+            if job['etat'] == 'en_cours':
+                st.progress(min(job['traites'] / job['total'], 1.0) if job['total'] else 0,
+                            text=_texte_progression(job))
+            else:
+                st.markdown(f"**{job['libelle']}**")
+        with col_etat:
+            st.markdown(ETATS_JOBS.get(job['etat'], job['etat']))
+        with col_btn:
+            if job['etat'] in ETATS_ACTIFS and st.button("⏹️ Annuler", key=f"annuler_{job['id']}",
+                                                          use_container_width=True):
+                job_runner.annuler(job['id'])
+                st.rerun()
+        
+        if job['resultat'] and job['etat'] != 'annule':
+            with st.expander(f"Résultat: {job['libelle']}", expanded=job['etat'] == 'erreur'):
+                efface = job['resultat'].get('effacement')
+                if efface and efface['success']:
+                    st.caption(
+                        f"🗑️ Planning effacé: {efface['examens']} examens, "
+                        f"{efface['surveillances']} surveillances ({efface['lots']} lots)"
+                    )
+                afficher_resultat_generation(job['resultat'])
+    
+    # Résumé global
+    results = [job['resultat'] for job in jobs if job['etat'] == 'termine']
+    if len(results) > 1:
+        st.markdown("### 📊 Résumé Global")
+        
+        total_planifies = sum(r['stats']['examens_planifies'] for r in results)
+        total_examens = sum(r['stats']['examens_total'] for r in results)
+        total_temps = sum(r['stats']['temps_execution'] for r in results)
+        
+        col_res1, col_res2, col_res3 = st.columns(3)
+        
+        with col_res1:
+            st.metric("📝 Total examens", f"{total_planifies}/{total_examens}")
+        
+        with col_res2:
+            taux_global = (total_planifies / total_examens * 100) if total_examens > 0 else 0
+            st.metric("✅ Taux global", f"{taux_global:.1f}%")
+        
+        with col_res3:
+            st.metric("⏱️ Temps total", f"{total_temps:.1f}s")
+        
+        if taux_global == 100:
+            st.success("🎉 TOUS LES EXAMENS PLANIFIÉS AVEC SUCCÈS!")
+    
+    for point in interrompus:
+        col_job, col_btn = st.columns([3, 1])
+        with col_job:
+            st.warning(
+                f"⏸️ {point['id']} interrompu ({PHASES_GENERATION.get(point['phase'], point['phase'])}: "
+                f"{point['traites']}/{point['total']}) — point de reprise du {point['sauvegarde_le']:%d/%m %H:%M}"
+            )
+        with col_btn:
+            if st.button("▶️ Reprendre", key=f"reprendre_{point['id']}", use_container_width=True):
+                job_runner.reprendre(point['id'])
+                st.rerun()
+    
+    if len(actifs) < len(jobs):
+        if st.button("🧹 Retirer les jobs terminés"):
+            job_runner.purger()
+            st.rerun()
+        st.info("🔄 Rechargez la page pour voir les statistiques mises à jour")
+    
+    st.markdown("---")
+
+def afficher_staging(annee_academique):
+    """🧪 Plans en staging: publication ou abandon des runs non publiés"""
+    runs = staging.runs_en_attente(annee_academique)
+    if not runs:
+        return
+    
+    st.markdown("#### 🧪 Plans en staging")
+    
+    for run in runs:
+        col_run, col_pub, col_ab = st.columns([3, 1, 1])
+        with col_run:
+            perimetre = f"département {run['dept_id']}" if run['dept_id'] else "tous départements"
+            conflits = "non validé" if run['conflits'] is None else f"{run['conflits']} conflits"
+            st.markdown(
+                f"**{run['run_id']}** — S{run['semestre']}, {perimetre}, {run['nb_examens']} examens, "
+                f"{conflits} ({'remplace le planning' if run['remplace'] else 'ajout'})"
+            )
+        with col_pub:
+            forcer = run['statut'] == 'rejete'
+            if st.button("📤 Publier" + (" malgré les conflits" if forcer else ""),
+                         key=f"publier_{run['run_id']}", use_container_width=True):
+                resultat = staging.publier(run['run_id'], forcer=forcer)
+                if resultat['success']:
+                    st.success(f"✅ {resultat['examens']} examens publiés "
+                               f"({resultat['supprimes']} remplacés) en {resultat['temps_execution']}s")
+                else:
+                    st.error(f"❌ Publication impossible: {resultat['error']}")
+        with col_ab:
+            if st.button("🗑️ Abandonner", key=f"abandonner_{run['run_id']}", use_container_width=True):
+                staging.abandonner(run['run_id'])
+                st.rerun()
+    
+    st.markdown("---")
+
+def _valeurs(texte, conversion=int):
+    """'0, 5, 10' -> [0, 5, 10] (valeurs invalides ignorées)"""
+    valeurs = []
+    for morceau in texte.split(','):
+        try:
+            valeurs.append(conversion(morceau.strip()))
+        except ValueError:
+            continue
+    return valeurs
+
+def afficher_simulation():
+    """Simulations what-if du générateur: aucun examen n'est écrit en base"""
+    st.markdown("### 🧪 Simulation (aucune écriture en base)")
+    st.caption("Les données sont lues une fois puis chaque scénario est planifié en mémoire.")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        semestre = st.selectbox("Semestre", [1, 2], key='sim_semestre')
+    with col2:
+        departments = load_departments() or []
+        choix_dept = st.selectbox(
+            "Département", ["Tous les départements"] + [d['nom'] for d in departments], key='sim_dept'
+        )
+        dept_id = next((d['id'] for d in departments if d['nom'] == choix_dept), None)
+    with col3:
+        annee_academique = st.text_input("Année académique", value=partition_manager.annee_active(), key='sim_annee')
+        depuis_zero = st.checkbox(
+            "Replanifier depuis zéro", value=True, key='sim_zero',
+            help="Les examens déjà planifiés du périmètre sont replacés, comme après un effacement"
+        )
+    
+    st.markdown("#### 🔧 Valeurs à balayer (séparées par des virgules)")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        prolongations = _valeurs(st.text_input("📅 Jours ajoutés à la période", "0, 5, 10", key='sim_jours'))
+    with col2:
+        limites = _valeurs(st.text_input("👨‍🏫 Surveillances max / jour", "3", key='sim_limite'))
+    with col3:
+        pas = _valeurs(st.text_input("⏱️ Pas des créneaux (min)", "120", key='sim_pas'))
+    with col4:
+        amphis = _valeurs(st.text_input("🏛️ Amphis fictifs en plus", "0", key='sim_amphis'))
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        fins = _valeurs(st.text_input("🕗 Fin de journée", "20:00", key='sim_fin'), str)
+    with col2:
+        capacite_amphi = st.number_input("Capacité d'un amphi fictif", min_value=10, value=200, step=10, key='sim_cap')
+    
+    scenarios = scenarios_croises(
+        prolongation_jours=prolongations or [0],
+        max_surveillances_jour=limites or [3],
+        pas_minutes=pas or [120],
+        fin_journee=fins or ['20:00'],
+        amphis_en_plus=amphis or [0]
+    )
+    for scenario in scenarios:
+        nb_amphis = scenario.pop('amphis_en_plus')
+        if nb_amphis:
+            scenario['salles_en_plus'] = [{'type': 'amphi', 'capacite': int(capacite_amphi), 'nombre': nb_amphis}]
+    
+    st.caption(f"📋 {len(scenarios)} scénarios")
+    
+    if st.button("🧪 Lancer la simulation", type="primary", disabled=not scenarios):
+        with st.spinner("📦 Lecture des données..."):
+            base = simulator.charger(semestre, dept_id, annee_academique, depuis_zero)
+        if base is None:
+            st.error("❌ Impossible de charger les données")
+            return
+        with st.spinner(f"⏳ Simulation de {len(scenarios)} scénarios..."):
+            start = time.perf_counter()
+            st.session_state.sim_resultats = simulator.balayer(scenarios)
+            st.session_state.sim_duree = time.perf_counter() - start
+    
+    resultats = st.session_state.get('sim_resultats')
+    if not resultats:
+        return
+    
+    st.success(f"✅ {len(resultats)} scénarios simulés en {st.session_state.sim_duree:.1f}s")
+    df = pd.DataFrame([
+        {
+            'Scénario': r['nom'],
+            'Planifiés': r['stats']['examens_planifies'],
+            'Échecs': r['stats']['examens_non_planifies'],
+            'Taux (%)': r['stats']['taux_reussite'],
+            'Jours': r['stats']['jours'],
+            'Salles': r['stats']['salles_utilisees'],
+            'Surv. max': r['stats']['surveillance_max'],
+            'Équilibre (σ)': r['stats']['equilibre'],
+            'Places vides': r['stats']['gaspillage'],
+            'Temps (s)': r['stats']['temps_execution']
+        }
+        for r in resultats
+    ])
+    st.dataframe(df, use_container_width=True, hide_index=True)
+    st.bar_chart(df.set_index('Scénario')['Taux (%)'])
+    
+    choix = st.selectbox("📋 Plan d'un scénario", [r['nom'] for r in resultats], key='sim_plan')
+    if st.button("Afficher le plan", key='sim_plan_btn'):
+        scenario = next(r for r in resultats if r['nom'] == choix)
+        plan = simulator.simuler({**scenario['parametres'], 'nom': choix})
+        if plan and plan['plan']:
+            st.dataframe(pd.DataFrame(plan['plan']), use_container_width=True, hide_index=True)
+        else:
+            st.info("ℹ️ Aucun examen placé dans ce scénario")
+
 # ========== PAGE PRINCIPALE ==========
 def main():
     col_title, col_user = st.columns([3, 1])
@@ -209,7 +596,7 @@ def main():
     
     st.markdown("---")
     
-    tab1, tab2, tab3 = st.tabs(["🎯 Génération EDT", "🔍 Détection Conflits", "📊 Statistiques"])
+    tab1, tab2, tab3, tab4 = st.tabs(["🎯 Génération EDT", "🔍 Détection Conflits", "📊 Statistiques", "🧪 Simulation"])
     
     # TAB 1: Génération EDT PAR SEMESTRE
     with tab1:
@@ -283,6 +670,27 @@ def main():
                 help="Supprime tous les examens planifiés pour les semestres sélectionnés"
             )
             
+            mode_staging = st.checkbox(
+                "📥 Mode staging (publication atomique)",
+                value=False,
+                help="Le plan est écrit dans examens_staging puis validé; l'ancien planning reste "
+                     "consultable jusqu'à la publication, qui le remplace en une transaction"
+            )
+            
+            publier_auto = st.checkbox(
+                "📤 Publier automatiquement si aucun conflit",
+                value=True,
+                disabled=not mode_staging
+            )
+            
+            essais = st.number_input(
+                "🎲 Essais (multi-start)",
+                min_value=1, max_value=64, value=1,
+                help="Constructions indépendantes lancées en parallèle (une graine chacune); "
+                     "le meilleur plan (examens planifiés, puis équilibre des surveillances, "
+                     "puis places vides) est sauvegardé"
+            )
+            
             st.markdown("---")
             
             st.info(f"""
@@ -297,106 +705,39 @@ def main():
         
         st.markdown("---")
         
+        afficher_jobs()
+        afficher_staging(annee_academique)
+        
         # 🚀 BOUTONS DE GÉNÉRATION
         col_gen1, col_gen2, col_gen3 = st.columns([1, 1, 1])
         
         with col_gen1:
             if st.button("🚀 Générer les semestres sélectionnés", type="primary", use_container_width=True):
-                results = {}
+                # 📅 Partition de l'année (découpe de p_futur si elle n'existe pas encore)
+                try:
+                    partition_manager.ensure_year(annee_academique)
+                except ValueError as e:
+                    st.error(f"❌ {e}")
+                    st.stop()
                 
+                # 📋 Un job par semestre: la page rend la main, la table des jobs suit la progression
                 for semestre in semestres_to_generate:
-                    st.markdown(f"### 📅 Génération Semestre {semestre}")
-                    
-                    # Effacer si demandé
-                    if clear_existing:
-                        with st.spinner(f"🗑️ Effacement planning S{semestre}..."):
-                            scheduler.clear_schedule(dept_id=dept_id, semestre=semestre, annee_academique=annee_academique)
-                            st.success(f"✅ Planning S{semestre} effacé")
-                    
-                    # Générer
-                    with st.spinner(f"⏳ Génération S{semestre} en cours..."):
-                        progress_bar = st.progress(0)
-                        progress_bar.progress(25)
-                        
-                        result = scheduler.generate_schedule(
-                            semestre=semestre,
-                            dept_id=dept_id,
-                            annee_academique=annee_academique
-                        )
-                        
-                        progress_bar.progress(100)
-                    
-                    results[semestre] = result
-                    
-                    # Afficher résultats
-                    if result['success']:
-                        st.success(f"✅ {result['message']}")
-                        
-                        stats = result['stats']
-                        col_a, col_b, col_c = st.columns(3)
-                        
-                        with col_a:
-                            st.metric("📝 Examens planifiés", stats['examens_planifies'])
-                            st.metric("⏱️ Temps d'exécution", f"{stats['temps_execution']}s")
-                        
-                        with col_b:
-                            st.metric("📚 Total modules", stats['modules_total'])
-                            st.metric("🏫 Salles utilisées", stats['salles_utilisees'])
-                        
-                        with col_c:
-                            st.metric("❌ Échecs", stats['examens_non_planifies'])
-                            st.metric("✅ Taux de réussite", f"{stats['taux_reussite']}%")
-                        
-                        # Vérifier conflits
-                        total_conflits = (stats.get('conflits_groupes', 0) + 
-                                        stats.get('conflits_professeurs', 0) + 
-                                        stats.get('conflits_salles', 0))
-                        
-                        if total_conflits == 0:
-                            st.success("🎉 ZÉRO CONFLIT - Planning optimal!")
-                        else:
-                            st.warning(f"⚠️ {total_conflits} conflits détectés")
-                    else:
-                        st.error(f"❌ {result['message']}")
-                    
-                    st.markdown("---")
-                
-                # Résumé global
-                if len(results) > 1:
-                    st.markdown("### 📊 Résumé Global")
-                    
-                    total_planifies = sum(r['stats']['examens_planifies'] for r in results.values() if r['success'])
-                    total_examens = sum(r['stats']['examens_total'] for r in results.values() if r['success'])
-                    total_temps = sum(r['stats']['temps_execution'] for r in results.values() if r['success'])
-                    
-                    col_res1, col_res2, col_res3 = st.columns(3)
-                    
-                    with col_res1:
-                        st.metric("📝 Total examens", f"{total_planifies}/{total_examens}")
-                    
-                    with col_res2:
-                        taux_global = (total_planifies / total_examens * 100) if total_examens > 0 else 0
-                        st.metric("✅ Taux global", f"{taux_global:.1f}%")
-                    
-                    with col_res3:
-                        st.metric("⏱️ Temps total", f"{total_temps:.1f}s")
-                    
-                    if taux_global == 100:
-                        st.balloons()
-                        st.success("🎉 TOUS LES EXAMENS PLANIFIÉS AVEC SUCCÈS!")
-                
-                st.info("🔄 Rechargez la page pour voir les statistiques mises à jour")
+                    job_runner.generer(
+                        semestre=semestre,
+                        dept_id=dept_id,
+                        annee_academique=annee_academique,
+                        effacer=clear_existing,
+                        essais=int(essais),
+                        staging=mode_staging,
+                        publier=publier_auto
+                    )
+                st.rerun()
         
         with col_gen2:
             if st.button("🗑️ Effacer Semestre 1", use_container_width=True):
                 if st.session_state.get('confirm_delete_s1'):
-                    try:
-                        scheduler.clear_schedule(semestre=1, annee_academique=annee_academique)
-                        st.success("✅ Planning S1 effacé")
-                        st.session_state.confirm_delete_s1 = False
-                        st.rerun()
-                    except Exception as e:
-                        st.error(f"❌ Erreur: {e}")
+                    st.session_state.confirm_delete_s1 = False
+                    afficher_effacement(semestre=1, annee_academique=annee_academique)
                 else:
                     st.session_state.confirm_delete_s1 = True
                     st.warning("⚠️ Cliquez à nouveau pour confirmer")
@@ -404,16 +745,29 @@ def main():
         with col_gen3:
             if st.button("🗑️ Effacer Semestre 2", use_container_width=True):
                 if st.session_state.get('confirm_delete_s2'):
-                    try:
-                        scheduler.clear_schedule(semestre=2, annee_academique=annee_academique)
-                        st.success("✅ Planning S2 effacé")
-                        st.session_state.confirm_delete_s2 = False
-                        st.rerun()
-                    except Exception as e:
-                        st.error(f"❌ Erreur: {e}")
+                    st.session_state.confirm_delete_s2 = False
+                    afficher_effacement(semestre=2, annee_academique=annee_academique)
                 else:
                     st.session_state.confirm_delete_s2 = True
                     st.warning("⚠️ Cliquez à nouveau pour confirmer")
+        
+        st.markdown("---")
+        st.markdown("#### 📄 Convocations et feuilles de surveillance (PDF)")
+        
+        col_conv1, col_conv2 = st.columns([1, 2])
+        
+        with col_conv1:
+            semestre_convocations = st.selectbox(
+                "Semestre",
+                [1, 2],
+                format_func=lambda s: f"Semestre {s}",
+                key='semestre_convocations'
+            )
+        
+        with col_conv2:
+            st.caption("Une archive .zip par département; une génération interrompue reprend là où elle s'est arrêtée.")
+            if st.button("📄 Générer les convocations", use_container_width=True):
+                afficher_convocations(semestre_convocations, annee_academique)
     
     # TAB 2: Détection de conflits
     with tab2:
@@ -421,8 +775,8 @@ def main():
         
         if st.button("🔍 Analyser les conflits", type="primary"):
             with st.spinner("Analyse en cours..."):
-                conflicts = conflict_detector.detect_all_conflicts()
-                summary = conflict_detector.get_conflicts_summary()
+                conflicts = conflict_detector.detect_all_conflicts(annee_academique)
+                summary = conflict_detector.get_conflicts_summary(annee_academique)
             
             col1, col2, col3, col4 = st.columns(4)
             
@@ -465,6 +819,15 @@ def main():
                     if 'date_heure' in df_salle.columns:
                         df_salle['date_heure'] = pd.to_datetime(df_salle['date_heure']).dt.strftime('%d/%m/%Y %H:%M')
                     st.dataframe(df_salle, use_container_width=True, hide_index=True)
+                
+                st.markdown("---")
+                rapport = conflict_detector.export_conflicts(conflicts=conflicts)
+                st.download_button(
+                    f"📥 Télécharger le rapport ({rapport.rows} conflits)",
+                    rapport.read(),
+                    f"conflits_{annee_academique}.csv",
+                    rapport.mime
+                )
             else:
                 st.success("✅ Aucun conflit détecté!")
     
@@ -508,8 +871,51 @@ def main():
                     st.metric("👨‍🏫 Profs", stat_row['profs_mobilises'] or 0)
                 
                 st.markdown("---")
+        elif db.last_error:
+            st.error(f"❌ Statistiques indisponibles ({db.last_error['kind']}): {db.last_error['message']}")
         else:
             st.info("Aucun examen planifié")
+        
+        commits = optimizer.get_commit_stats()
+        st.caption(
+            f"💾 Commits depuis le démarrage: {commits['commits']} "
+            f"({commits['autocommit']} autocommit, {commits['transactions']} transactions, "
+            f"{commits['rollbacks']} rollbacks)"
+        )
+        
+        with st.expander("🛡️ Résilience de la base de données"):
+            resilience = optimizer.get_resilience_stats()
+            breaker = resilience['breaker']
+            
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                etat = {'ferme': '✅ Fermé', 'ouvert': '🔥 Ouvert', 'semi_ouvert': '⚠️ Semi-ouvert'}
+                st.metric("Disjoncteur", etat.get(breaker['state'], breaker['state']))
+            with col2:
+                st.metric("🔁 Nouvelles tentatives", resilience['total_retries'])
+            with col3:
+                st.metric("✅ Reprises réussies", resilience['recovered'])
+            with col4:
+                st.metric("⚡ Déclenchements", resilience['breaker_trips'], f"{resilience['breaker_rejected']} refus", delta_color="off")
+            
+            if resilience['errors']:
+                st.dataframe(
+                    pd.DataFrame([
+                        {'Classe': kind, 'Erreurs': nb, 'Tentatives': resilience['retries'].get(kind, 0)}
+                        for kind, nb in resilience['errors'].items()
+                    ]),
+                    use_container_width=True,
+                    hide_index=True
+                )
+    
+    # TAB 4: Simulation what-if
+    with tab4:
+        afficher_simulation()
+    
+    # 🔄 Rafraîchir la table des jobs tant qu'une génération est en attente ou en cours
+    if job_runner.liste(actifs=True):
+        time.sleep(2)
+        st.rerun()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -13,6 +13,7 @@ import pandas as pd
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from backend.db_connection import db
+from backend.ical import calendar_feeds
 
 st.set_page_config(
     page_title="Étudiant - EDT",
@@ -40,7 +41,7 @@ def load_student_schedule(matricule, semestre=None):
         m.credits,
         m.semestre as module_semestre,
         e.date_heure,
-        DATE(e.date_heure) as date_examen,
+        e.exam_date as date_examen,
         e.duree_minutes,
         s.nom as salle_nom,
         s.type as salle_type,
@@ -64,13 +65,17 @@ def load_student_schedule(matricule, semestre=None):
     WHERE et.matricule = %s
     """
     
+    params = [matricule]
+    
     # 🔥 FILTRE PAR SEMESTRE
+    # Valeur en paramètre (%s), pas dans le texte: les requêtes préparées de db sont réutilisées
     if semestre:
-        query += f" AND m.semestre = {semestre}"
+        query += " AND m.semestre = %s"
+        params.append(semestre)
     
     query += " ORDER BY e.date_heure, m.nom"
     
-    result = db.execute_query(query, (matricule,))
+    result = db.execute_query(query, tuple(params))
     return result if result else []
 
 def get_student_info(matricule):
@@ -115,7 +120,7 @@ def get_exam_stats(matricule, semestre=None):
         SUM(m.credits) as total_credits,
         MIN(e.date_heure) as premier_examen,
         MAX(e.date_heure) as dernier_examen,
-        COUNT(DISTINCT DATE(e.date_heure)) as nb_jours_examens
+        COUNT(DISTINCT e.exam_date) as nb_jours_examens
     FROM etudiants et
     JOIN inscriptions i ON et.id = i.etudiant_id
     JOIN modules m ON i.module_id = m.id
@@ -125,11 +130,14 @@ def get_exam_stats(matricule, semestre=None):
     WHERE et.matricule = %s
     """
     
+    params = [matricule]
+    
     # 🔥 FILTRE PAR SEMESTRE
     if semestre:
-        query += f" AND m.semestre = {semestre}"
+        query += " AND m.semestre = %s"
+        params.append(semestre)
     
-    result = db.execute_query(query, (matricule,))
+    result = db.execute_query(query, tuple(params))
     return result[0] if result else None
 
 def check_conflicts(matricule, semestre=None):
@@ -145,7 +153,7 @@ def check_conflicts(matricule, semestre=None):
     """
     query = """
     SELECT 
-        DATE(e.date_heure) as jour,
+        e.exam_date as jour,
         COUNT(DISTINCT e.id) as nb_examens,
         GROUP_CONCAT(
             DISTINCT CONCAT(TIME(e.date_heure), ' - ', m.nom)
@@ -161,17 +169,20 @@ def check_conflicts(matricule, semestre=None):
     WHERE et.matricule = %s
     """
     
+    params = [matricule]
+    
     # 🔥 FILTRE PAR SEMESTRE
     if semestre:
-        query += f" AND m.semestre = {semestre}"
+        query += " AND m.semestre = %s"
+        params.append(semestre)
     
     query += """
-    GROUP BY DATE(e.date_heure)
+    GROUP BY e.exam_date
     HAVING COUNT(DISTINCT e.id) > 1
     ORDER BY jour
     """
     
-    result = db.execute_query(query, (matricule,))
+    result = db.execute_query(query, tuple(params))
     return result if result else []
 
 def get_modules_by_semestre(matricule):
@@ -463,6 +474,20 @@ def main():
             file_name=f"emploi_temps_{matricule}_S{selected_semestre if selected_semestre else 'ALL'}.csv",
             mime="text/csv"
         )
+        
+        # 📆 Calendrier .ics (mis en cache, régénéré seulement si les examens changent)
+        flux = calendar_feeds.get_feed('etudiant', matricule)
+        if flux['body']:
+            st.download_button(
+                label="📆 Ajouter à mon calendrier (.ics)",
+                data=flux['body'],
+                file_name=f"examens_{matricule}.ics",
+                mime="text/calendar"
+            )
+        url_abonnement = calendar_feeds.feed_url('etudiant', matricule)
+        if url_abonnement:
+            st.caption("🔗 Abonnement (mis à jour automatiquement dans Google Calendar, Outlook...)")
+            st.code(url_abonnement, language=None)
     
     with tab2:
         st.markdown("#### 📅 Vue Calendrier")
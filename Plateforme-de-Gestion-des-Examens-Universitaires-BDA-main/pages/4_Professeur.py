@@ -12,6 +12,7 @@ from datetime import datetime
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from backend.db_connection import db
+from backend.ical import calendar_feeds
 
 st.set_page_config(
     page_title="Espace Professeur",
@@ -74,7 +75,7 @@ def login_page():
 # ========== FONCTIONS DE DONNÉES ==========
 
 def get_professor_surveillances(prof_id, dept_filter=None, date_debut=None, date_fin=None):
-    """Obtenir les surveillances d'un professeur avec filtres"""
+    """Obtenir les surveillances d'un professeur avec filtres (DataFrame, dates en datetime64)"""
     query = """
     SELECT 
         e.id as examen_id,
@@ -91,14 +92,16 @@ def get_professor_surveillances(prof_id, dept_filter=None, date_debut=None, date
         s.capacite as capacite_salle,
         g.nom as groupe,
         e.nb_etudiants,
-        e.duree_minutes
-    FROM examens e
+        e.duree_minutes,
+        sv.role
+    FROM surveillances sv
+    JOIN examens e ON e.id = sv.examen_id
     JOIN modules m ON e.module_id = m.id
     JOIN formations f ON m.formation_id = f.id
     JOIN departements d ON f.dept_id = d.id
     JOIN salles s ON e.salle_id = s.id
     LEFT JOIN groupes g ON e.groupe_id = g.id
-    WHERE e.prof_id = %s
+    WHERE sv.prof_id = %s
     AND e.statut = 'planifie'
     """
     
@@ -109,32 +112,33 @@ def get_professor_surveillances(prof_id, dept_filter=None, date_debut=None, date
         params.append(dept_filter)
     
     if date_debut:
-        query += " AND DATE(e.date_heure) >= %s"
+        query += " AND e.exam_date >= %s"
         params.append(date_debut)
     
     if date_fin:
-        query += " AND DATE(e.date_heure) <= %s"
+        query += " AND e.exam_date <= %s"
         params.append(date_fin)
     
     query += " ORDER BY e.date_heure"
     
-    return db.execute_query(query, tuple(params))
+    return db.query_df(query, tuple(params))
 
 def get_professor_stats(prof_id):
     """Statistiques globales du professeur"""
     query = """
     SELECT 
         COUNT(DISTINCT e.id) as total_surveillances,
-        COUNT(DISTINCT DATE(e.date_heure)) as nb_jours,
+        COUNT(DISTINCT e.exam_date) as nb_jours,
         COUNT(DISTINCT d.id) as nb_departements,
         MIN(e.date_heure) as premiere_surveillance,
         MAX(e.date_heure) as derniere_surveillance,
         SUM(e.nb_etudiants) as total_etudiants_surveilles
-    FROM examens e
+    FROM surveillances sv
+    JOIN examens e ON e.id = sv.examen_id
     JOIN modules m ON e.module_id = m.id
     JOIN formations f ON m.formation_id = f.id
     JOIN departements d ON f.dept_id = d.id
-    WHERE e.prof_id = %s AND e.statut = 'planifie'
+    WHERE sv.prof_id = %s AND e.statut = 'planifie'
     """
     result = db.execute_query(query, (prof_id,))
     return result[0] if result else None
@@ -146,12 +150,13 @@ def get_surveillances_by_department(prof_id):
         d.nom as departement,
         d.id as dept_id,
         COUNT(DISTINCT e.id) as nb_surveillances,
-        COUNT(DISTINCT DATE(e.date_heure)) as nb_jours
-    FROM examens e
+        COUNT(DISTINCT e.exam_date) as nb_jours
+    FROM surveillances sv
+    JOIN examens e ON e.id = sv.examen_id
     JOIN modules m ON e.module_id = m.id
     JOIN formations f ON m.formation_id = f.id
     JOIN departements d ON f.dept_id = d.id
-    WHERE e.prof_id = %s AND e.statut = 'planifie'
+    WHERE sv.prof_id = %s AND e.statut = 'planifie'
     GROUP BY d.id, d.nom
     ORDER BY nb_surveillances DESC
     """
@@ -161,13 +166,14 @@ def check_overload_days(prof_id):
     """Vérifier les jours de surcharge (>3 surveillances)"""
     query = """
     SELECT 
-        DATE(e.date_heure) as date,
+        e.exam_date as date,
         COUNT(DISTINCT e.id) as nb_surveillances,
         GROUP_CONCAT(DISTINCT m.nom ORDER BY e.date_heure SEPARATOR ' | ') as modules
-    FROM examens e
+    FROM surveillances sv
+    JOIN examens e ON e.id = sv.examen_id
     JOIN modules m ON e.module_id = m.id
-    WHERE e.prof_id = %s AND e.statut = 'planifie'
-    GROUP BY DATE(e.date_heure)
+    WHERE sv.prof_id = %s AND e.statut = 'planifie'
+    GROUP BY e.exam_date
     HAVING COUNT(DISTINCT e.id) > 3
     ORDER BY date
     """
@@ -308,36 +314,32 @@ def main_page():
         
         st.markdown("---")
         
-        surveillances = get_professor_surveillances(
+        df = get_professor_surveillances(
             prof_id, 
             dept_filter,
             date_debut,
             date_fin
         )
         
-        if surveillances:
-            df = pd.DataFrame(surveillances)
-            
-            # Formater les dates
-            df['date_heure'] = pd.to_datetime(df['date_heure'])
+        if df is not None and not df.empty:
+            # Formater les dates (colonnes déjà en datetime64)
             df['Date'] = df['date_heure'].dt.strftime('%d/%m/%Y')
             df['Jour'] = df['date_heure'].dt.day_name()
             df['Heure début'] = df['date_heure'].dt.strftime('%H:%M')
             
-            df['heure_fin'] = pd.to_datetime(df['heure_fin'])
             df['Heure fin'] = df['heure_fin'].dt.strftime('%H:%M')
             
             # Créer tableau d'affichage
             df_display = df[[
                 'Date', 'Jour', 'Heure début', 'Heure fin',
                 'module', 'formation', 'departement',
-                'salle', 'nb_etudiants'
+                'salle', 'nb_etudiants', 'role'
             ]].copy()
             
             df_display.columns = [
                 'Date', 'Jour', 'Début', 'Fin',
                 'Module', 'Formation', 'Département',
-                'Salle', 'Étudiants'
+                'Salle', 'Étudiants', 'Rôle'
             ]
             
             # Afficher le tableau
@@ -364,8 +366,24 @@ def main_page():
                     mime="text/csv"
                 )
             
+                
+                # 📆 Calendrier .ics (mis en cache, régénéré seulement si les surveillances changent)
+                flux = calendar_feeds.get_feed('professeur', prof_id)
+                if flux['body']:
+                    st.download_button(
+                        label="📆 Calendrier (.ics)",
+                        data=flux['body'],
+                        file_name=f"surveillances_{prof['nom']}_{prof['prenom']}.ics",
+                        mime="text/calendar"
+                    )
+            
             with col2:
-                st.info("💡 Vous pouvez importer ce fichier dans Google Calendar, Outlook, etc.")
+                url_abonnement = calendar_feeds.feed_url('professeur', prof_id)
+                if url_abonnement:
+                    st.info("💡 Abonnez votre agenda (Google Calendar, Outlook...) à cette adresse: il se met à jour tout seul.")
+                    st.code(url_abonnement, language=None)
+                else:
+                    st.info("💡 Vous pouvez importer ces fichiers dans Google Calendar, Outlook, etc.")
         
         else:
             st.warning("⚠️ Aucune surveillance trouvée avec ces filtres")
@@ -478,7 +496,10 @@ def main_page():
             FROM (
                 SELECT p.id, COUNT(DISTINCT e.id) as surv_count
                 FROM professeurs p
-                LEFT JOIN examens e ON p.id = e.prof_id AND e.statut = 'planifie'
+                LEFT JOIN (
+                    surveillances sv
+                    JOIN examens e ON e.id = sv.examen_id AND e.statut = 'planifie'
+                ) ON sv.prof_id = p.id
                 WHERE p.dept_id = %s
                 GROUP BY p.id
             ) as sub
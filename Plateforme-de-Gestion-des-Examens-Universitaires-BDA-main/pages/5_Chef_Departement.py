@@ -10,10 +10,15 @@ from pathlib import Path
 import pandas as pd
 from datetime import datetime
 import hashlib
+import time
+from contextlib import nullcontext
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from backend.db_connection import db
+from backend.export import exporter
+from backend.partitions import partition_manager
+from backend.resilience import run_transaction
 
 st.set_page_config(
     page_title="Espace Chef de Département",
@@ -97,38 +102,38 @@ def login_page():
 
 # ========== STATISTIQUES ==========
 
-def get_stats_departement(dept_id):
-    """Récupérer les statistiques du département"""
+def requetes_stats_departement(dept_id):
+    """Requêtes COUNT indépendantes des statistiques du département"""
+    return {
+        'formations': ("SELECT COUNT(*) as total FROM formations WHERE dept_id = %s", (dept_id,)),
+        'etudiants': ("""
+            SELECT COUNT(DISTINCT e.id) as total
+            FROM etudiants e
+            JOIN formations f ON e.formation_id = f.id
+            WHERE f.dept_id = %s
+        """, (dept_id,)),
+        'professeurs': ("SELECT COUNT(*) as total FROM professeurs WHERE dept_id = %s", (dept_id,)),
+        'examens': ("""
+            SELECT 
+                SUM(CASE WHEN e.statut = 'planifie' THEN 1 ELSE 0 END) as planifies,
+                SUM(CASE WHEN e.statut = 'valide' THEN 1 ELSE 0 END) as valides,
+                COUNT(*) as total
+            FROM examens e
+            JOIN modules m ON e.module_id = m.id
+            JOIN formations f ON m.formation_id = f.id
+            WHERE f.dept_id = %s
+        """, (dept_id,))
+    }
+
+def assembler_stats_departement(resultats):
+    """Statistiques du département à partir des résultats de requetes_stats_departement"""
     stats = {}
     
-    query = "SELECT COUNT(*) as total FROM formations WHERE dept_id = %s"
-    result = db.execute_query(query, (dept_id,))
-    stats['formations'] = result[0]['total'] if result else 0
-    
-    query = """
-    SELECT COUNT(DISTINCT e.id) as total
-    FROM etudiants e
-    JOIN formations f ON e.formation_id = f.id
-    WHERE f.dept_id = %s
-    """
-    result = db.execute_query(query, (dept_id,))
-    stats['etudiants'] = result[0]['total'] if result else 0
+    for key in ('formations', 'etudiants', 'professeurs'):
+        result = resultats.get(key)
+        stats[key] = result[0]['total'] if result else 0
     
-    query = "SELECT COUNT(*) as total FROM professeurs WHERE dept_id = %s"
-    result = db.execute_query(query, (dept_id,))
-    stats['professeurs'] = result[0]['total'] if result else 0
-    
-    query = """
-    SELECT 
-        SUM(CASE WHEN e.statut = 'planifie' THEN 1 ELSE 0 END) as planifies,
-        SUM(CASE WHEN e.statut = 'valide' THEN 1 ELSE 0 END) as valides,
-        COUNT(*) as total
-    FROM examens e
-    JOIN modules m ON e.module_id = m.id
-    JOIN formations f ON m.formation_id = f.id
-    WHERE f.dept_id = %s
-    """
-    result = db.execute_query(query, (dept_id,))
+    result = resultats.get('examens')
     if result and result[0]:
         stats['examens_planifies'] = result[0]['planifies'] or 0
         stats['examens_valides'] = result[0]['valides'] or 0
@@ -140,47 +145,59 @@ def get_stats_departement(dept_id):
     
     return stats
 
+def get_stats_departement(dept_id):
+    """Récupérer les statistiques du département (4 COUNT en parallèle)"""
+    return assembler_stats_departement(db.run_parallel(requetes_stats_departement(dept_id)))
+
+QUERY_SPECIALITE_ETUDIANTS = """
+SELECT 
+    COALESCE(f.specialite, 'Tronc commun') as specialite,
+    COUNT(DISTINCT e.id) as nb_etudiants,
+    COUNT(DISTINCT f.id) as nb_formations,
+    COUNT(DISTINCT ex.id) as nb_examens
+FROM formations f
+LEFT JOIN etudiants e ON f.id = e.formation_id
+LEFT JOIN modules m ON f.id = m.formation_id
+LEFT JOIN examens ex ON m.id = ex.module_id
+WHERE f.dept_id = %s
+GROUP BY COALESCE(f.specialite, 'Tronc commun')
+ORDER BY nb_etudiants DESC
+"""
+
+QUERY_SPECIALITE_PROFS = """
+SELECT 
+    COALESCE(p.specialite, 'Non spécifié') as specialite,
+    COUNT(DISTINCT p.id) as nb_professeurs,
+    COUNT(DISTINCT sv.examen_id) as nb_surveillances
+FROM professeurs p
+LEFT JOIN surveillances sv ON p.id = sv.prof_id
+LEFT JOIN examens e ON sv.examen_id = e.id
+LEFT JOIN modules m ON e.module_id = m.id
+LEFT JOIN formations f ON m.formation_id = f.id
+WHERE p.dept_id = %s AND (f.dept_id = %s OR f.dept_id IS NULL)
+GROUP BY COALESCE(p.specialite, 'Non spécifié')
+ORDER BY nb_professeurs DESC
+"""
+
 def get_stats_par_specialite_etudiants(dept_id):
     """Récupérer les statistiques par spécialité des étudiants"""
-    query = """
-    SELECT 
-        COALESCE(f.specialite, 'Tronc commun') as specialite,
-        COUNT(DISTINCT e.id) as nb_etudiants,
-        COUNT(DISTINCT f.id) as nb_formations,
-        COUNT(DISTINCT ex.id) as nb_examens
-    FROM formations f
-    LEFT JOIN etudiants e ON f.id = e.formation_id
-    LEFT JOIN modules m ON f.id = m.formation_id
-    LEFT JOIN examens ex ON m.id = ex.module_id
-    WHERE f.dept_id = %s
-    GROUP BY COALESCE(f.specialite, 'Tronc commun')
-    ORDER BY nb_etudiants DESC
-    """
-    return db.execute_query(query, (dept_id,))
+    return db.execute_query(QUERY_SPECIALITE_ETUDIANTS, (dept_id,))
 
 def get_stats_par_specialite_profs(dept_id):
     """Récupérer les statistiques par spécialité des professeurs"""
-    query = """
-    SELECT 
-        COALESCE(p.specialite, 'Non spécifié') as specialite,
-        COUNT(DISTINCT p.id) as nb_professeurs,
-        COUNT(DISTINCT sv.examen_id) as nb_surveillances
-    FROM professeurs p
-    LEFT JOIN surveillances sv ON p.id = sv.prof_id
-    LEFT JOIN examens e ON sv.examen_id = e.id
-    LEFT JOIN modules m ON e.module_id = m.id
-    LEFT JOIN formations f ON m.formation_id = f.id
-    WHERE p.dept_id = %s AND (f.dept_id = %s OR f.dept_id IS NULL)
-    GROUP BY COALESCE(p.specialite, 'Non spécifié')
-    ORDER BY nb_professeurs DESC
-    """
-    return db.execute_query(query, (dept_id, dept_id))
+    return db.execute_query(QUERY_SPECIALITE_PROFS, (dept_id, dept_id))
 
 def afficher_statistiques(dept_id):
     """Afficher les statistiques du département"""
     st.subheader("📊 Statistiques Globales du Département")
     
-    stats = get_stats_departement(dept_id)
+    # ⚡ Compteurs et statistiques par spécialité: un seul lot parallèle
+    queries = requetes_stats_departement(dept_id)
+    queries['specialites_etudiants'] = (QUERY_SPECIALITE_ETUDIANTS, (dept_id,))
+    queries['specialites_profs'] = (QUERY_SPECIALITE_PROFS, (dept_id, dept_id))
+    resultats = db.run_parallel(queries)
+    
+    stats = assembler_stats_departement(resultats)
     
     col1, col2, col3, col4, col5 = st.columns(5)
     
@@ -200,7 +217,7 @@ def afficher_statistiques(dept_id):
     st.markdown("---")
     
     st.subheader("🎓 Statistiques par Spécialité des Étudiants")
-    stats_specialites_etudiants = get_stats_par_specialite_etudiants(dept_id)
+    stats_specialites_etudiants = resultats['specialites_etudiants']
     
     if stats_specialites_etudiants:
         df_spec_etudiants = pd.DataFrame(stats_specialites_etudiants)
@@ -219,7 +236,7 @@ def afficher_statistiques(dept_id):
     
     st.markdown("---")
     st.subheader("🔬 Statistiques par Spécialité des Professeurs")
-    stats_specialites_profs = get_stats_par_specialite_profs(dept_id)
+    stats_specialites_profs = resultats['specialites_profs']
     
     if stats_specialites_profs:
         df_specialites = pd.DataFrame(stats_specialites_profs)
@@ -235,32 +252,63 @@ def afficher_statistiques(dept_id):
             st.bar_chart(df_specialites.set_index('Spécialité')['Surveillances'])
     else:
         st.info("Aucune donnée disponible")
+    
+    st.caption(f"⏱️ Statistiques chargées en {resultats.timings_summary()}")
 
 # ========== CONFLITS ==========
 
 def detecter_conflits(dept_id):
-    """Détecter les conflits du planning"""
+    """Détecter les conflits du planning (trois requêtes lourdes en parallèle)"""
     conflits = []
     
-    query = """
-    SELECT 
-        DATE(ex.date_heure) as jour, e.matricule,
-        CONCAT(e.prenom, ' ', e.nom) as etudiant,
-        f.nom as formation, g.nom as groupe,
-        COUNT(DISTINCT ex.id) as nb_examens,
-        GROUP_CONCAT(DISTINCT CONCAT(TIME(ex.date_heure), ' - ', m.nom) ORDER BY ex.date_heure SEPARATOR ' | ') as detail_examens
-    FROM etudiants e
-    JOIN formations f ON e.formation_id = f.id
-    JOIN groupes g ON e.groupe_id = g.id
-    JOIN inscriptions i ON e.id = i.etudiant_id
-    JOIN modules m ON i.module_id = m.id
-    JOIN examens ex ON m.id = ex.module_id AND ex.groupe_id = e.groupe_id
-    WHERE f.dept_id = %s AND ex.statut = 'planifie'
-    GROUP BY DATE(ex.date_heure), e.id, e.matricule, e.prenom, e.nom, f.nom, g.nom
-    HAVING COUNT(DISTINCT ex.id) > 1
-    ORDER BY jour, nb_examens DESC
-    """
-    result = db.execute_query(query, (dept_id,))
+    resultats = db.run_parallel({
+        'etudiants': ("""
+        SELECT 
+            ex.exam_date as jour, e.matricule,
+            CONCAT(e.prenom, ' ', e.nom) as etudiant,
+            f.nom as formation, g.nom as groupe,
+            COUNT(DISTINCT ex.id) as nb_examens,
+            GROUP_CONCAT(DISTINCT CONCAT(TIME(ex.date_heure), ' - ', m.nom) ORDER BY ex.date_heure SEPARATOR ' | ') as detail_examens
+        FROM etudiants e
+        JOIN formations f ON e.formation_id = f.id
+        JOIN groupes g ON e.groupe_id = g.id
+        JOIN inscriptions i ON e.id = i.etudiant_id
+        JOIN modules m ON i.module_id = m.id
+        JOIN examens ex ON m.id = ex.module_id AND ex.groupe_id = e.groupe_id
+        WHERE f.dept_id = %s AND ex.statut = 'planifie'
+        GROUP BY ex.exam_date, e.id, e.matricule, e.prenom, e.nom, f.nom, g.nom
+        HAVING COUNT(DISTINCT ex.id) > 1
+        ORDER BY jour, nb_examens DESC
+        """, (dept_id,)),
+        'professeurs': ("""
+        SELECT 
+            e.exam_date as jour,
+            CONCAT(p.prenom, ' ', p.nom) as professeur,
+            COUNT(DISTINCT sv.examen_id) as nb_surveillances,
+            GROUP_CONCAT(DISTINCT CONCAT(TIME(e.date_heure), ' - ', m.nom) ORDER BY e.date_heure SEPARATOR ' | ') as detail_surveillances
+        FROM surveillances sv
+        JOIN professeurs p ON sv.prof_id = p.id
+        JOIN examens e ON sv.examen_id = e.id
+        JOIN modules m ON e.module_id = m.id
+        JOIN formations f ON m.formation_id = f.id
+        WHERE p.dept_id = %s AND e.statut = 'planifie'
+        GROUP BY e.exam_date, p.id, p.prenom, p.nom
+        HAVING COUNT(DISTINCT sv.examen_id) > 3
+        ORDER BY jour, nb_surveillances DESC
+        """, (dept_id,)),
+        'salles': ("""
+        SELECT e.date_heure, s.nom as salle, s.capacite, e.nb_etudiants, m.nom as module, g.nom as groupe
+        FROM examens e
+        JOIN salles s ON e.salle_id = s.id
+        JOIN modules m ON e.module_id = m.id
+        JOIN formations f ON m.formation_id = f.id
+        LEFT JOIN groupes g ON e.groupe_id = g.id
+        WHERE f.dept_id = %s AND e.nb_etudiants > s.capacite AND e.statut = 'planifie'
+        ORDER BY (e.nb_etudiants - s.capacite) DESC
+        """, (dept_id,))
+    })
+    
+    result = resultats['etudiants']
     if result:
         for r in result:
             conflits.append({
@@ -270,23 +318,7 @@ def detecter_conflits(dept_id):
                 'gravite': 'Critique'
             })
     
-    query = """
-    SELECT 
-        DATE(e.date_heure) as jour,
-        CONCAT(p.prenom, ' ', p.nom) as professeur,
-        COUNT(DISTINCT sv.examen_id) as nb_surveillances,
-        GROUP_CONCAT(DISTINCT CONCAT(TIME(e.date_heure), ' - ', m.nom) ORDER BY e.date_heure SEPARATOR ' | ') as detail_surveillances
-    FROM surveillances sv
-    JOIN professeurs p ON sv.prof_id = p.id
-    JOIN examens e ON sv.examen_id = e.id
-    JOIN modules m ON e.module_id = m.id
-    JOIN formations f ON m.formation_id = f.id
-    WHERE p.dept_id = %s AND e.statut = 'planifie'
-    GROUP BY DATE(e.date_heure), p.id, p.prenom, p.nom
-    HAVING COUNT(DISTINCT sv.examen_id) > 3
-    ORDER BY jour, nb_surveillances DESC
-    """
-    result = db.execute_query(query, (dept_id,))
+    result = resultats['professeurs']
     if result:
         for r in result:
             conflits.append({
@@ -296,17 +328,7 @@ def detecter_conflits(dept_id):
                 'gravite': 'Moyen'
             })
     
-    query = """
-    SELECT e.date_heure, s.nom as salle, s.capacite, e.nb_etudiants, m.nom as module, g.nom as groupe
-    FROM examens e
-    JOIN salles s ON e.salle_id = s.id
-    JOIN modules m ON e.module_id = m.id
-    JOIN formations f ON m.formation_id = f.id
-    LEFT JOIN groupes g ON e.groupe_id = g.id
-    WHERE f.dept_id = %s AND e.nb_etudiants > s.capacite AND e.statut = 'planifie'
-    ORDER BY (e.nb_etudiants - s.capacite) DESC
-    """
-    result = db.execute_query(query, (dept_id,))
+    result = resultats['salles']
     if result:
         for r in result:
             depassement = r['nb_etudiants'] - r['capacite']
@@ -384,15 +406,14 @@ def afficher_examens_par_formation(dept_id):
     WHERE f.dept_id = %s
     ORDER BY f.nom, m.semestre, e.date_heure
     """
-    result = db.execute_query(query, (dept_id,))
+    # DataFrame construit par colonnes: formation, groupe, salle, statut en catégories
+    df = db.query_df(query, (dept_id,))
     
-    if not result:
+    if df is None or df.empty:
         st.warning("⚠️ Aucun examen trouvé pour ce département")
         return
     
-    df = pd.DataFrame(result)
-    
-    examen_ids = [r['examen_id'] for r in result]
+    examen_ids = df['examen_id'].tolist()
     if examen_ids:
         placeholders = ','.join(['%s'] * len(examen_ids))
         query_profs = f"""
@@ -458,7 +479,7 @@ def afficher_examens_par_formation(dept_id):
     with col2:
         st.metric("👨‍🎓 Total étudiants", int(df_filtered['nb_etudiants'].sum()))
     with col3:
-        dates_uniques = pd.to_datetime(df_filtered['date_heure']).dt.date.nunique()
+        dates_uniques = df_filtered['date_heure'].dt.date.nunique()
         st.metric("📅 Jours utilisés", dates_uniques)
     with col4:
         salles_uniques = df_filtered['salle'].nunique()
@@ -554,6 +575,9 @@ def afficher_validation(dept_id, chef_info):
                     resultat = valider_planning_departement(dept_id, chef_info)
                     
                     if resultat['success']:
+                        # Lecture de ses propres écritures: les affichages suivants de la session
+                        # (après st.rerun) lisent sur le primaire, un réplica peut être en retard
+                        st.session_state['lectures_primaire_jusqu_a'] = time.monotonic() + db.sticky_seconds
                         st.success(f"""
                         🎉 **Validation Réussie !**
                         
@@ -577,7 +601,6 @@ def afficher_validation(dept_id, chef_info):
                             taux_valid = (stats_apres['examens_valides'] / stats_apres['examens_total'] * 100) if stats_apres['examens_total'] > 0 else 0
                             st.metric("📊 Taux de Validation", f"{taux_valid:.1f}%")
                         
-                        import time
                         time.sleep(2)
                         st.rerun()
                     else:
@@ -585,24 +608,28 @@ def afficher_validation(dept_id, chef_info):
         
         with col_btn2:
             if st.button("📋 Exporter le Planning", use_container_width=True):
-                st.info("🚧 Fonctionnalité d'export en cours de développement")
+                with st.spinner("Export en cours..."):
+                    fichier = exporter.export_planning(partition_manager.annee_active(), dept_id=dept_id)
+                
+                if fichier:
+                    st.download_button(
+                        f"📥 Télécharger ({fichier.rows} examens)",
+                        fichier.read(),
+                        fichier.filename,
+                        fichier.mime,
+                        use_container_width=True
+                    )
+                else:
+                    st.error("❌ Export impossible, réessayez dans quelques instants")
 
 def valider_planning_departement(dept_id, chef_info):
-    """Valider le planning d'un département"""
-    try:
-        query_count = """
-        SELECT COUNT(*) as nb_examens
-        FROM examens e
-        JOIN modules m ON e.module_id = m.id
-        JOIN formations f ON m.formation_id = f.id
-        WHERE f.dept_id = %s AND e.statut = 'planifie'
-        """
-        result_count = db.execute_query(query_count, (dept_id,))
-        nb_examens = result_count[0]['nb_examens'] if result_count else 0
-        
-        if nb_examens == 0:
-            return {'success': False, 'message': 'Aucun examen à valider', 'nb_valides': 0}
-        
+    """
+    Valider le planning d'un département
+    
+    UPDATE des examens et INSERT du suivi dans une seule transaction
+    (tout ou rien, un seul COMMIT), rejouée en cas de deadlock.
+    """
+    def valider(tx):
         query_update = """
         UPDATE examens e
         JOIN modules m ON e.module_id = m.id
@@ -610,28 +637,22 @@ def valider_planning_departement(dept_id, chef_info):
         SET e.statut = 'valide', e.date_validation = NOW(), e.validateur_id = %s
         WHERE f.dept_id = %s AND e.statut = 'planifie'
         """
-        db.execute_query(query_update, (chef_info['id'], dept_id))
+        tx.execute(query_update, (chef_info['id'], dept_id))
+        nb_examens = tx.rowcount
         
-        query_create_table = """
-        CREATE TABLE IF NOT EXISTS validations_planning (
-            id INT PRIMARY KEY AUTO_INCREMENT,
-            dept_id INT NOT NULL,
-            chef_id INT NOT NULL,
-            date_validation DATETIME NOT NULL,
-            nb_examens_valides INT NOT NULL,
-            commentaire TEXT,
-            FOREIGN KEY (dept_id) REFERENCES departements(id),
-            FOREIGN KEY (chef_id) REFERENCES professeurs(id),
-            INDEX idx_dept_date (dept_id, date_validation)
-        )
-        """
-        db.execute_query(query_create_table)
+        if nb_examens > 0:
+            query_insert_validation = """
+            INSERT INTO validations_planning (dept_id, chef_id, date_validation, nb_examens_valides)
+            VALUES (%s, %s, NOW(), %s)
+            """
+            tx.execute(query_insert_validation, (dept_id, chef_info['id'], nb_examens))
+        return nb_examens
+    
+    try:
+        nb_examens = run_transaction(valider)
         
-        query_insert_validation = """
-        INSERT INTO validations_planning (dept_id, chef_id, date_validation, nb_examens_valides)
-        VALUES (%s, %s, NOW(), %s)
-        """
-        db.execute_query(query_insert_validation, (dept_id, chef_info['id'], nb_examens))
+        if nb_examens == 0:
+            return {'success': False, 'message': 'Aucun examen à valider', 'nb_valides': 0}
         
         return {
             'success': True,
@@ -669,17 +690,20 @@ def main_page():
     
     tabs = st.tabs(["📊 Statistiques", "⚠️ Conflits", "📚 Examens", "✅ Validation"])
     
-    with tabs[0]:
-        afficher_statistiques(dept_id)
-    
-    with tabs[1]:
-        afficher_conflits(dept_id)
-    
-    with tabs[2]:
-        afficher_examens_par_formation(dept_id)
-    
-    with tabs[3]:
-        afficher_validation(dept_id, chef)
+    # Juste après une validation: lectures sur le primaire (voir afficher_validation)
+    lectures_primaire = time.monotonic() < st.session_state.get('lectures_primaire_jusqu_a', 0)
+    with db.primary() if lectures_primaire else nullcontext():
+        with tabs[0]:
+            afficher_statistiques(dept_id)
+        
+        with tabs[1]:
+            afficher_conflits(dept_id)
+        
+        with tabs[2]:
+            afficher_examens_par_formation(dept_id)
+        
+        with tabs[3]:
+            afficher_validation(dept_id, chef)
 
 # ========== MAIN ==========
 
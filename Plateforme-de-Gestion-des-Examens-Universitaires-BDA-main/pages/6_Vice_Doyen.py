@@ -12,6 +12,9 @@ import hashlib
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from backend.db_connection import db
+from backend.async_db import async_db
+from backend.export import exporter
+from backend.partitions import partition_manager
 
 st.set_page_config(
     page_title="Espace Vice-Doyen",
@@ -115,116 +118,180 @@ def login_page():
                 """)
 
 # ========== FONCTIONS DE DONNÉES ==========
+# Requêtes indépendantes: exécutées en un seul lot parallèle par charger_tableau_de_bord
 
-def get_kpis_globaux():
-    """KPIs académiques globaux"""
-    query = """
-    SELECT 
-        (SELECT COUNT(*) FROM departements) as nb_departements,
-        (SELECT COUNT(*) FROM formations) as nb_formations,
-        (SELECT COUNT(*) FROM modules) as nb_modules,
-        (SELECT COUNT(*) FROM etudiants) as nb_etudiants,
-        (SELECT COUNT(*) FROM professeurs) as nb_professeurs,
-        (SELECT COUNT(*) FROM salles) as nb_salles,
-        (SELECT SUM(capacite) FROM salles) as capacite_totale,
-        (SELECT COUNT(*) FROM examens WHERE statut = 'planifie') as examens_planifies
-    """
-    result = db.execute_query(query)
+QUERY_KPIS = """
+SELECT 
+    (SELECT COUNT(*) FROM departements) as nb_departements,
+    (SELECT COUNT(*) FROM formations) as nb_formations,
+    (SELECT COUNT(*) FROM modules) as nb_modules,
+    (SELECT COUNT(*) FROM etudiants) as nb_etudiants,
+    (SELECT COUNT(*) FROM professeurs) as nb_professeurs,
+    (SELECT COUNT(*) FROM salles) as nb_salles,
+    (SELECT SUM(capacite) FROM salles) as capacite_totale,
+    (SELECT COUNT(*) FROM examens WHERE statut = 'planifie' AND annee_academique = %s) as examens_planifies
+"""
+
+QUERY_TAUX_OCCUPATION = """
+SELECT 
+    type,
+    COUNT(*) as total,
+    SUM(capacite) as capacite_totale,
+    COUNT(DISTINCT CASE WHEN id IN (
+        SELECT DISTINCT salle_id FROM examens WHERE statut IN ('planifie', 'valide') AND annee_academique = %s
+    ) THEN id END) as utilisees,
+    ROUND(
+        COUNT(DISTINCT CASE WHEN id IN (
+            SELECT DISTINCT salle_id FROM examens WHERE statut IN ('planifie', 'valide') AND annee_academique = %s
+        ) THEN id END) * 100.0 / COUNT(*), 
+        1
+    ) as taux_utilisation
+FROM salles
+GROUP BY type
+"""
+
+QUERY_HEURES_PROFS = """
+SELECT 
+    CONCAT(p.prenom, ' ', p.nom) as professeur,
+    d.code as departement,
+    COUNT(DISTINCT e.id) as nb_surveillances,
+    SUM(e.duree_minutes) / 60.0 as heures_totales
+FROM professeurs p
+LEFT JOIN (
+    surveillances sv
+    JOIN examens e ON e.id = sv.examen_id AND e.statut IN ('planifie', 'valide')
+        AND e.annee_academique = %s
+) ON sv.prof_id = p.id
+LEFT JOIN departements d ON p.dept_id = d.id
+GROUP BY p.id, p.prenom, p.nom, d.code
+HAVING COUNT(DISTINCT e.id) > 0
+ORDER BY heures_totales DESC
+LIMIT 20
+"""
+
+# Conflits étudiants d'un département
+QUERY_CONFLITS_ETU = """
+SELECT COUNT(*) as nb
+FROM (
+    SELECT ex.exam_date as jour, et.id
+    FROM etudiants et
+    JOIN formations f ON et.formation_id = f.id
+    JOIN groupes g ON et.groupe_id = g.id
+    JOIN inscriptions i ON et.id = i.etudiant_id
+    JOIN modules m ON i.module_id = m.id
+    JOIN examens ex ON m.id = ex.module_id 
+        AND ex.groupe_id = et.groupe_id
+    WHERE f.dept_id = %s AND ex.statut IN ('planifie', 'valide')
+      AND ex.annee_academique = %s
+    GROUP BY ex.exam_date, et.id
+    HAVING COUNT(DISTINCT ex.id) > 1
+) as conflicts
+"""
+
+# Conflits profs d'un département
+QUERY_CONFLITS_PROF = """
+SELECT COUNT(*) as nb
+FROM (
+    SELECT e.exam_date as jour, p.id
+    FROM surveillances sv
+    JOIN examens e ON e.id = sv.examen_id
+    JOIN professeurs p ON sv.prof_id = p.id
+    WHERE p.dept_id = %s AND e.statut IN ('planifie', 'valide')
+      AND e.annee_academique = %s
+    GROUP BY e.exam_date, p.id
+    HAVING COUNT(DISTINCT e.id) > 3
+) as conflicts
+"""
+
+# Total examens d'un département
+QUERY_TOTAL_EXAMENS = """
+SELECT COUNT(*) as total
+FROM examens e
+JOIN modules m ON e.module_id = m.id
+JOIN formations f ON m.formation_id = f.id
+WHERE f.dept_id = %s AND e.statut IN ('planifie', 'valide')
+  AND e.annee_academique = %s
+"""
+
+# 🔥 CORRIGÉ: Statut de validation par département ET par semestre
+QUERY_VALIDATION_STATUS = """
+SELECT 
+    d.nom as departement,
+    d.code,
+    COALESCE(e.semestre, 0) as semestre,
+    COUNT(CASE WHEN e.statut = 'planifie' THEN 1 END) as planifies,
+    COUNT(CASE WHEN e.statut = 'valide' THEN 1 END) as valides,
+    COUNT(e.id) as total
+FROM departements d
+JOIN formations f ON d.id = f.dept_id
+JOIN modules m ON f.id = m.formation_id
+JOIN examens e ON m.id = e.module_id
+WHERE e.statut IN ('planifie', 'valide')
+  AND e.annee_academique = %s
+GROUP BY d.id, d.nom, d.code, e.semestre
+HAVING total > 0
+ORDER BY d.nom, e.semestre
+"""
+
+# 🔥 NOUVEAU: Résumé de validation par département (tous semestres confondus)
+QUERY_VALIDATION_SUMMARY = """
+SELECT 
+    d.nom as departement,
+    d.code,
+    COUNT(CASE WHEN e.statut = 'planifie' THEN 1 END) as planifies,
+    COUNT(CASE WHEN e.statut = 'valide' THEN 1 END) as valides,
+    COUNT(e.id) as total,
+    ROUND(
+        COUNT(CASE WHEN e.statut = 'valide' THEN 1 END) * 100.0 / COUNT(e.id),
+        1
+    ) as taux_validation
+FROM departements d
+JOIN formations f ON d.id = f.dept_id
+JOIN modules m ON f.id = m.formation_id
+JOIN examens e ON m.id = e.module_id
+WHERE e.statut IN ('planifie', 'valide')
+  AND e.annee_academique = %s
+GROUP BY d.id, d.nom, d.code
+HAVING total > 0
+ORDER BY taux_validation ASC, d.nom
+"""
+
+def get_kpis_globaux(annee_academique):
+    """KPIs académiques globaux (examens de l'année: une seule partition lue)"""
+    result = db.execute_query(QUERY_KPIS, (annee_academique,))
     return result[0] if result else None
 
-def get_taux_occupation_global():
+def get_taux_occupation_global(annee_academique):
     """Taux d'occupation des amphis et salles"""
-    query = """
-    SELECT 
-        type,
-        COUNT(*) as total,
-        SUM(capacite) as capacite_totale,
-        COUNT(DISTINCT CASE WHEN id IN (
-            SELECT DISTINCT salle_id FROM examens WHERE statut IN ('planifie', 'valide')
-        ) THEN id END) as utilisees,
-        ROUND(
-            COUNT(DISTINCT CASE WHEN id IN (
-                SELECT DISTINCT salle_id FROM examens WHERE statut IN ('planifie', 'valide')
-            ) THEN id END) * 100.0 / COUNT(*), 
-            1
-        ) as taux_utilisation
-    FROM salles
-    GROUP BY type
-    """
-    return db.execute_query(query)
+    return db.execute_query(QUERY_TAUX_OCCUPATION, (annee_academique, annee_academique))
 
-def get_heures_profs():
+def get_heures_profs(annee_academique):
     """Heures de surveillance par professeur"""
-    query = """
-    SELECT 
-        CONCAT(p.prenom, ' ', p.nom) as professeur,
-        d.code as departement,
-        COUNT(DISTINCT e.id) as nb_surveillances,
-        SUM(e.duree_minutes) / 60.0 as heures_totales
-    FROM professeurs p
-    LEFT JOIN examens e ON p.id = e.prof_id AND e.statut IN ('planifie', 'valide')
-    LEFT JOIN departements d ON p.dept_id = d.id
-    GROUP BY p.id, p.prenom, p.nom, d.code
-    HAVING COUNT(DISTINCT e.id) > 0
-    ORDER BY heures_totales DESC
-    LIMIT 20
-    """
-    return db.execute_query(query)
+    return db.execute_query(QUERY_HEURES_PROFS, (annee_academique,))
 
-def get_conflits_par_departement():
-    """Taux de conflits par département"""
+def requetes_conflits(departements, annee_academique):
+    """Trois requêtes indépendantes par département (étudiants, profs, total)"""
+    queries = {}
+    for dept in departements:
+        dept_id = dept['id']
+        queries[f"conflits_etu_{dept_id}"] = (QUERY_CONFLITS_ETU, (dept_id, annee_academique))
+        queries[f"conflits_prof_{dept_id}"] = (QUERY_CONFLITS_PROF, (dept_id, annee_academique))
+        queries[f"total_{dept_id}"] = (QUERY_TOTAL_EXAMENS, (dept_id, annee_academique))
+    return queries
+
+def assembler_conflits(departements, resultats):
+    """Taux de conflits par département à partir des résultats de requetes_conflits"""
     conflits_data = []
     
-    query_depts = "SELECT id, nom, code FROM departements"
-    departements = db.execute_query(query_depts)
-    
     for dept in departements:
         dept_id = dept['id']
-        
-        # Conflits étudiants
-        query_etu = """
-        SELECT COUNT(*) as nb
-        FROM (
-            SELECT DATE(ex.date_heure) as jour, et.id
-            FROM etudiants et
-            JOIN formations f ON et.formation_id = f.id
-            JOIN groupes g ON et.groupe_id = g.id
-            JOIN inscriptions i ON et.id = i.etudiant_id
-            JOIN modules m ON i.module_id = m.id
-            JOIN examens ex ON m.id = ex.module_id 
-                AND ex.groupe_id = et.groupe_id
-            WHERE f.dept_id = %s AND ex.statut IN ('planifie', 'valide')
-            GROUP BY DATE(ex.date_heure), et.id
-            HAVING COUNT(DISTINCT ex.id) > 1
-        ) as conflicts
-        """
-        result_etu = db.execute_query(query_etu, (dept_id,))
+        result_etu = resultats.get(f"conflits_etu_{dept_id}")
         nb_conflits_etu = result_etu[0]['nb'] if result_etu else 0
         
-        # Conflits profs
-        query_prof = """
-        SELECT COUNT(*) as nb
-        FROM (
-            SELECT DATE(e.date_heure) as jour, p.id
-            FROM examens e
-            JOIN professeurs p ON e.prof_id = p.id
-            WHERE p.dept_id = %s AND e.statut IN ('planifie', 'valide')
-            GROUP BY DATE(e.date_heure), p.id
-            HAVING COUNT(DISTINCT e.id) > 3
-        ) as conflicts
-        """
-        result_prof = db.execute_query(query_prof, (dept_id,))
+        result_prof = resultats.get(f"conflits_prof_{dept_id}")
         nb_conflits_prof = result_prof[0]['nb'] if result_prof else 0
         
-        # Total examens
-        query_total = """
-        SELECT COUNT(*) as total
-        FROM examens e
-        JOIN modules m ON e.module_id = m.id
-        JOIN formations f ON m.formation_id = f.id
-        WHERE f.dept_id = %s AND e.statut IN ('planifie', 'valide')
-        """
-        result_total = db.execute_query(query_total, (dept_id,))
+        result_total = resultats.get(f"total_{dept_id}")
         total_examens = result_total[0]['total'] if result_total else 0
         
         total_conflits = nb_conflits_etu + nb_conflits_prof
@@ -240,54 +307,59 @@ def get_conflits_par_departement():
     
     return conflits_data
 
-def get_validation_status():
-    """
-    🔥 CORRIGÉ: Statut de validation par département ET par semestre
-    """
-    query = """
-    SELECT 
-        d.nom as departement,
-        d.code,
-        COALESCE(e.semestre, 0) as semestre,
-        COUNT(CASE WHEN e.statut = 'planifie' THEN 1 END) as planifies,
-        COUNT(CASE WHEN e.statut = 'valide' THEN 1 END) as valides,
-        COUNT(e.id) as total
-    FROM departements d
-    JOIN formations f ON d.id = f.dept_id
-    JOIN modules m ON f.id = m.formation_id
-    JOIN examens e ON m.id = e.module_id
-    WHERE e.statut IN ('planifie', 'valide')
-    GROUP BY d.id, d.nom, d.code, e.semestre
-    HAVING total > 0
-    ORDER BY d.nom, e.semestre
-    """
-    return db.execute_query(query)
+def get_conflits_par_departement(annee_academique):
+    """Taux de conflits par département"""
+    departements = db.execute_query("SELECT id, nom, code FROM departements") or []
+    resultats = async_db.run_concurrently(requetes_conflits(departements, annee_academique))
+    return assembler_conflits(departements, resultats)
 
-def get_validation_summary():
-    """
-    🔥 NOUVEAU: Résumé de validation par département (tous semestres confondus)
+def get_validation_status(annee_academique):
+    """Statut de validation par département ET par semestre"""
+    return db.execute_query(QUERY_VALIDATION_STATUS, (annee_academique,))
+
+def get_validation_summary(annee_academique):
+    """Résumé de validation par département (tous semestres confondus)"""
+    return db.execute_query(QUERY_VALIDATION_SUMMARY, (annee_academique,))
+
+def charger_tableau_de_bord(annee_academique):
     """
-    query = """
-    SELECT 
-        d.nom as departement,
-        d.code,
-        COUNT(CASE WHEN e.statut = 'planifie' THEN 1 END) as planifies,
-        COUNT(CASE WHEN e.statut = 'valide' THEN 1 END) as valides,
-        COUNT(e.id) as total,
-        ROUND(
-            COUNT(CASE WHEN e.statut = 'valide' THEN 1 END) * 100.0 / COUNT(e.id),
-            1
-        ) as taux_validation
-    FROM departements d
-    JOIN formations f ON d.id = f.dept_id
-    JOIN modules m ON f.id = m.formation_id
-    JOIN examens e ON m.id = e.module_id
-    WHERE e.statut IN ('planifie', 'valide')
-    GROUP BY d.id, d.nom, d.code
-    HAVING total > 0
-    ORDER BY taux_validation ASC, d.nom
+    ⚡ Charger toutes les données des onglets en un seul lot parallèle
+    
+    Les requêtes sont indépendantes: la page attend la plus lente
+    au lieu de leur somme (voir backend/async_db.py).
+    
+    Args:
+        annee_academique: Année affichée
+        
+    Returns:
+        dict: kpis, occupation, heures_profs, conflits, validation_status, validation_summary
     """
-    return db.execute_query(query)
+    departements = db.execute_query("SELECT id, nom, code FROM departements") or []
+    
+    queries = {
+        'kpis': (QUERY_KPIS, (annee_academique,)),
+        'occupation': (QUERY_TAUX_OCCUPATION, (annee_academique, annee_academique)),
+        'heures_profs': (QUERY_HEURES_PROFS, (annee_academique,)),
+        'validation_status': (QUERY_VALIDATION_STATUS, (annee_academique,)),
+        'validation_summary': (QUERY_VALIDATION_SUMMARY, (annee_academique,)),
+    }
+    queries.update(requetes_conflits(departements, annee_academique))
+    
+    resultats = async_db.run_concurrently(queries)
+    
+    # Requêtes en échec (None): à signaler plutôt qu'afficher des tableaux vides
+    echecs = [name for name, rows in resultats.items() if rows is None]
+    
+    return {
+        'kpis': resultats['kpis'][0] if resultats['kpis'] else None,
+        'occupation': resultats['occupation'],
+        'heures_profs': resultats['heures_profs'],
+        'conflits': assembler_conflits(departements, resultats),
+        'validation_status': resultats['validation_status'],
+        'validation_summary': resultats['validation_summary'],
+        'temps_ms': resultats.timings.get('total'),
+        'echecs': echecs
+    }
 
 # ========== GESTION PROFIL ==========
 
@@ -354,7 +426,16 @@ def main_page():
             st.session_state.clear()
             st.rerun()
     
+    # 📅 Les tableaux de bord ne portent que sur l'année active (élagage des partitions)
+    annee_academique = partition_manager.annee_active()
+    
+    # ⚡ Toutes les requêtes des onglets en un seul lot parallèle
+    donnees = charger_tableau_de_bord(annee_academique)
+    
     st.markdown("Pilotage et validation de la planification des examens")
+    st.caption(f"📅 Année académique: {annee_academique} | ⏱️ Données chargées en {donnees['temps_ms']:.0f} ms")
+    if donnees['echecs']:
+        st.warning(f"⚠️ {len(donnees['echecs'])} requête(s) en échec: certaines données sont incomplètes. Réessayez dans quelques instants.")
     st.markdown("---")
     
     # Onglets
@@ -371,7 +452,7 @@ def main_page():
         # ========== KPIs GLOBAUX ==========
         st.subheader("📊 Indicateurs Clés de Performance")
         
-        kpis = get_kpis_globaux()
+        kpis = donnees['kpis']
         
         if kpis:
             col1, col2, col3, col4 = st.columns(4)
@@ -413,7 +494,7 @@ def main_page():
         
         with col2:
             st.markdown("**⚠️ Conflits**")
-            conflits_dept = get_conflits_par_departement()
+            conflits_dept = donnees['conflits']
             if conflits_dept:
                 total_conflits = sum(c['conflits'] for c in conflits_dept)
                 if total_conflits == 0:
@@ -425,7 +506,7 @@ def main_page():
         
         with col3:
             st.markdown("**🏫 Ressources**")
-            occupation = get_taux_occupation_global()
+            occupation = donnees['occupation']
             if occupation:
                 df_occ = pd.DataFrame(occupation)
                 taux_occ = (df_occ['utilisees'].sum() / df_occ['total'].sum() * 100)
@@ -440,7 +521,7 @@ def main_page():
         # ========== OCCUPATION GLOBALE ==========
         st.subheader("🏫 Occupation Globale des Amphis et Salles")
         
-        occupation = get_taux_occupation_global()
+        occupation = donnees['occupation']
         
         if occupation:
             df_occ = pd.DataFrame(occupation)
@@ -478,7 +559,7 @@ def main_page():
         # ========== CONFLITS PAR DÉPARTEMENT ==========
         st.subheader("⚠️ Taux de Conflits par Département")
         
-        conflits_dept = get_conflits_par_departement()
+        conflits_dept = donnees['conflits']
         
         if conflits_dept:
             df_conflits = pd.DataFrame(conflits_dept)
@@ -511,7 +592,7 @@ def main_page():
         # ========== HEURES PROFESSEURS ==========
         st.subheader("👨‍🏫 Heures de Surveillance des Professeurs")
         
-        heures_profs = get_heures_profs()
+        heures_profs = donnees['heures_profs']
         
         if heures_profs:
             df_heures = pd.DataFrame(heures_profs)
@@ -553,7 +634,7 @@ def main_page():
         # 🔥 Résumé par département (tous semestres)
         st.markdown("### 📊 Résumé par Département")
         
-        validation_summary = get_validation_summary()
+        validation_summary = donnees['validation_summary']
         
         if validation_summary:
             df_summary = pd.DataFrame(validation_summary)
@@ -598,7 +679,7 @@ def main_page():
         # 🔥 Détail par département ET par semestre
         st.markdown("### 📅 Détail par Département et Semestre")
         
-        validation_status = get_validation_status()
+        validation_status = donnees['validation_status']
         
         if validation_status:
             df_val = pd.DataFrame(validation_status)
@@ -632,12 +713,42 @@ def main_page():
                 
                 if st.button("🏆 APPROUVER LE PLANNING GLOBAL", type="primary", use_container_width=True):
                     # Mettre à jour tous les examens validés en "approuvé"
-                    query = "UPDATE examens SET statut = 'approuve' WHERE statut = 'valide'"
-                    db.execute_query(query)
+                    query = "UPDATE examens SET statut = 'approuve' WHERE statut = 'valide' AND annee_academique = %s"
+                    db.execute_query(query, (annee_academique,))
                     st.success("✅ Planning global approuvé avec succès!")
                     st.balloons()
         else:
             st.info("ℹ️ Aucun examen planifié pour le moment")
+        
+        st.markdown("---")
+        
+        # 💾 Export en flux: lignes lues par lots, jamais chargées en entier
+        st.markdown("### 💾 Export du planning de la faculté")
+        
+        col_fmt, col_gz, col_btn = st.columns([2, 1, 2])
+        
+        with col_fmt:
+            formats = ['csv', 'xlsx'] if exporter.excel_available else ['csv']
+            format_export = st.radio("Format", formats, format_func=str.upper, horizontal=True)
+        
+        with col_gz:
+            compresser = st.checkbox("🗜️ gzip", value=True, disabled=format_export != 'csv')
+        
+        with col_btn:
+            if st.button("📦 Préparer l'export", use_container_width=True):
+                with st.spinner("Export en cours..."):
+                    fichier = exporter.export_planning(annee_academique, fmt=format_export, compress=compresser)
+                
+                if fichier:
+                    st.download_button(
+                        f"📥 Télécharger ({fichier.rows} examens, {fichier.size / 1024:.0f} Ko)",
+                        fichier.read(),
+                        fichier.filename,
+                        fichier.mime,
+                        use_container_width=True
+                    )
+                else:
+                    st.error("❌ Export impossible, réessayez dans quelques instants")
     
     with tabs[5]:
         afficher_profil(vice_doyen)
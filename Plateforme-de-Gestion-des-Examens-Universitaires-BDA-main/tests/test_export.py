@@ -0,0 +1,138 @@
+"""
+Export du planning en flux (backend/export.py)
+
+La base est un fichier SQLite: db.new_connection est remplacé par une
+connexion dont le curseur se comporte comme celui de mysql-connector
+(seuls les %s sont des paramètres, le reste du texte part tel quel) et
+DATE_FORMAT reproduit la fonction MySQL ('%%' y donne un '%' littéral).
+
+Usage:
+    python -m pytest tests/
+"""
+import csv
+import io
+import re
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.db_connection import db
+from backend.export import exporter
+
+# Spécificateurs DATE_FORMAT utilisés par le projet -> strftime
+FORMATS_MYSQL = {'d': '%d', 'm': '%m', 'Y': '%Y', 'H': '%H', 'i': '%M', 's': '%S'}
+
+
+def date_format(valeur, format_mysql):
+    """DATE_FORMAT MySQL: '%x' connu -> valeur, '%%' -> '%', '%x' inconnu -> 'x'"""
+    date = datetime.fromisoformat(valeur)
+    sortie = []
+    i = 0
+    while i < len(format_mysql):
+        c = format_mysql[i]
+        if c == '%' and i + 1 < len(format_mysql):
+            spec = format_mysql[i + 1]
+            sortie.append(date.strftime(FORMATS_MYSQL[spec]) if spec in FORMATS_MYSQL else spec)
+            i += 2
+        else:
+            sortie.append(c)
+            i += 1
+    return ''.join(sortie)
+
+
+class CurseurSQLite:
+    """Curseur mysql-connector (tuples, non bufferisé) au-dessus de sqlite3"""
+
+    def __init__(self, sqlite):
+        self.sqlite = sqlite
+        self._curseur = None
+        self.description = None
+
+    def execute(self, query, params=()):
+        # Dialecte MySQL -> SQLite (GROUP_CONCAT ... ORDER BY ... SEPARATOR)
+        query = re.sub(r"\s+ORDER BY [\w.]+ SEPARATOR ('[^']*')\)", r", \1)", query)
+        self._curseur = self.sqlite.execute(query.replace('%s', '?'), tuple(params))
+        self.description = self._curseur.description
+
+    def fetchmany(self, size):
+        return self._curseur.fetchmany(size)
+
+    def close(self):
+        pass
+
+
+class ConnexionSQLite:
+
+    def __init__(self, chemin):
+        self.sqlite = sqlite3.connect(chemin)
+        self.sqlite.create_function('DATE_FORMAT', 2, date_format)
+        self.sqlite.create_function('CONCAT', -1, lambda *parts: ''.join(str(p) for p in parts))
+
+    def cursor(self, **kwargs):
+        return CurseurSQLite(self.sqlite)
+
+    def close(self):
+        self.sqlite.close()
+
+
+class TestExportPlanning(unittest.TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dossier.cleanup)
+        self.chemin = str(Path(self.dossier.name) / 'edt.db')
+        with sqlite3.connect(self.chemin) as conn:
+            conn.executescript("""
+                CREATE TABLE departements (id INTEGER PRIMARY KEY, nom TEXT);
+                CREATE TABLE formations (id INTEGER PRIMARY KEY, nom TEXT, niveau TEXT, dept_id INTEGER);
+                CREATE TABLE modules (id INTEGER PRIMARY KEY, code TEXT, nom TEXT, semestre INTEGER,
+                                      formation_id INTEGER);
+                CREATE TABLE salles (id INTEGER PRIMARY KEY, nom TEXT);
+                CREATE TABLE groupes (id INTEGER PRIMARY KEY, nom TEXT);
+                CREATE TABLE professeurs (id INTEGER PRIMARY KEY, prenom TEXT, nom TEXT);
+                CREATE TABLE examens (id INTEGER PRIMARY KEY, module_id INTEGER, salle_id INTEGER,
+                                      groupe_id INTEGER, date_heure TEXT, duree_minutes INTEGER,
+                                      nb_etudiants INTEGER, statut TEXT, annee_academique TEXT,
+                                      semestre INTEGER);
+                CREATE TABLE surveillances (examen_id INTEGER, prof_id INTEGER);
+
+                INSERT INTO departements VALUES (1, 'Informatique');
+                INSERT INTO formations VALUES (1, 'Licence Info', 'L3', 1);
+                INSERT INTO modules VALUES (1, 'BDA', 'Bases de données avancées', 1, 1);
+                INSERT INTO salles VALUES (1, 'Amphi A');
+                INSERT INTO groupes VALUES (1, 'G1');
+                INSERT INTO professeurs VALUES (1, 'Amina', 'Benali'), (2, 'Karim', 'Zerrouki');
+                INSERT INTO examens VALUES (1, 1, 1, 1, '2025-01-13 08:30:00', 90, 40, 'planifie',
+                                            '2024-2025', 1);
+                INSERT INTO surveillances VALUES (1, 2), (1, 1);
+            """)
+        conn.close()
+
+        patch = mock.patch.object(db, 'new_connection', side_effect=lambda: ConnexionSQLite(self.chemin))
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_date_et_heure_exportees(self):
+        fichier = exporter.export_planning('2024-2025', dept_id=1, fmt='csv')
+        self.assertIsNotNone(fichier)
+        lignes = list(csv.DictReader(io.StringIO(fichier.read().decode('utf-8-sig'))))
+
+        self.assertEqual(len(lignes), 1)
+        self.assertEqual(lignes[0]['Date'], '13/01/2025')
+        self.assertEqual(lignes[0]['Heure'], '08:30')
+        # L'ordre (ORDER BY p.nom) n'est pas reproduit par le GROUP_CONCAT de SQLite
+        self.assertEqual(sorted(lignes[0]['Surveillants'].split(', ')), ['Amina Benali', 'Karim Zerrouki'])
+
+    def test_filtre_annee(self):
+        fichier = exporter.export_planning('2025-2026', fmt='csv')
+        self.assertEqual(fichier.rows, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
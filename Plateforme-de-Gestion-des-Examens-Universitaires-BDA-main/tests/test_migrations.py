@@ -0,0 +1,99 @@
+"""
+Application des migrations (backend/migrations.py)
+
+La connexion passée au MigrationRunner est un fichier SQLite dont le curseur
+se comporte comme un curseur mysql-connector bufferisé (tuples, with_rows,
+column_names). Les migrations sont écrites dans un dossier temporaire.
+
+Usage:
+    python -m pytest tests/
+"""
+import re
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.migrations import MigrationRunner
+
+
+class CurseurSQLite:
+    """Curseur mysql-connector (buffered=True) au-dessus de sqlite3"""
+
+    def __init__(self, sqlite):
+        self.sqlite = sqlite
+        self._lignes = []
+        self.with_rows = False
+        self.column_names = ()
+
+    def execute(self, query, params=()):
+        # Options de table MySQL (schema_migrations) ignorées par SQLite
+        query = re.sub(r"\)\s*ENGINE=.*$", ")", query.strip(), flags=re.S)
+        curseur = self.sqlite.execute(query.replace('%s', '?'), tuple(params))
+        self.with_rows = curseur.description is not None
+        self.column_names = tuple(d[0] for d in curseur.description or ())
+        self._lignes = curseur.fetchall()
+
+    def fetchall(self):
+        lignes, self._lignes = self._lignes, []
+        return lignes
+
+    def close(self):
+        pass
+
+
+class ConnexionSQLite:
+
+    def __init__(self, chemin):
+        self.sqlite = sqlite3.connect(chemin)
+
+    def cursor(self, **kwargs):
+        return CurseurSQLite(self.sqlite)
+
+    def commit(self):
+        self.sqlite.commit()
+
+
+class TestVerificationDesMigrations(unittest.TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dossier.cleanup)
+        self.migrations = Path(self.dossier.name) / 'migrations'
+        self.migrations.mkdir()
+        self.conn = ConnexionSQLite(str(Path(self.dossier.name) / 'base.db'))
+        self.addCleanup(self.conn.sqlite.close)
+        self.runner = MigrationRunner(connection=self.conn, migrations_dir=self.migrations)
+
+        self.ecrire('001_notes.sql', """
+            CREATE TABLE notes (id INTEGER PRIMARY KEY, valeur INTEGER);
+            INSERT INTO notes (valeur) VALUES (12), (25);
+        """)
+
+    def ecrire(self, nom, contenu):
+        (self.migrations / nom).write_text(contenu, encoding='utf-8')
+
+    def test_verification_reussie(self):
+        self.ecrire('002_verification.sql', """
+            -- Vérification
+            SELECT COUNT(*) AS lignes_incoherentes FROM notes WHERE valeur > 30;
+        """)
+        self.assertEqual(self.runner.migrate(), ['001', '002'])
+        self.assertIn('002', self.runner.applied_versions())
+
+    def test_verification_en_echec(self):
+        self.ecrire('002_verification.sql', """
+            -- Vérification
+            SELECT COUNT(*) AS lignes_incoherentes FROM notes WHERE valeur > 20;
+        """)
+        self.assertIsNone(self.runner.migrate())
+        # Non enregistrée: rejouée au prochain lancement
+        self.assertEqual(set(self.runner.applied_versions()), {'001'})
+        self.assertEqual([m['version'] for m in self.runner.pending()], ['002'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+"""
+Routage lecture/écriture de DatabaseConnection (réplicas de lecture)
+
+Le primaire et le réplica sont des fichiers SQLite: mysql.connector.connect
+est remplacé par une fabrique qui ouvre le fichier de l'hôte demandé. Le
+réplica contient une copie en retard (examen encore 'planifie') pour savoir
+quel hôte a répondu.
+
+Usage:
+    python -m pytest tests/
+    python -m unittest discover tests
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.db_connection import DatabaseConnection
+
+# Retard de réplication renvoyé par SHOW REPLICA STATUS (None = réplication arrêtée)
+AUCUN_STATUT = object()
+
+
+class CurseurSQLite:
+    """Curseur mysql-connector (dictionary=True) au-dessus de sqlite3"""
+
+    def __init__(self, connexion):
+        self.connexion = connexion
+        self.rowcount = -1
+        self._lignes = []
+
+    def execute(self, query, params=None):
+        if query.strip().upper().startswith(('SHOW REPLICA STATUS', 'SHOW SLAVE STATUS')):
+            retard = self.connexion.retard
+            self._lignes = [] if retard is AUCUN_STATUT else [{'Seconds_Behind_Source': retard}]
+            return
+        curseur = self.connexion.sqlite.execute(query.replace('%s', '?'), tuple(params or ()))
+        self.rowcount = curseur.rowcount
+        colonnes = [d[0] for d in curseur.description or ()]
+        self._lignes = [dict(zip(colonnes, ligne)) for ligne in curseur.fetchall()]
+
+    def fetchall(self):
+        lignes, self._lignes = self._lignes, []
+        return lignes
+
+    def fetchone(self):
+        return self._lignes.pop(0) if self._lignes else None
+
+    def close(self):
+        pass
+
+
+class ConnexionSQLite:
+    """Connexion mysql-connector minimale sur un fichier SQLite"""
+
+    def __init__(self, chemin, retard=AUCUN_STATUT):
+        self.sqlite = sqlite3.connect(chemin, check_same_thread=False, isolation_level=None)
+        self.retard = retard
+        self.ouverte = True
+
+    def is_connected(self):
+        return self.ouverte
+
+    def cursor(self, **kwargs):
+        return CurseurSQLite(self)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.ouverte = False
+        self.sqlite.close()
+
+
+class TestReadReplicas(unittest.TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.TemporaryDirectory()
+        self.fichiers = {}
+        for hote, statut in (('primaire', 'valide'), ('replica1', 'planifie')):
+            chemin = self.fichiers[hote] = os.path.join(self.dossier.name, f'{hote}.db')
+            with sqlite3.connect(chemin) as conn:
+                conn.execute("CREATE TABLE examens (id INTEGER PRIMARY KEY, statut TEXT)")
+                conn.execute("INSERT INTO examens VALUES (1, ?)", (statut,))
+        self.retard_replica = AUCUN_STATUT
+
+        def connect(host, **kwargs):
+            retard = self.retard_replica if host == 'replica1' else AUCUN_STATUT
+            return ConnexionSQLite(self.fichiers[host], retard)
+
+        patches = [
+            mock.patch('mysql.connector.connect', side_effect=connect),
+            mock.patch.dict(os.environ, {
+                'DB_HOST': 'primaire',
+                'DB_REPLICA_HOSTS': 'replica1:3307',
+                'DB_REPLICA_MAX_LAG': '5',
+                'DB_STICKY_SECONDS': '5',
+                'DB_PREPARED_CACHE': '0'
+            })
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(self.dossier.cleanup)
+
+        self.db = DatabaseConnection()
+        self.addCleanup(self.db.disconnect)
+
+    def lire_statut(self):
+        return self.db.execute_query("SELECT statut FROM examens WHERE id = %s", (1,))[0]['statut']
+
+    def lire_dans_un_autre_thread(self):
+        resultat = {}
+        thread = threading.Thread(target=lambda: resultat.update(statut=self.lire_statut()))
+        thread.start()
+        thread.join()
+        return resultat['statut']
+
+    def test_lecture_sur_replica(self):
+        self.assertEqual(self.lire_statut(), 'planifie')
+        self.assertEqual(self.db.read_routing['replica1:3307'], 1)
+
+    def test_ecriture_sur_primaire(self):
+        self.assertTrue(self.db.execute_query("UPDATE examens SET statut = %s WHERE id = %s", ('annule', 1)))
+        with sqlite3.connect(self.fichiers['primaire']) as conn:
+            self.assertEqual(conn.execute("SELECT statut FROM examens").fetchone()[0], 'annule')
+        with sqlite3.connect(self.fichiers['replica1']) as conn:
+            self.assertEqual(conn.execute("SELECT statut FROM examens").fetchone()[0], 'planifie')
+
+    def test_lecture_de_ses_ecritures_par_thread(self):
+        self.db.execute_query("UPDATE examens SET statut = %s WHERE id = %s", ('valide', 1))
+        # Le thread qui a écrit lit sur le primaire...
+        self.assertEqual(self.lire_statut(), 'valide')
+        # ...les autres sessions restent sur le réplica
+        self.assertEqual(self.lire_dans_un_autre_thread(), 'planifie')
+
+    def test_fenetre_collante_expiree(self):
+        self.db.sticky_seconds = 0
+        self.db.execute_query("UPDATE examens SET statut = %s WHERE id = %s", ('valide', 1))
+        self.assertEqual(self.lire_statut(), 'planifie')
+
+    def test_primary_force_le_primaire(self):
+        with self.db.primary():
+            self.assertEqual(self.lire_statut(), 'valide')
+        self.assertEqual(self.lire_statut(), 'planifie')
+
+    def test_connexion_dediee_sur_primaire(self):
+        with self.db.dedicated_connection():
+            self.assertEqual(self.lire_statut(), 'valide')
+        self.assertEqual(self.lire_statut(), 'planifie')
+
+    def test_replica_en_retard_ecarte(self):
+        self.retard_replica = 30
+        self.assertEqual(self.lire_statut(), 'valide')
+        self.assertFalse(self.db.replica_status()['replicas'][0]['healthy'])
+
+    def test_replication_arretee_ecartee(self):
+        self.retard_replica = None
+        self.assertEqual(self.lire_statut(), 'valide')
+        self.assertEqual(self.db.replica_status()['replicas'][0]['error'], 'réplication arrêtée')
+
+    def test_explain_est_une_lecture(self):
+        # partition_manager.explain_pruning parcourt les lignes du plan
+        plan = self.db.execute_query("EXPLAIN SELECT statut FROM examens WHERE id = %s", (1,))
+        self.assertIsInstance(plan, list)
+        self.assertTrue(plan)
+        self.assertEqual(self.db.read_routing['replica1:3307'], 1)
+
+    def test_replica_en_retard_tolere(self):
+        self.retard_replica = 2
+        self.assertEqual(self.lire_statut(), 'planifie')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Résilience des accès MySQL (backend/resilience.py, DatabaseConnection)
+
+Aucun serveur n'est nécessaire: mysql.connector.connect est remplacé par une
+fonction qui échoue comme un serveur injoignable.
+
+Usage:
+    python -m pytest tests/
+"""
+import os
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from mysql.connector import errors
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.db_connection import DatabaseConnection
+from backend.resilience import GONE_AWAY, LOCK_WAIT, CircuitBreaker, QueryFailedError, require
+
+
+def serveur_injoignable(**kwargs):
+    raise errors.InterfaceError(msg="Can't connect to MySQL server", errno=2003)
+
+
+class TestDerniereErreur(unittest.TestCase):
+
+    def setUp(self):
+        patches = [
+            mock.patch('mysql.connector.connect', side_effect=serveur_injoignable),
+            mock.patch.dict(os.environ, {'DB_RETRY_ATTEMPTS': '1', 'DB_REPLICA_HOSTS': ''})
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.db = DatabaseConnection()
+
+    def test_echec_de_connexion_non_compte_comme_succes(self):
+        self.assertIsNone(self.db.execute_query("SELECT 1"))
+        self.assertEqual(self.db.last_error['kind'], 'connexion')
+        self.assertEqual(self.db.breaker.failures, 1)
+
+    def test_derniere_erreur_propre_au_thread(self):
+        self.db.execute_query("SELECT 1")
+        autre = {}
+        thread = threading.Thread(target=lambda: autre.update(erreur=self.db.last_error))
+        thread.start()
+        thread.join()
+
+        self.assertIsNone(autre['erreur'])
+        self.assertEqual(self.db.last_error['errno'], 2003)
+        # Le suivi global (page de monitoring) garde la dernière erreur toutes sessions confondues
+        self.assertEqual(self.db.resilience.snapshot()['last_error']['errno'], 2003)
+
+    def test_remise_a_zero_d_un_autre_thread_sans_effet(self):
+        # Un autre thread qui démarre un appel remet sa propre erreur à None, pas la nôtre
+        thread = threading.Thread(target=lambda: setattr(self.db, 'last_error', None))
+        self.db.execute_query("SELECT 1")
+        thread.start()
+        thread.join()
+        self.assertIsNotNone(self.db.last_error)
+
+    def test_require_leve_sur_lecture_en_echec(self):
+        with mock.patch('backend.db_connection.db', self.db):
+            with self.assertRaises(QueryFailedError) as ctx:
+                require(self.db.execute_query("SELECT 1"), "salles")
+        self.assertEqual(ctx.exception.kind, 'connexion')
+        self.assertIn("salles", str(ctx.exception))
+
+    def test_require_laisse_passer_un_resultat_vide(self):
+        self.assertEqual(require([], "salles"), [])
+
+
+class TestDisjoncteur(unittest.TestCase):
+
+    def test_lock_wait_n_ouvre_pas_le_disjoncteur(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+        for _ in range(10):
+            breaker.record_failure(LOCK_WAIT)
+        self.assertEqual(breaker.status()['state'], CircuitBreaker.FERME)
+
+    def test_connexions_perdues_ouvrent_le_disjoncteur(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+        for _ in range(3):
+            breaker.record_failure(GONE_AWAY)
+        self.assertTrue(breaker.is_open)
+
+
+if __name__ == '__main__':
+    unittest.main()